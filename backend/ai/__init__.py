@@ -1,14 +1,143 @@
 """
 AI components for AI Agent Galaxy.
 Contains agents, environment setup, and game execution logic.
+
+Importing this package is cheap: torch, cv2, gymnasium and minigrid are only
+imported on first use, so auth- and admin-only processes (and scripts) never
+pay for them. The web app talks to it through three calls:
+- init_ai(app): register with the app (imports nothing heavy)
+- run_episode(agent_type, gif_path, seed=None): play one episode, loading on
+  first use (a seed replays the same maze, as tournament rounds need)
+- warm_up(environments): load models and build environments now, e.g. in a
+  prefork master (wsgi.py) or when AI_PRELOAD is set
+With INFERENCE_SOCKET set, actions come from the inference daemon
+(ai/inference_server.py) and torch is never imported here. With
+MAZE_BANK_PATH set, environments reset from pre-generated layouts
+(ai/maze_bank.py); a seed then picks the layout.
+The submodule names below stay importable as attributes and load on access.
 """
+import importlib
+import os
+import sys
+
+_LAZY_EXPORTS = {
+    'setup_environment': 'environment',
+    'preprocess_state': 'environment',
+    'EnvironmentPool': 'environment',
+    'environment_pool': 'environment',
+    'MazeBank': 'maze_bank',
+    'MazeBankWrapper': 'maze_bank',
+    'ReplayRenderer': 'replay_renderer',
+    'StepLog': 'step_log',
+    'ModelRegistry': 'model_registry',
+    'model_registry': 'model_registry',
+    'video_of_one_DDQN_episode': 'game_runner',
+    'video_of_one_D3QN_episode': 'game_runner',
+}
+
+__all__ = ['init_ai', 'run_episode', 'warm_up', 'is_loaded'] + list(_LAZY_EXPORTS)
+
+_app = None
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def init_ai(app):
+    """Register the AI subsystem with the app without importing it."""
+    global _app
+    _app = app
+    app.extensions['ai'] = sys.modules[__name__]
+    if app.config.get('AI_PRELOAD', False):
+        warm_up()
+
+
+def _config():
+    if _app is not None:
+        return _app.config
+    from flask import current_app
+    return current_app.config
+
+
+def _runtime():
+    """Import the environment stack and point the inference client at the daemon."""
+    from .environment import environment_pool
+    from .inference import inference_client
+
+    config = _config()
+    if inference_client.socket_path is None and config.get('INFERENCE_SOCKET'):
+        inference_client.configure(config['INFERENCE_SOCKET'], config['INFERENCE_TIMEOUT'],
+                                   config['INFERENCE_RETRY_SECONDS'])
+    if environment_pool.maze_bank is None and config.get('MAZE_BANK_PATH'):
+        environment_pool.use_maze_bank(str(config['MAZE_BANK_PATH']))
+    return inference_client, environment_pool
+
+
+def _local_registry():
+    """The in-process model registry (imports torch)."""
+    from .model_registry import model_registry
+
+    if model_registry.model_folder is None:
+        model_registry.model_folder = str(_config()['MODEL_FOLDER'])
+    return model_registry
+
+
+def _model_path(agent_type):
+    from .inference import MODEL_FILES
+    return os.path.join(str(_config()['MODEL_FOLDER']), MODEL_FILES[agent_type])
+
+
+def run_episode(agent_type, gif_path, seed=None):
+    """Run one episode of agent_type, writing its replay to gif_path.
+
+    Returns the game runner's result tuple. Each call leases its own
+    environment, so concurrent requests never share one. With a seed the
+    maze (and, the policies being greedy, the whole episode) is reproducible.
+    """
+    from .game_runner import video_of_one_DDQN_episode, video_of_one_D3QN_episode
+
+    _, pool = _runtime()
+    runner = video_of_one_DDQN_episode if agent_type == 'ddqn' else video_of_one_D3QN_episode
+    with pool.lease() as env:
+        try:
+            return runner(env, _model_path(agent_type), gif_path, seed=seed,
+                          tile_size=_config().get('REPLAY_TILE_SIZE'))
+        finally:
+            if seed is not None:
+                # Reseed from entropy so later games on this pooled env do not
+                # follow a maze sequence derived from a published seed
+                env.reset(seed=int.from_bytes(os.urandom(4), 'little'))
+
+
+def warm_up(environments=1):
+    """Make the policies ready and build `environments` environments ahead of use.
+
+    With the inference daemon configured and reachable nothing is loaded
+    here (this process stays torch-free); otherwise the weights are loaded
+    in-process. Returns the agent types that are ready.
+    """
+    from exceptions import InferenceUnavailable
+
+    importlib.import_module('.game_runner', __name__)
+    client, pool = _runtime()
+    loaded = None
+    if client.enabled:
+        try:
+            loaded = client.ping()['agents']
+        except InferenceUnavailable:
+            loaded = None
+    if loaded is None:
+        loaded = _local_registry().preload()
+    pool.prefill(environments)
+    return loaded
 
-from .environment import setup_environment, preprocess_state
-from .game_runner import video_of_one_DDQN_episode, video_of_one_D3QN_episode
 
-__all__ = [
-    'setup_environment', 
-    'preprocess_state', 
-    'video_of_one_DDQN_episode', 
-    'video_of_one_D3QN_episode'
-]
\ No newline at end of file
+def is_loaded():
+    """True once the heavy AI modules have been imported in this process."""
+    return f'{__name__}.game_runner' in sys.modules or f'{__name__}.model_registry' in sys.modules
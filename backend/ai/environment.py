@@ -3,6 +3,11 @@
 MiniGrid environment setup for AI Agent Galaxy.
 Extracted from original app.py - handles environment creation and preprocessing.
 """
+import os
+import threading
+from contextlib import contextmanager
+from functools import partial
+
 import cv2
 import numpy as np
 import gymnasium as gym
@@ -17,10 +22,83 @@ def preprocess_state(state):
     return state.astype(np.float32)
 
 
-def setup_environment():
-    """Create and configure MiniGrid environment."""
+def setup_environment(maze_bank=None):
+    """Create and configure MiniGrid environment (resetting from maze_bank when given)."""
     ENV_NAME = "MiniGrid-MultiRoom-N6-v0"
     env = gym.make(ENV_NAME, render_mode="rgb_array", highlight=False)
     env = RGBImgPartialObsWrapper(env)
     env = ImgObsWrapper(env)
-    return env
\ No newline at end of file
+    if maze_bank is not None:
+        from .maze_bank import MazeBankWrapper
+        env = MazeBankWrapper(env, maze_bank)
+    return env
+
+
+class EnvironmentPool:
+    """Hands out one environment per concurrent episode.
+
+    Environments hold per-episode state and are not thread-safe, so each
+    request leases its own. prefill() builds them up front (in the master
+    process under a prefork server); extra ones are created on demand.
+
+    An environment's RNG picks every unseeded maze. Forked workers would
+    all inherit the master's RNG state and play the same maze sequence, so
+    the first lease in a new process reseeds the inherited environments
+    from OS entropy.
+    """
+
+    def __init__(self, factory=setup_environment):
+        self.factory = factory
+        self.maze_bank = None
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.created = 0
+
+    def use_maze_bank(self, path):
+        """Build environments that reset from the maze bank at path (ai/maze_bank.py) from now on."""
+        from .maze_bank import MazeBank
+
+        bank = MazeBank.load(path)
+        with self._lock:
+            self.maze_bank = bank
+            self.factory = partial(setup_environment, maze_bank=bank)
+            # Idle environments still generate their mazes; build banked ones instead
+            self._idle = []
+        return bank
+
+    def prefill(self, count):
+        """Create environments until at least `count` are idle."""
+        while len(self._idle) < count:
+            env = self.factory()
+            env.reset()
+            with self._lock:
+                self._idle.append(env)
+                self.created += 1
+
+    def _reseed(self, env):
+        if self.maze_bank is not None:
+            env.reseed()
+        env.reset(seed=int.from_bytes(os.urandom(4), 'little'))
+
+    @contextmanager
+    def lease(self):
+        """Check out an environment for the duration of one episode."""
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                for idle in self._idle:
+                    self._reseed(idle)
+            env = self._idle.pop() if self._idle else None
+        if env is None:
+            env = self.factory()
+            with self._lock:
+                self.created += 1
+        try:
+            yield env
+        finally:
+            with self._lock:
+                self._idle.append(env)
+
+
+environment_pool = EnvironmentPool()
@@ -3,20 +3,20 @@
 Game execution logic for AI Agent Galaxy.
 Extracted from original app.py - handles running episodes and generating videos.
 """
-import os
-import torch
+import logging
+
 import numpy as np
 import imageio
-from .environment import setup_environment, preprocess_state
-from .agents.ddqn_agent import DDQNAgent, DoubleDQNNetwork
-from .agents.d3qn_agent import D3QNAgent
-
-# Device configuration
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+from .environment import preprocess_state
+from .inference import get_policy
+from .replay_renderer import ReplayRenderer
+from .step_log import StepLog
 
 # Constants
 MAX_STEPS = 120
 
+logger = logging.getLogger(__name__)
+
 
 def shape_reward(step_count, max_steps, done, truncated, states_list, current_state, actions_list):
     """Reward function for DDQN agent."""
@@ -54,35 +54,25 @@ def compute_reward(step_count, max_steps, done, truncated, states_list, current_
     return reward
 
 
-def video_of_one_DDQN_episode(env, policy_network_path, gif_filename):
-    """Run one episode with DDQN agent and generate video."""
-    obs, _ = env.reset()
-    obs = preprocess_state(obs)
-    input_shape = obs.shape
-    num_actions = env.action_space.n
-    policy_net = DoubleDQNNetwork(input_shape, num_actions)
-    
+def video_of_one_DDQN_episode(env, policy_network_path, gif_filename, seed=None, tile_size=None):
+    """Run one episode with DDQN agent and generate video (seed fixes the maze, tile_size scales the replay)."""
+    # Actions come from the inference daemon, or from weights loaded once per process
     try:
-        policy_net.load_state_dict(torch.load(policy_network_path, map_location=device))
+        policy = get_policy('ddqn', policy_network_path)
     except FileNotFoundError:
         return 0, 120, []
-
-    policy_net.to(device)
-    policy_net.eval()
-    agent = DDQNAgent(input_shape, num_actions)
-    agent.policy_net = policy_net
     
     total_reward = 0
     frames = []
-    steps_log = []
-    obs, _ = env.reset()
-    processed = preprocess_state(obs)
-    state = torch.tensor(processed, dtype=torch.float32).unsqueeze(0)
+    renderer = ReplayRenderer(tile_size)
+    steps_log = StepLog(MAX_STEPS)
+    obs, _ = env.reset(seed=seed)
+    state = preprocess_state(obs)
     episode_states = []
     episode_actions = []
 
     for t in range(MAX_STEPS):
-        action = agent.select_action(state, 0)
+        action = policy.act(state)
         episode_states.append(state)
         episode_actions.append(action)
         
@@ -90,25 +80,16 @@ def video_of_one_DDQN_episode(env, policy_network_path, gif_filename):
         reward = shape_reward(t, MAX_STEPS, done, truncated, episode_states, next_obs, episode_actions)
         total_reward += reward
         
-        step_info = {
-            'step': int(t + 1),
-            'action': int(action),
-            'reward': float(reward),
-            'done': bool(done),
-            'truncated': bool(truncated),
-            'result': 'Goal reached!' if done else ('Max steps reached' if truncated else 'Continuing...')
-        }
-        steps_log.append(step_info)
+        steps_log.append(action, reward, done, truncated)
         
-        processed_next = preprocess_state(next_obs)
-        state = torch.tensor(processed_next, dtype=torch.float32).unsqueeze(0)
+        state = preprocess_state(next_obs)
 
         try:
-            frame = env.render()
+            frame = renderer.render(env)
             if frame.shape[-1] == 3:
-                frames.append(frame)
+                frames.append(frame.copy())
         except Exception as e:
-            print(f"Rendering error: {e}")
+            logger.warning(f"Rendering error: {e}", extra={'sample': True})
         
         if done or truncated:
             break
@@ -116,32 +97,30 @@ def video_of_one_DDQN_episode(env, policy_network_path, gif_filename):
     try:
         imageio.mimsave(gif_filename, frames, duration=0.1, loop=0)
     except Exception as e:
-        print(f"GIF save error: {e}")
+        logger.error(f"GIF save error: {e}")
         return float(total_reward), int(t + 1), None, steps_log
     
     return float(total_reward), int(t + 1), gif_filename, steps_log
 
 
-def video_of_one_D3QN_episode(env, policy_network_path, gif_filename):
-    """Run one episode with D3QN agent and generate video."""
-    trained_agent = D3QNAgent((1, 56, 56), env.action_space.n, seed=0)
-    
+def video_of_one_D3QN_episode(env, policy_network_path, gif_filename, seed=None, tile_size=None):
+    """Run one episode with D3QN agent and generate video (seed fixes the maze, tile_size scales the replay)."""
     try:
-        trained_agent.qnetwork_local.load_state_dict(torch.load(policy_network_path, map_location=device))
+        policy = get_policy('d3qn', policy_network_path)
     except FileNotFoundError:
         return 0, 120, []
     
-    trained_agent.qnetwork_local.eval()
     score = 0
     frames = []
-    steps_log = []
-    state, _ = env.reset()
+    renderer = ReplayRenderer(tile_size)
+    steps_log = StepLog(MAX_STEPS)
+    state, _ = env.reset(seed=seed)
     state = preprocess_state(state)
     episode_states = []
     episode_actions = []
 
     for t in range(MAX_STEPS):
-        action = trained_agent.act(state, 0.0)
+        action = policy.act(state)
         episode_states.append(state)
         episode_actions.append(action)
 
@@ -149,25 +128,17 @@ def video_of_one_D3QN_episode(env, policy_network_path, gif_filename):
         current_state = preprocess_state(current_state)
         reward = compute_reward(t, MAX_STEPS, done, truncated, episode_states, current_state, episode_actions)
         
-        step_info = {
-            'step': int(t + 1),
-            'action': int(action),
-            'reward': float(reward),
-            'done': bool(done),
-            'truncated': bool(truncated),
-            'result': 'Goal reached!' if done else ('Max steps reached' if truncated else 'Continuing...')
-        }
-        steps_log.append(step_info)
+        steps_log.append(action, reward, done, truncated)
 
         state = current_state
         score += reward
         
         try:
-            frame = env.render()
+            frame = renderer.render(env)
             if frame.shape[-1] == 3:
-                frames.append(frame)
+                frames.append(frame.copy())
         except Exception as e:
-            print(f"Rendering error: {e}")
+            logger.warning(f"Rendering error: {e}", extra={'sample': True})
         
         if done or truncated:
             break
@@ -175,11 +146,7 @@ def video_of_one_D3QN_episode(env, policy_network_path, gif_filename):
     try:
         imageio.mimsave(gif_filename, frames, duration=0.1, loop=0)
     except Exception as e:
-        print(f"GIF save error: {e}")
+        logger.error(f"GIF save error: {e}")
         return float(score), int(t + 1), None, steps_log
 
     return float(score), int(t + 1), gif_filename, steps_log
-
-
-# Initialize environment once
-env = setup_environment()
\ No newline at end of file
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Action selection for AI Agent Galaxy episodes, local or via the inference daemon.
+
+Episodes ask a policy for the greedy action of each preprocessed observation.
+With INFERENCE_SOCKET set, the policy sends the observation to the local
+inference daemon (ai/inference_server.py) over a Unix domain socket, so the
+web workers never import torch; the daemon holds the only copy of the
+networks and batches concurrent queries into one forward pass. Without the
+setting, or whenever the daemon cannot be reached, the networks are loaded
+in-process through the model registry (the previous behaviour).
+
+This module is torch-free; torch is only imported by the in-process fallback.
+
+Wire format (network byte order), one request/response pair per frame on a
+persistent connection:
+    request:  op:u8 agent:u8 count:u32 height:u16 width:u16, count*height*width uint8 pixels
+    response: status:u8 length:u32, `length` payload bytes
+              (status 0: one uint8 action per observation, or JSON for ping;
+               status 1: UTF-8 error message)
+"""
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from exceptions import InferenceUnavailable
+
+MODEL_FILES = {
+    'ddqn': 'DDQN_policy_net.pth',
+    'd3qn': 'D3QN_policy_net.pth',
+}
+AGENT_CODES = {'ddqn': 0, 'd3qn': 1}
+AGENT_NAMES = {code: name for name, code in AGENT_CODES.items()}
+
+# Both agents were trained without pickup/drop/done (3, 4, 6)
+VALID_ACTIONS = (0, 1, 2, 5)
+
+OP_ACT = 0
+OP_PING = 1
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+REQUEST_HEADER = struct.Struct('!BBIHH')
+RESPONSE_HEADER = struct.Struct('!BI')
+
+
+def recv_exact(sock, size):
+    """Read exactly size bytes or raise ConnectionError."""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        chunk = sock.recv_into(view[received:], size - received)
+        if chunk == 0:
+            raise ConnectionError('inference connection closed')
+        received += chunk
+    return bytes(buffer)
+
+
+def encode_states(states):
+    """Pack a (N, 1, H, W) batch of grayscale observations as uint8 pixels."""
+    states = np.asarray(states)
+    count, height, width = states.shape[0], states.shape[-2], states.shape[-1]
+    return count, height, width, np.ascontiguousarray(states, dtype=np.uint8).tobytes()
+
+
+class InferenceClient:
+    """Talks to the inference daemon over one persistent connection per thread."""
+
+    def __init__(self):
+        self.socket_path = None
+        self.timeout = 5.0
+        self.retry_after = 30.0
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def configure(self, socket_path, timeout=5.0, retry_after=30.0):
+        self.socket_path = socket_path or None
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._down_until = 0.0
+
+    @property
+    def enabled(self):
+        """True when a daemon is configured and not in its back-off window."""
+        return self.socket_path is not None and time.monotonic() >= self._down_until
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None or getattr(self._local, 'pid', None) != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+            self._local.pid = os.getpid()
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _call(self, op, agent_code, count, height, width, payload):
+        if not self.enabled:
+            raise InferenceUnavailable('inference daemon not configured or backing off')
+        try:
+            sock = self._connection()
+            sock.sendall(REQUEST_HEADER.pack(op, agent_code, count, height, width) + payload)
+            status, length = RESPONSE_HEADER.unpack(recv_exact(sock, RESPONSE_HEADER.size))
+            body = recv_exact(sock, length)
+        except (OSError, ConnectionError) as e:
+            self._close()
+            # Don't hammer a daemon that is down; fall back for a while
+            self._down_until = time.monotonic() + self.retry_after
+            raise InferenceUnavailable(f'inference daemon unreachable: {e}') from e
+        if status != STATUS_OK:
+            raise InferenceUnavailable(body.decode('utf-8', 'replace'))
+        return body
+
+    def act(self, agent_type, states):
+        """Greedy actions for a (N, 1, H, W) batch of observations."""
+        count, height, width, payload = encode_states(states)
+        body = self._call(OP_ACT, AGENT_CODES[agent_type], count, height, width, payload)
+        return np.frombuffer(body, dtype=np.uint8).astype(np.int64)
+
+    def ping(self):
+        """Daemon status (loaded agents, batch statistics)."""
+        return json.loads(self._call(OP_PING, 0, 0, 0, 0, b''))
+
+
+inference_client = InferenceClient()
+
+
+class LocalPolicy:
+    """Greedy policy evaluated in this process (imports torch)."""
+
+    def __init__(self, agent_type, model_path=None):
+        from .model_registry import model_registry
+
+        self.agent_type = agent_type
+        self.model_path = model_path
+        self._registry = model_registry
+        # Load now so a missing weights file surfaces before the episode starts
+        model_registry.get(agent_type, model_path)
+
+    def act(self, state):
+        return int(self._registry.greedy_actions(self.agent_type, state[np.newaxis], self.model_path)[0])
+
+
+class RemotePolicy:
+    """Greedy policy answered by the inference daemon, falling back to LocalPolicy."""
+
+    def __init__(self, agent_type, model_path=None, client=None):
+        self.agent_type = agent_type
+        self.model_path = model_path
+        self.client = client or inference_client
+        self._fallback = None
+
+    def act(self, state):
+        if self._fallback is None:
+            try:
+                return int(self.client.act(self.agent_type, state[np.newaxis])[0])
+            except InferenceUnavailable:
+                self._fallback = LocalPolicy(self.agent_type, self.model_path)
+        return self._fallback.act(state)
+
+
+def get_policy(agent_type, model_path=None):
+    """Policy for one episode: remote when the daemon is configured and up, else local.
+
+    Raises FileNotFoundError when falling back locally and the weights are missing.
+    """
+    if agent_type not in AGENT_CODES:
+        raise ValueError(f"Unknown agent type '{agent_type}'")
+    if inference_client.enabled:
+        return RemotePolicy(agent_type, model_path)
+    return LocalPolicy(agent_type, model_path)
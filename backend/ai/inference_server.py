@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Local inference daemon for AI Agent Galaxy.
+
+Owns the only copy of both Q-networks and answers greedy-action queries from
+the web workers over a Unix domain socket (protocol in ai/inference.py).
+Each connection gets a handler thread; queries for the same agent that arrive
+within INFERENCE_BATCH_WINDOW_MS are stacked into one forward pass of up to
+INFERENCE_MAX_BATCH observations.
+
+Usage (from backend/):
+    python -m ai.inference_server --socket /tmp/neural-navigator-inference.sock
+and start the web app with INFERENCE_SOCKET set to the same path.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socketserver
+import threading
+import time
+
+import numpy as np
+
+from .inference import (
+    AGENT_NAMES, OP_ACT, OP_PING, REQUEST_HEADER, RESPONSE_HEADER,
+    STATUS_ERROR, STATUS_OK, recv_exact,
+)
+from .model_registry import model_registry
+
+logger = logging.getLogger('inference')
+
+
+class _Query:
+    __slots__ = ('states', 'actions', 'error', 'done')
+
+    def __init__(self, states):
+        self.states = states
+        self.actions = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """Runs one agent's queries in batched forward passes on a single thread."""
+
+    def __init__(self, agent_type, max_batch=64, window=0.002, active_clients=lambda: 1):
+        self.agent_type = agent_type
+        self.max_batch = max_batch
+        self.window = window
+        self.active_clients = active_clients
+        self._queue = []
+        self._cond = threading.Condition()
+        self.stats = {'queries': 0, 'batches': 0, 'observations': 0, 'largest_batch': 0}
+        self._thread = threading.Thread(target=self._run, name=f'batcher-{agent_type}', daemon=True)
+        self._thread.start()
+
+    def submit(self, states, timeout=None):
+        """Queue a (N, 1, H, W) batch and wait for its actions."""
+        query = _Query(states)
+        with self._cond:
+            self._queue.append(query)
+            self._cond.notify()
+        if not query.done.wait(timeout):
+            raise TimeoutError('inference batch timed out')
+        if query.error is not None:
+            raise query.error
+        return query.actions
+
+    def _take(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            # Only wait for stragglers while other connected clients could still send
+            deadline = time.monotonic() + self.window
+            while (len(self._queue) < self.active_clients()
+                   and sum(len(q.states) for q in self._queue) < self.max_batch):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size = [], 0
+            while self._queue and (not batch or size + len(self._queue[0].states) <= self.max_batch):
+                query = self._queue.pop(0)
+                batch.append(query)
+                size += len(query.states)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            try:
+                states = np.concatenate([q.states for q in batch])
+                actions = model_registry.greedy_actions(self.agent_type, states.astype(np.float32))
+            except Exception as e:
+                for query in batch:
+                    query.error = e
+                    query.done.set()
+                continue
+
+            offset = 0
+            for query in batch:
+                query.actions = actions[offset:offset + len(query.states)]
+                offset += len(query.states)
+                query.done.set()
+            self.stats['queries'] += len(batch)
+            self.stats['batches'] += 1
+            self.stats['observations'] += len(states)
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(states))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.server.connection_opened()
+
+    def finish(self):
+        self.server.connection_closed()
+
+    def handle(self):
+        server = self.server
+        sock = self.request
+        while True:
+            try:
+                header = recv_exact(sock, REQUEST_HEADER.size)
+            except (ConnectionError, OSError):
+                return
+            op, agent_code, count, height, width = REQUEST_HEADER.unpack(header)
+            try:
+                payload = recv_exact(sock, count * height * width)
+                if op == OP_PING:
+                    status, body = STATUS_OK, json.dumps(server.status()).encode()
+                elif op == OP_ACT:
+                    states = np.frombuffer(payload, dtype=np.uint8).reshape(count, 1, height, width)
+                    actions = server.batchers[AGENT_NAMES[agent_code]].submit(states, server.query_timeout)
+                    status, body = STATUS_OK, actions.astype(np.uint8).tobytes()
+                else:
+                    status, body = STATUS_ERROR, f'unknown op {op}'.encode()
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                status, body = STATUS_ERROR, f'{type(e).__name__}: {e}'.encode()
+            sock.sendall(RESPONSE_HEADER.pack(status, len(body)) + body)
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server in front of one MicroBatcher per loaded agent."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, max_batch=64, window=0.002, query_timeout=10.0):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o660)
+        self.socket_path = socket_path
+        self.query_timeout = query_timeout
+        self.started_at = time.time()
+        self.connections = 0
+        self._connections_lock = threading.Lock()
+        agents = model_registry.preload()
+        self.batchers = {
+            agent: MicroBatcher(agent, max_batch, window, lambda: self.connections)
+            for agent in agents
+        }
+
+    def connection_opened(self):
+        with self._connections_lock:
+            self.connections += 1
+
+    def connection_closed(self):
+        with self._connections_lock:
+            self.connections -= 1
+
+    def status(self):
+        return {
+            'agents': sorted(self.batchers),
+            'pid': os.getpid(),
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'connections': self.connections,
+            'batchers': {agent: batcher.stats for agent, batcher in self.batchers.items()},
+        }
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--socket', default=Config.INFERENCE_SOCKET or '/tmp/neural-navigator-inference.sock')
+    parser.add_argument('--model-folder', default=str(Config.MODEL_FOLDER))
+    parser.add_argument('--max-batch', type=int, default=Config.INFERENCE_MAX_BATCH)
+    parser.add_argument('--window-ms', type=float, default=Config.INFERENCE_BATCH_WINDOW_MS)
+    parser.add_argument('--threads', type=int, default=Config.TORCH_NUM_THREADS, help='torch intra-op threads')
+    args = parser.parse_args()
+
+    import torch
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    torch.set_num_threads(args.threads)
+    model_registry.model_folder = args.model_folder
+
+    server = InferenceServer(args.socket, args.max_batch, args.window_ms / 1000.0)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    logger.info(f"Inference daemon serving {sorted(server.batchers)} on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Maze bank for AI Agent Galaxy.
+
+MiniGrid-MultiRoom-N6-v0 generates its rooms on every reset, retrying
+placements until six fit, so reset cost is uneven. A maze bank holds
+layouts generated ahead of time (scripts/build_maze_bank.py) and
+MazeBankWrapper resets from it instead: the grid is rebuilt from a row of
+cell codes and the agent and goal are set from the bank, so a reset costs
+one small array lookup plus the first observation.
+
+File layout (the flat format of ai/weights.py, memory-mapped and shared by
+every worker):
+    cells   uint8 [count, height * width]  one code per cell, in Grid order:
+            (object * colors + color) * states + state, as Grid.encode() gives them
+    agents  int16 [count, 3]               agent x, y, direction
+    goals   int16 [count, 2]               goal x, y
+    seeds   int64 [count]                  native reset seed that generated each layout
+A reset with seed s loads layout s % count, so a bank index (or any seed)
+reproduces the same maze; verify_trajectories() checks banked resets step
+exactly like native resets of the same layouts.
+"""
+import numpy as np
+import gymnasium as gym
+from minigrid.core.constants import COLOR_TO_IDX, OBJECT_TO_IDX, STATE_TO_IDX
+from minigrid.core.grid import Grid
+from minigrid.core.world_object import Wall, WorldObj
+
+from .weights import load_weights, save_weights
+
+BANK_FORMAT = '1'
+
+_COLORS = len(COLOR_TO_IDX)
+_STATES = len(STATE_TO_IDX)
+
+
+def _code(object_idx, color_idx, state):
+    return (object_idx * _COLORS + color_idx) * _STATES + state
+
+
+EMPTY_CODE = _code(OBJECT_TO_IDX['empty'], 0, 0)
+WALL_CODE = _code(OBJECT_TO_IDX['wall'], COLOR_TO_IDX['grey'], 0)
+
+# Walls carry no state, so every banked grid shares one (as MultiRoom's own generator does)
+_WALL = Wall()
+
+
+def encode_layout(env):
+    """(cells, agent, goal) of the layout the base MiniGrid env currently holds."""
+    base = env.unwrapped
+    encoded = base.grid.encode().astype(np.int64)  # [width, height, 3]
+    codes = _code(encoded[..., 0], encoded[..., 1], encoded[..., 2])
+    cells = codes.T.reshape(-1).astype(np.uint8)  # Grid stores cells row by row (y * width + x)
+    agent = (int(base.agent_pos[0]), int(base.agent_pos[1]), int(base.agent_dir))
+    goal = (int(base.goal_pos[0]), int(base.goal_pos[1]))
+    return cells, agent, goal
+
+
+class MazeBank:
+    """Pre-generated layouts of one MiniGrid environment."""
+
+    def __init__(self, cells, agents, goals, seeds, width, height, env_id):
+        self.cells = cells
+        self.agents = agents
+        self.goals = goals
+        self.seeds = seeds
+        self.width = width
+        self.height = height
+        self.env_id = env_id
+
+    def __len__(self):
+        return len(self.cells)
+
+    @classmethod
+    def generate(cls, env, count, base_seed=0):
+        """Reset `env` natively with seeds base_seed .. base_seed + count - 1 and keep each layout."""
+        base = env.unwrapped
+        cells = np.empty((count, base.width * base.height), dtype=np.uint8)
+        agents = np.empty((count, 3), dtype=np.int16)
+        goals = np.empty((count, 2), dtype=np.int16)
+        seeds = np.arange(base_seed, base_seed + count, dtype=np.int64)
+        for index, seed in enumerate(seeds.tolist()):
+            env.reset(seed=seed)
+            cells[index], agents[index], goals[index] = encode_layout(env)
+        return cls(cells, agents, goals, seeds, base.width, base.height, env.spec.id if env.spec else '')
+
+    def save(self, path):
+        """Write the bank as a flat, memory-mappable file (atomically)."""
+        save_weights(
+            {'cells': self.cells, 'agents': self.agents, 'goals': self.goals, 'seeds': self.seeds},
+            path,
+            metadata={'format': BANK_FORMAT, 'env_id': self.env_id, 'width': self.width, 'height': self.height},
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Map a bank file written by save()."""
+        arrays, metadata = load_weights(path)
+        if metadata.get('format') != BANK_FORMAT:
+            raise ValueError(f"{path}: not a maze bank (format {metadata.get('format')!r})")
+        width, height = int(metadata['width']), int(metadata['height'])
+        if arrays['cells'].shape[1:] != (width * height,):
+            raise ValueError(f'{path}: cell rows do not match a {width}x{height} grid')
+        return cls(arrays['cells'], arrays['agents'], arrays['goals'], arrays['seeds'],
+                   width, height, metadata.get('env_id', ''))
+
+    def index_for(self, seed):
+        """Layout a reset with `seed` loads."""
+        return int(seed) % len(self)
+
+    def grid(self, index):
+        """A fresh Grid holding layout `index` (doors and goal are new objects, walls shared)."""
+        codes = self.cells[index]
+        grid = Grid(self.width, self.height)
+        cells = grid.grid
+        for position in np.flatnonzero(codes == WALL_CODE).tolist():
+            cells[position] = _WALL
+        for position in np.flatnonzero((codes != EMPTY_CODE) & (codes != WALL_CODE)).tolist():
+            code = int(codes[position])
+            cell = WorldObj.decode(code // (_COLORS * _STATES), (code // _STATES) % _COLORS, code % _STATES)
+            if cell is not None:
+                cell.init_pos = cell.cur_pos = (position % self.width, position // self.width)
+            cells[position] = cell
+        return grid
+
+    def apply(self, index, base):
+        """Put layout `index` into a base MiniGrid env (what _gen_grid would have done)."""
+        if (base.width, base.height) != (self.width, self.height):
+            raise ValueError(f'Maze bank holds {self.width}x{self.height} layouts, '
+                             f'environment is {base.width}x{base.height}')
+        x, y, direction = self.agents[index].tolist()
+        base.grid = self.grid(index)
+        base.agent_pos = (x, y)
+        base.agent_dir = direction
+        base.goal_pos = tuple(self.goals[index].tolist())
+
+
+class MazeBankWrapper(gym.Wrapper):
+    """Resets a MiniGrid environment from a maze bank instead of generating the layout.
+
+    reset(seed=s) loads layout s % len(bank); without a seed a random one.
+    The layout index is returned in the reset info as 'layout'.
+    """
+
+    def __init__(self, env, bank):
+        super().__init__(env)
+        self.bank = bank
+        self.layout = None
+        self._rng = np.random.default_rng()
+        # MiniGridEnv.reset() builds the maze through _gen_grid(); loading the layout there
+        # keeps the rest of reset, and every wrapper's observation, on the native code path
+        env.unwrapped._gen_grid = self._load_layout
+
+    def reseed(self):
+        """Draw unseeded layouts from fresh OS entropy (a forked worker must not share its parent's)."""
+        self._rng = np.random.default_rng()
+
+    def _load_layout(self, width, height):
+        self.bank.apply(self.layout, self.env.unwrapped)
+
+    def reset(self, *, seed=None, options=None):
+        self.layout = self.bank.index_for(seed) if seed is not None else int(self._rng.integers(len(self.bank)))
+        obs, info = self.env.reset(seed=seed, options=options)
+        return obs, dict(info, layout=self.layout)
+
+
+def verify_trajectories(bank, env_factory, indices, steps=120, action_seed=0):
+    """Replay layouts natively and from the bank with the same actions; returns mismatching indices.
+
+    For each index the native env is reset with the layout's generating seed
+    and the banked env with the index, then both take the same random
+    actions for up to `steps` steps. Observations, rewards, termination and
+    agent pose must match at every step; the full grid (door states
+    included) and the rendered frame after the reset and the last step.
+    """
+    native = env_factory()
+    banked = MazeBankWrapper(env_factory(), bank)
+    rng = np.random.default_rng(action_seed)
+    # Mostly forward and toggle (doors), some turns, and the unused actions now and then
+    action_p = np.array([0.2, 0.2, 0.35, 0.02, 0.02, 0.19, 0.02])
+
+    def same_world():
+        return (np.array_equal(native.unwrapped.grid.encode(), banked.unwrapped.grid.encode())
+                and np.array_equal(native.render(), banked.render()))
+
+    mismatches = []
+    for index in indices:
+        native_obs, _ = native.reset(seed=int(bank.seeds[index]))
+        banked_obs, _ = banked.reset(seed=int(index))
+        same = np.array_equal(native_obs, banked_obs) and same_world()
+        for action in rng.choice(len(action_p), size=steps, p=action_p).tolist():
+            if not same:
+                break
+            native_step = native.step(action)
+            banked_step = banked.step(action)
+            a, b = native.unwrapped, banked.unwrapped
+            same = (np.array_equal(native_step[0], banked_step[0])
+                    and native_step[1:4] == banked_step[1:4]
+                    and tuple(a.agent_pos) == tuple(b.agent_pos) and a.agent_dir == b.agent_dir)
+            if native_step[2] or native_step[3]:
+                break
+        if not (same and same_world()):
+            mismatches.append(int(index))
+    return mismatches
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Model registry for AI Agent Galaxy.
+Loads each policy network once per process instead of on every episode.
+
+Agents are built and their weights loaded on first use (or up front via
+preload()), then shared by every request thread: inference only reads the
+weights. Under a prefork server preload() runs in the master, so the weight
+pages are shared copy-on-write by all workers.
+
+Weights come from the flat .safetensors file next to each .pth checkpoint
+when there is one (scripts/convert_weights.py writes them): the file is
+memory-mapped and the parameters alias the mapped pages, so every process
+shares one page-cache copy and no pickle code runs. Without it the .pth is
+read with torch.load(weights_only=True).
+"""
+import os
+import threading
+
+import numpy as np
+import torch
+
+from .agents.ddqn_agent import DDQNAgent
+from .agents.d3qn_agent import D3QNAgent
+from .inference import MODEL_FILES, VALID_ACTIONS
+from .weights import load_weights, weights_path
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+# Observation shape after preprocess_state and the MiniGrid action count
+INPUT_SHAPE = (1, 56, 56)
+NUM_ACTIONS = 7
+
+
+def load_state_dict(path):
+    """Read a checkpoint; returns (state_dict, mapped).
+
+    mapped is True when the tensors are views of a memory-mapped flat
+    weights file and should be assigned to the network rather than copied.
+    """
+    flat_path = weights_path(path)
+    if os.path.exists(flat_path):
+        arrays, _ = load_weights(flat_path)
+        state_dict = {name: torch.from_numpy(array) for name, array in arrays.items()}
+        if device.type != 'cpu':
+            return {name: tensor.to(device) for name, tensor in state_dict.items()}, False
+        return state_dict, True
+    return torch.load(path, map_location=device, weights_only=True), False
+
+
+def _build_ddqn(state_dict, input_shape, num_actions, assign=False):
+    agent = DDQNAgent(input_shape, num_actions)
+    agent.policy_net.load_state_dict(state_dict, assign=assign)
+    agent.policy_net.eval()
+    return agent
+
+
+def _build_d3qn(state_dict, input_shape, num_actions, assign=False):
+    agent = D3QNAgent(input_shape, num_actions, seed=0)
+    agent.qnetwork_local.load_state_dict(state_dict, assign=assign)
+    agent.qnetwork_local.eval()
+    return agent
+
+
+BUILDERS = {
+    'ddqn': _build_ddqn,
+    'd3qn': _build_d3qn,
+}
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded agents, keyed by agent type and weights file."""
+
+    def __init__(self, app=None):
+        self.model_folder = None
+        self._agents = {}
+        self._lock = threading.Lock()
+        self.stats = {'loads': 0, 'hits': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read MODEL_FOLDER from app config."""
+        self.model_folder = str(app.config['MODEL_FOLDER'])
+        app.extensions['model_registry'] = self
+
+    def model_path(self, agent_type):
+        """Default weights file for an agent type."""
+        if agent_type not in MODEL_FILES:
+            raise ValueError(f"Unknown agent type '{agent_type}'")
+        return os.path.join(self.model_folder, MODEL_FILES[agent_type])
+
+    def get(self, agent_type, model_path=None, input_shape=INPUT_SHAPE, num_actions=NUM_ACTIONS):
+        """Return the loaded agent, loading its weights on first use.
+
+        Raises FileNotFoundError if neither the .safetensors file nor the
+        .pth checkpoint exists.
+        """
+        path = os.path.abspath(model_path or self.model_path(agent_type))
+        key = (agent_type, path, tuple(input_shape), num_actions)
+        agent = self._agents.get(key)
+        if agent is not None:
+            self.stats['hits'] += 1
+            return agent
+
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is None:
+                state_dict, mapped = load_state_dict(path)
+                agent = BUILDERS[agent_type](state_dict, input_shape, num_actions, assign=mapped)
+                self._agents[key] = agent
+                self.stats['loads'] += 1
+        return agent
+
+    def network(self, agent_type, model_path=None):
+        """The loaded Q-network of an agent."""
+        agent = self.get(agent_type, model_path)
+        return agent.policy_net if agent_type == 'ddqn' else agent.qnetwork_local
+
+    def greedy_actions(self, agent_type, states, model_path=None):
+        """Best valid action for each observation in a (N, 1, H, W) batch.
+
+        Same choice as DDQNAgent.select_action / D3QNAgent.act with epsilon 0,
+        but for a whole batch in one forward pass.
+        """
+        network = self.network(agent_type, model_path)
+        batch = torch.from_numpy(np.ascontiguousarray(states, dtype=np.float32)).to(device)
+        with torch.no_grad():
+            q_values = network(batch)
+            invalid = torch.ones(q_values.shape[1], dtype=torch.bool, device=q_values.device)
+            invalid[list(VALID_ACTIONS)] = False
+            q_values[:, invalid] = -float('inf')
+            return q_values.argmax(dim=1).cpu().numpy()
+
+    def preload(self, agent_types=None):
+        """Load every known agent now; returns the agent types that loaded."""
+        loaded = []
+        for agent_type in agent_types or MODEL_FILES:
+            try:
+                self.get(agent_type)
+                loaded.append(agent_type)
+            except FileNotFoundError:
+                pass
+        return loaded
+
+    def loaded(self):
+        """Agent types currently held in memory."""
+        return sorted({key[0] for key in self._agents})
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Replay frame renderer for AI Agent Galaxy.
+
+env.render() rebuilds the whole MultiRoom frame every step: it computes the
+agent's field of view (even with highlighting off) and copies every tile of
+the grid into a new image. Within an episode only a few tiles ever change:
+the agent's old and new cell, the cell it acted on, and doors. ReplayRenderer
+rasterizes the maze once when it first sees a grid, then redraws only the
+tiles whose contents changed into the same preallocated frame buffer.
+
+Tiles come from MiniGrid's own tile cache (Grid.render_tile), so at the
+env's tile size the frames are pixel-identical to env.render() without
+highlighting; a smaller tile_size gives lower-resolution replays.
+"""
+import numpy as np
+from minigrid.core.constants import DIR_TO_VEC
+from minigrid.core.grid import Grid
+
+# Objects that never change once the maze is generated; any other object
+# (doors, and keys, balls and boxes in other envs) is checked every frame
+STATIC_TYPES = frozenset(('wall', 'floor', 'goal', 'lava'))
+
+
+class ReplayRenderer:
+    """Full-frame renderer that redraws only the tiles changed since the previous frame.
+
+    render(env) must be called after the reset and after every step of an
+    episode (as the game runner records replays); the returned array is the
+    renderer's buffer and is overwritten by the next call, so copy it to keep it.
+    """
+
+    def __init__(self, tile_size=None):
+        self.tile_size = tile_size  # None = the env's own tile size
+        self.frame = None
+        self._tiles = None  # frame viewed as [row, y, column, x, rgb]
+        self._grid = None
+        self._size = None
+        self._drawn = []  # per cell, the (object encoding, agent direction) currently drawn
+        self._mutable = set()
+        self._agent = None  # (cell, direction) at the previous frame
+
+    def render(self, env):
+        """RGB frame of the env's current state (the renderer's buffer)."""
+        base = env.unwrapped
+        if base.highlight:
+            # The highlighted field of view changes with every move; nothing to reuse
+            return base.get_frame(True, self.tile_size or base.tile_size)
+        tile_size = self.tile_size or base.tile_size
+        if base.grid is not self._grid or self._size != (base.width, base.height, tile_size):
+            self._rasterize(base, tile_size)
+        else:
+            self._update(base)
+        return self.frame
+
+    def _draw(self, position, cell, agent_dir, key):
+        row, column = divmod(position, self._grid.width)
+        self._tiles[row, :, column, :] = Grid.render_tile(cell, agent_dir=agent_dir, highlight=False,
+                                                          tile_size=self._size[2])
+        self._drawn[position] = key
+
+    def _rasterize(self, base, tile_size):
+        width, height = base.width, base.height
+        if self._size != (width, height, tile_size):
+            self.frame = np.zeros((height * tile_size, width * tile_size, 3), dtype=np.uint8)
+            self._tiles = self.frame.reshape(height, tile_size, width, tile_size, 3)
+        self._grid = base.grid
+        self._size = (width, height, tile_size)
+        self._drawn = [None] * (width * height)
+        self._mutable = set()
+
+        agent_cell = int(base.agent_pos[1]) * width + int(base.agent_pos[0])
+        for position, cell in enumerate(base.grid.grid):
+            agent_dir = base.agent_dir if position == agent_cell else None
+            self._draw(position, cell, agent_dir, (cell.encode() if cell else None, agent_dir))
+            if cell is not None and cell.type not in STATIC_TYPES:
+                self._mutable.add(position)
+        self._agent = (agent_cell, base.agent_dir)
+
+    def _update(self, base):
+        width, height = base.width, base.height
+        cells = self._grid.grid
+        agent_cell = int(base.agent_pos[1]) * width + int(base.agent_pos[0])
+
+        # Every action acts on the cell in front of the agent, so besides the
+        # tracked objects only the agent's previous cell, that front cell and
+        # the agent's new cell can have changed
+        previous, previous_dir = self._agent
+        dx, dy = DIR_TO_VEC[previous_dir]
+        x, y = previous % width + dx, previous // width + dy
+        candidates = set(self._mutable)
+        candidates.update((previous, agent_cell))
+        if 0 <= x < width and 0 <= y < height:
+            candidates.add(y * width + x)
+
+        for position in candidates:
+            cell = cells[position]
+            agent_dir = base.agent_dir if position == agent_cell else None
+            key = (cell.encode() if cell else None, agent_dir)
+            if key != self._drawn[position]:
+                self._draw(position, cell, agent_dir, key)
+            if cell is not None and cell.type not in STATIC_TYPES:
+                self._mutable.add(position)
+        self._agent = (agent_cell, base.agent_dir)
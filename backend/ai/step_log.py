@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Episode step logs for AI Agent Galaxy.
+
+A StepLog records an episode column by column in preallocated arrays
+instead of one dict per step: actions as uint8, done/truncated as a uint8
+bit field and rewards as float32, six bytes per step. The step number and
+result text of the old per-step dicts are implied by position and flags.
+to_blobs()/from_blobs() give the little-endian bytes stored in the
+game_steps table (database/models/steps.py), so analytics can decode many
+games with np.frombuffer without building per-step objects.
+"""
+import numpy as np
+
+# MiniGrid's Actions enum, by value
+ACTION_NAMES = ('left', 'right', 'forward', 'pickup', 'drop', 'toggle', 'done')
+
+FLAG_DONE = 1
+FLAG_TRUNCATED = 2
+
+ACTION_DTYPE = np.dtype(np.uint8)
+FLAG_DTYPE = np.dtype(np.uint8)
+REWARD_DTYPE = np.dtype('<f4')
+
+
+class StepLog:
+    """Actions, flags and rewards of one episode, in packed arrays."""
+
+    __slots__ = ('actions', 'flags', 'rewards', 'count')
+
+    def __init__(self, capacity=120):
+        self.actions = np.zeros(capacity, dtype=ACTION_DTYPE)
+        self.flags = np.zeros(capacity, dtype=FLAG_DTYPE)
+        self.rewards = np.zeros(capacity, dtype=REWARD_DTYPE)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, action, reward, done, truncated):
+        """Record one step."""
+        if self.count == len(self.actions):
+            # Longer than planned: double the arrays
+            for name in ('actions', 'flags', 'rewards'):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros_like(getattr(self, name))]))
+        i = self.count
+        self.actions[i] = action
+        self.flags[i] = (FLAG_DONE if done else 0) | (FLAG_TRUNCATED if truncated else 0)
+        self.rewards[i] = reward
+        self.count = i + 1
+
+    def to_blobs(self):
+        """(actions, flags, rewards) bytes of the recorded steps."""
+        n = self.count
+        return self.actions[:n].tobytes(), self.flags[:n].tobytes(), self.rewards[:n].tobytes()
+
+    @classmethod
+    def from_blobs(cls, actions, flags, rewards):
+        """A StepLog viewing stored bytes (read-only)."""
+        log = cls(0)
+        log.actions = np.frombuffer(actions, dtype=ACTION_DTYPE)
+        log.flags = np.frombuffer(flags, dtype=FLAG_DTYPE)
+        log.rewards = np.frombuffer(rewards, dtype=REWARD_DTYPE)
+        log.count = len(log.actions)
+        return log
+
+    def timeline(self):
+        """The steps as JSON-ready columns."""
+        n = self.count
+        flags = self.flags[:n]
+        return {
+            'actions': self.actions[:n].tolist(),
+            'rewards': [round(reward, 4) for reward in self.rewards[:n].tolist()],
+            'cumulative_rewards': [round(total, 4) for total in
+                                   np.cumsum(self.rewards[:n], dtype=np.float64).tolist()],
+            'done': (flags & FLAG_DONE).astype(bool).tolist(),
+            'truncated': (flags & FLAG_TRUNCATED).astype(bool).tolist(),
+        }
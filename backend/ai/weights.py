@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Flat, memory-mappable weight files for AI Agent Galaxy.
+
+Writes and reads the safetensors layout without needing the safetensors
+package (files stay readable by it):
+    8-byte little-endian header length N
+    N bytes of JSON: {name: {"dtype", "shape", "data_offsets": [begin, end]}, "__metadata__": {...}}
+    raw little-endian tensor bytes, offsets relative to the end of the header
+
+load_weights() maps the file copy-on-write with numpy and returns array views
+into the mapping: nothing is unpickled, loading costs a page-table update,
+and every process using the same file shares one page-cache copy of the
+weights (pages only become private if something writes to them).
+
+This module only needs numpy; torch is not imported.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+WEIGHTS_EXTENSION = '.safetensors'
+HEADER_ALIGNMENT = 8
+
+DTYPES = {
+    'F64': np.float64, 'F32': np.float32, 'F16': np.float16,
+    'I64': np.int64, 'I32': np.int32, 'I16': np.int16, 'I8': np.int8,
+    'U8': np.uint8, 'BOOL': np.bool_,
+}
+DTYPE_NAMES = {np.dtype(dtype): name for name, dtype in DTYPES.items()}
+
+
+def weights_path(model_path):
+    """Flat weights file that sits next to a .pth checkpoint."""
+    return os.path.splitext(model_path)[0] + WEIGHTS_EXTENSION
+
+
+def save_weights(arrays, path, metadata=None):
+    """Write a {name: ndarray} mapping as a flat weights file (atomically)."""
+    header = {}
+    offset = 0
+    ordered = []
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        dtype_name = DTYPE_NAMES.get(array.dtype)
+        if dtype_name is None:
+            raise ValueError(f"Unsupported dtype {array.dtype} for tensor '{name}'")
+        array = array.astype(array.dtype.newbyteorder('<'), copy=False)
+        header[name] = {'dtype': dtype_name, 'shape': list(array.shape),
+                        'data_offsets': [offset, offset + array.nbytes]}
+        offset += array.nbytes
+        ordered.append(array)
+    if metadata:
+        header['__metadata__'] = {str(k): str(v) for k, v in metadata.items()}
+
+    encoded = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    # Pad with spaces so the tensor data starts 8-byte aligned
+    encoded += b' ' * (-(8 + len(encoded)) % HEADER_ALIGNMENT)
+
+    partial = path + '.partial'
+    with open(partial, 'wb') as f:
+        f.write(struct.pack('<Q', len(encoded)))
+        f.write(encoded)
+        for array in ordered:
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+
+def read_header(path):
+    """Return (header dict, data start offset) of a flat weights file."""
+    with open(path, 'rb') as f:
+        (length,) = struct.unpack('<Q', f.read(8))
+        if length > 100 * 1024 * 1024:
+            raise ValueError(f'{path}: implausible header length {length}')
+        header = json.loads(f.read(length))
+    return header, 8 + length
+
+
+def load_weights(path):
+    """Map a flat weights file and return ({name: ndarray view}, metadata)."""
+    header, data_start = read_header(path)
+    metadata = header.pop('__metadata__', {})
+    data_end = max((info['data_offsets'][1] for info in header.values()), default=0)
+    if os.path.getsize(path) < data_start + data_end:
+        raise ValueError(f'{path}: truncated weights file')
+
+    mapping = np.memmap(path, dtype=np.uint8, mode='c', offset=data_start, shape=(data_end,)) \
+        if data_end else np.empty(0, dtype=np.uint8)
+    arrays = {}
+    for name, info in header.items():
+        dtype = np.dtype(DTYPES[info['dtype']]).newbyteorder('<')
+        begin, end = info['data_offsets']
+        arrays[name] = mapping[begin:end].view(dtype).reshape(info['shape'])
+    return arrays, metadata
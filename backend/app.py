@@ -10,6 +10,17 @@ from flask_swagger_ui import get_swaggerui_blueprint
 
 from config import Config
 from database import init_db
+from services.game_writer import init_game_writer
+from ai import init_ai
+from services.replay_store import init_replay_store
+from services.static_delivery import init_static_delivery
+from services.email_outbox import init_email_outbox
+from services.password_service import init_password_service
+from services.maintenance import init_maintenance
+from services.response_cache import init_response_cache
+from services.round_events import init_round_events
+from middleware.admission import init_admission_control
+from middleware.profiling import init_profiling
 from utils.logging_config import setup_logging
 from services.auth_service import get_current_user
 
@@ -41,6 +52,15 @@ def create_app(config_class=Config):
     
     # Initialize database
     init_db(app)
+    # Early, so its hooks wrap as much of each request as possible
+    init_profiling(app)
+    init_game_writer(app)
+    init_email_outbox(app)
+    init_password_service(app)
+    init_ai(app)
+    init_admission_control(app)
+    init_response_cache(app)
+    init_round_events(app)
 
     # Configure Swagger UI
     SWAGGER_URL = '/api/docs'
@@ -62,6 +82,14 @@ def create_app(config_class=Config):
     # Register Swagger UI blueprint
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
+    # Views catch their own errors, so answer an oversized declared body before they read it
+    @app.before_request
+    def reject_oversized_body():
+        """Reject request bodies over MAX_CONTENT_LENGTH with 413."""
+        limit = app.config.get('MAX_CONTENT_LENGTH')
+        if limit and (request.content_length or 0) > limit:
+            return jsonify({'error': 'Request body too large'}), 413
+
     # Add admin-only access control for Swagger UI
     @app.before_request
     def require_admin_for_swagger():
@@ -97,6 +125,12 @@ def create_app(config_class=Config):
     
     # Ensure required directories exist
     _ensure_directories(app)
+
+    # Replay retention sweeper needs VIDEO_FOLDER to exist
+    init_replay_store(app)
+    init_static_delivery(app)
+    # Last: its jobs use the services initialised above
+    init_maintenance(app)
     
     app.logger.info("Neural Navigator application initialized successfully")
     return app
@@ -118,10 +152,7 @@ def main():
     """Main entry point for the application."""
     app = create_app()
     
-    # Print startup information (temporarily simplified)
-    print("Neural Navigator - Backend Starting...")
-    print(f"Running on: http://{app.config['HOST']}:{app.config['PORT']}")
-    print("All routes registered and ready!")
+    app.logger.info(f"Neural Navigator backend starting on http://{app.config['HOST']}:{app.config['PORT']}")
     
     try:
         app.run(
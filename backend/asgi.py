@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for AI Agent Galaxy.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+The Flask app is built and preloaded as in wsgi.py, then served through
+middleware/asgi.py: the game, round result stream and static endpoints are
+async handlers (routes/async_routes.py) and the other blueprints run
+unchanged on ASGI_WSGI_THREADS threads. Open result streams and players
+queued for an episode cost a suspended task each instead of a worker
+thread. uvicorn's --workers starts processes that each load the app (no
+copy-on-write sharing as with gunicorn's preload; use the inference daemon
+to keep the weights out of the workers).
+"""
+from middleware.asgi import AsgiApp
+from routes.async_routes import ASYNC_VIEWS
+from wsgi import app as flask_app
+
+app = AsgiApp(flask_app, ASYNC_VIEWS)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the AI Agent Galaxy benchmark scripts.
+Scripts are run from the backend directory, e.g. `python benchmarks/db_profiles.py`.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile (nearest rank) of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    """Summarize latency samples (seconds) as milliseconds."""
+    return {
+        'count': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def make_db_app(**overrides):
+    """Build a minimal Flask app with only the database initialised.
+
+    Avoids importing the routes (and with them torch/minigrid) so database
+    benchmarks start quickly. Defaults to a fresh SQLite file in a temp dir.
+    """
+    from flask import Flask
+    from config import Config
+    from database import init_db
+
+    workdir = tempfile.mkdtemp(prefix='nn-bench-')
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'VIDEO_FOLDER': os.path.join(workdir, 'videos'),
+        'DEBUG': False,
+        'TESTING': True,
+    }
+    settings.update(overrides)
+    config_class = type('BenchConfig', (Config,), settings)
+
+    app = Flask('benchmark')
+    app.config.from_object(config_class)
+    app.logger.setLevel('WARNING')
+    init_db(app)
+    os.makedirs(app.config['VIDEO_FOLDER'], exist_ok=True)
+    return app
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Latency of admitted game requests under overload, with and without admission control.
+
+Starts a threaded server in a subprocess whose game endpoint is wrapped with
+@admission_controlled and burns --episode-ms of CPU per request in numpy
+(a stand-in for an episode; it releases the GIL, so concurrent episodes
+compete for the cores as real ones do). --clients players then play for
+--duration seconds, pausing --think-ms between games and honouring
+Retry-After when refused, alongside one scripted client that retries at once.
+For each mode reports the latency of admitted (200) requests, how many were
+refused with 429/503, and how fast the refusals came back.
+
+Usage (from backend/; Linux only):
+    python benchmarks/admission_control.py --clients 32 --episode-ms 50 --duration 15
+"""
+import argparse
+import http.cookiejar
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from _common import BACKEND_DIR, summarize
+
+SERVER = r'''
+import time
+import numpy as np
+from flask import Flask, jsonify, session
+from werkzeug.serving import make_server
+from config import Config
+from middleware.admission import admission_controlled, admission_controller, init_admission_control
+
+app = Flask('admission-benchmark')
+app.config.from_object(Config)
+app.config.update(SECRET_KEY='benchmark', ADMISSION_ENABLED=ENABLED, ADMISSION_MAX_CONCURRENT=MAX_CONCURRENT,
+                  ADMISSION_MAX_QUEUE=MAX_QUEUE, ADMISSION_USER_RATE=USER_RATE, ADMISSION_USER_BURST=USER_BURST)
+init_admission_control(app)
+
+@app.route('/login/<int:user_id>', methods=['POST'])
+def login(user_id):
+    session['user_id'] = user_id
+    return jsonify({'ok': True})
+
+@app.route('/game', methods=['POST'])
+@admission_controlled
+def game():
+    # numpy releases the GIL like the torch forward passes of an episode do
+    a = np.random.rand(192, 192)
+    stop = time.thread_time() + EPISODE_S
+    while time.thread_time() < stop:
+        a = np.tanh(a @ a)
+    return jsonify({'ok': True})
+
+@app.route('/stats')
+def stats():
+    return jsonify(admission_controller.stats())
+
+make_server('127.0.0.1', PORT, app, threaded=True).serve_forever()
+'''
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(server, port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'server exited with status {server.returncode} before listening')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server did not start listening on {port} within {timeout}s')
+
+
+def _client(port):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def call(path):
+        request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=b'', method='POST')
+        try:
+            with opener.open(request, timeout=300) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get('Retry-After')
+
+    return call
+
+
+def run(enabled, args):
+    port = _free_port()
+    code = (f'PORT = {port}\nENABLED = {enabled}\nEPISODE_S = {args.episode_ms / 1000.0}\n'
+            f'MAX_CONCURRENT = {args.max_concurrent}\nMAX_QUEUE = {args.max_queue}\n'
+            f'USER_RATE = {args.user_rate}\nUSER_BURST = {args.user_burst}\n' + SERVER)
+    env = dict(os.environ, OMP_NUM_THREADS='1', OPENBLAS_NUM_THREADS='1', MKL_NUM_THREADS='1')
+    server = subprocess.Popen([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(server, port)
+        players = []
+        for user_id in range(1, args.clients + 2):
+            call = _client(port)
+            call(f'/login/{user_id}')
+            players.append(call)
+
+        admitted, refused, statuses = [], [], {}
+        missing_retry_after = 0
+        lock = threading.Lock()
+        stop = time.perf_counter() + args.duration
+
+        def drive(call, think, polite):
+            nonlocal missing_retry_after
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                status, retry_after = call('/game')
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    statuses[status] = statuses.get(status, 0) + 1
+                    if status == 200:
+                        admitted.append(elapsed)
+                    else:
+                        refused.append(elapsed)
+                        missing_retry_after += retry_after is None
+                if status != 200 and polite and retry_after:
+                    time.sleep(float(retry_after) * random.uniform(0.5, 1.0))
+                else:
+                    time.sleep(think)
+
+        # The last player is the scripted client: no think time at all
+        threads = [threading.Thread(target=drive, args=(call, args.think_ms / 1000.0, True)) for call in players[:-1]]
+        threads.append(threading.Thread(target=drive, args=(players[-1], 0.0, False)))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = urllib.request.urlopen(f'http://127.0.0.1:{port}/stats', timeout=10).read()
+        return {
+            'admitted': summarize(admitted),
+            'refused': summarize(refused),
+            'statuses': statuses,
+            'missing_retry_after': missing_retry_after,
+            'games_per_sec': round(len(admitted) / args.duration, 1),
+            'server_stats': stats.decode(),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--episode-ms', type=float, default=50.0, help='CPU time per game')
+    parser.add_argument('--think-ms', type=float, default=200.0, help='pause between a player\'s games')
+    parser.add_argument('--max-concurrent', type=int, default=2)
+    parser.add_argument('--max-queue', type=int, default=4)
+    parser.add_argument('--user-rate', type=float, default=120.0, help='games/minute per player')
+    parser.add_argument('--user-burst', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.clients} players + 1 scripted client, {args.episode_ms:.0f} ms CPU per game, "
+          f"limit {args.max_concurrent} running + {args.max_queue} queued\n")
+    print(f"{'admission':<10} {'games/s':>8} {'ok p50 ms':>10} {'ok p99 ms':>10} {'ok max ms':>10} "
+          f"{'refused p99 ms':>15} {'statuses':>28}")
+    for enabled in (False, True):
+        r = run(enabled, args)
+        statuses = ' '.join(f'{code}:{count}' for code, count in sorted(r['statuses'].items()))
+        print(f"{'on' if enabled else 'off':<10} {r['games_per_sec']:>8} {r['admitted']['p50_ms']:>10} "
+              f"{r['admitted']['p99_ms']:>10} {r['admitted']['max_ms']:>10} {r['refused']['p99_ms']:>15} "
+              f"{statuses:>28}")
+        if r['missing_retry_after']:
+            print(f"  {r['missing_retry_after']} refusals without Retry-After")
+        if enabled:
+            print(f"  server: {r['server_stats']}")
+
+
+if __name__ == '__main__':
+    main()
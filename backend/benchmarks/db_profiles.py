@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Mixed read/write load benchmark for the database profiles.
+
+Writers replay the run_validation commit (insert a GameResult, update the
+player's totals, commit); readers replay the admin dashboard queries. Reports
+throughput and latency percentiles per operation for each profile.
+
+Usage (from backend/):
+    python benchmarks/db_profiles.py --profiles default sqlite
+    DATABASE_URL=postgresql://... python benchmarks/db_profiles.py --profiles postgresql
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from _common import make_db_app, summarize
+
+
+def _seed(app, users):
+    from database import db
+    from database.models import User
+
+    with app.app_context():
+        db.session.add_all([
+            User(username=f'bench{i}', email=f'bench{i}@example.com', password_hash='x')
+            for i in range(users)
+        ])
+        db.session.commit()
+        return [u.id for u in User.query.all()]
+
+
+def _write_op(user_id):
+    from database import db
+    from database.models import User, GameResult
+
+    score = random.choice([0, 25, 50, 100])
+    user = db.session.get(User, user_id)
+    db.session.add(GameResult(
+        user_id=user_id, agent_type=random.choice(['ddqn', 'd3qn']),
+        prediction=random.randint(1, 120), actual_steps=random.randint(20, 120),
+        score=score, gif_filename=None,
+    ))
+    user.total_score += score
+    user.games_played += 1
+    user.best_score = max(user.best_score, score)
+    db.session.commit()
+
+
+def _read_op():
+    from database import db
+    from database.models import User, GameResult
+
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    User.query.count()
+    GameResult.query.count()
+    db.session.query(db.func.sum(User.total_score)).scalar()
+    GameResult.query.filter(GameResult.timestamp >= week_ago).count()
+    User.query.order_by(User.total_score.desc()).limit(10).all()
+    db.session.rollback()
+
+
+def run_profile(profile, args):
+    overrides = {'DATABASE_PROFILE': profile}
+    app = make_db_app(**overrides)
+    user_ids = _seed(app, args.users)
+
+    latencies = {'write': [], 'read': []}
+    errors = {'write': 0, 'read': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def worker(kind):
+        from database import db
+        local, failed = [], 0
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    if kind == 'write':
+                        _write_op(random.choice(user_ids))
+                    else:
+                        _read_op()
+                    local.append(time.perf_counter() - started)
+                except Exception:
+                    db.session.rollback()
+                    failed += 1
+            db.session.remove()
+        with lock:
+            latencies[kind].extend(local)
+            errors[kind] += failed
+
+    threads = [threading.Thread(target=worker, args=('write',)) for _ in range(args.writers)]
+    threads += [threading.Thread(target=worker, args=('read',)) for _ in range(args.readers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'profile': profile,
+        'duration_s': round(elapsed, 2),
+        'writes_per_s': round(len(latencies['write']) / elapsed, 1),
+        'reads_per_s': round(len(latencies['read']) / elapsed, 1),
+        'write': dict(summarize(latencies['write']), errors=errors['write']),
+        'read': dict(summarize(latencies['read']), errors=errors['read']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', nargs='+', default=['default', 'sqlite'])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per profile')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    results = [run_profile(profile, args) for profile in args.profiles]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'profile':<12}{'writes/s':>10}{'reads/s':>10}{'w p50':>9}{'w p99':>9}{'r p50':>9}{'r p99':>9}{'errors':>8}")
+    for r in results:
+        print(f"{r['profile']:<12}{r['writes_per_s']:>10}{r['reads_per_s']:>10}"
+              f"{r['write']['p50_ms']:>9}{r['write']['p99_ms']:>9}"
+              f"{r['read']['p50_ms']:>9}{r['read']['p99_ms']:>9}"
+              f"{r['write']['errors'] + r['read']['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
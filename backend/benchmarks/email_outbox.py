@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Password-reset email: inline SMTP per request vs the background outbox.
+
+Runs against the local SMTP stand-in from tests/smtp_stand_in.py (no mail
+leaves the machine), which adds --handshake-ms to every new connection, as
+STARTTLS + AUTH against a remote provider would, and --message-ms per
+message.
+- inline: the previous behaviour, one connect/login/send/quit per request
+- outbox: the request only inserts an email_outbox row; the background
+  sender delivers over one reused authenticated connection in batches
+Timing only; claims, retries and permanent failures are covered by
+tests/test_email_outbox.py.
+
+Usage (from backend/):
+    python benchmarks/email_outbox.py --messages 50 --handshake-ms 300
+"""
+import argparse
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+
+from _common import make_db_app, summarize
+from tests.smtp_stand_in import StandInSMTP
+
+
+def _message(i):
+    email = EmailMessage()
+    email['From'] = 'no-reply@localhost'
+    email['To'] = f'player{i}@example.com'
+    email['Subject'] = 'Neural Navigator - Password Reset'
+    email.set_content(f'reset link {i}')
+    return email
+
+
+def run_inline(server, count):
+    latencies = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        smtp = smtplib.SMTP('127.0.0.1', server.port, timeout=30)
+        smtp.login('bench', 'bench')
+        smtp.send_message(_message(i))
+        smtp.quit()
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def _app(server, **overrides):
+    from services.email_outbox import EmailOutbox
+
+    settings = dict(MAIL_BACKEND='smtp', MAIL_SERVER='127.0.0.1', MAIL_PORT=server.port, MAIL_USE_TLS=False,
+                    MAIL_USERNAME='bench', MAIL_PASSWORD='bench', MAIL_DEFAULT_SENDER='no-reply@localhost',
+                    MAIL_POLL_INTERVAL=0.2)
+    settings.update(overrides)
+    app = make_db_app(**settings)
+    return app, EmailOutbox(app)
+
+
+def _wait_delivered(app, outbox, count, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        with app.app_context():
+            status = outbox.status()
+        if status['sent'] + status['failed'] >= count:
+            return status
+        time.sleep(0.02)
+    raise RuntimeError(f'outbox did not drain within {timeout}s: {status}')
+
+
+def run_outbox(server, count, batch_size):
+    app, outbox = _app(server, MAIL_BATCH_SIZE=batch_size)
+    latencies = []
+    started = time.perf_counter()
+    with app.app_context():
+        for i in range(count):
+            t0 = time.perf_counter()
+            message = _message(i)
+            outbox.enqueue(message['To'], message['Subject'], message.get_content())
+            latencies.append(time.perf_counter() - t0)
+    status = _wait_delivered(app, outbox, count, timeout=60 + count)
+    drained = time.perf_counter() - started
+    outbox.shutdown()
+    return latencies, drained, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--handshake-ms', type=float, default=300.0, help='delay per new SMTP connection')
+    parser.add_argument('--message-ms', type=float, default=5.0, help='delay per message')
+    parser.add_argument('--batch', type=int, default=20)
+    args = parser.parse_args()
+
+    server = StandInSMTP(args.handshake_ms / 1000.0, args.message_ms / 1000.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connections = server.connections
+        inline = run_inline(server, args.messages)
+        inline_connections = server.connections - connections
+        s = summarize(inline)
+        print(f"inline: request p50 {s['p50_ms']}ms p99 {s['p99_ms']}ms, "
+              f"{args.messages} messages in {sum(inline):.2f}s over {inline_connections} connections")
+
+        connections = server.connections
+        latencies, drained, status = run_outbox(server, args.messages, args.batch)
+        s = summarize(latencies)
+        print(f"outbox: request p50 {s['p50_ms']}ms p99 {s['p99_ms']}ms, "
+              f"{status['sent']} messages delivered {drained:.2f}s after the first request "
+              f"over {server.connections - connections} connections")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Environment reset latency: native maze generation vs the maze bank.
+
+Builds a --layouts maze bank in a temp file (as scripts/build_maze_bank.py
+does), then resets one native and one banked environment --resets times
+each with the same seeds and reports:
+- gen:   the layout step alone (MultiRoom's _gen_grid vs loading a banked layout)
+- reset: the whole env.reset(), first rendered observation included
+
+Usage (from backend/):
+    python benchmarks/env_reset.py --layouts 1000 --resets 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from _common import summarize
+
+
+def _timed_gen_grid(env, samples):
+    base = env.unwrapped
+    gen_grid = base._gen_grid
+
+    def timed(width, height):
+        started = time.perf_counter()
+        gen_grid(width, height)
+        samples.append(time.perf_counter() - started)
+
+    base._gen_grid = timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layouts', type=int, default=1000)
+    parser.add_argument('--resets', type=int, default=2000)
+    args = parser.parse_args()
+
+    from ai.environment import setup_environment
+    from ai.maze_bank import MazeBank
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'maze_bank.safetensors')
+        started = time.perf_counter()
+        MazeBank.generate(setup_environment(), args.layouts).save(path)
+        print(f'bank: {args.layouts} layouts in {time.perf_counter() - started:.1f}s, '
+              f'{os.path.getsize(path)} bytes')
+        bank = MazeBank.load(path)
+
+        for name, env in (('native', setup_environment()), ('banked', setup_environment(maze_bank=bank))):
+            gen, reset = [], []
+            _timed_gen_grid(env, gen)
+            for seed in range(args.resets):
+                started = time.perf_counter()
+                env.reset(seed=seed)
+                reset.append(time.perf_counter() - started)
+            print(f'{name:7s} gen   {summarize(gen)}')
+            print(f'{name:7s} reset {summarize(reset)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Games/sec committed under concurrent players.
+
+Compares the legacy per-game commit (ORM read-modify-write of the user row,
+one commit per game) with the write-behind buffer in sync and async
+durability. After each run the user totals are checked against the game rows
+to count lost updates.
+
+Usage (from backend/):
+    python benchmarks/game_writes.py --players 50 --duration 10
+"""
+import argparse
+import random
+import threading
+import time
+
+from _common import make_db_app, summarize
+
+
+def _seed(app, players):
+    from database import db
+    from database.models import User
+
+    with app.app_context():
+        db.session.add_all([
+            User(username=f'player{i}', email=f'player{i}@example.com', password_hash='x')
+            for i in range(players)
+        ])
+        db.session.commit()
+        return [u.id for u in User.query.all()]
+
+
+def _legacy_write(user_id, score):
+    from database import db
+    from database.models import User, GameResult
+
+    user = db.session.get(User, user_id)
+    db.session.add(GameResult(user_id=user_id, agent_type='ddqn', prediction=50,
+                              actual_steps=60, score=score))
+    user.total_score += score
+    user.games_played += 1
+    if score > user.best_score:
+        user.best_score = score
+    db.session.commit()
+
+
+def _check_totals(app):
+    from database import db
+    from database.models import User, GameResult
+
+    with app.app_context():
+        games = GameResult.query.count()
+        played = db.session.query(db.func.sum(User.games_played)).scalar() or 0
+        return games, games - played
+
+
+def run_mode(mode, args):
+    overrides = {
+        'GAME_WRITE_BEHIND': mode != 'direct',
+        'GAME_WRITE_DURABILITY': 'async' if mode == 'buffer-async' else 'sync',
+        'GAME_WRITE_BATCH_SIZE': args.batch_size,
+        'GAME_WRITE_FLUSH_MS': args.flush_ms,
+    }
+    app = make_db_app(**overrides)
+    from services.game_writer import GameWriteBuffer
+    writer = GameWriteBuffer(app)
+    user_ids = _seed(app, args.players)
+
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def player(user_id):
+        from database import db
+        local = []
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                score = random.choice([0, 25, 50, 100])
+                started = time.perf_counter()
+                try:
+                    if mode == 'direct':
+                        _legacy_write(user_id, score)
+                    else:
+                        writer.submit(user_id=user_id, agent_type='ddqn', prediction=50,
+                                      actual_steps=60, score=score)
+                    local.append(time.perf_counter() - started)
+                except Exception:
+                    db.session.rollback()
+                    with lock:
+                        errors[0] += 1
+            db.session.remove()
+        with lock:
+            latencies.extend(local)
+
+    # Two players share each account so the user-row race is exercised
+    threads = [threading.Thread(target=player, args=(user_ids[i // 2],)) for i in range(args.players)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    writer.shutdown()
+    elapsed = time.perf_counter() - started
+
+    committed, lost = _check_totals(app)
+    return dict(summarize(latencies), mode=mode, committed=committed,
+                games_per_s=round(committed / elapsed, 1), lost_updates=lost,
+                errors=errors[0], batches=writer.stats['batches'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['direct', 'buffer-sync', 'buffer-async'])
+    parser.add_argument('--players', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--flush-ms', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'mode':<14}{'games/s':>10}{'committed':>11}{'batches':>9}{'p50 ms':>9}{'p99 ms':>9}{'lost':>6}{'errors':>8}")
+    for mode in args.modes:
+        r = run_mode(mode, args)
+        print(f"{r['mode']:<14}{r['games_per_s']:>10}{r['committed']:>11}{r['batches']:>9}"
+              f"{r['p50_ms']:>9}{r['p99_ms']:>9}{r['lost_updates']:>6}{r['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
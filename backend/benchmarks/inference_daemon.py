@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Action-query round-trip latency and total memory: in-process vs inference daemon.
+
+Starts --workers worker processes that each ask for one greedy action per
+step, as an episode does, for --duration seconds:
+- local: every worker imports torch and loads both networks itself
+- daemon: workers stay torch-free and query `python -m ai.inference_server`
+  over its Unix socket (the daemon batches concurrent queries)
+Reports per-query latency, total queries/sec, and the summed PSS of all
+processes involved (workers plus daemon), read from /proc at the end.
+
+Usage (from backend/; Linux only):
+    python benchmarks/inference_daemon.py --workers 8 --duration 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _common import BACKEND_DIR, summarize
+
+WORKER = r'''
+import json, sys, time
+import numpy as np
+from ai.inference import inference_client, get_policy
+
+if SOCKET:
+    inference_client.configure(SOCKET)
+else:
+    import torch
+    from ai.model_registry import model_registry
+    torch.set_num_threads(TORCH_THREADS)  # as gunicorn's post_fork does
+    model_registry.model_folder = MODEL_FOLDER
+policies = {agent: get_policy(agent) for agent in ('ddqn', 'd3qn')}
+
+rng = np.random.default_rng()
+states = rng.integers(0, 255, size=(64, 1, 56, 56)).astype(np.float32)
+print('READY', flush=True)
+sys.stdin.readline()
+
+latencies = []
+stop = time.perf_counter() + DURATION
+i = 0
+while time.perf_counter() < stop:
+    agent = 'ddqn' if i % 2 else 'd3qn'
+    t0 = time.perf_counter()
+    policies[agent].act(states[i % len(states)])
+    latencies.append(time.perf_counter() - t0)
+    i += 1
+
+pss = 0
+with open('/proc/self/smaps_rollup') as f:
+    for line in f:
+        if line.startswith('Pss:'):
+            pss = int(line.split()[1])
+print('RESULT ' + json.dumps({'latencies': latencies, 'pss_kb': pss, 'torch': 'torch' in sys.modules}), flush=True)
+'''
+
+
+def _pss_kb(pid):
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1])
+    return 0
+
+
+def run(mode, args):
+    from config import Config
+
+    daemon = None
+    socket_path = ''
+    if mode == 'daemon':
+        socket_path = os.path.join(tempfile.mkdtemp(prefix='nn-inference-'), 'inference.sock')
+        daemon = subprocess.Popen([sys.executable, '-m', 'ai.inference_server', '--socket', socket_path],
+                                  cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + 120
+        while not os.path.exists(socket_path):
+            if daemon.poll() is not None or time.time() > deadline:
+                raise RuntimeError('inference daemon did not start')
+            time.sleep(0.2)
+
+    code = (f'SOCKET = {socket_path!r}\nMODEL_FOLDER = {str(Config.MODEL_FOLDER)!r}\n'
+            f'DURATION = {args.duration!r}\nTORCH_THREADS = {Config.TORCH_NUM_THREADS!r}\n' + WORKER)
+    workers = [subprocess.Popen([sys.executable, '-c', code], cwd=BACKEND_DIR, text=True,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+               for _ in range(args.workers)]
+    try:
+        for worker in workers:
+            if worker.stdout.readline().strip() != 'READY':
+                raise RuntimeError('worker failed to start')
+        for worker in workers:
+            worker.stdin.write('go\n')
+            worker.stdin.flush()
+
+        results = []
+        for worker in workers:
+            for line in worker.stdout:
+                if line.startswith('RESULT '):
+                    results.append(json.loads(line[len('RESULT '):]))
+                    break
+        daemon_pss = _pss_kb(daemon.pid) if daemon else 0
+    finally:
+        for worker in workers:
+            worker.kill()
+        if daemon:
+            daemon.terminate()
+            daemon.wait(timeout=30)
+
+    latencies = [latency for result in results for latency in result['latencies']]
+    return {
+        'queries_per_sec': round(len(latencies) / args.duration, 1),
+        'latency': summarize(latencies),
+        'worker_pss_mb': round(sum(r['pss_kb'] for r in results) / 1024, 1),
+        'daemon_pss_mb': round(daemon_pss / 1024, 1),
+        'total_pss_mb': round((sum(r['pss_kb'] for r in results) + daemon_pss) / 1024, 1),
+        'workers_with_torch': sum(1 for r in results if r['torch']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['local', 'daemon'], choices=['local', 'daemon'])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'q/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'workers MB':>11} {'daemon MB':>10} {'total MB':>9} {'torch':>6}")
+    for mode in args.modes:
+        r = run(mode, args)
+        print(f"{mode:<8} {r['queries_per_sec']:>8} {r['latency']['p50_ms']:>8} {r['latency']['p95_ms']:>8} "
+              f"{r['latency']['p99_ms']:>8} {r['worker_pss_mb']:>11} {r['daemon_pss_mb']:>10} "
+              f"{r['total_pss_mb']:>9} {r['workers_with_torch']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the player journey.
+
+Virtual players arrive at --arrival-rate per second (Poisson arrivals, at
+most --concurrency in flight; later arrivals wait for a slot and the wait
+is reported) until --users have arrived. Each one registers, logs in and
+plays --games games of /api/run-validation alternating DDQN and D3QN,
+fetching the replay and polling /api/me after every game, with --think-ms
+between actions. Meanwhile the first registered user (the admin) polls the
+admin endpoints every --admin-interval seconds.
+
+By default the app is started in a subprocess on 127.0.0.1 (threaded
+server, scratch SQLite database and replay folder, --env KEY=VALUE passed
+as environment, e.g. --env ADMISSION_USER_RATE=0). --url targets a server
+that is already running instead; it must be on this machine, and
+--admin-username/--admin-password log the admin poller in there.
+
+Reports throughput, latency percentiles, status codes and error rates per
+endpoint (429/503 refusals from admission control count as errors), saves
+them as JSON under benchmarks/reports/ (or --output) and, with --compare,
+prints the change against an earlier report.
+
+Usage (from backend/):
+    python benchmarks/load_test.py --users 12 --concurrency 4 --arrival-rate 1 --games 2
+    python benchmarks/load_test.py --env ADMISSION_USER_RATE=0 --compare benchmarks/reports/<earlier>.json
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 --admin-username admin --admin-password ...
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+from _common import BACKEND_DIR, summarize
+
+REPORT_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'reports')
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+AGENTS = ('ddqn', 'd3qn')
+ADMIN_ENDPOINTS = ('/api/admin/stats', '/api/admin/users', '/api/admin/games', '/api/admin/charts/activity',
+                   '/api/admin/storage', '/api/admin/admission', '/api/admin/maintenance')
+
+SERVER = r'''
+import os
+from werkzeug.serving import make_server
+from config import Config
+from app import create_app
+
+workdir = os.environ['LOADTEST_WORKDIR']
+
+class LoadTestConfig(Config):
+    DEBUG = False
+    VIDEO_FOLDER = os.path.join(workdir, 'videos')
+    PROFILE_FOLDER = os.path.join(workdir, 'profiles')
+
+app = create_app(LoadTestConfig)
+make_server('127.0.0.1', int(os.environ['PORT']), app, threaded=True).serve_forever()
+'''
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(server, port, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'server exited with status {server.returncode} before listening')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f'server did not start listening on {port} within {timeout}s')
+
+
+def start_server(env_overrides):
+    """Start the app on a free loopback port with scratch storage; returns (process, base url, workdir)."""
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix='nn-load-')
+    env = dict(os.environ, PORT=str(port), FLASK_DEBUG='False', PYTHONUNBUFFERED='1',
+               LOADTEST_WORKDIR=workdir,
+               DATABASE_PATH=os.path.join(workdir, 'load.db'),
+               LOG_FILE=os.path.join(workdir, 'app.log'))
+    env.update(env_overrides)
+    with open(os.path.join(workdir, 'server.out'), 'w') as out:
+        server = subprocess.Popen([sys.executable, '-c', SERVER], cwd=BACKEND_DIR, env=env,
+                                  stdout=out, stderr=subprocess.STDOUT)
+    _wait_for_port(server, port)
+    return server, f'http://127.0.0.1:{port}', workdir
+
+
+class Recorder:
+    """Latency, status and error tallies per endpoint, shared by all client threads."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.lock = threading.Lock()
+
+    def add(self, endpoint, elapsed, status):
+        with self.lock:
+            entry = self.endpoints.setdefault(endpoint, {'latencies': [], 'statuses': {}})
+            entry['latencies'].append(elapsed)
+            entry['statuses'][str(status)] = entry['statuses'].get(str(status), 0) + 1
+
+    def report(self, duration):
+        endpoints, total, errors = {}, 0, 0
+        for endpoint, entry in sorted(self.endpoints.items()):
+            count = len(entry['latencies'])
+            failed = sum(n for status, n in entry['statuses'].items() if not status.startswith(('2', '3')))
+            total += count
+            errors += failed
+            endpoints[endpoint] = dict(
+                summarize(entry['latencies']),
+                errors=failed,
+                error_rate=round(failed / count, 4) if count else 0.0,
+                requests_per_sec=round(count / duration, 3) if duration else 0.0,
+                statuses=dict(sorted(entry['statuses'].items())),
+            )
+        return endpoints, total, errors
+
+
+class Client:
+    """One browser session: a cookie jar and timed JSON requests."""
+
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def call(self, method, path, body=None, endpoint=None):
+        """Returns (status, parsed JSON body or None); transport failures are recorded as status 'error'."""
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=300) as response:
+                status, payload, content_type = response.status, response.read(), response.headers.get('Content-Type', '')
+        except urllib.error.HTTPError as e:
+            status, payload, content_type = e.code, e.read(), e.headers.get('Content-Type', '')
+        except OSError:
+            status, payload, content_type = 'error', b'', ''
+        self.recorder.add(endpoint or f'{method} {path.split("?")[0]}', time.perf_counter() - started, status)
+        if 'json' in content_type:
+            try:
+                return status, json.loads(payload)
+            except ValueError:
+                pass
+        return status, None
+
+
+def journey(client, name, games, think, rng):
+    """Register, log in and play; True when every step succeeded."""
+    ok = True
+    password = 'load-test-password'
+    status, _ = client.call('POST', '/api/register', {'username': name, 'email': f'{name}@example.com',
+                                                      'password': password, 'skip_auto_login': True})
+    ok &= status == 200
+    status, _ = client.call('POST', '/api/login', {'username': name, 'password': password})
+    if status != 200:
+        return False
+    for game in range(games):
+        time.sleep(think)
+        prediction = 'fail' if rng.random() < 0.1 else str(rng.randint(1, 120))
+        status, result = client.call('POST', '/api/run-validation',
+                                     {'agent_type': AGENTS[game % 2], 'prediction': prediction})
+        ok &= status == 200
+        if status == 200 and result and result.get('gif_url'):
+            status, _ = client.call('GET', result['gif_url'], endpoint='GET /video/<replay>')
+            ok &= status == 200
+        status, _ = client.call('GET', '/api/me')
+        ok &= status == 200
+    return ok
+
+
+def poll_admin(client, interval, stop):
+    index = 0
+    while not stop.wait(interval):
+        client.call('GET', ADMIN_ENDPOINTS[index % len(ADMIN_ENDPOINTS)])
+        index += 1
+
+
+def run(base_url, args):
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    tag = datetime.utcnow().strftime('%H%M%S')
+
+    admin = Client(base_url, recorder)
+    if args.admin_username:
+        admin.call('POST', '/api/login', {'username': args.admin_username, 'password': args.admin_password})
+    else:
+        # On a fresh database the first account becomes the admin
+        admin.call('POST', '/api/register', {'username': f'ltadmin{tag}', 'email': f'ltadmin{tag}@example.com',
+                                             'password': 'load-test-password'})
+    stop = threading.Event()
+    poller = threading.Thread(target=poll_admin, args=(admin, args.admin_interval, stop), daemon=True)
+
+    slots = threading.BoundedSemaphore(args.concurrency)
+    outcomes, arrival_waits, threads = [], [], []
+
+    def player(index, seed):
+        try:
+            client = Client(base_url, recorder)
+            outcomes.append(journey(client, f'lt{tag}u{index}', args.games, args.think_ms / 1000.0,
+                                    random.Random(seed)))
+        finally:
+            slots.release()
+
+    started = time.perf_counter()
+    poller.start()
+    for index in range(args.users):
+        time.sleep(rng.expovariate(args.arrival_rate))
+        arrived = time.perf_counter()
+        slots.acquire()
+        arrival_waits.append(time.perf_counter() - arrived)
+        thread = threading.Thread(target=player, args=(index, rng.random()))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+    stop.set()
+    poller.join()
+
+    endpoints, total, errors = recorder.report(duration)
+    games = endpoints.get('POST /api/run-validation', {})
+    return {
+        'created_at': datetime.utcnow().isoformat(),
+        'commit': _git_commit(),
+        'host': {'python': platform.python_version(), 'cpus': os.cpu_count(), 'platform': platform.platform()},
+        'settings': {key: value for key, value in vars(args).items()
+                     if key not in ('admin_password', 'output', 'compare')},
+        'duration_s': round(duration, 2),
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'requests_per_sec': round(total / duration, 3),
+        'games_per_min': round(games.get('count', 0) / duration * 60, 2),
+        'journeys': {'completed': sum(outcomes), 'failed': len(outcomes) - sum(outcomes)},
+        'arrival_wait': summarize(arrival_waits),
+        'endpoints': endpoints,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_report(report, previous=None):
+    def delta(new, old):
+        if old in (None, 0):
+            return ''
+        return f' ({(new - old) / old:+.0%})'
+
+    old = previous or {}
+    print(f"{report['requests']} requests in {report['duration_s']}s: {report['requests_per_sec']} req/s"
+          f"{delta(report['requests_per_sec'], old.get('requests_per_sec'))}, "
+          f"{report['games_per_min']} games/min{delta(report['games_per_min'], old.get('games_per_min'))}, "
+          f"error rate {report['error_rate']:.1%}, journeys {report['journeys']['completed']} ok / "
+          f"{report['journeys']['failed']} failed, arrival wait p95 {report['arrival_wait']['p95_ms']}ms")
+    print(f"{'endpoint':<32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}  statuses")
+    for endpoint, s in report['endpoints'].items():
+        change = delta(s['p95_ms'], old.get('endpoints', {}).get(endpoint, {}).get('p95_ms'))
+        print(f"{endpoint:<32} {s['count']:>6} {s['p50_ms']:>9} {s['p95_ms']:>9} {s['p99_ms']:>9} {s['max_ms']:>9} "
+              f"{s['errors']:>7}  {s['statuses']}" + (f'  p95{change}' if change else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=12, help='virtual players in total')
+    parser.add_argument('--concurrency', type=int, default=4, help='players in flight at most')
+    parser.add_argument('--arrival-rate', type=float, default=1.0, help='new players per second')
+    parser.add_argument('--games', type=int, default=2, help='games per player')
+    parser.add_argument('--think-ms', type=float, default=500.0, help='pause before each game')
+    parser.add_argument('--admin-interval', type=float, default=2.0, help='seconds between admin requests')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='setting for the started server (repeatable)')
+    parser.add_argument('--url', help='running local server to test instead of starting one')
+    parser.add_argument('--admin-username')
+    parser.add_argument('--admin-password')
+    parser.add_argument('--output', help='report path (default benchmarks/reports/load-<time>.json)')
+    parser.add_argument('--compare', help='earlier report to compare against')
+    args = parser.parse_args()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+    server = workdir = None
+    if args.url:
+        if urllib.parse.urlsplit(args.url).hostname not in LOCAL_HOSTS:
+            parser.error('--url must point at this machine (127.0.0.1, localhost or ::1)')
+        base_url = args.url.rstrip('/')
+    else:
+        overrides = dict(item.split('=', 1) for item in args.env)
+        server, base_url, workdir = start_server(overrides)
+    try:
+        report = run(base_url, args)
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    report['target'] = args.url or 'subprocess'
+
+    output = args.output or os.path.join(REPORT_DIR, f"load-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_report(report, previous)
+    print(f"\nreport saved to {output}" + (f" (server output in {workdir}/server.out)" if workdir else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Cost of a log call on the request thread: direct handlers vs the queue pipeline.
+
+--threads threads each log --records WARNING records (written to both the
+console stream and the log file), --interval-ms apart as request threads
+doing other work would, and time every call.
+- direct: the previous setup_logging, a StreamHandler and a FileHandler on
+  app.logger, so the caller formats and writes under the handler locks
+- queue: utils/logging_config.setup_logging, the caller only enqueues and
+  the listener thread formats JSON and writes
+--slow-sink-ms adds a delay to every console write, as a congested stdout
+pipe (a busy log shipper) would. Also reports how many of a per-frame
+render-error storm (--storm records from one call site) reach the output.
+
+Usage (from backend/):
+    python benchmarks/logging_pipeline.py --threads 8 --records 2000 --slow-sink-ms 0.2
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from _common import summarize
+
+
+class SlowStream:
+    """File-backed stream whose writes take at least `delay` seconds."""
+
+    def __init__(self, path, delay):
+        self._file = open(path, 'w')
+        self.delay = delay
+
+    def write(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+
+def _app(workdir, **overrides):
+    from flask import Flask
+    from config import Config
+
+    settings = dict(DEBUG=False, TESTING=True, LOG_FILE=os.path.join(workdir, 'app.log'))
+    settings.update(overrides)
+    app = Flask('benchmark')
+    app.config.from_object(type('BenchConfig', (Config,), settings))
+    return app
+
+
+def setup_direct(app):
+    """The previous setup_logging: handlers write on the calling thread."""
+    from flask.logging import default_handler
+
+    # Left out (it also wrote every record to stderr) to compare like for like
+    app.logger.removeHandler(default_handler)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(formatter)
+    file_handler = logging.FileHandler(app.config['LOG_FILE'])
+    file_handler.setLevel(logging.WARNING)
+    file_handler.setFormatter(formatter)
+    app.logger.addHandler(file_handler)
+    app.logger.addHandler(console)
+    app.logger.setLevel(logging.INFO)
+    app.logger.propagate = False
+
+
+def hammer(logger, threads, records, interval):
+    latencies = [[] for _ in range(threads)]
+
+    def worker(index):
+        samples = latencies[index]
+        for i in range(records):
+            t0 = time.perf_counter()
+            logger.warning('worker %d game %d finished', index, i)
+            samples.append(time.perf_counter() - t0)
+            time.sleep(interval)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return [s for samples in latencies for s in samples], elapsed
+
+
+def run(mode, args):
+    from utils.logging_config import log_stats, setup_logging
+
+    workdir = tempfile.mkdtemp(prefix='nn-logging-')
+    stdout = sys.stdout
+    sys.stdout = SlowStream(os.path.join(workdir, 'console.log'), args.slow_sink_ms / 1000.0)
+    try:
+        app = _app(workdir, LOG_QUEUE_SIZE=args.queue)
+        if mode == 'direct':
+            setup_direct(app)
+        else:
+            setup_logging(app)
+        latencies, elapsed = hammer(app.logger, args.threads, args.records, args.interval_ms / 1000.0)
+        stats = log_stats() if mode == 'queue' else None
+
+        storm_written = None
+        if mode == 'queue':
+            before = log_stats()['suppressed']
+            storm = logging.getLogger('ai.game_runner')
+            for step in range(args.storm):
+                storm.warning('Rendering error: frame %d', step, extra={'sample': True})
+            storm_written = args.storm - (log_stats()['suppressed'] - before)
+        drain_started = time.perf_counter()
+        for handler in logging.getLogger().handlers:
+            if hasattr(handler, 'pipeline'):
+                handler.pipeline.stop()
+        drained = time.perf_counter() - drain_started
+        return latencies, elapsed, drained, stats, storm_written
+    finally:
+        sys.stdout = stdout
+        # Flask apps named alike share one logger; leave it clean for the next mode
+        for handler in list(app.logger.handlers):
+            app.logger.removeHandler(handler)
+            handler.close()
+        app.logger.propagate = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--records', type=int, default=2000, help='records per thread')
+    parser.add_argument('--interval-ms', type=float, default=1.0, help='pause between calls per thread')
+    parser.add_argument('--slow-sink-ms', type=float, default=0.2, help='delay per console write')
+    parser.add_argument('--queue', type=int, default=10000, help='LOG_QUEUE_SIZE')
+    parser.add_argument('--storm', type=int, default=1200, help='render errors from one call site')
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.records} records every {args.interval_ms} ms, "
+          f"console write delay {args.slow_sink_ms} ms")
+    for mode in ('direct', 'queue'):
+        latencies, elapsed, drained, stats, storm_written = run(mode, args)
+        s = summarize(latencies)
+        line = (f"{mode:>7}: per call p50 {s['p50_ms']}ms p99 {s['p99_ms']}ms max {s['max_ms']}ms, "
+                f"{len(latencies) / elapsed:,.0f} calls/s")
+        if stats is not None:
+            line += (f", {stats['dropped']} dropped (queue full), listener drained the rest in {drained:.2f}s; "
+                     f"render-error storm: {storm_written} of {args.storm} written")
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
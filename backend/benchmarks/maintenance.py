@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Housekeeping vs request traffic: one big transaction vs budgeted increments.
+
+Seeds --tokens expired password-reset tokens, then purges them while a
+writer thread inserts a token every 5 ms (standing in for request writes)
+and records how long each insert takes:
+- one-shot: a single DELETE of every expired row in one transaction
+- scheduler: the purge_reset_tokens job, MAINTENANCE_BATCH_SIZE rows per
+  increment with MAINTENANCE_PAUSE_MS between them, turns of
+  MAINTENANCE_BUDGET seconds
+Then checks the single-runner lease: --schedulers independent schedulers
+(standing in for workers) race for one shared job for --race seconds, and
+at most one may run it at any moment.
+
+Usage (from backend/):
+    python benchmarks/maintenance.py --tokens 200000
+"""
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+
+from _common import make_db_app, summarize
+
+
+def _seed(app, count):
+    from database import db
+    from database.models import User, PasswordResetToken
+
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        expired = datetime.utcnow() - timedelta(days=2)
+        db.session.execute(PasswordResetToken.__table__.insert(), [
+            {'user_id': user.id, 'token': f'expired-{i}', 'expires_at': expired, 'used': False}
+            for i in range(count)
+        ])
+        db.session.commit()
+        return user.id
+
+
+def _with_writer(app, user_id, purge):
+    """Run purge() while timing small inserts; returns (insert latencies, purge seconds)."""
+    from database import db
+    from database.models import PasswordResetToken
+
+    latencies = []
+    done = threading.Event()
+
+    def writer():
+        i = 0
+        while not done.is_set():
+            with app.app_context():
+                t0 = time.perf_counter()
+                db.session.add(PasswordResetToken(user_id=user_id, token=f'live-{time.time_ns()}-{i}'))
+                db.session.commit()
+                latencies.append(time.perf_counter() - t0)
+                db.session.remove()
+            i += 1
+            time.sleep(0.005)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    time.sleep(0.2)
+    started = time.perf_counter()
+    purge()
+    elapsed = time.perf_counter() - started
+    time.sleep(0.2)
+    done.set()
+    thread.join()
+    return latencies, elapsed
+
+
+def run_one_shot(count):
+    from sqlalchemy import delete
+    from database import db
+    from database.models import PasswordResetToken
+
+    app = make_db_app()
+    user_id = _seed(app, count)
+
+    def purge():
+        with app.app_context():
+            db.session.execute(delete(PasswordResetToken).where(PasswordResetToken.expires_at < datetime.utcnow()))
+            db.session.commit()
+
+    return _with_writer(app, user_id, purge)
+
+
+def run_scheduler(count):
+    from services.maintenance import MaintenanceScheduler, purge_reset_tokens
+
+    app = make_db_app(MAINTENANCE_ENABLED=False)
+    user_id = _seed(app, count)
+    scheduler = MaintenanceScheduler(app)
+    scheduler.register('purge_reset_tokens', purge_reset_tokens, 3600)
+    turns = []
+
+    def purge():
+        # What the scheduler thread does: a turn, then the next one a tick later while backlog remains
+        while True:
+            record = scheduler.run_job('purge_reset_tokens', force=True)
+            turns.append(record)
+            if record['last_status'] != 'partial':
+                break
+
+    latencies, elapsed = _with_writer(app, user_id, purge)
+    return latencies, elapsed, turns
+
+
+def check_single_runner(schedulers, seconds):
+    from services.maintenance import MaintenanceScheduler
+
+    app = make_db_app(MAINTENANCE_ENABLED=False, MAINTENANCE_JITTER=0)
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0, 'runs': 0}
+
+    def job(run):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            state['runs'] += 1
+        time.sleep(0.05)
+        with lock:
+            state['active'] -= 1
+        return {}
+
+    instances = []
+    for _ in range(schedulers):
+        scheduler = MaintenanceScheduler(app)
+        scheduler.register('contended', job, interval=0.25)
+        instances.append(scheduler)
+    stop = time.monotonic() + seconds
+
+    def worker(scheduler):
+        while time.monotonic() < stop:
+            scheduler.run_job('contended')
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in instances]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tokens', type=int, default=200000, help='expired tokens to purge')
+    parser.add_argument('--schedulers', type=int, default=4)
+    parser.add_argument('--race', type=float, default=5.0, help='seconds of the single-runner check')
+    args = parser.parse_args()
+
+    latencies, elapsed = run_one_shot(args.tokens)
+    s = summarize(latencies)
+    print(f"one-shot:  purge {elapsed:.2f}s, insert p50 {s['p50_ms']}ms p99 {s['p99_ms']}ms max {s['max_ms']}ms")
+
+    latencies, elapsed, turns = run_scheduler(args.tokens)
+    s = summarize(latencies)
+    deleted = sum(t['last_result']['deleted'] for t in turns)
+    print(f"scheduler: purge {elapsed:.2f}s in {len(turns)} turns ({deleted} rows), "
+          f"insert p50 {s['p50_ms']}ms p99 {s['p99_ms']}ms max {s['max_ms']}ms")
+
+    state = check_single_runner(args.schedulers, args.race)
+    expected = int(args.race / 0.25)
+    ok = state['peak'] == 1
+    print(f"single runner: {args.schedulers} schedulers, {state['runs']} runs in {args.race:.0f}s "
+          f"(interval 0.25s, ~{expected} expected), at most {state['peak']} at once -> {'OK' if ok else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Login throughput and its effect on other requests: hashing pool sizes compared.
+
+Starts the app in a threaded server subprocess on a scratch database,
+registers --users players, then --clients threads log in back to back for
+--duration seconds while a probe thread times a light request (GET /api/me)
+every 50 ms. Runs once per --workers value (PASSWORD_HASH_WORKERS); a value
+as large as --clients behaves like hashing on the request threads, with no
+bound.
+
+Also checks rehash-on-login: a user stored with an old hash (werkzeug's
+scrypt default) logs in and must come back with the configured pbkdf2 hash.
+
+Usage (from backend/; Linux only):
+    python benchmarks/password_hashing.py --clients 16 --workers 16 2 --duration 15
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from _common import BACKEND_DIR, summarize
+
+SERVER = r'''
+from werkzeug.serving import make_server
+from app import create_app
+app = create_app()
+make_server('127.0.0.1', PORT, app, threaded=True).serve_forever()
+'''
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(server, port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'server exited with status {server.returncode} before listening')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server did not start listening on {port} within {timeout}s')
+
+
+def _client(port):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def call(method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with opener.open(request, timeout=300) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    return call
+
+
+def run(workers, args):
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix='nn-password-')
+    env = dict(os.environ, FLASK_DEBUG='False', DATABASE_PATH=os.path.join(workdir, 'bench.db'),
+               REPLAY_SWEEPER_ENABLED='False', PASSWORD_HASH_WORKERS=str(workers),
+               PASSWORD_HASH_QUEUE=str(args.clients), PASSWORD_HASH_ITERATIONS=str(args.iterations))
+    server = subprocess.Popen([sys.executable, '-c', f'PORT = {port}\n' + SERVER], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(server, port)
+        call = _client(port)
+        for i in range(args.users):
+            call('POST', '/api/register', {'username': f'bench{i}', 'email': f'bench{i}@example.com',
+                                           'password': 'benchmark', 'skip_auto_login': True})
+
+        logins, probes, statuses = [], [], {}
+        lock = threading.Lock()
+        stop = time.perf_counter() + args.duration
+
+        def storm(index):
+            call = _client(port)
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                status, _ = call('POST', '/api/login', {'username': f'bench{index % args.users}',
+                                                       'password': 'benchmark'})
+                with lock:
+                    statuses[status] = statuses.get(status, 0) + 1
+                    if status == 200:
+                        logins.append(time.perf_counter() - t0)
+
+        def probe():
+            call = _client(port)
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                call('GET', '/api/me')
+                probes.append(time.perf_counter() - t0)
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=storm, args=(i,)) for i in range(args.clients)]
+        threads.append(threading.Thread(target=probe))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return {
+            'logins_per_sec': round(len(logins) / args.duration, 1),
+            'login': summarize(logins),
+            'probe': summarize(probes),
+            'statuses': statuses,
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def check_rehash(iterations):
+    """A scrypt-hashed user is upgraded to the configured pbkdf2 hash on login."""
+    from werkzeug.security import generate_password_hash
+    from _common import make_db_app
+    from database import db
+    from database.models import User
+    from services.password_service import PasswordService
+
+    app = make_db_app(PASSWORD_HASH_ITERATIONS=iterations)
+    service = PasswordService(app)
+    with app.app_context():
+        user = User(username='legacy', email='legacy@example.com',
+                    password_hash=generate_password_hash('benchmark', 'scrypt'))
+        db.session.add(user)
+        db.session.commit()
+        old = user.password_hash.split('$', 1)[0]
+        ok = service.verify_and_update(user, 'benchmark')
+        db.session.commit()
+        new = db.session.get(User, user.id).password_hash
+        upgraded = ok and not service.needs_rehash(new) and service.verify(new, 'benchmark')
+        wrong = service.verify_and_update(user, 'wrong-password')
+    return old, new.split('$', 1)[0], upgraded and not wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', nargs='+', type=int, default=[16, 2], help='PASSWORD_HASH_WORKERS values')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--users', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--iterations', type=int, default=600000)
+    args = parser.parse_args()
+
+    old, new, ok = check_rehash(args.iterations)
+    print(f"rehash on login: {old} -> {new}: {'OK' if ok else 'MISMATCH'}\n")
+
+    print(f"{args.clients} clients logging in, pbkdf2:sha256:{args.iterations}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'logins/s':>9} {'login p50':>10} {'login p99':>10} {'probe p50':>10} "
+          f"{'probe p99':>10}  statuses")
+    for workers in args.workers:
+        r = run(workers, args)
+        statuses = ' '.join(f'{code}:{count}' for code, count in sorted(r['statuses'].items()))
+        print(f"{workers:>8} {r['logins_per_sec']:>9} {r['login']['p50_ms']:>10} {r['login']['p99_ms']:>10} "
+              f"{r['probe']['p50_ms']:>10} {r['probe']['p99_ms']:>10}  {statuses}")
+
+
+if __name__ == '__main__':
+    main()
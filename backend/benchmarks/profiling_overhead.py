@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Per-request cost of the request profiler (middleware/profiling.py).
+
+Times --requests requests to an endpoint that burns about --work-ms of CPU
+in a helper function, with the profiler:
+- off: PROFILING_ENABLED false, no hooks installed
+- idle: enabled but nothing triggers it (no X-Profile header, rate 0)
+- profiling: every request profiled (PROFILE_SAMPLE_RATE 1), saved to disk
+For the profiled run it also reports which share of the samples landed in
+the helper, which should match the share of time the request spends there.
+
+Usage (from backend/):
+    python benchmarks/profiling_overhead.py --requests 300 --work-ms 20
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from _common import make_db_app, summarize
+
+
+def burn(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def run(mode, args):
+    from flask import jsonify
+    from middleware.profiling import RequestProfiler
+
+    folder = tempfile.mkdtemp(prefix='nn-profiles-')
+    app = make_db_app(
+        PROFILING_ENABLED=mode != 'off',
+        PROFILE_SAMPLE_RATE=1.0 if mode == 'profiling' else 0.0,
+        PROFILE_INTERVAL_MS=args.interval_ms,
+        PROFILE_FOLDER=folder,
+        PROFILE_MAX_FILES=args.requests,
+    )
+    profiler = RequestProfiler(app)
+
+    @app.route('/work')
+    def work():
+        return jsonify({'total': burn(args.work_ms / 1000.0)})
+
+    client = app.test_client()
+    latencies = []
+    for _ in range(args.requests):
+        t0 = time.perf_counter()
+        client.get('/work')
+        latencies.append(time.perf_counter() - t0)
+
+    share = None
+    if mode == 'profiling':
+        in_burn = total = 0
+        for name in os.listdir(folder):
+            if not name.endswith('.folded'):
+                continue
+            with open(os.path.join(folder, name)) as f:
+                for line in f:
+                    stack, _, count = line.rpartition(' ')
+                    total += int(count)
+                    if ';burn (' in stack:
+                        in_burn += int(count)
+        share = in_burn / total if total else 0.0
+    return latencies, share, profiler.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--work-ms', type=float, default=20.0, help='CPU time per request')
+    parser.add_argument('--interval-ms', type=float, default=5.0, help='PROFILE_INTERVAL_MS')
+    args = parser.parse_args()
+
+    baseline = None
+    for mode in ('off', 'idle', 'profiling'):
+        latencies, share, stats = run(mode, args)
+        s = summarize(latencies)
+        line = f"{mode:>9}: p50 {s['p50_ms']}ms p99 {s['p99_ms']}ms"
+        if baseline is None:
+            baseline = s['p50_ms']
+        else:
+            line += f" ({s['p50_ms'] - baseline:+.3f}ms p50 vs off)"
+        if share is not None:
+            line += f", {stats['profiled']} profiles saved, {share:.0%} of samples in the {args.work_ms:g}ms helper"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
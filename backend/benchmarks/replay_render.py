@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Replay frame rendering: env.render() vs the incremental ReplayRenderer.
+
+Plays --episodes seeded MultiRoom episodes with random actions (mostly
+forward and door toggles, up to MAX_STEPS each) and records every frame
+twice: with env.render() and with ai/replay_renderer.py (the copy the game
+runner keeps included). Reports per-frame time of both, checks the frames
+are pixel-identical at the env's tile size, and for each --tile-sizes entry
+the renderer's per-frame time plus GIF encoding time and size of one replay.
+
+Usage (from backend/):
+    python benchmarks/replay_render.py --episodes 50 --tile-sizes 32 16 8
+"""
+import argparse
+import io
+import time
+
+import numpy as np
+
+from _common import summarize
+
+# Mostly forward and toggle (doors), some turns, and the unused actions now and then
+ACTION_P = [0.2, 0.2, 0.35, 0.02, 0.02, 0.19, 0.02]
+
+
+def _episode(env, seed, rng, renderers, max_steps):
+    """Step one episode; returns {name: (frame times, frames)} for every render function."""
+    recorded = {name: ([], []) for name in renderers}
+    env.reset(seed=seed)
+    for action in rng.choice(len(ACTION_P), size=max_steps, p=ACTION_P).tolist():
+        _, _, done, truncated, _ = env.step(action)
+        for name, render in renderers.items():
+            started = time.perf_counter()
+            frame = render()
+            recorded[name][0].append(time.perf_counter() - started)
+            recorded[name][1].append(frame)
+        if done or truncated:
+            break
+    return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--episodes', type=int, default=50)
+    parser.add_argument('--tile-sizes', type=int, nargs='+', default=[32, 16, 8])
+    parser.add_argument('--max-steps', type=int, default=120)
+    args = parser.parse_args()
+
+    import imageio
+    from ai.environment import setup_environment
+    from ai.replay_renderer import ReplayRenderer
+
+    env = setup_environment()
+    renderers = {'env.render': env.render}
+    for tile_size in args.tile_sizes:
+        renderer = ReplayRenderer(tile_size)
+        renderers[f'renderer@{tile_size}'] = (lambda renderer=renderer: renderer.render(env).copy())
+
+    rng = np.random.default_rng(0)
+    times = {name: [] for name in renderers}
+    mismatched = 0
+    frames = 0
+    replay = None
+    for seed in range(args.episodes):
+        recorded = _episode(env, seed, rng, renderers, args.max_steps)
+        for name, (samples, _) in recorded.items():
+            times[name].extend(samples)
+        native = recorded['env.render'][1]
+        frames += len(native)
+        same_size = [name for name in recorded
+                     if name != 'env.render' and recorded[name][1][0].shape == native[0].shape]
+        mismatched += sum(not np.array_equal(a, b) for name in same_size
+                          for a, b in zip(native, recorded[name][1]))
+        if replay is None or len(native) > len(replay['env.render'][1]):
+            replay = recorded
+
+    print(f'{args.episodes} episodes, {frames} frames, pixel check at env tile size: '
+          f"{'identical' if not mismatched else f'{mismatched} MISMATCHED frames'}")
+    for name, samples in times.items():
+        gif = io.BytesIO()
+        started = time.perf_counter()
+        imageio.mimsave(gif, replay[name][1], format='GIF', duration=0.1, loop=0)
+        encode_ms = (time.perf_counter() - started) * 1000
+        print(f'{name:13s} frame {summarize(samples)}  '
+              f'gif of {len(replay[name][1])} frames: {encode_ms:.0f}ms, {gif.tell()} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Rescoring stored games after a scoring rule change.
+
+Seeds --games game rows (spread over --players players and the last 30
+days) scored under an older rule set (close <= 5 steps, far <= 15, no
+120-step special case), with player totals, per-agent rollups and hourly
+analytics consistent with those scores. Then runs a rescoring job's two
+phases unthrottled, in RESCORE_CHUNK_SIZE / RESCORE_USER_CHUNK_SIZE chunks:
+- games: vectorized scoring and updates of the changed rows
+- users: set-based recompute of score totals and bests
+and reports each phase's throughput, next to the cost of scoring the first
+--baseline-rows games one calculate_score call at a time. Afterwards every
+score, total and analytics sum is checked against the current rules.
+
+Usage (from backend/):
+    python benchmarks/rescoring.py --games 1000000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from _common import make_db_app
+
+
+def _old_scores(predicted, actual):
+    difference = np.abs(predicted - actual)
+    scores = np.select([difference == 0, difference <= 5, difference <= 15], [100, 50, 25], default=0)
+    return np.where((predicted < 1) | (predicted > 120), 0, scores)
+
+
+def _seed(app, games, players, seed):
+    from database import db
+    from database.models import User
+
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'player{i}', 'email': f'player{i}@example.com', 'password_hash': 'x',
+             'created_at': now, 'total_score': 0, 'games_played': 0, 'best_score': 0,
+             'is_admin': False, 'is_active': True}
+            for i in range(players)
+        ])
+        db.session.commit()
+
+        connection = db.session.connection().connection
+        for start in range(0, games, 100000):
+            size = min(100000, games - start)
+            user_ids = rng.integers(1, players + 1, size)
+            agents = rng.integers(0, 2, size)
+            actual = rng.integers(10, 121, size)
+            predicted = np.where(rng.random(size) < 0.1, 0, np.clip(actual + rng.integers(-25, 26, size), 1, 120))
+            scores = _old_scores(predicted, actual)
+            offsets = rng.integers(0, 30 * 24 * 3600, size)
+            connection.executemany(
+                'INSERT INTO game_result (user_id, agent_type, prediction, actual_steps, score, timestamp) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(int(u), ('ddqn', 'd3qn')[a], int(p), int(s), int(sc), str(now - timedelta(seconds=int(o))))
+                 for u, a, p, s, sc, o in zip(user_ids, agents, predicted, actual, scores, offsets)]
+            )
+        # Aggregates as the game writer would have left them
+        connection.executescript('''
+            UPDATE user SET total_score = (SELECT COALESCE(SUM(score), 0) FROM game_result WHERE user_id = user.id),
+                            best_score = (SELECT COALESCE(MAX(score), 0) FROM game_result WHERE user_id = user.id),
+                            games_played = (SELECT COUNT(*) FROM game_result WHERE user_id = user.id);
+            INSERT INTO user_agent_stats (user_id, agent_type, games_played, total_score, best_score,
+                                          abs_error_sum, exact_hits)
+                SELECT user_id, agent_type, COUNT(*), SUM(score), MAX(score), 0, 0
+                FROM game_result GROUP BY user_id, agent_type;
+            INSERT INTO analytics_hourly (bucket_start, agent_type, games, successes, score_sum, new_users)
+                SELECT substr(timestamp, 1, 13) || ':00:00.000000', agent_type, COUNT(*),
+                       SUM(actual_steps < 120), SUM(score), 0
+                FROM game_result GROUP BY 1, 2;
+        ''')
+        db.session.commit()
+
+
+def _check(app, max_steps):
+    from database import db
+    from services.scoring_service import calculate_score
+
+    with app.app_context():
+        connection = db.session.connection()
+        sample = connection.exec_driver_sql(
+            'SELECT prediction, actual_steps, score FROM game_result ORDER BY random() LIMIT 20000').all()
+        scores_ok = all(score == calculate_score(prediction or 'fail', steps, steps < max_steps)
+                        for prediction, steps, score in sample)
+        users_off = connection.exec_driver_sql('''
+            SELECT COUNT(*) FROM user u WHERE total_score != (SELECT COALESCE(SUM(score), 0) FROM game_result
+                                                             WHERE user_id = u.id)
+                                       OR best_score != (SELECT COALESCE(MAX(score), 0) FROM game_result
+                                                         WHERE user_id = u.id)''').scalar()
+        stats_off = connection.exec_driver_sql('''
+            SELECT COUNT(*) FROM user_agent_stats s WHERE total_score != (
+                SELECT SUM(score) FROM game_result WHERE user_id = s.user_id AND agent_type = s.agent_type)''').scalar()
+        analytics_ok = connection.exec_driver_sql(
+            'SELECT (SELECT SUM(score_sum) FROM analytics_hourly) = (SELECT SUM(score) FROM game_result)').scalar()
+        return scores_ok and not users_off and not stats_off and bool(analytics_ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=1000000)
+    parser.add_argument('--players', type=int, default=5000)
+    parser.add_argument('--chunk-size', type=int, default=10000, help='RESCORE_CHUNK_SIZE')
+    parser.add_argument('--user-chunk-size', type=int, default=2000, help='RESCORE_USER_CHUNK_SIZE')
+    parser.add_argument('--baseline-rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    from database import db
+    from services.rescoring_service import rescore_games, rescore_users, start_rescore
+    from services.scoring_service import calculate_score
+
+    app = make_db_app()
+    started = time.perf_counter()
+    _seed(app, args.games, args.players, args.seed)
+    print(f"seeded {args.games} games for {args.players} players in {time.perf_counter() - started:.1f}s")
+    max_steps = app.config.get('MAX_STEPS', 120)
+
+    with app.app_context():
+        rows = db.session.connection().exec_driver_sql(
+            f'SELECT prediction, actual_steps FROM game_result LIMIT {int(args.baseline_rows)}').all()
+        started = time.perf_counter()
+        for prediction, steps in rows:
+            calculate_score(prediction or 'fail', steps, steps < max_steps)
+        baseline_s = time.perf_counter() - started
+        print(f"per-row calculate_score: {len(rows)} games in {baseline_s * 1000:.0f}ms "
+              f"({len(rows) / baseline_s:,.0f} games/s, scoring only)")
+
+        job = start_rescore()
+        started = time.perf_counter()
+        while rescore_games(job, args.chunk_size, max_steps):
+            db.session.commit()
+        games_s = time.perf_counter() - started
+        print(f"games phase: {job.games_scanned} scanned, {job.games_changed} changed "
+              f"(score delta {job.score_delta:+}) in {games_s:.2f}s "
+              f"({job.games_scanned / games_s:,.0f} games/s, {job.games_scanned / games_s * 60 / 1e6:.1f}M/min)")
+
+        started = time.perf_counter()
+        users = 0
+        while True:
+            count = rescore_users(job, args.user_chunk_size)
+            db.session.commit()
+            if not count:
+                break
+            users += count
+        users_s = time.perf_counter() - started
+        print(f"users phase: {users} players, {job.users_changed} totals and {job.stats_changed} agent rollups "
+              f"corrected in {users_s:.2f}s")
+
+    print(f"check: {'consistent' if _check(app, max_steps) else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
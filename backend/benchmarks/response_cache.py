@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Response cache: read-heavy JSON endpoints with and without cached responses.
+
+Builds the app on a scratch SQLite database seeded with --players players
+(with per-agent rollups) and --games games, logs in as an admin, then
+requests /api/me, /api/admin/stats, /api/admin/users and /api/admin/games
+--requests times each (in-process test client, so no network):
+- uncached: the response cache disabled, every request runs the view
+- hit:      served from the cache (data versions unchanged)
+- 304:      the client sends the ETag back in If-None-Match
+After one write (a user update) the next request of each endpoint must be a
+miss with fresh data; the cache's hit ratios are printed at the end.
+
+Usage (from backend/):
+    python benchmarks/response_cache.py --players 5000 --games 200000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from _common import summarize
+
+ENDPOINTS = ('/api/me', '/api/admin/stats', '/api/admin/users', '/api/admin/games')
+
+
+def _make_app(workdir):
+    from config import Config
+    from app import create_app
+
+    class BenchConfig(Config):
+        DEBUG = False
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        VIDEO_FOLDER = os.path.join(workdir, 'videos')
+        PROFILE_FOLDER = os.path.join(workdir, 'profiles')
+        MAINTENANCE_ENABLED = False
+        LOG_FILE = os.path.join(workdir, 'app.log')
+
+    app = create_app(BenchConfig)
+    app.logger.setLevel('WARNING')
+    return app
+
+
+def _seed(app, players, games, seed):
+    from database import db
+
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    with app.app_context():
+        connection = db.session.connection().connection
+        connection.executemany(
+            'INSERT INTO user (username, email, password_hash, created_at, total_score, games_played, best_score, '
+            'is_admin, is_active) VALUES (?, ?, ?, ?, 0, 0, 0, 0, 1)',
+            [(f'player{i}', f'player{i}@example.com', 'x', str(now - timedelta(minutes=i))) for i in range(players)])
+        user_ids = rng.integers(2, players + 2, games)
+        offsets = rng.integers(0, 30 * 24 * 3600, games)
+        scores = rng.choice([0, 25, 50, 100], games)
+        connection.executemany(
+            'INSERT INTO game_result (user_id, agent_type, prediction, actual_steps, score, timestamp) '
+            'VALUES (?, ?, 50, 60, ?, ?)',
+            [(int(u), ('ddqn', 'd3qn')[i % 2], int(s), str(now - timedelta(seconds=int(o))))
+             for i, (u, s, o) in enumerate(zip(user_ids, scores, offsets))])
+        connection.executescript('''
+            UPDATE user SET total_score = (SELECT COALESCE(SUM(score), 0) FROM game_result WHERE user_id = user.id),
+                            games_played = (SELECT COUNT(*) FROM game_result WHERE user_id = user.id);
+            INSERT INTO user_agent_stats (user_id, agent_type, games_played, total_score, best_score,
+                                          abs_error_sum, exact_hits)
+                SELECT user_id, agent_type, COUNT(*), SUM(score), MAX(score), 0, 0
+                FROM game_result GROUP BY user_id, agent_type;
+        ''')
+        db.session.commit()
+
+
+def _time(client, path, requests, headers=None):
+    samples, statuses = [], set()
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path, headers=headers)
+        samples.append(time.perf_counter() - started)
+        statuses.add(response.status_code)
+    return samples, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=5000)
+    parser.add_argument('--games', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    from database import db
+    from database.models import User
+    from services.response_cache import response_cache
+
+    app = _make_app(tempfile.mkdtemp(prefix='nn-cache-'))
+    client = app.test_client()
+    # The first registered user becomes the admin
+    client.post('/api/register', json={'username': 'admin', 'email': 'admin@example.com', 'password': 'secret1'})
+    started = time.perf_counter()
+    _seed(app, args.players, args.games, args.seed)
+    print(f'seeded {args.players} players and {args.games} games in {time.perf_counter() - started:.1f}s')
+
+    for path in ENDPOINTS:
+        response_cache.enabled = False
+        uncached, _ = _time(client, path, args.requests)
+        response_cache.enabled = True
+        etag = client.get(path).headers['ETag']
+        hits, _ = _time(client, path, args.requests)
+        revalidated, statuses = _time(client, path, args.requests, headers={'If-None-Match': etag})
+        print(f'{path}')
+        print(f'  uncached {summarize(uncached)}')
+        print(f'  hit      {summarize(hits)}')
+        print(f'  304      {summarize(revalidated)} statuses {sorted(statuses)}')
+
+    # A write must make every dependent entry stale at once
+    before = {path: client.get(path).get_data() for path in ENDPOINTS}
+    with app.app_context():
+        db.session.get(User, 1).total_score = 123456
+        db.session.commit()
+    fresh = {path: client.get(path).get_data() != before[path] for path in ENDPOINTS if path != '/api/admin/games'}
+    print(f"after a user write: {'all refreshed' if all(fresh.values()) else f'STALE {fresh}'}")
+    print(f"hit ratio {response_cache.stats()['hit_ratio']}, entries {response_cache.stats()['entries']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Open round result streams one process can hold: threaded server vs ASGI.
+
+Starts one server process on a scratch database, either gunicorn with one
+gthread worker of --threads threads (the production threaded server) or
+uvicorn serving asgi.py's ASGI app, opens a tournament round that closes
+after --hold seconds, then opens --streams concurrent
+GET /api/rounds/<id>/events streams. Reported per mode:
+- live streams: streams that received their first status event within
+  --connect-timeout (the rest are queued behind busy threads, or refused)
+- responsiveness while they are open: latency of plain GET /api/rounds/<id>
+  requests, with timeouts counted
+- worker RSS and thread count with every stream open
+- result delivery once the maintenance job scores the round: streams that
+  got the result event, and the spread from the first to the last
+
+Usage (from backend/; Linux only, needs gunicorn and uvicorn):
+    python benchmarks/result_streams.py --streams 2000 --threads 4 --hold 20
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from _common import BACKEND_DIR, summarize
+
+SERVER = r'''
+import os
+import ai
+from config import Config
+from app import create_app
+
+workdir = os.environ['STREAMS_WORKDIR']
+
+class StreamsConfig(Config):
+    DEBUG = False
+    VIDEO_FOLDER = os.path.join(workdir, 'videos')
+    PROFILE_FOLDER = os.path.join(workdir, 'profiles')
+
+app = create_app(StreamsConfig)
+with app.app_context():
+    ai.warm_up(environments=2)
+port = int(os.environ['PORT'])
+
+if os.environ['STREAMS_MODE'] == 'asgi':
+    import uvicorn
+    from middleware.asgi import AsgiApp
+    from routes.async_routes import ASYNC_VIEWS
+    uvicorn.run(AsgiApp(app, ASYNC_VIEWS), host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+else:
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in {'bind': f'127.0.0.1:{port}', 'workers': 1, 'worker_class': 'gthread',
+                               'threads': int(os.environ['WEB_THREADS']), 'timeout': 600,
+                               'backlog': 4096, 'worker_connections': 100000}.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Server().run()
+'''
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(server, port, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'server exited with status {server.returncode} before listening')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f'server did not start listening on {port} within {timeout}s')
+
+
+def _client(port):
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+
+    def call(method, path, body=None, timeout=300):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        with opener.open(req, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'null')
+
+    return call
+
+
+def _worker_pid(server):
+    """The process serving requests: gunicorn's worker, or the uvicorn process itself."""
+    try:
+        with open(f'/proc/{server.pid}/task/{server.pid}/children') as f:
+            children = [int(child) for child in f.read().split()]
+    except FileNotFoundError:
+        children = []
+    return children[0] if children else server.pid
+
+
+def _process_status(pid):
+    """(rss_mb, threads) of one process."""
+    values = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            values[name] = value.split()
+    return round(int(values['VmRSS'][0]) / 1024, 1), int(values['Threads'][0])
+
+
+class Stream:
+    """One raw SSE connection, timing its first status event and its result event."""
+
+    def __init__(self):
+        self.first_event = None
+        self.result = None
+        self.error = None
+
+    async def run(self, port, path, started, deadline):
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        except OSError as e:
+            self.error = type(e).__name__
+            return
+        try:
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n'.encode())
+            await writer.drain()
+            received = b''
+            while self.result is None:
+                chunk = await asyncio.wait_for(reader.read(65536), max(0.01, deadline - time.perf_counter()))
+                if not chunk:
+                    break
+                received += chunk
+                now = time.perf_counter()
+                if self.first_event is None and b'event: status' in received:
+                    self.first_event = now - started
+                if b'event: result' in received:
+                    self.result = now
+        except (asyncio.TimeoutError, OSError) as e:
+            self.error = self.error or type(e).__name__
+        finally:
+            writer.close()
+
+
+async def _probe(port, path, count, timeout):
+    """Latencies of plain GET requests made one after another, and how many timed out."""
+    latencies, timeouts = [], 0
+    loop = asyncio.get_running_loop()
+    for _ in range(count):
+        call = _client(port)
+        started = time.perf_counter()
+        try:
+            await loop.run_in_executor(None, lambda: call('GET', path, timeout=timeout))
+            latencies.append(time.perf_counter() - started)
+        except Exception:
+            timeouts += 1
+    return latencies, timeouts
+
+
+async def _measure(port, server, round_id, args):
+    path = f'/api/rounds/{round_id}/events'
+    streams = [Stream() for _ in range(args.streams)]
+    started = time.perf_counter()
+    deadline = started + args.hold + args.result_timeout
+    tasks = []
+    for index, stream in enumerate(streams):
+        tasks.append(asyncio.ensure_future(stream.run(port, path, started, deadline)))
+        if index % 100 == 99:
+            await asyncio.sleep(0.05)  # open in waves so the listen backlog is not the limit
+
+    await asyncio.sleep(args.connect_timeout)
+    live = [s.first_event for s in streams if s.first_event is not None and s.first_event <= args.connect_timeout]
+    rss_mb, threads = _process_status(_worker_pid(server))
+    probe_latencies, probe_timeouts = await _probe(port, f'/api/rounds/{round_id}', args.probes,
+                                                   args.probe_timeout)
+    await asyncio.gather(*tasks)
+
+    delivered = sorted(s.result for s in streams if s.result is not None)
+    errors = {}
+    for s in streams:
+        if s.error:
+            errors[s.error] = errors.get(s.error, 0) + 1
+    return {
+        'live_streams': len(live),
+        'first_event': summarize(live),
+        'worker_rss_mb': rss_mb,
+        'worker_threads': threads,
+        'probe': summarize(probe_latencies),
+        'probe_timeouts': probe_timeouts,
+        'results_delivered': len(delivered),
+        'result_spread_ms': round((delivered[-1] - delivered[0]) * 1000, 1) if delivered else None,
+        'errors': errors,
+    }
+
+
+def run(mode, args):
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix='nn-streams-')
+    env = dict(os.environ, PORT=str(port), FLASK_DEBUG='False', PYTHONUNBUFFERED='1',
+               STREAMS_MODE=mode, STREAMS_WORKDIR=workdir, WEB_THREADS=str(args.threads),
+               DATABASE_PATH=os.path.join(workdir, 'streams.db'),
+               LOG_FILE=os.path.join(workdir, 'app.log'),
+               MAINTENANCE_TICK='1', TOURNAMENT_CLOSE_INTERVAL='1',
+               RESULT_STREAM_POLL_INTERVAL='0.5', RESULT_STREAM_HEARTBEAT='5')
+    with open(os.path.join(workdir, 'server.out'), 'w') as out:
+        server = subprocess.Popen([sys.executable, '-c', SERVER], cwd=BACKEND_DIR, env=env,
+                                  stdout=out, stderr=subprocess.STDOUT)
+    try:
+        _wait_for_port(server, port)
+        admin = _client(port)
+        # The first registered user is the admin; the request also starts the maintenance scheduler
+        admin('POST', '/api/register', {'username': 'admin', 'email': 'admin@example.com', 'password': 'benchmark'})
+        _, tournament_round = admin('POST', '/api/rounds', {'duration_seconds': args.hold, 'seed': 1234})
+        idle_rss_mb, idle_threads = _process_status(_worker_pid(server))
+        result = asyncio.run(_measure(port, server, tournament_round['id'], args))
+        result.update(idle_rss_mb=idle_rss_mb, idle_threads=idle_threads)
+        return result
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['threaded', 'asgi'], choices=['threaded', 'asgi'])
+    parser.add_argument('--streams', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4, help='gthread threads (WEB_THREADS)')
+    parser.add_argument('--hold', type=float, default=20.0, help='seconds until the round closes')
+    parser.add_argument('--connect-timeout', type=float, default=10.0)
+    parser.add_argument('--result-timeout', type=float, default=60.0, help='seconds after --hold to wait for results')
+    parser.add_argument('--probes', type=int, default=5)
+    parser.add_argument('--probe-timeout', type=float, default=3.0)
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        result = run(mode, args)
+        print(f"\n{mode}: {result['live_streams']}/{args.streams} streams live within {args.connect_timeout:g}s, "
+              f"first event {result['first_event']}")
+        print(f"  worker RSS {result['idle_rss_mb']}MB idle -> {result['worker_rss_mb']}MB, "
+              f"threads {result['idle_threads']} -> {result['worker_threads']}")
+        print(f"  GET /api/rounds/<id> meanwhile: {result['probe']}, {result['probe_timeouts']} timed out "
+              f"after {args.probe_timeout:g}s")
+        print(f"  result delivered to {result['results_delivered']}/{args.streams} streams, "
+              f"first to last {result['result_spread_ms']}ms, errors {result['errors'] or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
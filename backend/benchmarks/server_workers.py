@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Requests/sec and memory per worker: Flask dev server vs the prefork server.
+
+Starts each server as a subprocess on a scratch database, registers a
+player, drives --clients concurrent clients for --duration seconds and then
+reads RSS and PSS (proportional set size: shared pages split between the
+processes sharing them) for every server process from /proc. PSS well below
+RSS on the workers means the preloaded weights are shared copy-on-write.
+
+Usage (from backend/; Linux only):
+    python benchmarks/server_workers.py --workers 4 --threads 2 --clients 8 --duration 20
+    python benchmarks/server_workers.py --endpoint me   # light request, no episode
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from _common import BACKEND_DIR, summarize
+
+ENDPOINTS = {
+    'game': ('POST', '/api/run-validation', {'agent_type': 'ddqn', 'prediction': '60'}),
+    'me': ('GET', '/api/me', None),
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(server, port, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'server exited with status {server.returncode} before listening')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f'server did not start listening on {port} within {timeout}s')
+
+
+def _client(port):
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+
+    def call(method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        with opener.open(req, timeout=300) as response:
+            return response.status, response.read()
+
+    return call
+
+
+def _memory(pid):
+    """(rss_kb, pss_kb) for one process."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1]] = int(parts[1])
+    return values.get('Rss', 0), values.get('Pss', 0)
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def run(mode, args):
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix='nn-server-')
+    env = dict(os.environ,
+               PORT=str(port), FLASK_HOST='127.0.0.1', FLASK_DEBUG='False',
+               DATABASE_PATH=os.path.join(workdir, 'bench.db'),
+               REPLAY_SWEEPER_ENABLED='False', PYTHONUNBUFFERED='1',
+               WEB_WORKERS=str(args.workers), WEB_THREADS=str(args.threads),
+               WEB_MAX_REQUESTS='0')
+    if mode == 'dev':
+        command = [sys.executable, 'app.py']
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                   '--access-logfile', os.devnull, 'wsgi:app']
+
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(server, port)
+        startup = time.perf_counter() - started
+
+        method, path, body = ENDPOINTS[args.endpoint]
+        clients = []
+        for i in range(args.clients):
+            call = _client(port)
+            call('POST', '/api/register', {'username': f'bench{i}', 'email': f'bench{i}@example.com',
+                                           'password': 'benchmark'})
+            call(method, path, body)  # warm-up (loads the models lazily on the dev server)
+            clients.append(call)
+
+        latencies, errors = [], []
+        stop = time.perf_counter() + args.duration
+
+        def drive(call):
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                try:
+                    call(method, path, body)
+                    latencies.append(time.perf_counter() - t0)
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=drive, args=(call,)) for call in clients]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        processes = [server.pid] + _children(server.pid)
+        memory = {pid: _memory(pid) for pid in processes}
+        return {
+            'startup_s': round(startup, 2),
+            'requests_per_sec': round(len(latencies) / args.duration, 2),
+            'errors': len(errors),
+            'latency': summarize(latencies),
+            'processes': len(processes),
+            'memory_kb': memory,
+            'total_rss_mb': round(sum(rss for rss, _ in memory.values()) / 1024, 1),
+            'total_pss_mb': round(sum(pss for _, pss in memory.values()) / 1024, 1),
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['dev', 'prefork'], choices=['dev', 'prefork'])
+    parser.add_argument('--endpoint', default='game', choices=sorted(ENDPOINTS))
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0)
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        result = run(mode, args)
+        print(f"\n{mode}: {result['requests_per_sec']} req/s, p50 {result['latency']['p50_ms']}ms, "
+              f"p95 {result['latency']['p95_ms']}ms, {result['errors']} errors, startup {result['startup_s']}s")
+        print(f"  {result['processes']} processes, total RSS {result['total_rss_mb']}MB, "
+              f"total PSS {result['total_pss_mb']}MB")
+        for pid, (rss, pss) in result['memory_kb'].items():
+            print(f"    pid {pid}: RSS {rss / 1024:.1f}MB  PSS {pss / 1024:.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Startup time and memory of the web app, with an import breakdown and a budget.
+
+Each run starts a fresh interpreter with `python -X importtime`, imports app
+and calls create_app(), then reports wall time, RSS and which heavy AI
+modules got imported. The importtime output is folded by top-level package
+(self time) to show where startup goes. With --warm-up the run also times
+ai.warm_up(), i.e. what the first game (or a prefork master) pays.
+
+Exits non-zero if the best create_app run exceeds --budget-ms (default
+STARTUP_BUDGET_MS, 1500) or if any of the --forbid modules was imported
+during startup. The Docker build runs it, so an image that starts slowly
+or imports torch at startup is never built:
+
+    python benchmarks/startup_time.py --runs 3
+
+Usage (from backend/):
+    python benchmarks/startup_time.py --runs 3 --top 15 --warm-up
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+from _common import BACKEND_DIR
+
+HEAVY_MODULES = ['torch', 'cv2', 'gymnasium', 'minigrid', 'imageio']
+# create_app budget (best of --runs), overridable for slow build machines
+DEFAULT_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
+
+CHILD = r'''
+import json, os, sys, time
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app()
+created = time.perf_counter()
+result = {
+    'import_ms': (imported - started) * 1000,
+    'create_ms': (created - started) * 1000,
+    'heavy_loaded': [m for m in HEAVY if m in sys.modules],
+    'rss_mb': rss_mb(),
+}
+if WARM_UP:
+    import ai
+    with application.app_context():
+        ai.warm_up()
+    result['warm_up_ms'] = (time.perf_counter() - created) * 1000
+    result['warm_rss_mb'] = rss_mb()
+# Not stdout: the app's log listener thread writes JSON records there
+with open(os.environ['STARTUP_RESULT'], 'w') as f:
+    json.dump(result, f)
+'''
+
+
+def _run_once(warm_up):
+    workdir = tempfile.mkdtemp(prefix='nn-startup-')
+    result_path = os.path.join(workdir, 'result.json')
+    env = dict(os.environ, REPLAY_SWEEPER_ENABLED='False', STARTUP_RESULT=result_path,
+               DATABASE_PATH=os.path.join(workdir, 'startup.db'),
+               LOG_FILE=os.path.join(workdir, 'app.log'))
+    code = f'HEAVY = {HEAVY_MODULES!r}\nWARM_UP = {bool(warm_up)}\n' + CHILD
+    try:
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=BACKEND_DIR,
+                                 env=env, capture_output=True, text=True)
+        if process.returncode != 0 or not os.path.exists(result_path):
+            raise RuntimeError(f'startup run failed:\n{process.stderr[-2000:]}')
+        with open(result_path) as f:
+            result = json.load(f)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    by_package = defaultdict(int)
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        by_package[name.strip().split('.')[0]] += int(self_us)
+    result['packages_ms'] = {name: us / 1000 for name, us in by_package.items()}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters to start (best is reported)')
+    parser.add_argument('--top', type=int, default=15, help='packages to list in the breakdown')
+    parser.add_argument('--warm-up', action='store_true', help='also time ai.warm_up()')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='fail if create_app takes longer (0 = no budget)')
+    parser.add_argument('--forbid', nargs='*', default=HEAVY_MODULES,
+                        help='fail if any of these modules is imported by create_app')
+    args = parser.parse_args()
+
+    runs = [_run_once(args.warm_up) for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda r: r['create_ms'])
+
+    print(f"import app: {best['import_ms']:.0f}ms   create_app total: {best['create_ms']:.0f}ms   "
+          f"RSS: {best['rss_mb']:.0f}MB   (best of {len(runs)})")
+    if 'warm_up_ms' in best:
+        print(f"ai.warm_up(): {best['warm_up_ms']:.0f}ms   RSS after: {best['warm_rss_mb']:.0f}MB")
+    print(f"heavy modules imported: {', '.join(best['heavy_loaded']) or 'none'}")
+    print(f"\n{'package':<28} {'self ms':>9}")
+    for name, ms in sorted(best['packages_ms'].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<28} {ms:>9.1f}")
+
+    failures = []
+    if args.budget_ms and best['create_ms'] > args.budget_ms:
+        failures.append(f"create_app took {best['create_ms']:.0f}ms, budget is {args.budget_ms:.0f}ms")
+    forbidden = sorted(set(args.forbid) & set(best['heavy_loaded']))
+    if forbidden:
+        failures.append(f"startup imported {', '.join(forbidden)}")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
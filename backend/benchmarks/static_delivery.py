@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Bytes and worker time per visit for the frontend page and replays.
+
+A visit loads index.html and --replays replay GIFs. A small browser cache
+model honours Cache-Control (fresh entries are not requested at all) and
+revalidates stale ones with If-None-Match. Compares:
+- legacy: the previous handlers (plain send_from_directory/send_file, no
+  Cache-Control, no compression)
+- cached: the current handlers (immutable replays, pre-encoded HTML, 304s)
+Repeat visits are where the difference shows.
+
+Usage (from backend/):
+    python benchmarks/static_delivery.py --visits 200 --replays 5
+"""
+import argparse
+import os
+import time
+
+from _common import make_db_app, summarize
+
+
+class BrowserCache:
+    """Just enough of a browser HTTP cache to replay repeat visits."""
+
+    def __init__(self, client, accept_encoding):
+        self.client = client
+        self.accept_encoding = accept_encoding
+        self.entries = {}
+        self.bytes = 0
+        self.requests = 0
+
+    def get(self, url):
+        entry = self.entries.get(url)
+        if entry and entry['expires'] > time.time():
+            return 0.0
+        headers = {'Accept-Encoding': self.accept_encoding}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+
+        started = time.perf_counter()
+        response = self.client.get(url, headers=headers)
+        body = response.get_data()
+        elapsed = time.perf_counter() - started
+
+        self.requests += 1
+        self.bytes += len(body) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        if response.status_code == 200:
+            max_age = response.cache_control.max_age if not response.cache_control.no_cache else 0
+            self.entries[url] = {'etag': response.headers.get('ETag'),
+                                 'expires': time.time() + (max_age or 0)}
+        return elapsed
+
+
+def _legacy_routes(app):
+    from flask import send_file, send_from_directory
+
+    @app.route('/legacy/')
+    def legacy_index():
+        return send_from_directory(app.config['FRONTEND_FOLDER'], 'index.html')
+
+    @app.route('/legacy/video/<filename>')
+    def legacy_video(filename):
+        from services.replay_store import replay_store
+        canonical_name, video_path = replay_store.resolve(filename)
+        if os.path.exists(video_path):
+            replay_store.touch(canonical_name)
+            return send_file(video_path, mimetype='image/gif')
+        return "File not found", 404
+
+
+def _make_app(replays):
+    from routes.static_routes import static_bp
+    from services.replay_store import init_replay_store, replay_store
+    from services.static_delivery import init_static_delivery
+
+    app = make_db_app(REPLAY_SWEEPER_ENABLED=False)
+    app.register_blueprint(static_bp)
+    _legacy_routes(app)
+    init_replay_store(app)
+    init_static_delivery(app)
+
+    names = []
+    with app.app_context():
+        for _ in range(replays):
+            path = replay_store.incoming_path('.gif')
+            with open(path, 'wb') as f:
+                f.write(os.urandom(60 * 1024))  # typical 120-step replay size
+            names.append(replay_store.store(path))
+    return app, names
+
+
+def run(app, names, prefix, accept_encoding, visits):
+    browser = BrowserCache(app.test_client(), accept_encoding)
+    urls = [f'{prefix}/'] + [f'{prefix}/video/{name}' for name in names]
+
+    first = sum(browser.get(url) for url in urls)
+    first_bytes = browser.bytes
+    repeat_times = []
+    for _ in range(visits):
+        repeat_times.append(sum(browser.get(url) for url in urls))
+
+    return {
+        'first_visit_bytes': first_bytes,
+        'first_visit_ms': round(first * 1000, 3),
+        'repeat_visit_bytes': round((browser.bytes - first_bytes) / max(visits, 1)),
+        'repeat_requests_per_visit': round((browser.requests - len(urls)) / max(visits, 1), 2),
+        'repeat_worker_time': summarize(repeat_times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--visits', type=int, default=200, help='repeat visits per mode')
+    parser.add_argument('--replays', type=int, default=5, help='replays loaded per visit')
+    args = parser.parse_args()
+
+    app, names = _make_app(args.replays)
+    results = {
+        'legacy': run(app, names, '/legacy', 'identity', args.visits),
+        'cached': run(app, names, '', 'gzip, br', args.visits),
+    }
+
+    print(f"{'mode':<8} {'1st bytes':>10} {'repeat bytes':>13} {'repeat reqs':>12} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode, result in results.items():
+        timing = result['repeat_worker_time']
+        print(f"{mode:<8} {result['first_visit_bytes']:>10} {result['repeat_visit_bytes']:>13} "
+              f"{result['repeat_requests_per_visit']:>12} {timing['p50_ms']:>8} {timing['p95_ms']:>8}")
+
+
+if __name__ == '__main__':
+    main()
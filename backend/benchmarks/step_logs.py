@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Step logs: per-step dicts vs packed StepLog arrays.
+
+Replays --games synthetic episodes (random lengths up to 120 steps, random
+actions and rewards) three ways:
+- build: recording an episode as the old list of six-key dicts vs
+  StepLog.append(), per episode, with the memory each episode's log holds
+- storage: JSON of the dicts vs the game_steps blobs, bytes per game
+- analytics: the games are written to game_steps (with their game_result
+  rows) and step_analytics() aggregates action counts and reward curves for
+  all of them; the baseline decodes the first --baseline-games JSON logs and
+  aggregates the dicts in Python
+The two aggregations are checked against each other on the baseline games.
+
+Usage (from backend/):
+    python benchmarks/step_logs.py --games 100000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from _common import make_db_app, summarize
+
+
+def _dict_log(actions, rewards, done, truncated):
+    steps_log = []
+    for t, (action, reward) in enumerate(zip(actions, rewards)):
+        is_done, is_truncated = done and t == len(actions) - 1, truncated and t == len(actions) - 1
+        steps_log.append({
+            'step': int(t + 1),
+            'action': int(action),
+            'reward': float(reward),
+            'done': bool(is_done),
+            'truncated': bool(is_truncated),
+            'result': 'Goal reached!' if is_done else ('Max steps reached' if is_truncated else 'Continuing...')
+        })
+    return steps_log
+
+
+def _packed_log(actions, rewards, done, truncated):
+    from ai.step_log import StepLog
+
+    steps_log = StepLog(120)
+    for t, (action, reward) in enumerate(zip(actions, rewards)):
+        last = t == len(actions) - 1
+        steps_log.append(action, reward, done and last, truncated and last)
+    return steps_log
+
+
+def _retained(build, episode):
+    tracemalloc.start()
+    log = build(*episode)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del log
+    return size
+
+
+def _python_aggregate(json_logs):
+    """Action counts and mean reward per step from decoded per-step dicts."""
+    counts, sums, games = {}, {}, {}
+    for raw in json_logs:
+        for step in json.loads(raw):
+            counts[step['action']] = counts.get(step['action'], 0) + 1
+            sums[step['step']] = sums.get(step['step'], 0.0) + step['reward']
+            games[step['step']] = games.get(step['step'], 0) + 1
+    return counts, [sums[s] / games[s] for s in sorted(games)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--baseline-games', type=int, default=20000)
+    parser.add_argument('--build-episodes', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    from ai.step_log import ACTION_NAMES
+    from database import db
+    from database.models import GameResult, GameSteps, User
+    from services.step_log_service import step_analytics
+
+    rng = np.random.default_rng(args.seed)
+    lengths = rng.integers(10, 121, args.games)
+    episodes = []
+    for length in lengths.tolist():
+        actions = rng.choice(7, size=length, p=[0.2, 0.2, 0.35, 0.02, 0.02, 0.19, 0.02]).tolist()
+        rewards = np.round(rng.normal(-0.5, 3, length), 1).tolist()
+        episodes.append((actions, rewards, length < 120, length == 120))
+
+    for name, build in (('dicts', _dict_log), ('StepLog', _packed_log)):
+        samples = []
+        for episode in episodes[:args.build_episodes]:
+            started = time.perf_counter()
+            build(*episode)
+            samples.append(time.perf_counter() - started)
+        memory = np.mean([_retained(build, episode) for episode in episodes[:200]])
+        print(f'build {name:8s} per episode {summarize(samples)}, {memory:,.0f} bytes held')
+
+    json_logs = [json.dumps(_dict_log(*episode)) for episode in episodes[:args.baseline_games]]
+    packed = [_packed_log(*episode) for episode in episodes]
+    print(f'storage: json {np.mean([len(raw) for raw in json_logs]):,.0f} bytes/game, '
+          f'packed {np.mean([sum(map(len, log.to_blobs())) for log in packed]):,.0f} bytes/game')
+
+    app = make_db_app()
+    with app.app_context():
+        db.session.add(User(username='player', email='player@example.com', password_hash='x'))
+        db.session.commit()
+        now = datetime.utcnow()
+        db.session.execute(GameResult.__table__.insert(), [
+            {'id': i + 1, 'user_id': 1, 'agent_type': 'ddqn', 'prediction': 50, 'actual_steps': len(log),
+             'score': 0, 'timestamp': now} for i, log in enumerate(packed)])
+        db.session.execute(GameSteps.__table__.insert(), [GameSteps.row(i + 1, log) for i, log in enumerate(packed)])
+        db.session.commit()
+
+        for run in ('cold', 'warm'):
+            started = time.perf_counter()
+            result = step_analytics(days=1, limit=args.games)['agents']['ddqn']
+            packed_s = time.perf_counter() - started
+            print(f'analytics packed ({run}): {result["games"]} games, {result["steps"]} steps in '
+                  f'{packed_s * 1000:.0f}ms ({result["steps"] / packed_s / 1e6:.1f}M steps/s, query included)')
+
+        started = time.perf_counter()
+        counts, curve = _python_aggregate(json_logs)
+        dicts_s = time.perf_counter() - started
+        dict_steps = sum(counts.values())
+        print(f'analytics dicts:  {len(json_logs)} games, {dict_steps} steps in {dicts_s * 1000:.0f}ms '
+              f'({dict_steps / dicts_s / 1e6:.1f}M steps/s, decode included)')
+
+        # The newest games come first; check on the baseline's games alone
+        db.session.execute(GameSteps.__table__.delete().where(GameSteps.game_id > len(json_logs)))
+        baseline = step_analytics(days=1, limit=args.games)['agents']['ddqn']
+        same = ([baseline['action_counts'][name] for name in ACTION_NAMES]
+                == [counts.get(i, 0) for i in range(len(ACTION_NAMES))]
+                and np.allclose(baseline['reward_curve']['mean_reward'], curve, atol=1e-3))
+        print(f"check: {'aggregates match' if same else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
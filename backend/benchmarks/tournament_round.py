@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Closing a tournament round with many predictions.
+
+Seeds --players players, each predicting on one agent (or both with
+--both-agents) in one round, then scores and writes the round two ways:
+- per-game: what as many solo games cost once their episodes are done,
+  calculate_score per prediction and the game writer's batched commits
+  (GAME_WRITE_BATCH_SIZE games per transaction)
+- round: tournament_service.close_round, calculate_scores over each agent's
+  predictions and one write_many transaction
+Episodes are stubbed with fixed outcomes (the round plays one per agent,
+solo play one per prediction). Afterwards player totals are checked
+against the game rows.
+
+Usage (from backend/):
+    python benchmarks/tournament_round.py --players 10000
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+from _common import make_db_app
+
+OUTCOMES = {'ddqn': (57, None), 'd3qn': (120, None)}
+
+
+def _seed(app, players, both_agents, seed):
+    from database import db
+    from database.models import User, RoundPrediction
+    from services.tournament_service import open_round
+
+    rng = random.Random(seed)
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {'username': f'player{i}', 'email': f'player{i}@example.com', 'password_hash': 'x',
+             'created_at': datetime.utcnow(), 'total_score': 0, 'games_played': 0, 'best_score': 0,
+             'is_admin': False, 'is_active': True}
+            for i in range(players)
+        ])
+        db.session.commit()
+        user_ids = [row[0] for row in db.session.execute(User.__table__.select().with_only_columns(User.id))]
+        tournament_round = open_round(duration=3600, seed=seed)
+        rows = []
+        for user_id in user_ids:
+            agents = ('ddqn', 'd3qn') if both_agents else (rng.choice(('ddqn', 'd3qn')),)
+            for agent_type in agents:
+                prediction = 0 if rng.random() < 0.1 else rng.randint(1, 120)
+                rows.append({'round_id': tournament_round.id, 'user_id': user_id, 'agent_type': agent_type,
+                             'prediction': prediction, 'created_at': datetime.utcnow()})
+        db.session.execute(RoundPrediction.__table__.insert(), rows)
+        db.session.commit()
+        return tournament_round.id, len(rows)
+
+
+def _check(app):
+    from database import db
+    from database.models import User, GameResult
+
+    with app.app_context():
+        games = db.session.query(db.func.count(GameResult.id), db.func.sum(GameResult.score)).one()
+        users = db.session.query(db.func.sum(User.games_played), db.func.sum(User.total_score)).one()
+        return games[0], games[0] == (users[0] or 0) and (games[1] or 0) == (users[1] or 0)
+
+
+def run_per_game(args):
+    from database import db
+    from database.models import RoundPrediction
+    from services.game_writer import GameWriteBuffer, PendingGame
+    from services.scoring_service import calculate_score
+
+    app = make_db_app(GAME_WRITE_BATCH_SIZE=args.batch_size)
+    writer = GameWriteBuffer(app)
+    round_id, count = _seed(app, args.players, args.both_agents, args.seed)
+    with app.app_context():
+        predictions = db.session.execute(
+            RoundPrediction.__table__.select().where(RoundPrediction.round_id == round_id)
+        ).all()
+        started = time.perf_counter()
+        games = []
+        for row in predictions:
+            steps, _ = OUTCOMES[row.agent_type]
+            score = calculate_score(row.prediction or 'fail', steps, steps < 120)
+            games.append(PendingGame(user_id=row.user_id, agent_type=row.agent_type, prediction=row.prediction,
+                                     actual_steps=steps, score=score))
+        score_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for i in range(0, len(games), writer.batch_size):
+        writer._commit(games[i:i + writer.batch_size])
+    write_s = time.perf_counter() - started
+    return count, score_s, write_s, _check(app)
+
+
+def run_round(args):
+    from services.game_writer import game_writer
+    from services.tournament_service import close_round
+
+    app = make_db_app()
+    game_writer.init_app(app)
+    round_id, count = _seed(app, args.players, args.both_agents, args.seed)
+    with app.app_context():
+        summary = close_round(round_id, force=True, simulate_episode=lambda agent_type, seed: OUTCOMES[agent_type])
+    return count, summary['score_ms'] / 1000.0, summary['write_ms'] / 1000.0, _check(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=10000)
+    parser.add_argument('--both-agents', action='store_true', help='every player predicts on both agents')
+    parser.add_argument('--batch-size', type=int, default=64, help='GAME_WRITE_BATCH_SIZE of the per-game path')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    for name, run in (('per-game', run_per_game), ('round', run_round)):
+        count, score_s, write_s, (games, consistent) = run(args)
+        episodes = count if name == 'per-game' else len(OUTCOMES)
+        print(f"{name:>8}: {count} predictions, score {score_s * 1000:.1f}ms, write {write_s * 1000:.1f}ms "
+              f"({count / write_s:,.0f} games/s), {episodes} episodes to simulate, "
+              f"{games} games written, totals {'consistent' if consistent else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
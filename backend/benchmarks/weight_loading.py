@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Weight loading time and per-process memory: torch.load(.pth) vs mapped .safetensors.
+
+Starts --workers independent processes (as separate, non-forked workers)
+that each import torch, load both policy networks and run a few batches of
+inference, all at the same time:
+- pth:  torch.load(path, weights_only=True) unpickles a private copy per process
+- mmap: ai/weights.py maps MODEL_FOLDER/*.safetensors and the parameters alias
+        the shared page-cache pages (run scripts/convert_weights.py first)
+Reports the time to read the state dicts and to build both agents, and from /proc/<pid>/smaps_rollup the growth of
+unique memory (USS = Private_Clean + Private_Dirty) caused by loading, plus
+the final USS, PSS and shared memory summed over all workers.
+
+Usage (from backend/; Linux only):
+    python benchmarks/weight_loading.py --workers 8
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from _common import BACKEND_DIR, summarize
+
+WORKER = r'''
+import json, sys, time
+import numpy as np
+import torch
+from ai.model_registry import BUILDERS, INPUT_SHAPE, NUM_ACTIONS, device, load_state_dict, model_registry
+
+torch.set_num_threads(1)
+model_registry.model_folder = MODEL_FOLDER
+
+def rollup():
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {'uss': values['Private_Clean'] + values['Private_Dirty'], 'pss': values['Pss'],
+            'shared': values['Shared_Clean'] + values['Shared_Dirty']}
+
+# Warm torch's own kernels and allocator so the delta below is mostly the weights
+with torch.no_grad():
+    torch.nn.functional.conv2d(torch.zeros(8, 1, 56, 56), torch.zeros(32, 1, 8, 8), stride=4).relu().sum()
+print('READY', flush=True)
+sys.stdin.readline()
+
+before = rollup()
+read_s = 0.0
+t0 = time.perf_counter()
+for agent_type in ('ddqn', 'd3qn'):
+    path = model_registry.model_path(agent_type)
+    t1 = time.perf_counter()
+    if MODE == 'mmap':
+        state_dict, mapped = load_state_dict(path)
+        assert mapped, 'no .safetensors file; run scripts/convert_weights.py'
+    else:
+        state_dict, mapped = torch.load(path, map_location=device, weights_only=True), False
+    read_s += time.perf_counter() - t1
+    agent = BUILDERS[agent_type](state_dict, INPUT_SHAPE, NUM_ACTIONS, assign=mapped)
+    model_registry._agents[(agent_type, path, INPUT_SHAPE, NUM_ACTIONS)] = agent
+load_s = time.perf_counter() - t0
+
+states = np.random.default_rng().integers(0, 255, size=(8, 1, 56, 56)).astype(np.float32)
+for _ in range(10):
+    for agent_type in ('ddqn', 'd3qn'):
+        model_registry.greedy_actions(agent_type, states)
+after = rollup()
+print('RESULT ' + json.dumps({'load_s': load_s, 'read_s': read_s, 'before': before, 'after': after}), flush=True)
+sys.stdin.readline()
+'''
+
+
+def run(mode, args):
+    from config import Config
+
+    code = f'MODE = {mode!r}\nMODEL_FOLDER = {str(Config.MODEL_FOLDER)!r}\n' + WORKER
+    workers = [subprocess.Popen([sys.executable, '-c', code], cwd=BACKEND_DIR, text=True,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+               for _ in range(args.workers)]
+    try:
+        for worker in workers:
+            if worker.stdout.readline().strip() != 'READY':
+                raise RuntimeError('worker failed to start')
+        for worker in workers:
+            worker.stdin.write('go\n')
+            worker.stdin.flush()
+        # Every worker stays alive until all have reported, so PSS splits shared pages 8 ways
+        results = []
+        for worker in workers:
+            for line in worker.stdout:
+                if line.startswith('RESULT '):
+                    results.append(json.loads(line[len('RESULT '):]))
+                    break
+    finally:
+        for worker in workers:
+            worker.kill()
+
+    def total_mb(key, field):
+        return round(sum(r[key][field] for r in results) / 1024, 1)
+
+    return {
+        'read': summarize([r['read_s'] for r in results]),
+        'load': summarize([r['load_s'] for r in results]),
+        'weights_uss_mb_per_worker': round(
+            sum(r['after']['uss'] - r['before']['uss'] for r in results) / len(results) / 1024, 2),
+        'uss_mb': total_mb('after', 'uss'),
+        'pss_mb': total_mb('after', 'pss'),
+        'shared_mb': total_mb('after', 'shared'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['pth', 'mmap'], choices=['pth', 'mmap'])
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'read p50 ms':>12} {'load p50 ms':>12} {'load max ms':>12} {'weights USS/worker MB':>22} "
+          f"{'total USS MB':>13} {'total PSS MB':>13} {'shared MB':>10}")
+    for mode in args.modes:
+        r = run(mode, args)
+        print(f"{mode:<6} {r['read']['p50_ms']:>12} {r['load']['p50_ms']:>12} {r['load']['max_ms']:>12} "
+              f"{r['weights_uss_mb_per_worker']:>22} {r['uss_mb']:>13} {r['pss_mb']:>13} {r['shared_mb']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -36,23 +36,211 @@ class Config:
     MODEL_FOLDER = PROJECT_ROOT / 'models'
     FRONTEND_FOLDER = PROJECT_ROOT / 'frontend'
 
+    # Replay retention (see services/replay_store.py)
+    # Replays share the persistent disk with the SQLite database, so keep them bounded
+    REPLAY_MAX_BYTES = int(os.environ.get('REPLAY_MAX_BYTES', 2 * 1024 ** 3))  # 0 = unlimited
+    REPLAY_MAX_AGE_DAYS = float(os.environ.get('REPLAY_MAX_AGE_DAYS', 30))  # days since last use, 0 = unlimited
+    REPLAY_SWEEP_INTERVAL = int(os.environ.get('REPLAY_SWEEP_INTERVAL', 30))  # seconds between sweeps (maintenance job)
+    REPLAY_SWEEP_BATCH = int(os.environ.get('REPLAY_SWEEP_BATCH', 500))  # max files per sweep step
+    # Replays stored or used this recently are never evicted (at least two sweep intervals)
+    REPLAY_EVICTION_GRACE = int(os.environ.get('REPLAY_EVICTION_GRACE', 600))  # seconds
+    REPLAY_SWEEPER_ENABLED = os.environ.get('REPLAY_SWEEPER_ENABLED', 'True').lower() == 'true'
+
+    # Static delivery (see services/static_delivery.py)
+    # Replays never change once written; frontend pages always revalidate (0 = no-cache)
+    REPLAY_CACHE_MAX_AGE = int(os.environ.get('REPLAY_CACHE_MAX_AGE', 365 * 24 * 3600))
+    FRONTEND_CACHE_MAX_AGE = int(os.environ.get('FRONTEND_CACHE_MAX_AGE', 0))
+    STATIC_CACHE_MAX_AGE = int(os.environ.get('STATIC_CACHE_MAX_AGE', 3600))
+    # 'none', 'x-sendfile' (Apache/lighttpd) or 'x-accel' (nginx internal location
+    # STATIC_OFFLOAD_PREFIX aliased to STATIC_FOLDER)
+    STATIC_OFFLOAD = os.environ.get('STATIC_OFFLOAD', 'none').lower()
+    STATIC_OFFLOAD_PREFIX = os.environ.get('STATIC_OFFLOAD_PREFIX', '/_static')
+
     # Database configuration
     # CRITICAL: Database is stored in static/ folder so it persists with Render disk mount
     # This ensures user data survives deployments and server restarts
-    DATABASE_PATH = STATIC_FOLDER / "minigrid_game.db"
+    DATABASE_PATH = Path(os.environ.get('DATABASE_PATH', STATIC_FOLDER / "minigrid_game.db"))
     SQLALCHEMY_DATABASE_URI = f'sqlite:///{DATABASE_PATH}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Database profile: 'sqlite' (tuned WAL), 'postgresql' (pooled) or 'default'
+    # (plain SQLAlchemy engine, no tuning). See database/profiles.py
+    # The postgresql profile reads its URI from DATABASE_URL (e.g. set by Render)
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'postgresql' if DATABASE_URL else 'sqlite')
+
+    # SQLite tuning (applied on every new connection)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 32768))
+
+    # PostgreSQL connection pool
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true'
+
+    # Production server (gunicorn.conf.py / wsgi.py)
+    # Workers are forked after the models are loaded so they share the weights
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', min(4, (os.cpu_count() or 1) + 1)))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 4))
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT', 120))  # episodes render a GIF
+    WEB_MAX_REQUESTS = int(os.environ.get('WEB_MAX_REQUESTS', 1000))  # recycle workers; 0 = never
+    WEB_MAX_REQUESTS_JITTER = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 100))
+    # Import torch/minigrid and load the models at startup instead of on the first game
+    # (wsgi.py always warms up in the prefork master)
+    AI_PRELOAD = os.environ.get('AI_PRELOAD', 'False').lower() == 'true'
+    # torch intra-op threads per worker; the default (all cores) oversubscribes with several workers
+    TORCH_NUM_THREADS = int(os.environ.get('TORCH_NUM_THREADS', 1))
+    # ASGI server (asgi.py, middleware/asgi.py): async endpoints run on the event loop,
+    # the other blueprints on ASGI_WSGI_THREADS threads per process
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', WEB_THREADS))
+    # Threads running the episodes async handlers await; 0 = ADMISSION_MAX_CONCURRENT
+    ASGI_EPISODE_THREADS = int(os.environ.get('ASGI_EPISODE_THREADS', 0))
+    # Largest request body accepted (API bodies are small JSON): Flask answers 413 past it,
+    # and the ASGI front stops buffering a body as soon as it exceeds it
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 1024 * 1024))
+
+    # Maze bank (scripts/build_maze_bank.py, ai/maze_bank.py): environments reset from
+    # pre-generated layouts instead of generating each maze. Unset = generate natively
+    MAZE_BANK_PATH = os.environ.get('MAZE_BANK_PATH', '')
+
+    # Local inference daemon (python -m ai.inference_server, see ai/inference.py)
+    # Unset = run the networks in-process; if the daemon is unreachable episodes
+    # fall back to in-process inference and retry the daemon after INFERENCE_RETRY_SECONDS
+    INFERENCE_SOCKET = os.environ.get('INFERENCE_SOCKET', '')
+    INFERENCE_TIMEOUT = float(os.environ.get('INFERENCE_TIMEOUT', 5))
+    INFERENCE_RETRY_SECONDS = float(os.environ.get('INFERENCE_RETRY_SECONDS', 30))
+    INFERENCE_MAX_BATCH = int(os.environ.get('INFERENCE_MAX_BATCH', 64))
+    INFERENCE_BATCH_WINDOW_MS = float(os.environ.get('INFERENCE_BATCH_WINDOW_MS', 2))
+
+    # Admission control for game execution (see middleware/admission.py); per process
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'True').lower() == 'true'
+    ADMISSION_MAX_CONCURRENT = int(os.environ.get('ADMISSION_MAX_CONCURRENT', 2))  # episodes at once
+    ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', 4))  # waiting beyond that get 503
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 15))  # seconds
+    ADMISSION_USER_RATE = float(os.environ.get('ADMISSION_USER_RATE', 12))  # games/minute; 0 = unlimited
+    ADMISSION_USER_BURST = int(os.environ.get('ADMISSION_USER_BURST', 4))
+
+    # Password hashing (see services/password_service.py)
+    # Iterations: this setting, else the calibrated value written by
+    # scripts/calibrate_password_hash.py, else 600000
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 0))
+    PASSWORD_CALIBRATION_FILE = BACKEND_DIR / 'instance' / 'password_hash.json'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # hashing threads per process
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 32))  # waiting beyond that get 503
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
     # Email configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
-    MAIL_USE_TLS = True
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'True').lower() == 'true'
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME or 'no-reply@localhost')
+    MAIL_TIMEOUT = float(os.environ.get('MAIL_TIMEOUT', 30))  # SMTP socket timeout, seconds
+
+    # Email outbox (see services/email_outbox.py): requests only queue mail,
+    # a background sender delivers it. 'console' logs instead of sending.
+    MAIL_BACKEND = os.environ.get('MAIL_BACKEND', 'smtp' if MAIL_USERNAME else 'console')
+    MAIL_OUTBOX_ENABLED = os.environ.get('MAIL_OUTBOX_ENABLED', 'True').lower() == 'true'
+    MAIL_BATCH_SIZE = int(os.environ.get('MAIL_BATCH_SIZE', 20))
+    MAIL_POLL_INTERVAL = float(os.environ.get('MAIL_POLL_INTERVAL', 5))  # seconds between outbox checks
+    MAIL_IDLE_TIMEOUT = float(os.environ.get('MAIL_IDLE_TIMEOUT', 60))  # close an unused SMTP connection
+    MAIL_MAX_PER_CONNECTION = int(os.environ.get('MAIL_MAX_PER_CONNECTION', 100))
+    MAIL_MAX_ATTEMPTS = int(os.environ.get('MAIL_MAX_ATTEMPTS', 6))
+    MAIL_RETRY_BASE = float(os.environ.get('MAIL_RETRY_BASE', 30))  # seconds, doubled per attempt
+    MAIL_RETRY_MAX = float(os.environ.get('MAIL_RETRY_MAX', 3600))
+    MAIL_CLAIM_LEASE = float(os.environ.get('MAIL_CLAIM_LEASE', 300))  # seconds a claimed message is held
     
     # Game settings
     MAX_STEPS = 120
+    # Replay frame tile size in pixels (ai/replay_renderer.py): 32 draws exactly what env.render() does,
+    # smaller values give lower-resolution, lighter replays
+    REPLAY_TILE_SIZE = int(os.environ.get('REPLAY_TILE_SIZE', 32))
+
+    # Game write-behind buffer (see services/game_writer.py)
+    # Durability: 'sync' waits for the batch commit before responding,
+    # 'async' responds once the game is queued (flushed on shutdown)
+    GAME_WRITE_BEHIND = os.environ.get('GAME_WRITE_BEHIND', 'True').lower() == 'true'
+    GAME_WRITE_BATCH_SIZE = int(os.environ.get('GAME_WRITE_BATCH_SIZE', 64))
+    GAME_WRITE_FLUSH_MS = int(os.environ.get('GAME_WRITE_FLUSH_MS', 10))
+    GAME_WRITE_DURABILITY = os.environ.get('GAME_WRITE_DURABILITY', 'sync')
+    GAME_WRITE_SYNC_TIMEOUT = int(os.environ.get('GAME_WRITE_SYNC_TIMEOUT', 10))
+
+    # Tournament rounds (see services/tournament_service.py): one seeded episode per
+    # agent shared by every prediction made while the round is open
+    TOURNAMENT_ROUND_SECONDS = float(os.environ.get('TOURNAMENT_ROUND_SECONDS', 300))  # default window
+    TOURNAMENT_MAX_ROUND_SECONDS = float(os.environ.get('TOURNAMENT_MAX_ROUND_SECONDS', 7 * 24 * 3600))
+    TOURNAMENT_CLOSE_INTERVAL = float(os.environ.get('TOURNAMENT_CLOSE_INTERVAL', 5))  # seconds between due checks
+    TOURNAMENT_CLOSE_TIMEOUT = float(os.environ.get('TOURNAMENT_CLOSE_TIMEOUT', 300))  # a closing claim older than this is retaken
+    # Round result streams (services/round_events.py): one poller per process reads every watched round
+    RESULT_STREAM_POLL_INTERVAL = float(os.environ.get('RESULT_STREAM_POLL_INTERVAL', 1.0))  # seconds
+    RESULT_STREAM_HEARTBEAT = float(os.environ.get('RESULT_STREAM_HEARTBEAT', 15))  # seconds between keep-alive comments
+    RESULT_STREAM_MAX_SECONDS = float(os.environ.get('RESULT_STREAM_MAX_SECONDS', 3600))  # then the client reconnects
+
+    # Rescoring (see services/rescoring_service.py): applies the current scoring rules to
+    # stored games in resumable chunks, run by the maintenance scheduler
+    RESCORE_INTERVAL = float(os.environ.get('RESCORE_INTERVAL', 10))  # seconds between checks for a queued job
+    RESCORE_BUDGET = float(os.environ.get('RESCORE_BUDGET', 10))  # seconds of work per turn
+    RESCORE_CHUNK_SIZE = int(os.environ.get('RESCORE_CHUNK_SIZE', 10000))  # games per transaction
+    RESCORE_USER_CHUNK_SIZE = int(os.environ.get('RESCORE_USER_CHUNK_SIZE', 2000))  # users per transaction
+    RESCORE_MAX_ROWS_PER_SECOND = float(os.environ.get('RESCORE_MAX_ROWS_PER_SECOND', 50000))  # 0 = unthrottled
+
+    # Maintenance scheduler (see services/maintenance.py): housekeeping jobs on a
+    # background thread; shared jobs run in one worker at a time under a database lease
+    MAINTENANCE_ENABLED = os.environ.get('MAINTENANCE_ENABLED', 'True').lower() == 'true'
+    MAINTENANCE_TICK = float(os.environ.get('MAINTENANCE_TICK', 5))  # seconds between due-job checks
+    MAINTENANCE_JITTER = float(os.environ.get('MAINTENANCE_JITTER', 0.1))  # +-fraction of each interval
+    MAINTENANCE_BUDGET = float(os.environ.get('MAINTENANCE_BUDGET', 2))  # seconds a job may run per turn
+    MAINTENANCE_PAUSE_MS = float(os.environ.get('MAINTENANCE_PAUSE_MS', 20))  # between increments
+    MAINTENANCE_BATCH_SIZE = int(os.environ.get('MAINTENANCE_BATCH_SIZE', 500))  # rows per increment
+    MAINTENANCE_LEASE_GRACE = float(os.environ.get('MAINTENANCE_LEASE_GRACE', 60))  # lease = budget + grace
+    MAINTENANCE_RETRY_DELAY = float(os.environ.get('MAINTENANCE_RETRY_DELAY', 300))  # after a failed run
+    # Job intervals, seconds (the replay sweep uses REPLAY_SWEEP_INTERVAL)
+    MAINTENANCE_TOKEN_INTERVAL = float(os.environ.get('MAINTENANCE_TOKEN_INTERVAL', 3600))
+    MAINTENANCE_ANALYTICS_INTERVAL = float(os.environ.get('MAINTENANCE_ANALYTICS_INTERVAL', 3600))
+    MAINTENANCE_CHECKPOINT_INTERVAL = float(os.environ.get('MAINTENANCE_CHECKPOINT_INTERVAL', 300))
+    MAINTENANCE_OPTIMIZE_INTERVAL = float(os.environ.get('MAINTENANCE_OPTIMIZE_INTERVAL', 24 * 3600))
+    MAINTENANCE_WARM_INTERVAL = float(os.environ.get('MAINTENANCE_WARM_INTERVAL', 300))
+    # SQLite ANALYZE samples this many rows per index; incremental vacuum frees this many pages per step
+    MAINTENANCE_ANALYZE_LIMIT = int(os.environ.get('MAINTENANCE_ANALYZE_LIMIT', 1000))
+    MAINTENANCE_VACUUM_PAGES = int(os.environ.get('MAINTENANCE_VACUUM_PAGES', 256))
+
+    # Analytics rollups: hourly buckets older than this are compacted into daily ones
+    # (kept above 7 days so the dashboard's "last 7 days" figures stay hour-exact)
+    ANALYTICS_HOURLY_RETENTION_HOURS = int(os.environ.get('ANALYTICS_HOURLY_RETENTION_HOURS', 192))
+    # Response cache (services/response_cache.py): serialized JSON of read-heavy endpoints, per
+    # process, invalidated by data versions; the TTL bounds time-dependent figures
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 30))  # seconds, 0 = until data changes
+    # Step analytics (services/step_log_service.py): most games one request may aggregate
+    STEP_ANALYTICS_MAX_GAMES = int(os.environ.get('STEP_ANALYTICS_MAX_GAMES', 100000))
     
+    # Logging (see utils/logging_config.py): callers only enqueue, one listener thread writes
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # 'json' (one object per line) or 'text'
+    LOG_FILE = Path(os.environ.get('LOG_FILE', BACKEND_DIR / 'app.log'))  # WARNING and up, not in debug
+    LOG_FILE_MAX_BYTES = int(os.environ.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_FILE_BACKUPS = int(os.environ.get('LOG_FILE_BACKUPS', 5))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # records beyond this are dropped
+    # Records per window from call sites logging with extra={'sample': True} (per-frame
+    # render errors); other records are never sampled. 0 = log everything
+    LOG_SAMPLE_BURST = int(os.environ.get('LOG_SAMPLE_BURST', 20))
+    LOG_SAMPLE_WINDOW = float(os.environ.get('LOG_SAMPLE_WINDOW', 60))  # seconds
+
+    # Request profiling (see middleware/profiling.py): admins send "X-Profile: 1",
+    # PROFILE_SAMPLE_RATE profiles that fraction of all requests. Disabled = no hooks at all
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True').lower() == 'true'
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))  # stack sampling period
+    PROFILE_MAX_ACTIVE = int(os.environ.get('PROFILE_MAX_ACTIVE', 2))  # profiled requests at once, per process
+    PROFILE_FOLDER = Path(os.environ.get('PROFILE_FOLDER', BACKEND_DIR / 'instance' / 'profiles'))
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 200))  # oldest deleted beyond this
+
     # Security settings - FIXED for session cookies
     SESSION_COOKIE_SECURE = False  # Set to True only in HTTPS production
     SESSION_COOKIE_HTTPONLY = True
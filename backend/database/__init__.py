@@ -11,14 +11,29 @@ db = SQLAlchemy()
 
 def init_db(app):
     """Initialize database with the Flask app."""
+    from .profiles import apply_database_profile, register_engine_events
+
+    profile = apply_database_profile(app)
     db.init_app(app)
-    
+
     # Import models to ensure they're registered
-    from .models import User, GameResult, PasswordResetToken
-    
+    from .models import (User, GameResult, PasswordResetToken, UserAgentStats,
+                         AnalyticsHourly, AnalyticsDaily, ReplayFile, ReplayAlias,
+                         OutboxEmail, MaintenanceLease, TournamentRound, RoundPrediction,
+                         RescoreJob, GameSteps, DataVersion)
+    from .versions import ensure_version_rows, register_version_events
+
     with app.app_context():
         try:
+            register_engine_events(app, db.engine)
+            app.logger.info(f"Database profile: {profile} ({db.engine.dialect.name})")
+
             db.create_all()
+            _ensure_columns()
+            _ensure_indexes()
+            ensure_version_rows(db.session)
+            # Writes to games and users bump their data versions (cache validation)
+            register_version_events(db.session)
             app.logger.info("Database tables created successfully!")
 
             # Note: First user to register will automatically become admin
@@ -28,4 +43,38 @@ def init_db(app):
 
         except Exception as e:
             app.logger.error(f"Database initialization error: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+def _ensure_columns():
+    """Add columns declared on models after their tables already existed.
+
+    Only columns that are nullable or carry a server default can be added this
+    way; anything else needs a manual migration and is reported instead.
+    """
+    from sqlalchemy import inspect, text
+    from sqlalchemy.schema import CreateColumn
+
+    inspector = inspect(db.engine)
+    preparer = db.engine.dialect.identifier_preparer
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if column.primary_key or (not column.nullable and column.server_default is None):
+                raise RuntimeError(f"Column {table.name}.{column.name} is missing and needs a manual migration")
+            ddl = CreateColumn(column).compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}'))
+
+
+def _ensure_indexes():
+    """Create indexes added to models after their tables already existed.
+
+    create_all() skips existing tables entirely, so indexes declared later
+    (e.g. game_result.gif_filename) would otherwise never be built.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
@@ -7,5 +7,17 @@ Imports all models for easy access.
 from .user import User
 from .game import GameResult
 from .auth import PasswordResetToken
+from .stats import UserAgentStats
+from .analytics import AnalyticsHourly, AnalyticsDaily
+from .replay import ReplayFile, ReplayAlias
+from .email import OutboxEmail
+from .maintenance import MaintenanceLease
+from .tournament import TournamentRound, RoundPrediction
+from .rescore import RescoreJob
+from .steps import GameSteps
+from .version import DataVersion
 
-__all__ = ['User', 'GameResult', 'PasswordResetToken']
\ No newline at end of file
+__all__ = ['User', 'GameResult', 'PasswordResetToken', 'UserAgentStats',
+           'AnalyticsHourly', 'AnalyticsDaily', 'ReplayFile',
+           'ReplayAlias', 'OutboxEmail', 'MaintenanceLease', 'TournamentRound',
+           'RoundPrediction', 'RescoreJob', 'GameSteps', 'DataVersion']
\ No newline at end of file
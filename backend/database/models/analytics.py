@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Analytics rollup models for AI Agent Galaxy.
+Time-bucketed counters behind the admin dashboard charts.
+"""
+from .. import db
+
+# agent_type used for counters that are not tied to an agent (e.g. new users)
+ALL_AGENTS = 'all'
+
+
+class _ActivityBucket:
+    """Columns shared by the hourly and daily activity rollups."""
+
+    # Composite key: one row per (bucket start, agent)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    agent_type = db.Column(db.String(10), primary_key=True)
+
+    # Counters
+    games = db.Column(db.Integer, nullable=False, default=0)
+    successes = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    new_users = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.bucket_start.isoformat()} {self.agent_type}: {self.games} games>'
+
+
+class AnalyticsHourly(_ActivityBucket, db.Model):
+    """Hourly activity counters, kept for ANALYTICS_HOURLY_RETENTION_HOURS."""
+
+    __tablename__ = 'analytics_hourly'
+
+
+class AnalyticsDaily(_ActivityBucket, db.Model):
+    """Daily activity counters, compacted from hourly rows past retention."""
+
+    __tablename__ = 'analytics_daily'
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Email outbox model for AI Agent Galaxy.
+Outgoing mail is queued here by request handlers and delivered by the
+background sender in services/email_outbox.py.
+"""
+from datetime import datetime
+from .. import db
+
+
+class OutboxEmail(db.Model):
+    """A message waiting to be (or already) delivered over SMTP.
+
+    status: pending -> sent, or failed after MAIL_MAX_ATTEMPTS / a permanent
+    SMTP error. A sender claims pending rows by stamping claim_token and
+    pushing next_attempt_at out by the claim lease, so concurrent senders in
+    other workers skip them and a crashed sender's rows become due again.
+    """
+
+    __tablename__ = 'email_outbox'
+
+    # Primary fields
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+
+    # Delivery state
+    status = db.Column(db.String(10), nullable=False, default='pending', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    claim_token = db.Column(db.String(32), index=True)
+    last_error = db.Column(db.String(500))
+
+    # Lifecycle
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        """Convert outbox entry to dictionary for JSON responses."""
+        return {
+            'id': self.id,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None
+        }
+
+    def __repr__(self):
+        return f'<OutboxEmail {self.id} to {self.recipient} ({self.status})>'
@@ -11,6 +11,10 @@ class GameResult(db.Model):
     """Game result model storing individual game outcomes."""
     
     __tablename__ = 'game_result'
+    __table_args__ = (
+        # Per-player (and per-agent) score sums and bests read from the index alone
+        db.Index('ix_game_result_user_agent_score', 'user_id', 'agent_type', 'score'),
+    )
     
     # Primary fields
     id = db.Column(db.Integer, primary_key=True)
@@ -27,7 +31,10 @@ class GameResult(db.Model):
     score = db.Column(db.Integer, nullable=False)
 
     # Media
-    gif_filename = db.Column(db.String(255), nullable=True)
+    gif_filename = db.Column(db.String(255), nullable=True, index=True)
+
+    # Tournament round the game was scored in (None for a solo game)
+    round_id = db.Column(db.Integer, db.ForeignKey('tournament_round.id'), nullable=True, index=True)
     
     # Timestamps
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -48,6 +55,7 @@ class GameResult(db.Model):
             'succeeded': self.succeeded,
             'score': self.score,
             'gif_url': f'/video/{self.gif_filename}' if self.gif_filename else None,
+            'round_id': self.round_id,
             'timestamp': self.timestamp.isoformat()
         }
     
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Maintenance job model for AI Agent Galaxy.
+One row per shared housekeeping job: the single-runner lease and the
+outcome of its last run (see services/maintenance.py).
+"""
+import json
+from datetime import datetime
+from .. import db
+
+
+class MaintenanceLease(db.Model):
+    """Lease and last-run record of a shared maintenance job.
+
+    A scheduler claims a due job with an UPDATE that only matches while the
+    lease is free (lease_until NULL or past) and next_run_at has arrived, so
+    exactly one worker runs it. A crashed runner's lease simply expires.
+    """
+
+    __tablename__ = 'maintenance_lease'
+
+    # Primary fields
+    name = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(100))
+    lease_until = db.Column(db.DateTime)
+    next_run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Last run
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    last_duration_ms = db.Column(db.Float)
+    last_status = db.Column(db.String(10))
+    last_error = db.Column(db.String(500))
+    last_result = db.Column(db.Text)
+    last_owner = db.Column(db.String(100))
+    runs = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    failures = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def to_dict(self):
+        """Convert lease to dictionary for JSON responses."""
+        return {
+            'owner': self.owner,
+            'lease_until': self.lease_until.isoformat() if self.lease_until else None,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'last_started_at': self.last_started_at.isoformat() if self.last_started_at else None,
+            'last_finished_at': self.last_finished_at.isoformat() if self.last_finished_at else None,
+            'last_duration_ms': self.last_duration_ms,
+            'last_status': self.last_status,
+            'last_error': self.last_error,
+            'last_result': json.loads(self.last_result) if self.last_result else None,
+            'last_owner': self.last_owner,
+            'runs': self.runs,
+            'failures': self.failures
+        }
+
+    def __repr__(self):
+        return f'<MaintenanceLease {self.name} ({self.last_status or "never run"})>'
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Replay file models for AI Agent Galaxy.
+Tracks replay GIFs on disk so retention can be enforced without directory scans.
+"""
+from datetime import datetime
+from .. import db
+
+
+class ReplayFile(db.Model):
+    """A replay file stored under VIDEO_FOLDER.
+
+    Content-addressed replays are named <sha256>.<ext>; ref_count is the number
+    of games that produced identical bytes and share the file.
+    """
+
+    __tablename__ = 'replay_file'
+
+    # Primary fields
+    filename = db.Column(db.String(255), primary_key=True)
+    size_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    ref_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+    # Lifecycle (last_accessed_at drives LRU eviction)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    last_accessed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        """Convert replay file to dictionary for JSON responses."""
+        return {
+            'filename': self.filename,
+            'size_bytes': self.size_bytes,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat(),
+            'last_accessed_at': self.last_accessed_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<ReplayFile {self.filename} ({self.size_bytes} bytes)>'
+
+
+class ReplayAlias(db.Model):
+    """Maps a legacy flat replay name (run_<uuid>.gif) to its content-addressed file."""
+
+    __tablename__ = 'replay_alias'
+
+    legacy_name = db.Column(db.String(255), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ReplayAlias {self.legacy_name} -> {self.filename}>'
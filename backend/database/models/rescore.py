@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Rescoring job model for AI Agent Galaxy.
+Progress of one pass of the current scoring rules over stored games, kept
+so the job resumes where it stopped (see services/rescoring_service.py).
+"""
+from datetime import datetime
+from .. import db
+
+RESCORE_STATUSES = ('pending', 'running', 'done')
+
+
+class RescoreJob(db.Model):
+    """A rescoring pass: game scores by id range, then user aggregates by user range.
+
+    last_game_id / last_user_id are keyset cursors committed with every
+    chunk, so a job cut short by its time budget or a restart continues
+    from the last committed chunk.
+    """
+
+    __tablename__ = 'rescore_job'
+
+    # Primary fields
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(10), nullable=False, default='pending', index=True)
+    phase = db.Column(db.String(10), nullable=False, default='games')  # 'games', then 'users'
+    dry_run = db.Column(db.Boolean, nullable=False, default=False)
+    requested_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    error = db.Column(db.String(500))
+
+    # Cursors (games above max_game_id were written after the job started, under the current rules)
+    max_game_id = db.Column(db.Integer, nullable=False, default=0)
+    last_game_id = db.Column(db.Integer, nullable=False, default=0)
+    last_user_id = db.Column(db.Integer, nullable=False, default=0)
+
+    # Progress
+    games_scanned = db.Column(db.Integer, nullable=False, default=0)
+    games_changed = db.Column(db.Integer, nullable=False, default=0)
+    score_delta = db.Column(db.Integer, nullable=False, default=0)
+    users_changed = db.Column(db.Integer, nullable=False, default=0)
+    stats_changed = db.Column(db.Integer, nullable=False, default=0)
+    active_ms = db.Column(db.Float, nullable=False, default=0.0)  # time spent in chunks, pauses excluded
+
+    def to_dict(self):
+        """Convert job to dictionary for JSON responses."""
+        active_s = (self.active_ms or 0) / 1000.0
+        return {
+            'id': self.id,
+            'status': self.status,
+            'phase': self.phase,
+            'dry_run': self.dry_run,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+            'max_game_id': self.max_game_id,
+            'last_game_id': self.last_game_id,
+            'progress': round(self.last_game_id / self.max_game_id, 4) if self.max_game_id else 1.0,
+            'games_scanned': self.games_scanned,
+            'games_changed': self.games_changed,
+            'score_delta': self.score_delta,
+            'users_changed': self.users_changed,
+            'stats_changed': self.stats_changed,
+            'active_ms': round(self.active_ms or 0, 2),
+            'games_per_second': round(self.games_scanned / active_s) if active_s else None
+        }
+
+    def __repr__(self):
+        return f'<RescoreJob {self.id} ({self.status}/{self.phase})>'
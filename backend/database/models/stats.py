@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Statistics rollup models for AI Agent Galaxy.
+Per-user, per-agent aggregates maintained incrementally as games are written.
+"""
+from datetime import datetime
+from .. import db
+
+
+class UserAgentStats(db.Model):
+    """Per-user, per-agent rollup of game outcomes.
+
+    Updated in the same transaction as each game (see services/game_writer.py)
+    so per-agent breakdowns never need to scan game_result.
+    """
+
+    __tablename__ = 'user_agent_stats'
+
+    # Composite key: one row per (user, agent)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    agent_type = db.Column(db.String(10), primary_key=True)
+
+    # Aggregates
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    total_score = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Integer, nullable=False, default=0)
+    abs_error_sum = db.Column(db.Integer, nullable=False, default=0)
+    exact_hits = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def prediction_error(prediction, actual_steps, max_steps=120):
+        """Absolute prediction error; a 'fail' prediction (stored as 0) means max_steps."""
+        predicted = prediction if prediction else max_steps
+        return abs(predicted - actual_steps)
+
+    def to_dict(self):
+        """Convert rollup to dictionary for JSON responses."""
+        games = self.games_played or 0
+        return {
+            'agent_type': self.agent_type.upper(),
+            'games_played': games,
+            'total_score': self.total_score,
+            'best_score': self.best_score,
+            'average_score': round(self.total_score / games, 2) if games else 0,
+            'average_error': round(self.abs_error_sum / games, 2) if games else None,
+            'exact_hits': self.exact_hits,
+            'accuracy': round(self.exact_hits / games, 4) if games else None
+        }
+
+    def __repr__(self):
+        return f'<UserAgentStats {self.user_id}/{self.agent_type}: {self.games_played} games>'
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Step log model for AI Agent Galaxy.
+Packed per-step arrays of a game's episode (see ai/step_log.py), kept
+beside game_result so listing games never loads them.
+"""
+from .. import db
+
+
+class GameSteps(db.Model):
+    """Actions (uint8), done/truncated flags (uint8 bits) and rewards (float32) of one game.
+
+    Written with the game by services/game_writer.py; six bytes per step.
+    """
+
+    __tablename__ = 'game_steps'
+
+    game_id = db.Column(db.Integer, db.ForeignKey('game_result.id'), primary_key=True)
+    step_count = db.Column(db.Integer, nullable=False)
+    actions = db.Column(db.LargeBinary, nullable=False)
+    flags = db.Column(db.LargeBinary, nullable=False)
+    rewards = db.Column(db.LargeBinary, nullable=False)
+
+    @staticmethod
+    def row(game_id, steps):
+        """Column values for a StepLog."""
+        actions, flags, rewards = steps.to_blobs()
+        return {'game_id': game_id, 'step_count': len(steps), 'actions': actions, 'flags': flags,
+                'rewards': rewards}
+
+    def to_log(self):
+        """The stored steps as a (read-only) StepLog."""
+        from ai.step_log import StepLog
+        return StepLog.from_blobs(self.actions, self.flags, self.rewards)
+
+    def __repr__(self):
+        return f'<GameSteps {self.game_id}: {self.step_count} steps>'
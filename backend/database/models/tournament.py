@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tournament round models for AI Agent Galaxy.
+A round shares one seeded episode per agent between every player who
+predicts on it (see services/tournament_service.py).
+"""
+from datetime import datetime
+from .. import db
+
+ROUND_STATUSES = ('open', 'closing', 'scored', 'failed')
+
+
+class TournamentRound(db.Model):
+    """A prediction window on one seeded episode per agent.
+
+    Episodes are only simulated when the round closes, so nothing about the
+    outcome exists while predictions are accepted.
+    """
+
+    __tablename__ = 'tournament_round'
+
+    # Primary fields
+    id = db.Column(db.Integer, primary_key=True)
+    seed = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='open', index=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+
+    # Prediction window
+    opens_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    closes_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    # Closing (claimed_at guards against two closers; a stale claim can be retaken)
+    claimed_at = db.Column(db.DateTime)
+    scored_at = db.Column(db.DateTime)
+    error = db.Column(db.String(500))
+
+    # Outcome, filled in when the round is scored
+    ddqn_steps = db.Column(db.Integer)
+    d3qn_steps = db.Column(db.Integer)
+    ddqn_gif = db.Column(db.String(255))
+    d3qn_gif = db.Column(db.String(255))
+    predictions = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    def outcome(self, agent_type):
+        """(steps, replay filename) of agent_type's episode, None before scoring."""
+        steps = getattr(self, f'{agent_type}_steps')
+        return None if steps is None else (steps, getattr(self, f'{agent_type}_gif'))
+
+    def to_dict(self, max_steps=120):
+        """Convert round to dictionary for JSON responses (outcome only once scored)."""
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'opens_at': self.opens_at.isoformat(),
+            'closes_at': self.closes_at.isoformat(),
+            'scored_at': self.scored_at.isoformat() if self.scored_at else None,
+            'predictions': self.predictions,
+        }
+        if self.status == 'scored':
+            data['seed'] = self.seed
+            data['results'] = {}
+            for agent_type in ('ddqn', 'd3qn'):
+                steps, gif = self.outcome(agent_type)
+                data['results'][agent_type] = {
+                    'steps': steps,
+                    'succeeded': steps < max_steps,
+                    'gif_url': f'/video/{gif}' if gif else None,
+                }
+        if self.status == 'failed':
+            data['error'] = self.error
+        return data
+
+    def __repr__(self):
+        return f'<TournamentRound {self.id} ({self.status})>'
+
+
+class RoundPrediction(db.Model):
+    """One player's prediction for one agent in a round."""
+
+    __tablename__ = 'round_prediction'
+    __table_args__ = (
+        db.UniqueConstraint('round_id', 'user_id', 'agent_type', name='uq_round_prediction'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    round_id = db.Column(db.Integer, db.ForeignKey('tournament_round.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    agent_type = db.Column(db.String(10), nullable=False)
+
+    # Steps predicted, 0 for 'fail' (as in game_result)
+    prediction = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert prediction to dictionary for JSON responses."""
+        return {
+            'round_id': self.round_id,
+            'agent_type': self.agent_type,
+            'prediction': str(self.prediction) if self.prediction else 'fail',
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f'<RoundPrediction {self.round_id}/{self.user_id}/{self.agent_type}: {self.prediction}>'
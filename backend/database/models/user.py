@@ -34,6 +34,7 @@ class User(db.Model):
 
     # Relationships
     games = db.relationship('GameResult', backref='user', lazy=True, cascade='all, delete-orphan')
+    agent_stats = db.relationship('UserAgentStats', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def check_password(self, password):
         """Check password against hash."""
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Data version model for AI Agent Galaxy.
+One counter per data scope, bumped with every write to the scope's tables
+(see database/versions.py).
+"""
+from .. import db
+
+
+class DataVersion(db.Model):
+    """Version of one data scope ('games', 'users').
+
+    Bumped in the same transaction as the write, so a reader that sees an
+    unchanged version knows nothing in the scope was committed since.
+    """
+
+    __tablename__ = 'data_version'
+
+    scope = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DataVersion {self.scope}={self.version}>'
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Database profiles for AI Agent Galaxy.
+Selects the database URI and engine tuning for the configured DATABASE_PROFILE.
+
+Profiles:
+- sqlite: file database in WAL mode with busy_timeout, synchronous=NORMAL and a
+  larger page cache, so game writes no longer block admin dashboard readers;
+  new databases are created with auto_vacuum=INCREMENTAL
+- postgresql: DATABASE_URL with a sized connection pool (pre-ping + recycle)
+- default: plain SQLAlchemy engine with no tuning (the original behaviour)
+"""
+from sqlalchemy import event
+
+PROFILES = ('sqlite', 'postgresql', 'default')
+
+
+def apply_database_profile(app):
+    """Set the database URI and engine options for the configured profile.
+
+    Must run before db.init_app() so Flask-SQLAlchemy builds the engine with them.
+    Options set explicitly in SQLALCHEMY_ENGINE_OPTIONS take precedence.
+    """
+    profile = app.config.get('DATABASE_PROFILE', 'sqlite')
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DATABASE_PROFILE '{profile}' (expected one of {', '.join(PROFILES)})")
+
+    options = {}
+    if profile == 'postgresql':
+        database_url = app.config.get('DATABASE_URL')
+        if not database_url:
+            raise ValueError("DATABASE_PROFILE=postgresql requires the DATABASE_URL environment variable")
+        # Render and Heroku still hand out the deprecated postgres:// scheme
+        if database_url.startswith('postgres://'):
+            database_url = 'postgresql://' + database_url[len('postgres://'):]
+        app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+        options = {
+            'pool_size': app.config['DB_POOL_SIZE'],
+            'max_overflow': app.config['DB_MAX_OVERFLOW'],
+            'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+            'pool_recycle': app.config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': app.config['DB_POOL_PRE_PING'],
+        }
+    elif profile == 'sqlite':
+        # The driver-level timeout covers the window before our PRAGMAs run
+        options = {'connect_args': {'timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000.0}}
+
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return profile
+
+
+def register_engine_events(app, engine):
+    """Attach per-connection tuning to an engine created for the sqlite profile."""
+    if app.config.get('DATABASE_PROFILE', 'sqlite') != 'sqlite' or engine.dialect.name != 'sqlite':
+        return
+
+    busy_timeout_ms = int(app.config['SQLITE_BUSY_TIMEOUT_MS'])
+    # Negative cache_size is interpreted by SQLite as KiB rather than pages
+    cache_size = -abs(int(app.config['SQLITE_CACHE_SIZE_KB']))
+
+    @event.listens_for(engine, 'connect')
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # Only takes effect for a new database (before its first table); lets the
+            # maintenance scheduler return free pages in steps instead of a full VACUUM
+            cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute(f'PRAGMA busy_timeout={busy_timeout_ms}')
+            cursor.execute('PRAGMA synchronous=NORMAL')
+            cursor.execute(f'PRAGMA cache_size={cache_size}')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+        finally:
+            cursor.close()
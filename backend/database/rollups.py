@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Incremental rollup helpers for AI Agent Galaxy.
+Applies counter deltas to rollup tables with a single upsert per key.
+"""
+from sqlalchemy import case, func, insert
+
+
+def _dialect_insert(dialect_name, table):
+    if dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert(table)
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert(table)
+    return None
+
+
+def increment_rollup(session, model, keys, increments, maximums=None):
+    """Add `increments` (and fold `maximums`) into the rollup row identified by `keys`.
+
+    Creates the row when it does not exist yet. Uses INSERT ... ON CONFLICT DO
+    UPDATE on SQLite and PostgreSQL so concurrent writers never lose a delta.
+    """
+    maximums = maximums or {}
+    table = model.__table__
+    values = dict(keys)
+    values.update(increments)
+    values.update(maximums)
+
+    stmt = _dialect_insert(session.get_bind().dialect.name, table)
+    if stmt is not None:
+        stmt = stmt.values(**values)
+        updates = {name: table.c[name] + stmt.excluded[name] for name in increments}
+        updates.update({
+            name: case((table.c[name] < stmt.excluded[name], stmt.excluded[name]), else_=table.c[name])
+            for name in maximums
+        })
+        session.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=updates))
+        return
+
+    # Generic fallback: update in place, insert when nothing matched
+    condition = [table.c[name] == value for name, value in keys.items()]
+    updates = {name: func.coalesce(table.c[name], 0) + delta for name, delta in increments.items()}
+    updates.update({
+        name: case((func.coalesce(table.c[name], value) < value, value), else_=table.c[name])
+        for name, value in maximums.items()
+    })
+    result = session.execute(table.update().where(*condition).values(**updates))
+    if result.rowcount == 0:
+        session.execute(insert(table).values(**values))
+
+
+def increment_rollups(session, model, rows, keys, increments, maximums=()):
+    """increment_rollup for many rows in one executemany.
+
+    `rows` are dicts holding the `keys`, `increments` and `maximums` columns.
+    Without a native upsert each row goes through increment_rollup.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    stmt = _dialect_insert(session.get_bind().dialect.name, table)
+    if stmt is None:
+        for row in rows:
+            increment_rollup(session, model,
+                             keys={name: row[name] for name in keys},
+                             increments={name: row[name] for name in increments},
+                             maximums={name: row[name] for name in maximums})
+        return
+
+    updates = {name: table.c[name] + stmt.excluded[name] for name in increments}
+    updates.update({
+        name: case((table.c[name] < stmt.excluded[name], stmt.excluded[name]), else_=table.c[name])
+        for name in maximums
+    })
+    session.execute(stmt.on_conflict_do_update(index_elements=list(keys), set_=updates), rows)
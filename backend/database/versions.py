@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Data versions for AI Agent Galaxy.
+
+A counter per data scope is bumped in the same transaction as any write to
+the scope's tables, so a cache (services/response_cache.py) can tell from
+one small read whether what it holds is still current - in every worker
+process, whichever process made the write.
+
+Writes are noticed through session events: ORM flushes of new, changed or
+deleted rows (after_flush) and Core INSERT/UPDATE/DELETE statements run
+through the session (do_orm_execute). The bump itself runs just before the
+commit. Raw driver SQL is not seen; call bump_versions() after it.
+"""
+from sqlalchemy import event, select, update
+
+SCOPE_TABLES = {
+    'games': ('game_result', 'game_steps'),
+    'users': ('user', 'user_agent_stats'),
+}
+_TABLE_SCOPES = {table: scope for scope, tables in SCOPE_TABLES.items() for table in tables}
+_PENDING = 'data_version_scopes'
+
+
+def ensure_version_rows(session):
+    """Create the counter row of every scope that has none yet."""
+    from .models import DataVersion
+
+    existing = set(session.execute(select(DataVersion.scope)).scalars())
+    session.add_all(DataVersion(scope=scope, version=0) for scope in SCOPE_TABLES if scope not in existing)
+    session.commit()
+
+
+def read_versions(session, scopes):
+    """Current versions of `scopes`, in the given order."""
+    from .models import DataVersion
+
+    versions = dict(session.execute(
+        select(DataVersion.scope, DataVersion.version).where(DataVersion.scope.in_(scopes))
+    ).all())
+    return tuple(versions.get(scope, 0) for scope in scopes)
+
+
+def bump_versions(session, scopes):
+    """Increment the versions of `scopes` in the session's transaction."""
+    from .models import DataVersion
+
+    session.execute(
+        update(DataVersion).where(DataVersion.scope.in_(sorted(scopes)))
+        .values(version=DataVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _note(session, table_name):
+    scope = _TABLE_SCOPES.get(table_name)
+    if scope is not None:
+        session.info.setdefault(_PENDING, set()).add(scope)
+
+
+def _after_flush(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, '__table__', None)
+        if table is not None:
+            _note(session, table.name)
+
+
+def _do_orm_execute(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, 'table', None)
+        if table is not None:
+            _note(state.session, table.name)
+
+
+def _before_commit(session):
+    # Flush first so rows still pending are counted
+    session.flush()
+    scopes = session.info.pop(_PENDING, None)
+    if scopes:
+        bump_versions(session, scopes)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING, None)
+
+
+def register_version_events(session):
+    """Bump data versions on commits of `session` (a Session, sessionmaker or scoped_session)."""
+    for name, listener in (('after_flush', _after_flush), ('do_orm_execute', _do_orm_execute),
+                           ('before_commit', _before_commit), ('after_rollback', _after_rollback)):
+        if not event.contains(session, name, listener):
+            event.listen(session, name, listener)
@@ -0,0 +1,23 @@
+"""
+Custom exceptions for AI Agent Galaxy.
+"""
+
+
+class GameWriteError(Exception):
+    """Raised when a finished game could not be committed to the database."""
+
+
+class InferenceUnavailable(Exception):
+    """Raised when the local inference daemon cannot answer a query."""
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the password hashing pool is saturated or a job timed out."""
+
+
+class RoundClosed(Exception):
+    """Raised when a prediction arrives for a tournament round that no longer accepts them."""
+
+
+class RescoreInProgress(Exception):
+    """Raised when a rescoring job is requested while another one is pending or running."""
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Gunicorn settings for AI Agent Galaxy.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Prefork workers with threads; the app (and the models) is loaded in the
+master before forking. Sizes come from the WEB_* settings in config.py.
+"""
+from config import Config
+
+bind = f"{Config.HOST}:{Config.PORT}"
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS
+worker_class = 'gthread'
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = 30
+
+# Load wsgi:app (models included) once in the master; workers inherit it
+preload_app = True
+
+# Recycle workers after N requests to bound slow growth (allocator fragmentation)
+max_requests = Config.WEB_MAX_REQUESTS
+max_requests_jitter = Config.WEB_MAX_REQUESTS_JITTER
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Per-worker setup that must not be inherited from the master."""
+    import sys
+    from database import db
+    from wsgi import app
+
+    # With the inference daemon the workers never import torch
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(Config.TORCH_NUM_THREADS)
+    # Prefilled environments reseed themselves on their first lease here (ai/environment.py)
+    # Connections opened in the master must not be shared across processes
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,6 @@
+# Middleware for AI Agent Galaxy
+from .admission import admission_controller, admission_controlled, init_admission_control
+from .profiling import request_profiler, init_profiling
+
+__all__ = ['admission_controller', 'admission_controlled', 'init_admission_control',
+           'request_profiler', 'init_profiling']
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Admission control for game execution in AI Agent Galaxy.
+
+Episodes are CPU-heavy, so run-validation is wrapped with @admission_controlled:
+1. Per-user token bucket (ADMISSION_USER_RATE games/minute, bursts of
+   ADMISSION_USER_BURST). An empty bucket answers 429 with Retry-After set
+   to when the next token arrives.
+2. Global concurrency limit: at most ADMISSION_MAX_CONCURRENT episodes run
+   at once. Further requests wait in a FIFO queue of ADMISSION_MAX_QUEUE
+   places for up to ADMISSION_QUEUE_TIMEOUT seconds. A full queue, or a wait
+   that times out, answers 503 right away with Retry-After estimated from
+   the recent episode time, and the user's token is given back.
+Admitted requests therefore see at most max_queue / max_concurrent episode
+times of queueing however hard the endpoint is hit.
+
+Under the ASGI server (asgi.py) async handlers use @admission_controlled_async:
+the same controller, but a queued request is a suspended task, not a thread.
+
+Limits and buckets are per process: under gunicorn the site-wide limit is
+WEB_WORKERS x ADMISSION_MAX_CONCURRENT. Counters are in stats() and
+GET /api/admin/admission.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from flask import jsonify, session
+
+# Buckets idle long enough to be full again are dropped past this many users
+MAX_TRACKED_BUCKETS = 10000
+WAIT_SAMPLES = 1024
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted; carries the HTTP status and Retry-After."""
+
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`."""
+
+    __slots__ = ('tokens', 'updated')
+
+    def __init__(self, burst, now):
+        self.tokens = float(burst)
+        self.updated = now
+
+    def refill(self, rate, burst, now):
+        self.tokens = min(float(burst), self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def take(self, rate, burst, now):
+        """Take one token; returns 0 on success, else seconds until one is available."""
+        self.refill(rate, burst, now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / rate
+
+
+class AsyncWaiter:
+    """A queue place an event loop task awaits; set() may be called from any thread."""
+
+    __slots__ = ('_loop', '_future', '_set')
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._future = self._loop.create_future()
+        self._set = False
+
+    def set(self):
+        self._set = True
+        self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+    def is_set(self):
+        return self._set
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded FIFO wait queue and per-user token buckets."""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.max_concurrent = 2
+        self.max_queue = 4
+        self.queue_timeout = 15.0
+        self.user_rate = 12 / 60.0  # tokens per second
+        self.user_burst = 4
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiters = deque()
+        self._buckets = {}
+        self._service_time = None  # EWMA of episode time, seconds
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._counters = {
+            'admitted': 0, 'queued': 0, 'completed': 0,
+            'rejected_rate_limited': 0, 'rejected_queue_full': 0, 'rejected_queue_timeout': 0,
+            'max_queue_depth_seen': 0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read ADMISSION_* settings from app config."""
+        self.enabled = app.config['ADMISSION_ENABLED']
+        self.max_concurrent = max(1, app.config['ADMISSION_MAX_CONCURRENT'])
+        self.max_queue = max(0, app.config['ADMISSION_MAX_QUEUE'])
+        self.queue_timeout = app.config['ADMISSION_QUEUE_TIMEOUT']
+        self.user_rate = app.config['ADMISSION_USER_RATE'] / 60.0
+        self.user_burst = app.config['ADMISSION_USER_BURST']
+        app.extensions['admission'] = self
+
+    def _retry_after(self, queued):
+        """Whole seconds until a slot is likely to free up for a new request."""
+        service = self._service_time or 1.0
+        return max(1, math.ceil(service * (queued + 1) / self.max_concurrent))
+
+    def _take_token(self, user_key, now):
+        if user_key is None or self.user_rate <= 0:
+            return 0.0
+        bucket = self._buckets.get(user_key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_BUCKETS:
+                self._prune_buckets(now)
+            bucket = self._buckets[user_key] = TokenBucket(self.user_burst, now)
+        return bucket.take(self.user_rate, self.user_burst, now)
+
+    def _refund_token(self, user_key):
+        bucket = self._buckets.get(user_key)
+        if bucket is not None:
+            bucket.tokens = min(float(self.user_burst), bucket.tokens + 1.0)
+
+    def _prune_buckets(self, now):
+        full_after = self.user_burst / self.user_rate
+        for key in [k for k, b in self._buckets.items() if now - b.updated >= full_after]:
+            del self._buckets[key]
+
+    def _enter(self, user_key, now, waiter_class):
+        """Take a slot (returns None) or a place in the queue (returns the waiter to wait on)."""
+        with self._lock:
+            wait = self._take_token(user_key, now)
+            if wait:
+                self._counters['rejected_rate_limited'] += 1
+                raise AdmissionRejected(429, 'Too many games, please slow down', max(1, math.ceil(wait)))
+            if self._running < self.max_concurrent and not self._waiters:
+                self._running += 1
+                self._counters['admitted'] += 1
+                self._waits.append(0.0)
+                return None
+            if len(self._waiters) >= self.max_queue:
+                self._refund_token(user_key)
+                self._counters['rejected_queue_full'] += 1
+                raise AdmissionRejected(503, 'Server busy, please try again shortly',
+                                        self._retry_after(len(self._waiters)))
+            waiter = waiter_class()
+            self._waiters.append(waiter)
+            self._counters['queued'] += 1
+            self._counters['max_queue_depth_seen'] = max(self._counters['max_queue_depth_seen'],
+                                                         len(self._waiters))
+            return waiter
+
+    def _leave_queue(self, waiter, user_key, now):
+        """After a wait: the seconds queued if the slot was handed over, else reject."""
+        with self._lock:
+            # Checked under the lock: release() may have handed us the slot just now
+            if not waiter.is_set():
+                self._waiters.remove(waiter)
+                self._refund_token(user_key)
+                self._counters['rejected_queue_timeout'] += 1
+                raise AdmissionRejected(503, 'Server busy, please try again shortly',
+                                        self._retry_after(len(self._waiters)))
+            waited = time.monotonic() - now
+            self._counters['admitted'] += 1
+            self._waits.append(waited)
+        return waited
+
+    def acquire(self, user_key=None):
+        """Wait for an execution slot; returns seconds spent queued.
+
+        Raises AdmissionRejected (429 rate limited, 503 queue full or wait timed out).
+        """
+        now = time.monotonic()
+        waiter = self._enter(user_key, now, threading.Event)
+        if waiter is None:
+            return 0.0
+        waiter.wait(self.queue_timeout)
+        return self._leave_queue(waiter, user_key, now)
+
+    async def acquire_async(self, user_key=None):
+        """acquire() for event loop handlers: a queued request waits without holding a thread."""
+        now = time.monotonic()
+        waiter = self._enter(user_key, now, AsyncWaiter)
+        if waiter is None:
+            return 0.0
+        try:
+            await waiter.wait(self.queue_timeout)
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.is_set():
+                    self._waiters.remove(waiter)
+                elif self._waiters:
+                    # Handed a slot it will never use: pass it on
+                    self._waiters.popleft().set()
+                else:
+                    self._running -= 1
+            raise
+        return self._leave_queue(waiter, user_key, now)
+
+    def release(self, service_time=None):
+        """Free the caller's slot, handing it straight to the oldest waiter."""
+        with self._lock:
+            self._counters['completed'] += 1
+            if service_time is not None:
+                self._service_time = service_time if self._service_time is None \
+                    else 0.8 * self._service_time + 0.2 * service_time
+            if self._waiters:
+                # The slot passes to the waiter; _running stays the same
+                self._waiters.popleft().set()
+            else:
+                self._running -= 1
+
+    def stats(self):
+        """Current load, limits and counters."""
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = dict(self._counters)
+            stats.update({
+                'enabled': self.enabled,
+                'running': self._running,
+                'queue_depth': len(self._waiters),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'queue_timeout_s': self.queue_timeout,
+                'user_rate_per_minute': round(self.user_rate * 60, 3),
+                'user_burst': self.user_burst,
+                'tracked_users': len(self._buckets),
+                'avg_episode_ms': round(self._service_time * 1000, 1) if self._service_time else None,
+                'queue_wait_p50_ms': round(waits[len(waits) // 2] * 1000, 1) if waits else 0.0,
+                'queue_wait_p99_ms': round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 1)
+                if waits else 0.0,
+            })
+        return stats
+
+
+admission_controller = AdmissionController()
+
+
+def _client_key():
+    """Rate-limit key: the session user, or None for anonymous requests (the view rejects those)."""
+    user_id = session.get('user_id')
+    return f'user:{user_id}' if user_id else None
+
+
+def _rejection(e):
+    response = jsonify({'error': e.message, 'retry_after': e.retry_after})
+    response.status_code = e.status
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+def admission_controlled(view):
+    """Run the view only once admitted; otherwise answer 429/503 with Retry-After."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        controller = admission_controller
+        user_key = _client_key()
+        if not controller.enabled or user_key is None:
+            return view(*args, **kwargs)
+        try:
+            controller.acquire(user_key)
+        except AdmissionRejected as e:
+            return _rejection(e)
+
+        started = time.monotonic()
+        try:
+            return view(*args, **kwargs)
+        finally:
+            controller.release(time.monotonic() - started)
+    return wrapper
+
+
+def admission_controlled_async(handler):
+    """admission_controlled for async handlers (ASGI mode, see middleware/asgi.py)."""
+    @wraps(handler)
+    async def wrapper(*args, **kwargs):
+        controller = admission_controller
+        user_key = _client_key()
+        if not controller.enabled or user_key is None:
+            return await handler(*args, **kwargs)
+        try:
+            await controller.acquire_async(user_key)
+        except AdmissionRejected as e:
+            return _rejection(e)
+
+        started = time.monotonic()
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            controller.release(time.monotonic() - started)
+    return wrapper
+
+
+def init_admission_control(app):
+    """Configure the process-wide admission controller from app config."""
+    admission_controller.init_app(app)
+    app.logger.info(
+        f"Admission control: {'on' if admission_controller.enabled else 'off'}, "
+        f"{admission_controller.max_concurrent} concurrent episodes, queue {admission_controller.max_queue}, "
+        f"{app.config['ADMISSION_USER_RATE']}/min per user (burst {admission_controller.user_burst})")
+    return admission_controller
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+ASGI front for AI Agent Galaxy.
+
+AsgiApp serves the Flask app to an ASGI server (see asgi.py). Requests for
+the endpoints in its `views` (routes/async_routes.py) are coroutines run on
+the event loop inside an ordinary Flask request context, so before/after
+request hooks, the session, g, error handlers and CORS behave exactly as
+under the threaded server. Their blocking work is awaited with
+run_blocking() on a pool of ASGI_EPISODE_THREADS threads.
+
+Every other request runs the unchanged WSGI app on a pool of
+ASGI_WSGI_THREADS threads, as a gthread worker would. (asgiref's WsgiToAsgi
+is not used: by default it runs every request on one shared thread.)
+
+Request bodies are buffered before dispatch, up to MAX_CONTENT_LENGTH
+(MAX_BODY when unset): a larger body is answered 413 without being read
+further.
+
+Response bodies may be async iterators (Server-Sent Events), sent as they
+are produced until the client disconnects. Files are read in large chunks
+on the loop's default executor, never on the loop itself.
+"""
+import asyncio
+import contextvars
+import functools
+import io
+import json
+import sys
+from collections.abc import AsyncIterable
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, g, request
+from werkzeug.exceptions import HTTPException
+
+from utils.profiler import propagate
+
+FILE_CHUNK = 256 * 1024
+MAX_BODY = 16 * 1024 * 1024  # request body cap when MAX_CONTENT_LENGTH is unset
+
+
+class _BodyTooLarge(Exception):
+    """The request body is over the configured limit."""
+
+
+class FileBody:
+    """wsgi.file_wrapper: a file the sender reads in FILE_CHUNK pieces off the event loop."""
+
+    def __init__(self, file, buffer_size=FILE_CHUNK):
+        self.file = file
+        self.buffer_size = max(buffer_size, FILE_CHUNK)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = self.file.read(self.buffer_size)
+        if not chunk:
+            raise StopIteration()
+        return chunk
+
+    # Range requests seek instead of reading up to the first byte
+    def seekable(self):
+        return hasattr(self.file, 'seekable') and self.file.seekable()
+
+    def seek(self, *args):
+        self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def build_environ(scope, body):
+    """The WSGI environ of an ASGI HTTP request whose body has been read."""
+    script_name = scope.get('root_path', '').encode('utf-8').decode('latin-1')
+    path_info = scope['path'].encode('utf-8').decode('latin-1')
+    if script_name and path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client')
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': client[0] if client else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'wsgi.file_wrapper': FileBody,
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        value = value.decode('latin-1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _response_start(status, headers):
+    return {
+        'type': 'http.response.start',
+        'status': int(str(status).split(' ', 1)[0]),
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    }
+
+
+def _declared_length(scope):
+    for name, value in scope['headers']:
+        if name == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+async def _read_body(receive, limit):
+    """The whole request body, or None if the client went away first.
+
+    Raises _BodyTooLarge as soon as more than `limit` bytes have arrived.
+    """
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > limit:
+            raise _BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _send_error(send, status, message):
+    body = json.dumps({'error': message}).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+                    (b'connection', b'close')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+class AsgiApp:
+    """ASGI application running selected endpoints as coroutines and the rest as WSGI."""
+
+    def __init__(self, app, views):
+        self.app = app
+        self.views = dict(views)  # Flask endpoint -> coroutine function taking the view args
+        self.wsgi_threads = max(1, app.config.get('ASGI_WSGI_THREADS') or app.config.get('WEB_THREADS', 4))
+        self.episode_threads = max(1, app.config.get('ASGI_EPISODE_THREADS')
+                                   or app.config.get('ADMISSION_MAX_CONCURRENT', 2))
+        self.wsgi_pool = ThreadPoolExecutor(self.wsgi_threads, thread_name_prefix='asgi-wsgi')
+        self.episode_pool = ThreadPoolExecutor(self.episode_threads, thread_name_prefix='asgi-episode')
+        self.max_body = app.config.get('MAX_CONTENT_LENGTH') or MAX_BODY
+        app.extensions['asgi'] = self
+        app.logger.info(
+            f"ASGI mode: {len(self.views)} async endpoints, {self.wsgi_threads} WSGI threads, "
+            f"{self.episode_threads} episode threads")
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            await send({'type': 'websocket.close'})
+            return
+        try:
+            declared = _declared_length(scope)
+            if declared is not None and declared > self.max_body:
+                raise _BodyTooLarge()
+            body = await _read_body(receive, self.max_body)
+        except _BodyTooLarge:
+            await _send_error(send, 413, 'Request body too large')
+            return
+        if body is None:
+            return
+        environ = build_environ(scope, body)
+        view = self._match(environ)
+        if view is None:
+            await self._call_wsgi(environ, send)
+        else:
+            await self._call_async(view, environ, receive, send)
+
+    async def run_blocking(self, func, *args):
+        """Await func(*args) on the episode pool, inside the caller's Flask contexts.
+
+        A profiled request's profile follows the work onto the pool thread.
+        It is taken from g: the loop thread's current_profile() is shared by
+        every request on the loop.
+        """
+        call = functools.partial(contextvars.copy_context().run, func, *args)
+        profile = g.get('profile')
+        if profile is not None:
+            call = propagate(call, profile)
+        return await asyncio.get_running_loop().run_in_executor(self.episode_pool, call)
+
+    def _match(self, environ):
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            # 404, 405 and redirects are answered by the WSGI app as usual
+            return None
+        return self.views.get(endpoint)
+
+    async def _call_async(self, view, environ, receive, send):
+        # What Flask.wsgi_app does, with the view awaited
+        app = self.app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.push()
+                try:
+                    response = app.preprocess_request()
+                    if response is None:
+                        response = await view(**request.view_args)
+                except Exception as e:
+                    response = app.handle_user_exception(e)
+                response = app.finalize_request(response)
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            await self._send_response(response, environ, receive, send)
+        finally:
+            ctx.pop(error)
+
+    async def _send_response(self, response, environ, receive, send):
+        loop = asyncio.get_running_loop()
+        if isinstance(response.response, AsyncIterable):
+            await send(_response_start(response.status_code, response.get_wsgi_headers(environ).to_wsgi_list()))
+            await self._stream(response.response, receive, send)
+            return
+
+        in_memory = response.is_sequence
+        body, status, headers = response.get_wsgi_response(environ)
+        await send(_response_start(status, headers))
+        try:
+            if in_memory:
+                for chunk in body:
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            else:
+                # Files and generators may block: pull each chunk on the default executor
+                chunks = iter(body)
+                while (chunk := await loop.run_in_executor(None, next, chunks, None)) is not None:
+                    if chunk:
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        await send({'type': 'http.response.body'})
+
+    async def _stream(self, body, receive, send):
+        """Send an async body until it ends or the client disconnects, then close it."""
+        chunks = body.__aiter__()
+        disconnect = asyncio.ensure_future(_disconnected(receive))
+        try:
+            while True:
+                chunk = asyncio.ensure_future(chunks.__anext__())
+                await asyncio.wait((chunk, disconnect), return_when=asyncio.FIRST_COMPLETED)
+                if not chunk.done():
+                    chunk.cancel()
+                    await asyncio.gather(chunk, return_exceptions=True)
+                    return
+                try:
+                    data = chunk.result()
+                except StopAsyncIteration:
+                    break
+                await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+            await send({'type': 'http.response.body'})
+        finally:
+            disconnect.cancel()
+            if hasattr(chunks, 'aclose'):
+                await chunks.aclose()
+
+    async def _call_wsgi(self, environ, send):
+        loop = asyncio.get_running_loop()
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            state = {'start': None, 'sent': False}
+
+            def start_response(status, headers, exc_info=None):
+                if exc_info and state['sent']:
+                    raise exc_info[1].with_traceback(exc_info[2])
+                state['start'] = _response_start(status, headers)
+
+            def send_start():
+                if not state['sent']:
+                    send_from_thread(state['start'])
+                    state['sent'] = True
+
+            body = self.app(environ, start_response)
+            try:
+                for chunk in body:
+                    send_start()
+                    if chunk:
+                        send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                send_start()
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            send_from_thread({'type': 'http.response.body'})
+
+        await loop.run_in_executor(self.wsgi_pool, run)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.wsgi_pool.shutdown(wait=False)
+                self.episode_pool.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+async def run_blocking(func, *args):
+    """Await blocking func(*args) from an async handler without holding up the event loop."""
+    return await current_app.extensions['asgi'].run_blocking(func, *args)
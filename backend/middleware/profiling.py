@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+On-demand request profiling for AI Agent Galaxy.
+
+A request is profiled when an admin sends `X-Profile: 1`, or at random
+with probability PROFILE_SAMPLE_RATE. Its thread, and the helper threads
+doing work for it (password hashing pool, game writer flush), are sampled
+every PROFILE_INTERVAL_MS by utils/profiler.py for the whole request, so
+time in env.render, model loading, imageio.mimsave or the database shows up
+as stacks. At most PROFILE_MAX_ACTIVE requests per process are profiled at
+once.
+
+Each profile is saved to PROFILE_FOLDER as <name>.folded (collapsed stacks,
+which speedscope opens directly) plus <name>.json metadata; the newest
+PROFILE_MAX_FILES are kept. The response carries X-Profile-Id: <name>.
+Profiles are listed at GET /api/admin/profiles and downloaded from
+GET /api/admin/profiles/<name> (?format=speedscope for speedscope JSON).
+
+With PROFILING_ENABLED off no hooks are installed at all; with it on and
+no trigger, a request costs one header lookup (plus one random() when
+sampling).
+"""
+import json
+import os
+import random
+import re
+import threading
+from datetime import datetime
+
+from flask import current_app, g, request
+
+from services.auth_service import get_current_user
+from utils.profiler import Profile, Sampler
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_NAME = re.compile(r'^[0-9A-Za-z_-]+$')
+
+
+class RequestProfiler:
+    """Profiles selected requests and keeps the results on disk."""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.interval = 0.005
+        self.max_active = 2
+        self.folder = None
+        self.max_files = 200
+        self.sampler = Sampler(self.interval)
+        self._lock = threading.Lock()
+        self.stats = {'profiled': 0, 'skipped_busy': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read PROFIL* settings and install the request hooks when enabled."""
+        self.enabled = app.config.get('PROFILING_ENABLED', True)
+        self.sample_rate = min(1.0, max(0.0, float(app.config.get('PROFILE_SAMPLE_RATE', 0))))
+        self.interval = max(0.001, float(app.config.get('PROFILE_INTERVAL_MS', 5)) / 1000.0)
+        self.sampler.interval = self.interval
+        self.max_active = max(1, int(app.config.get('PROFILE_MAX_ACTIVE', 2)))
+        self.folder = str(app.config['PROFILE_FOLDER'])
+        self.max_files = max(1, int(app.config.get('PROFILE_MAX_FILES', 200)))
+        app.extensions['profiler'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._abandon)
+
+    # -- request hooks -----------------------------------------------------------
+
+    def _trigger(self):
+        if request.headers.get(PROFILE_HEADER):
+            user = get_current_user()
+            return 'header' if user is not None and user.is_admin else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def _start(self):
+        trigger = self._trigger()
+        if trigger is None:
+            return
+        if self.sampler.active >= self.max_active:
+            self.stats['skipped_busy'] += 1
+            return
+        g.profile = Profile(self.sampler, label=f'{request.method} {request.path}').start()
+        g.profile_trigger = trigger
+
+    def _finish(self, response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        profile.stop()
+        try:
+            response.headers['X-Profile-Id'] = self._save(profile, response.status_code)
+        except OSError as e:
+            current_app.logger.error(f"Could not save profile of {profile.label}: {e}")
+        return response
+
+    def _abandon(self, exc):
+        # The request failed before after_request ran: just stop sampling
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile.stop()
+
+    # -- storage -----------------------------------------------------------------
+
+    def _save(self, profile, status):
+        os.makedirs(self.folder, exist_ok=True)
+        created = datetime.utcnow()
+        name = f"{created.strftime('%Y%m%dT%H%M%S')}-{getattr(g, 'request_id', None) or os.urandom(8).hex()}"
+        name = re.sub(r'[^0-9A-Za-z_-]', '_', name)
+        meta = {
+            'name': name,
+            'method': request.method,
+            'path': request.path,
+            'status': status,
+            'duration_ms': round(profile.duration * 1000, 2),
+            'samples': profile.samples,
+            'interval_ms': self.interval * 1000,
+            'trigger': getattr(g, 'profile_trigger', None),
+            'user_id': getattr(g, 'user_id', None),
+            'created_at': created.isoformat(),
+        }
+        with open(os.path.join(self.folder, f'{name}.folded'), 'w') as f:
+            f.write(profile.collapsed())
+        with open(os.path.join(self.folder, f'{name}.json'), 'w') as f:
+            json.dump(meta, f)
+        self.stats['profiled'] += 1
+        self._prune()
+        return name
+
+    def _prune(self):
+        with self._lock:
+            names = sorted(n[:-len('.folded')] for n in os.listdir(self.folder) if n.endswith('.folded'))
+            for name in names[:-self.max_files]:
+                for extension in ('.folded', '.json'):
+                    try:
+                        os.remove(os.path.join(self.folder, name + extension))
+                    except OSError:
+                        pass
+
+    def list(self):
+        """Metadata of the saved profiles, newest first."""
+        if not self.folder or not os.path.isdir(self.folder):
+            return []
+        profiles = []
+        for filename in sorted(os.listdir(self.folder), reverse=True):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.folder, filename)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def path_for(self, name):
+        """Path of a saved profile's collapsed stacks, or None for unknown/invalid names."""
+        if not self.folder or not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.folder, f'{name}.folded')
+        return path if os.path.isfile(path) else None
+
+
+request_profiler = RequestProfiler()
+
+
+def init_profiling(app):
+    """Initialize request profiling with the Flask app."""
+    request_profiler.init_app(app)
+    app.logger.info(
+        f"Request profiling: {'on' if request_profiler.enabled else 'off'}"
+        + (f" ({PROFILE_HEADER} from admins, sample rate {request_profiler.sample_rate})"
+           if request_profiler.enabled else '')
+    )
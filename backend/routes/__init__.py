@@ -6,6 +6,7 @@ Registers all route blueprints with the Flask app.
 from .auth_routes import auth_bp
 from .game_routes import game_bp
 from .admin_routes import admin_bp
+from .round_routes import round_bp
 from .static_routes import static_bp
 
 
@@ -13,6 +14,7 @@ def register_routes(app):
     """Register all route blueprints with the Flask app."""
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(game_bp, url_prefix='/api')
+    app.register_blueprint(round_bp, url_prefix='/api')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(static_bp)
 
@@ -3,11 +3,23 @@
 Admin routes for AI Agent Galaxy.
 Extracted from original app.py - handles admin panel functionality.
 """
-from flask import Blueprint, request, jsonify
-from datetime import datetime, timedelta
+import json
+
+from flask import Blueprint, Response, request, jsonify, current_app, send_file
+from datetime import datetime, timedelta, timezone
 from database import db
-from database.models import User, GameResult
+from database.models import User, GameResult, UserAgentStats
+from exceptions import RescoreInProgress
 from services.auth_service import get_current_user, admin_required
+from services.analytics_service import activity_series, totals_since, GRANULARITIES
+from services.replay_store import replay_store
+from services.maintenance import maintenance
+from services.response_cache import cached_response, response_cache
+from services import rescoring_service
+from services.step_log_service import step_analytics
+from middleware.admission import admission_controller
+from middleware.profiling import request_profiler
+from utils.profiler import to_speedscope
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -23,6 +35,7 @@ def require_admin():
 
 
 @admin_bp.route('/stats', methods=['GET'])
+@cached_response('games', 'users', guard=require_admin)
 def admin_stats():
     """Get admin dashboard statistics.
     ---
@@ -72,10 +85,15 @@ def admin_stats():
                 d3qn_games:
                   type: integer
                   example: 400
+                performance:
+                  type: object
+                  description: Per-agent games, average score, average error and exact-hit accuracy
             top_players:
               type: array
               items:
                 $ref: '#/definitions/User'
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       401:
         description: Not authenticated
         schema:
@@ -99,12 +117,32 @@ def admin_stats():
         total_games = GameResult.query.count()
         total_score = db.session.query(db.func.sum(User.total_score)).scalar() or 0
         
+        # Last-7-days figures come from the analytics rollups, not range scans
         week_ago = datetime.utcnow() - timedelta(days=7)
-        recent_games = GameResult.query.filter(GameResult.timestamp >= week_ago).count()
-        recent_users = User.query.filter(User.created_at >= week_ago).count()
+        recent = totals_since(week_ago)
+        recent_games = recent['games']
+        recent_users = recent['new_users']
         
         ddqn_games = GameResult.query.filter_by(agent_type='ddqn').count()
         d3qn_games = GameResult.query.filter_by(agent_type='d3qn').count()
+
+        # Per-agent performance comes from the rollup table, not a game_result scan
+        agent_rollups = db.session.query(
+            UserAgentStats.agent_type,
+            db.func.sum(UserAgentStats.games_played),
+            db.func.sum(UserAgentStats.total_score),
+            db.func.sum(UserAgentStats.abs_error_sum),
+            db.func.sum(UserAgentStats.exact_hits)
+        ).group_by(UserAgentStats.agent_type).all()
+        agent_performance = {
+            agent_type: {
+                'games_played': games,
+                'average_score': round(score_sum / games, 2) if games else 0,
+                'average_error': round(error_sum / games, 2) if games else None,
+                'accuracy': round(hits / games, 4) if games else None
+            }
+            for agent_type, games, score_sum, error_sum, hits in agent_rollups
+        }
         
         top_players = User.query.order_by(User.total_score.desc()).limit(10).all()
         top_players_data = [{
@@ -127,7 +165,8 @@ def admin_stats():
             },
             'agent_stats': {
                 'ddqn_games': ddqn_games,
-                'd3qn_games': d3qn_games
+                'd3qn_games': d3qn_games,
+                'performance': agent_performance
             },
             'top_players': top_players_data
         })
@@ -137,6 +176,7 @@ def admin_stats():
 
 
 @admin_bp.route('/users', methods=['GET'])
+@cached_response('users', guard=require_admin)
 def admin_users():
     """Get paginated list of users.
     ---
@@ -194,6 +234,8 @@ def admin_users():
                 has_prev:
                   type: boolean
                   example: false
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       401:
         description: Not authenticated
         schema:
@@ -227,6 +269,13 @@ def admin_users():
             page=page, per_page=per_page, error_out=False
         )
         
+        # One query for the per-agent rollups of every user on this page
+        page_ids = [user.id for user in users.items]
+        agent_stats = {}
+        if page_ids:
+            for stats in UserAgentStats.query.filter(UserAgentStats.user_id.in_(page_ids)).all():
+                agent_stats.setdefault(stats.user_id, {})[stats.agent_type] = stats.to_dict()
+
         users_data = []
         for user in users.items:
             users_data.append({
@@ -239,7 +288,8 @@ def admin_users():
                 'is_admin': user.is_admin,
                 'is_active': user.is_active,
                 'created_at': user.created_at.isoformat(),
-                'last_login': user.last_login.isoformat() if user.last_login else None
+                'last_login': user.last_login.isoformat() if user.last_login else None,
+                'agent_stats': agent_stats.get(user.id, {})
             })
         
         return jsonify({
@@ -358,6 +408,7 @@ def admin_update_user(user_id):
 
 
 @admin_bp.route('/games', methods=['GET'])
+@cached_response('games', 'users', guard=require_admin)
 def admin_games():
     """Get paginated list of game results.
     ---
@@ -439,6 +490,8 @@ def admin_games():
                 has_prev:
                   type: boolean
                   example: false
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       401:
         description: Not authenticated
         schema:
@@ -491,4 +544,695 @@ def admin_games():
         })
         
     except Exception as e:
-        return jsonify({'error': 'Failed to fetch games'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Failed to fetch games'}), 500
+
+
+def _parse_utc(value):
+    """Parse an ISO 8601 timestamp into a naive UTC datetime."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@admin_bp.route('/charts/activity', methods=['GET'])
+def admin_activity_chart():
+    """Get bucketed activity trend data for dashboard charts.
+    ---
+    tags:
+      - Admin
+    summary: Get activity chart series
+    description: |
+      Games, successes, score and new users per hour or per day, read only from the
+      analytics rollup tables. Hourly data is available inside the hourly retention
+      window; use daily granularity for longer ranges.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    parameters:
+      - name: granularity
+        in: query
+        type: string
+        enum: [hour, day]
+        default: day
+      - name: start
+        in: query
+        type: string
+        format: date-time
+        description: Range start (UTC, ISO 8601). Defaults to 30 days (day) or 48 hours (hour) ago
+      - name: end
+        in: query
+        type: string
+        format: date-time
+        description: Range end (UTC, ISO 8601, exclusive). Defaults to now; later ends are clamped to now
+      - name: agent_type
+        in: query
+        type: string
+        enum: [ddqn, d3qn]
+        description: Only count games for this agent
+    responses:
+      200:
+        description: Series retrieved successfully
+        schema:
+          type: object
+          properties:
+            granularity:
+              type: string
+              example: day
+            series:
+              type: array
+              items:
+                type: object
+                properties:
+                  bucket:
+                    type: string
+                    format: date-time
+                  games:
+                    type: integer
+                    example: 42
+                  successes:
+                    type: integer
+                    example: 30
+                  score_sum:
+                    type: integer
+                    example: 1250
+                  new_users:
+                    type: integer
+                    example: 3
+                  success_rate:
+                    type: number
+                    example: 0.7143
+      400:
+        description: Invalid range or granularity
+        schema:
+          $ref: '#/definitions/Error'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+
+    agent_type = request.args.get('agent_type')
+    if agent_type not in (None, 'ddqn', 'd3qn'):
+        return jsonify({'error': 'Invalid agent type'}), 400
+
+    now = datetime.utcnow()
+    try:
+        # No activity is recorded ahead of now; this also bounds the hourly series to the retention window
+        end = min(_parse_utc(request.args['end']), now) if 'end' in request.args else now
+        default_span = timedelta(hours=48) if granularity == 'hour' else timedelta(days=30)
+        start = _parse_utc(request.args['start']) if 'start' in request.args else end - default_span
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 timestamps'}), 400
+
+    if start >= end:
+        return jsonify({'error': 'start must be before end'}), 400
+    if granularity == 'hour':
+        retention = timedelta(hours=current_app.config['ANALYTICS_HOURLY_RETENTION_HOURS'])
+        if start < now - retention:
+            return jsonify({'error': 'Hourly data only covers the retention window; use granularity=day'}), 400
+    elif end - start > timedelta(days=3660):
+        return jsonify({'error': 'Range too large'}), 400
+
+    try:
+        series = activity_series(start, end, granularity, agent_type)
+        return jsonify({'granularity': granularity, 'series': series})
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch activity'}), 500
+
+
+@admin_bp.route('/charts/steps', methods=['GET'])
+def admin_step_analytics():
+    """Get step-level analytics.
+    ---
+    tags:
+      - Admin
+    summary: Get step-level analytics
+    description: |
+      Action frequencies and reward curves (mean reward and mean running reward at each
+      step, with the number of games still running) per agent, aggregated from the packed
+      step logs of the newest games in the range.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    parameters:
+      - name: days
+        in: query
+        type: integer
+        default: 7
+        description: Only games from the last this many days
+      - name: limit
+        in: query
+        type: integer
+        default: 10000
+        description: Newest games to aggregate (at most STEP_ANALYTICS_MAX_GAMES)
+      - name: agent_type
+        in: query
+        type: string
+        enum: [ddqn, d3qn]
+        description: Only aggregate games of this agent
+    responses:
+      200:
+        description: Analytics retrieved successfully
+        schema:
+          $ref: '#/definitions/StepAnalytics'
+      400:
+        description: Invalid parameters
+        schema:
+          $ref: '#/definitions/Error'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    agent_type = request.args.get('agent_type')
+    if agent_type not in (None, 'ddqn', 'd3qn'):
+        return jsonify({'error': 'Invalid agent type'}), 400
+    max_games = current_app.config['STEP_ANALYTICS_MAX_GAMES']
+    try:
+        days = int(request.args.get('days', 7))
+        limit = int(request.args.get('limit', 10000))
+    except ValueError:
+        return jsonify({'error': 'days and limit must be integers'}), 400
+    if not 0 < days <= 3660:
+        return jsonify({'error': 'days must be between 1 and 3660'}), 400
+    if not 0 < limit <= max_games:
+        return jsonify({'error': f'limit must be between 1 and {max_games}'}), 400
+
+    try:
+        return jsonify(step_analytics(agent_type, days, limit))
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch step analytics'}), 500
+
+
+@admin_bp.route('/storage', methods=['GET'])
+def admin_storage():
+    """Get replay storage usage.
+    ---
+    tags:
+      - Admin
+    summary: Get replay storage usage
+    description: Tracked replay files and bytes, the configured quotas, disk usage of the replay volume and the result of the last retention sweep.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    responses:
+      200:
+        description: Usage retrieved successfully
+        schema:
+          type: object
+          properties:
+            tracked_files:
+              type: integer
+              example: 1200
+            tracked_bytes:
+              type: integer
+              example: 734003200
+            max_bytes:
+              type: integer
+              example: 2147483648
+            max_age_days:
+              type: integer
+              example: 30
+            oldest_access:
+              type: string
+              format: date-time
+            pending_registrations:
+              type: integer
+              example: 3
+            last_sweep:
+              type: object
+            disk:
+              type: object
+              properties:
+                total_bytes:
+                  type: integer
+                used_bytes:
+                  type: integer
+                free_bytes:
+                  type: integer
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    try:
+        return jsonify(replay_store.usage())
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch storage usage'}), 500
+
+
+@admin_bp.route('/admission', methods=['GET'])
+def admin_admission():
+    """Get game admission control status.
+    ---
+    tags:
+      - Admin
+    summary: Get game admission control status
+    description: Episodes running and queued in this worker process, the configured limits, and how many game requests were admitted or refused (rate limited, queue full, queue wait timed out) since the process started.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    responses:
+      200:
+        description: Status retrieved successfully
+        schema:
+          type: object
+          properties:
+            enabled:
+              type: boolean
+              example: true
+            running:
+              type: integer
+              example: 2
+            queue_depth:
+              type: integer
+              example: 3
+            max_concurrent:
+              type: integer
+              example: 2
+            max_queue:
+              type: integer
+              example: 4
+            admitted:
+              type: integer
+              example: 950
+            rejected_rate_limited:
+              type: integer
+              example: 12
+            rejected_queue_full:
+              type: integer
+              example: 40
+            rejected_queue_timeout:
+              type: integer
+              example: 0
+            max_queue_depth_seen:
+              type: integer
+              example: 4
+            avg_episode_ms:
+              type: number
+              example: 850.0
+            queue_wait_p99_ms:
+              type: number
+              example: 1700.0
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    return jsonify(admission_controller.stats())
+
+
+@admin_bp.route('/cache', methods=['GET'])
+def admin_cache():
+    """Get response cache statistics.
+    ---
+    tags:
+      - Admin
+    summary: Get response cache statistics
+    description: Entries, bytes, evictions and per-endpoint hits, misses, 304 answers and hit ratio of the response cache in the worker process that answers.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    responses:
+      200:
+        description: Cache statistics
+        schema:
+          $ref: '#/definitions/ResponseCacheStats'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    return jsonify(response_cache.stats())
+
+
+@admin_bp.route('/maintenance', methods=['GET'])
+def admin_maintenance():
+    """Get maintenance job status.
+    ---
+    tags:
+      - Admin
+    summary: Get maintenance job status
+    description: Registered housekeeping jobs with their interval and time budget, and the status, duration and result of their last run. Shared jobs (run by one worker at a time) report from the lease table; local jobs report this worker's last run.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    responses:
+      200:
+        description: Status retrieved successfully
+        schema:
+          type: object
+          properties:
+            enabled:
+              type: boolean
+              example: true
+            owner:
+              type: string
+              example: web-1:4242:9f2c1a7b
+            running:
+              type: string
+              description: Job running in this worker right now, if any
+            thread_alive:
+              type: boolean
+              example: true
+            jobs:
+              type: array
+              items:
+                type: object
+                properties:
+                  name:
+                    type: string
+                    example: purge_reset_tokens
+                  shared:
+                    type: boolean
+                    example: true
+                  interval_seconds:
+                    type: number
+                    example: 3600
+                  budget_seconds:
+                    type: number
+                    example: 2
+                  last_status:
+                    type: string
+                    enum: [ok, partial, error]
+                  last_started_at:
+                    type: string
+                    format: date-time
+                  last_duration_ms:
+                    type: number
+                    example: 14.2
+                  last_error:
+                    type: string
+                  last_result:
+                    type: object
+                  next_run_at:
+                    type: string
+                    format: date-time
+                  runs:
+                    type: integer
+                    example: 48
+                  failures:
+                    type: integer
+                    example: 0
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    try:
+        return jsonify(maintenance.status())
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch maintenance status'}), 500
+
+
+@admin_bp.route('/rescore', methods=['GET'])
+def admin_rescore_status():
+    """Get rescoring jobs.
+    ---
+    tags:
+      - Admin
+    summary: Get rescoring jobs
+    description: The newest rescoring jobs with their phase, cursor and counts of games and players whose scores changed, newest first.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    responses:
+      200:
+        description: Jobs retrieved successfully
+        schema:
+          type: object
+          properties:
+            jobs:
+              type: array
+              items:
+                $ref: '#/definitions/RescoreJob'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    return jsonify({'jobs': [job.to_dict() for job in rescoring_service.recent_jobs()]})
+
+
+@admin_bp.route('/rescore', methods=['POST'])
+def admin_rescore():
+    """Rescore stored games.
+    ---
+    tags:
+      - Admin
+    summary: Rescore stored games
+    description: Queues a job applying the current scoring rules to every game written so far, then recomputing player score totals and bests. The maintenance scheduler runs it in throttled, resumable chunks; follow it with GET /api/admin/rescore. A dry run only counts what would change.
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    parameters:
+      - name: body
+        in: body
+        required: false
+        schema:
+          type: object
+          properties:
+            dry_run:
+              type: boolean
+              example: false
+    responses:
+      202:
+        description: Job queued
+        schema:
+          $ref: '#/definitions/RescoreJob'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+      409:
+        description: A rescoring job is already pending or running
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    data = request.get_json(silent=True) or {}
+    try:
+        job = rescoring_service.start_rescore(requested_by=get_current_user().id,
+                                              dry_run=bool(data.get('dry_run', False)))
+    except RescoreInProgress as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(job.to_dict()), 202
+
+
+@admin_bp.route('/profiles', methods=['GET'])
+def admin_profiles():
+    """List saved request profiles.
+    ---
+    tags:
+      - Admin
+    summary: List saved request profiles
+    description: 'CPU profiles of requests sent by an admin with an "X-Profile: 1" header, or picked at PROFILE_SAMPLE_RATE, newest first. Each covers the whole request including work it handed to the password hashing pool and the game writer.'
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    responses:
+      200:
+        description: Profiles retrieved successfully
+        schema:
+          type: object
+          properties:
+            enabled:
+              type: boolean
+              example: true
+            sample_rate:
+              type: number
+              example: 0.0
+            profiles:
+              type: array
+              items:
+                type: object
+                properties:
+                  name:
+                    type: string
+                    example: 20261019T101500-3f9a1c2b7d4e5f60
+                  method:
+                    type: string
+                    example: POST
+                  path:
+                    type: string
+                    example: /api/game/play
+                  status:
+                    type: integer
+                    example: 200
+                  duration_ms:
+                    type: number
+                    example: 912.4
+                  samples:
+                    type: integer
+                    example: 170
+                  interval_ms:
+                    type: number
+                    example: 5
+                  trigger:
+                    type: string
+                    enum: [header, sampled]
+                  user_id:
+                    type: integer
+                    example: 1
+                  created_at:
+                    type: string
+                    format: date-time
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    return jsonify({
+        'enabled': request_profiler.enabled,
+        'sample_rate': request_profiler.sample_rate,
+        'profiles': request_profiler.list(),
+    })
+
+
+@admin_bp.route('/profiles/<name>', methods=['GET'])
+def admin_profile_download(name):
+    """Download a request profile.
+    ---
+    tags:
+      - Admin
+    summary: Download a request profile
+    description: The profile as collapsed stacks (one "thread;outer;...;inner count" line per stack, opened directly by speedscope and flamegraph.pl) or as speedscope JSON.
+    produces:
+      - text/plain
+      - application/json
+    security:
+      - SessionAuth: []
+    parameters:
+      - name: name
+        in: path
+        type: string
+        required: true
+        description: Profile name, as in X-Profile-Id or the profile list
+      - name: format
+        in: query
+        type: string
+        enum: [collapsed, speedscope]
+        default: collapsed
+    responses:
+      200:
+        description: Profile file
+      400:
+        description: Unknown format
+        schema:
+          $ref: '#/definitions/Error'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+      404:
+        description: Profile not found
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = require_admin()
+    if auth_check:
+        return auth_check
+
+    output = request.args.get('format', 'collapsed')
+    if output not in ('collapsed', 'speedscope'):
+        return jsonify({'error': 'format must be collapsed or speedscope'}), 400
+    path = request_profiler.path_for(name)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+
+    if output == 'collapsed':
+        return send_file(path, mimetype='text/plain', as_attachment=True, download_name=f'{name}.folded')
+    with open(path) as f:
+        profile = to_speedscope(f.read(), name, request_profiler.interval)
+    return Response(json.dumps(profile), mimetype='application/json',
+                    headers={'Content-Disposition': f'attachment; filename={name}.speedscope.json'})
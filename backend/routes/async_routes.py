@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Async handlers for AI Agent Galaxy's ASGI mode (asgi.py, middleware/asgi.py).
+
+ASYNC_VIEWS maps Flask endpoints to coroutines that stand in for their
+blueprint views under the ASGI server; URLs, hooks and responses stay those
+of the blueprints, and every endpoint not listed here runs its blueprint
+view on the WSGI thread pool.
+- game.run_validation: a player queued by admission control is a suspended
+  task, and the episode is awaited on the episode pool, so a waiting
+  request holds no thread.
+- rounds.round_event_stream: the SSE stream is an async generator fed by
+  the round event hub.
+- static.*: frontend files come from the in-memory frontend cache; replays
+  and static files are read off the loop by the sender.
+Short database reads (the session's user, a round's existence) run on the
+loop.
+"""
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+
+from database import db
+from database.models import TournamentRound
+from middleware.admission import admission_controlled_async
+from middleware.asgi import run_blocking
+from services.auth_service import get_current_user
+from services.round_events import AsyncSubscription, round_events
+from . import game_routes, round_routes, static_routes
+
+
+@admission_controlled_async
+async def run_validation():
+    """POST /api/run-validation: game_routes.run_validation with the episode awaited."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Must be logged in to play'}), 401
+
+    try:
+        data = request.get_json()
+        error = game_routes.validate_game_request(data)
+        if error:
+            return jsonify({'error': error}), 400
+        g.agent_type = data['agent_type']
+        return await run_blocking(game_routes.play_game, user, data['agent_type'], data['prediction'])
+
+    except Exception as e:
+        current_app.logger.error(f"Error in validation: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+async def round_event_stream(round_id):
+    """GET /api/rounds/<id>/events: round_routes.round_event_stream as an async stream."""
+    if db.session.get(TournamentRound, round_id) is None:
+        return jsonify({'error': 'Round not found'}), 404
+    # Thousands of streams may be open: none of them may keep a pooled connection
+    db.session.remove()
+    subscription = round_events.subscribe(round_id, AsyncSubscription)
+    return round_routes.event_stream_response(round_events.astream(subscription))
+
+
+def _on_loop(view):
+    """A blueprint view that never blocks, run on the event loop as it is."""
+    @wraps(view)
+    async def handler(**kwargs):
+        return view(**kwargs)
+    return handler
+
+
+ASYNC_VIEWS = {
+    'game.run_validation': run_validation,
+    'rounds.round_event_stream': round_event_stream,
+    'static.index': _on_loop(static_routes.index),
+    'static.favicon': _on_loop(static_routes.favicon),
+    'static.frontend_assets': _on_loop(static_routes.frontend_assets),
+    'static.serve_video': _on_loop(static_routes.serve_video),
+    'static.serve_static': _on_loop(static_routes.serve_static),
+}
@@ -4,17 +4,28 @@ Authentication routes for AI Agent Galaxy.
 Extracted from original app.py - handles login, register, logout, password reset.
 """
 from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
 from database import db
-from database.models import User, PasswordResetToken
+from database.models import User, PasswordResetToken, UserAgentStats
 from services.auth_service import get_current_user, login_user, logout_user, validate_registration_data
 from services.email_service import send_password_reset_email
+from services.analytics_service import record_new_user
+from services.password_service import password_service
+from services.response_cache import cached_response
+from exceptions import PasswordServiceBusy
 import secrets
 
 auth_bp = Blueprint('auth', __name__)
 
 
+def _password_busy():
+    """503 for when the password hashing pool is saturated."""
+    response = jsonify({'error': 'Server busy, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user account.
@@ -72,6 +83,10 @@ def register():
         description: Server error
         schema:
           $ref: '#/definitions/Error'
+      503:
+        description: Password hashing is saturated; retry after the Retry-After header
+        schema:
+          $ref: '#/definitions/Error'
     """
     try:
         data = request.get_json()
@@ -86,11 +101,13 @@ def register():
             return jsonify({'error': '; '.join(errors)}), 400
 
         # Create new user
+        now = datetime.utcnow()
         user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password),
-            last_login=datetime.utcnow()
+            password_hash=password_service.hash(password),
+            created_at=now,
+            last_login=now
         )
 
         # Make first user an admin
@@ -98,6 +115,7 @@ def register():
             user.is_admin = True
 
         db.session.add(user)
+        record_new_user(db.session, now)
         db.session.commit()
 
         # Log in the user (unless skip_auto_login is true for testing)
@@ -109,6 +127,9 @@ def register():
             'user': user.to_dict()
         })
 
+    except PasswordServiceBusy:
+        db.session.rollback()
+        return _password_busy()
     except Exception as e:
         return jsonify({'error': 'Registration failed'}), 500
 
@@ -166,6 +187,10 @@ def login():
         description: Server error
         schema:
           $ref: '#/definitions/Error'
+      503:
+        description: Password hashing is saturated; retry after the Retry-After header
+        schema:
+          $ref: '#/definitions/Error'
     """
     try:
         data = request.get_json()
@@ -178,7 +203,8 @@ def login():
 
         user = User.query.filter_by(username=username).first()
 
-        if not user or not user.check_password(password):
+        # Upgrades a hash made with outdated parameters; login_user commits it
+        if not user or not password_service.verify_and_update(user, password):
             return jsonify({'error': 'Invalid username or password'}), 401
 
         if not user.is_active:
@@ -187,12 +213,17 @@ def login():
         # Log in the user (unless skip_auto_login is true for testing)
         if not skip_auto_login:
             login_user(user)
+        else:
+            db.session.commit()  # keep a rehashed password
 
         return jsonify({
             'success': True,
             'user': user.to_dict()
         })
 
+    except PasswordServiceBusy:
+        db.session.rollback()
+        return _password_busy()
     except Exception as e:
         return jsonify({'error': 'Login failed'}), 500
 
@@ -228,6 +259,7 @@ def logout():
 
 
 @auth_bp.route('/me', methods=['GET'])
+@cached_response('users', per_user=True)
 def get_current_user_info():
     """Get current user information.
     ---
@@ -269,6 +301,35 @@ def get_current_user_info():
                 is_admin:
                   type: boolean
                   example: false
+                agent_stats:
+                  type: object
+                  description: Per-agent breakdown keyed by agent type (ddqn, d3qn)
+                  additionalProperties:
+                    type: object
+                    properties:
+                      games_played:
+                        type: integer
+                        example: 6
+                      total_score:
+                        type: integer
+                        example: 300
+                      best_score:
+                        type: integer
+                        example: 100
+                      average_score:
+                        type: number
+                        example: 50.0
+                      average_error:
+                        type: number
+                        example: 8.5
+                      exact_hits:
+                        type: integer
+                        example: 1
+                      accuracy:
+                        type: number
+                        example: 0.1667
+      304:
+        description: Not modified since the ETag sent in If-None-Match
       401:
         description: Not authenticated
         schema:
@@ -277,7 +338,9 @@ def get_current_user_info():
     user = get_current_user()
     if not user:
         return jsonify({'error': 'Not logged in'}), 401
-    
+
+    agent_stats = UserAgentStats.query.filter_by(user_id=user.id).all()
+
     return jsonify({
         'user': {
             'id': user.id,
@@ -286,7 +349,8 @@ def get_current_user_info():
             'games_played': user.games_played,
             'best_score': user.best_score,
             'created_at': user.created_at.isoformat(),
-            'is_admin': user.is_admin
+            'is_admin': user.is_admin,
+            'agent_stats': {stats.agent_type: stats.to_dict() for stats in agent_stats}
         }
     })
 
@@ -362,8 +426,10 @@ def forgot_password():
         )
         
         db.session.add(reset_token)
-        db.session.commit()
-        send_password_reset_email(user, token)
+        # Queues the email and commits it together with the token; delivery is in the background
+        if not send_password_reset_email(user, token):
+            db.session.rollback()
+            return jsonify({'error': 'Password reset failed'}), 500
         
         return jsonify({
             'success': True,
@@ -427,6 +493,10 @@ def reset_password():
         description: Server error
         schema:
           $ref: '#/definitions/Error'
+      503:
+        description: Password hashing is saturated; retry after the Retry-After header
+        schema:
+          $ref: '#/definitions/Error'
     """
     try:
         data = request.get_json()
@@ -442,7 +512,7 @@ def reset_password():
             return jsonify({'error': 'Invalid or expired reset token'}), 400
         
         user = reset_token.user
-        user.password_hash = generate_password_hash(new_password)
+        user.password_hash = password_service.hash(new_password)
         reset_token.used = True
         db.session.commit()
         
@@ -451,5 +521,8 @@ def reset_password():
             'message': 'Password reset successfully!'
         })
         
+    except PasswordServiceBusy:
+        db.session.rollback()
+        return _password_busy()
     except Exception as e:
         return jsonify({'error': 'Password reset failed'}), 500
\ No newline at end of file
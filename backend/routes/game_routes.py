@@ -4,21 +4,22 @@ Game routes for AI Agent Galaxy.
 Extracted from original app.py - handles game execution and validation.
 """
 import os
-import uuid
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from database import db
 from database.models import GameResult
+from services.game_writer import game_writer
+from services.replay_store import replay_store
 from services.auth_service import get_current_user
 from services.scoring_service import calculate_score, get_score_explanation
-from ai import video_of_one_DDQN_episode, video_of_one_D3QN_episode, setup_environment
+from services.step_log_service import game_timeline
+from middleware.admission import admission_controlled
+from ai import run_episode
 
 game_bp = Blueprint('game', __name__)
 
-# Initialize environment once
-env = setup_environment()
-
 
 @game_bp.route('/run-validation', methods=['POST'])
+@admission_controlled
 def run_validation():
     """Run AI agent validation and return results.
     ---
@@ -37,6 +38,10 @@ def run_validation():
       - Far (11-20 steps off): 25 points
       - Way Off (21+ steps off): 0 points
       - Correct failure prediction: 50 points
+
+      Episodes are admission controlled: each player may start a limited number of games
+      per minute (429 otherwise), and when all execution slots and the wait queue are taken
+      the request is refused with 503. Both carry a Retry-After header in seconds.
     consumes:
       - application/json
     produces:
@@ -72,6 +77,10 @@ def run_validation():
         schema:
           type: object
           properties:
+            game_id:
+              type: integer
+              example: 1042
+              description: Id of the stored game (null while the write is pending: async durability, or a sync write slower than GAME_WRITE_SYNC_TIMEOUT)
             steps:
               type: integer
               example: 48
@@ -82,7 +91,7 @@ def run_validation():
               description: Whether the agent reached the goal
             gif_url:
               type: string
-              example: /video/run_abc123.gif
+              example: /video/3f2a9c0d5e8b7a61c4d2e9f0b1a3c5d7e9f1a2b3c4d5e6f708192a3b4c5d6e7f.gif
               description: URL to the GIF recording of the episode
             agent_type:
               type: string
@@ -115,10 +124,18 @@ def run_validation():
         description: Not authenticated
         schema:
           $ref: '#/definitions/Error'
+      429:
+        description: Too many games started by this player; retry after the Retry-After header
+        schema:
+          $ref: '#/definitions/Error'
       500:
         description: Server error
         schema:
           $ref: '#/definitions/Error'
+      503:
+        description: All execution slots and the wait queue are busy; retry after the Retry-After header
+        schema:
+          $ref: '#/definitions/Error'
     """
     user = get_current_user()
     if not user:
@@ -126,92 +143,157 @@ def run_validation():
     
     try:
         data = request.get_json()
-        agent_type = data.get('agent_type')
-        prediction = data.get('prediction')
-        
-        if agent_type not in ['ddqn', 'd3qn']:
-            return jsonify({'error': 'Invalid agent type'}), 400
-        
-        if not prediction:
-            return jsonify({'error': 'Prediction required'}), 400
-        
-        # Generate unique filename for GIF
-        gif_filename = f"run_{uuid.uuid4().hex}.gif"
-        gif_path = os.path.join(current_app.config['VIDEO_FOLDER'], gif_filename)
-        
-        # Run the appropriate agent
-        if agent_type == 'ddqn':
-            model_path = os.path.join(current_app.config['MODEL_FOLDER'], 'DDQN_policy_net.pth')
-            result = video_of_one_DDQN_episode(env, model_path, gif_path)
-        else:  # d3qn
-            model_path = os.path.join(current_app.config['MODEL_FOLDER'], 'D3QN_policy_net.pth')
-            result = video_of_one_D3QN_episode(env, model_path, gif_path)
-        
-        # Parse results - SIMPLIFIED
-        if len(result) == 4:
-            total_reward, num_steps, gif_file, steps_log = result
-            gif_url = f'/video/{os.path.basename(gif_file)}' if gif_file else None
-            gif_filename_final = os.path.basename(gif_file) if gif_file else None
-        else:
-            total_reward, num_steps, steps_log = result
-            gif_url = None
-            gif_filename_final = None
-
-        # Calculate results
-        ai_agent_succeeded = bool(num_steps < current_app.config['MAX_STEPS'])
-        score = calculate_score(prediction, num_steps, ai_agent_succeeded)
-
-        # Save game result - SIMPLIFIED FIELDS
-        game_result = GameResult(
-            user_id=user.id,
-            agent_type=agent_type,
-            prediction=int(prediction) if prediction != 'fail' else 0,
-            actual_steps=int(num_steps),
-            score=int(score),
-            gif_filename=gif_filename_final
-        )
-
-        db.session.add(game_result)
-
-        # Update user statistics - SIMPLIFIED
-        user.total_score += int(score)
-        user.games_played += 1
-
-        # Track best score
-        if int(score) > user.best_score:
-            user.best_score = int(score)
-
-        db.session.commit()
-
-        return jsonify({
-            'steps': int(num_steps),
-            'succeeded': ai_agent_succeeded,
-            'gif_url': gif_url,
-            'agent_type': str(agent_type),
-            'score': int(score),
-            'prediction': str(prediction),
-            'user_stats': {
-                'total_score': user.total_score,
-                'games_played': user.games_played,
-                'best_score': user.best_score
-            }
-        })
+        error = validate_game_request(data)
+        if error:
+            return jsonify({'error': error}), 400
+        g.agent_type = data['agent_type']
+        return play_game(user, data['agent_type'], data['prediction'])
         
     except Exception as e:
         current_app.logger.error(f"Error in validation: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+def validate_game_request(data):
+    """The error message for an invalid run-validation body, else None."""
+    if data.get('agent_type') not in ['ddqn', 'd3qn']:
+        return 'Invalid agent type'
+    if not data.get('prediction'):
+        return 'Prediction required'
+    return None
+
+
+def play_game(user, agent_type, prediction):
+    """Run the episode, score the prediction and queue the game; returns the JSON response.
+
+    Blocking (the episode is CPU-bound): the ASGI handler awaits it on the
+    episode executor (routes/async_routes.py).
+    """
+    # Episodes write to a scratch file; store() moves it into content-addressed storage
+    gif_path = replay_store.incoming_path('.gif')
+    
+    # Run the appropriate agent (the AI stack is imported on the first game)
+    result = run_episode(agent_type, gif_path)
+    
+    # Parse results - SIMPLIFIED
+    if len(result) == 4:
+        total_reward, num_steps, gif_file, steps_log = result
+        gif_filename_final = replay_store.store(gif_file) if gif_file else None
+        gif_url = f'/video/{gif_filename_final}' if gif_filename_final else None
+    else:
+        total_reward, num_steps, steps_log = result
+        gif_url = None
+        gif_filename_final = None
+
+    # Calculate results
+    ai_agent_succeeded = bool(num_steps < current_app.config['MAX_STEPS'])
+    score = calculate_score(prediction, num_steps, ai_agent_succeeded)
+
+    # Queue the game for the write-behind buffer; user totals are applied
+    # there as SQL-side increments in the same batched transaction
+    pending = game_writer.submit(
+        user_id=user.id,
+        agent_type=agent_type,
+        prediction=int(prediction) if prediction != 'fail' else 0,
+        actual_steps=int(num_steps),
+        score=int(score),
+        gif_filename=gif_filename_final,
+        steps=steps_log or None
+    )
+
+    if pending.committed:
+        db.session.refresh(user)
+        user_stats = {
+            'total_score': user.total_score,
+            'games_played': user.games_played,
+            'best_score': user.best_score
+        }
+    else:
+        # Async durability, or a sync write past its timeout: report the totals this game will produce
+        user_stats = {
+            'total_score': user.total_score + int(score),
+            'games_played': user.games_played + 1,
+            'best_score': max(user.best_score, int(score))
+        }
+
+    return jsonify({
+        'game_id': pending.game_id,
+        'steps': int(num_steps),
+        'succeeded': ai_agent_succeeded,
+        'gif_url': gif_url,
+        'agent_type': str(agent_type),
+        'score': int(score),
+        'prediction': str(prediction),
+        'user_stats': user_stats
+    })
+
+
+@game_bp.route('/games/<int:game_id>/steps', methods=['GET'])
+def game_steps(game_id):
+    """Get a game's step timeline.
+    ---
+    tags:
+      - Game
+    summary: Get a game's step timeline
+    description: The agent's action, reward, running reward and done/truncated flags at every step of a game, as parallel arrays. Players can read their own games, admins any game.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    parameters:
+      - name: game_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Step timeline
+        schema:
+          $ref: '#/definitions/StepTimeline'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Not your game
+        schema:
+          $ref: '#/definitions/Error'
+      404:
+        description: Game not found or no steps stored for it
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+
+    game = db.session.get(GameResult, game_id)
+    if game is None:
+        return jsonify({'error': 'Game not found'}), 404
+    if game.user_id != user.id and not user.is_admin:
+        return jsonify({'error': 'Not your game'}), 403
+
+    timeline = game_timeline(game)
+    if timeline is None:
+        return jsonify({'error': 'No steps stored for this game'}), 404
+    return jsonify(timeline)
+
+
 @game_bp.route('/cleanup-old-videos', methods=['POST'])
 def cleanup_old_videos():
-    """Clean up old video files to save space.
+    """Enforce replay retention now and remove legacy MP4 files.
     ---
     tags:
       - Game
     summary: Clean up old videos
-    description: Remove old MP4 video files from the server to free up disk space. GIF files are preserved.
+    description: |
+      Admin only. Removes legacy MP4 files and runs one replay retention sweep, which
+      evicts replays unused for longer than the age quota and least-recently-used
+      replays while the replay folder is over its byte quota. Evicted games lose their gif_url.
     produces:
       - application/json
+    security:
+      - SessionAuth: []
     responses:
       200:
         description: Cleanup completed successfully
@@ -225,31 +307,56 @@ def cleanup_old_videos():
               type: integer
               example: 5
               description: Number of files removed
+            freed_bytes:
+              type: integer
+              example: 1048576
             message:
               type: string
-              example: Cleaned up 5 old MP4 files
+              example: Cleaned up 5 old replay files
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
       500:
         description: Server error
         schema:
           $ref: '#/definitions/Error'
     """
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    if not user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+
     try:
         import glob
         mp4_files = glob.glob(os.path.join(current_app.config['VIDEO_FOLDER'], "*.mp4"))
         removed_count = 0
-        
+        freed_bytes = 0
+
         for mp4_file in mp4_files:
             try:
+                size = os.path.getsize(mp4_file)
                 os.remove(mp4_file)
                 removed_count += 1
+                freed_bytes += size
             except Exception as e:
                 current_app.logger.error(f"Could not remove {mp4_file}: {e}")
-        
+
+        summary = replay_store.sweep()
+        removed_count += summary['evicted']
+        freed_bytes += summary['freed_bytes']
+
         return jsonify({
             'success': True,
             'removed_files': removed_count,
-            'message': f'Cleaned up {removed_count} old MP4 files'
+            'freed_bytes': freed_bytes,
+            'message': f'Cleaned up {removed_count} old replay files'
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
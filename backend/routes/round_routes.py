@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Tournament round routes for AI Agent Galaxy.
+Players predict on a shared seeded episode per agent; the round is scored
+for everybody at once when it closes (see services/tournament_service.py).
+"""
+from flask import Blueprint, request, jsonify, current_app
+from database import db
+from database.models import RoundPrediction, TournamentRound
+from exceptions import RoundClosed
+from services.auth_service import get_current_user
+from services.round_events import round_events
+from services import tournament_service
+from services.tournament_service import AGENTS
+
+round_bp = Blueprint('rounds', __name__)
+
+
+def _require_admin():
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Authentication required'}), 401
+    if not user.is_admin:
+        return jsonify({'error': 'Admin access required'}), 403
+    return None
+
+
+def _round_response(tournament_round, user=None):
+    data = tournament_round.to_dict(current_app.config['MAX_STEPS'])
+    if tournament_round.status == 'scored':
+        data['leaderboard'] = tournament_service.round_leaderboard(tournament_round.id)
+    if user is not None:
+        data['my_predictions'] = [p.to_dict() for p in RoundPrediction.query.filter_by(
+            round_id=tournament_round.id, user_id=user.id)]
+    return data
+
+
+@round_bp.route('/rounds', methods=['POST'])
+def create_round():
+    """Open a tournament round.
+    ---
+    tags:
+      - Tournament
+    summary: Open a tournament round
+    description: Opens a prediction window on one seeded episode per agent. The episodes are simulated once, when the round closes, and every prediction is scored against them.
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    parameters:
+      - name: body
+        in: body
+        required: false
+        schema:
+          type: object
+          properties:
+            duration_seconds:
+              type: number
+              example: 300
+              description: Length of the prediction window (default TOURNAMENT_ROUND_SECONDS)
+            seed:
+              type: integer
+              description: Maze seed (random when omitted)
+    responses:
+      201:
+        description: Round opened
+        schema:
+          $ref: '#/definitions/Round'
+      400:
+        description: Invalid duration or seed
+        schema:
+          $ref: '#/definitions/Error'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = _require_admin()
+    if auth_check:
+        return auth_check
+
+    data = request.get_json(silent=True) or {}
+    try:
+        tournament_round = tournament_service.open_round(
+            created_by=get_current_user().id,
+            duration=data.get('duration_seconds'),
+            seed=data.get('seed'),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(_round_response(tournament_round)), 201
+
+
+@round_bp.route('/rounds/current', methods=['GET'])
+def get_current_round():
+    """Get the open tournament round.
+    ---
+    tags:
+      - Tournament
+    summary: Get the open tournament round
+    description: The open round closing soonest, with the caller's predictions when logged in.
+    produces:
+      - application/json
+    responses:
+      200:
+        description: Open round
+        schema:
+          $ref: '#/definitions/Round'
+      404:
+        description: No round is open
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    tournament_round = tournament_service.current_round()
+    if tournament_round is None:
+        return jsonify({'error': 'No round is open'}), 404
+    return jsonify(_round_response(tournament_round, get_current_user()))
+
+
+@round_bp.route('/rounds/<int:round_id>', methods=['GET'])
+def get_round(round_id):
+    """Get a tournament round.
+    ---
+    tags:
+      - Tournament
+    summary: Get a tournament round
+    description: Status of a round. Once scored it includes the seed, each agent's steps and replay, and the round's top players; with a session, the caller's predictions.
+    produces:
+      - application/json
+    parameters:
+      - name: round_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Round
+        schema:
+          $ref: '#/definitions/Round'
+      404:
+        description: Round not found
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    tournament_round = db.session.get(TournamentRound, round_id)
+    if tournament_round is None:
+        return jsonify({'error': 'Round not found'}), 404
+    return jsonify(_round_response(tournament_round, get_current_user()))
+
+
+@round_bp.route('/rounds/<int:round_id>/events', methods=['GET'])
+def round_event_stream(round_id):
+    """Stream a tournament round's status and result.
+    ---
+    tags:
+      - Tournament
+    summary: Stream a tournament round's status and result
+    description: |
+      Server-Sent Events. A `status` event carries the round's id, status, closes_at and scored_at
+      and is sent on connect and whenever the status changes. Once the round is scored a `result`
+      event carries the round as GET /api/rounds/{round_id} returns it (without the caller's
+      predictions) and the stream ends. Idle streams get a comment line every
+      RESULT_STREAM_HEARTBEAT seconds and are closed after RESULT_STREAM_MAX_SECONDS.
+
+      Under the threaded server each open stream holds a worker thread; under the ASGI
+      server (asgi.py) it is a suspended task.
+    produces:
+      - text/event-stream
+    parameters:
+      - name: round_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Event stream
+      404:
+        description: Round not found
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    if db.session.get(TournamentRound, round_id) is None:
+        return jsonify({'error': 'Round not found'}), 404
+    # The stream may stay open for an hour: give the connection back to the pool now
+    db.session.remove()
+    subscription = round_events.subscribe(round_id)
+    return event_stream_response(round_events.stream(subscription))
+
+
+def event_stream_response(body):
+    """An SSE response that proxies must not buffer or cache."""
+    return current_app.response_class(body, mimetype='text/event-stream',
+                                      headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@round_bp.route('/rounds/<int:round_id>/predictions', methods=['POST'])
+def predict(round_id):
+    """Predict on a tournament round.
+    ---
+    tags:
+      - Tournament
+    summary: Predict on a tournament round
+    description: Records the caller's prediction for one agent of an open round, replacing an earlier one for the same agent. It is scored when the round closes.
+    consumes:
+      - application/json
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    parameters:
+      - name: round_id
+        in: path
+        type: integer
+        required: true
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - agent_type
+            - prediction
+          properties:
+            agent_type:
+              type: string
+              enum: [ddqn, d3qn]
+            prediction:
+              type: string
+              example: '45'
+              description: Steps (1-120) or 'fail'
+    responses:
+      200:
+        description: Prediction recorded
+        schema:
+          type: object
+          properties:
+            round_id:
+              type: integer
+            agent_type:
+              type: string
+            prediction:
+              type: string
+            created_at:
+              type: string
+              format: date-time
+      400:
+        description: Invalid agent or prediction
+        schema:
+          $ref: '#/definitions/Error'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      404:
+        description: Round not found
+        schema:
+          $ref: '#/definitions/Error'
+      409:
+        description: Round is closed
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Must be logged in to play'}), 401
+
+    data = request.get_json(silent=True) or {}
+    agent_type = data.get('agent_type')
+    prediction = str(data.get('prediction', '')).strip().lower()
+    if agent_type not in AGENTS:
+        return jsonify({'error': 'Invalid agent type'}), 400
+    if prediction != 'fail' and not (prediction.isdigit() and 1 <= int(prediction) <= 120):
+        return jsonify({'error': "Prediction must be 1-120 or 'fail'"}), 400
+
+    tournament_round = db.session.get(TournamentRound, round_id)
+    if tournament_round is None:
+        return jsonify({'error': 'Round not found'}), 404
+    try:
+        entry = tournament_service.submit_prediction(tournament_round, user.id, agent_type, prediction)
+    except RoundClosed as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(entry.to_dict())
+
+
+@round_bp.route('/rounds/<int:round_id>/close', methods=['POST'])
+def close_round(round_id):
+    """Close a tournament round now.
+    ---
+    tags:
+      - Tournament
+    summary: Close a tournament round now
+    description: Simulates the round's episodes, scores every prediction in one pass and writes the games, without waiting for the window to end. Also retries a failed round.
+    produces:
+      - application/json
+    security:
+      - SessionAuth: []
+    parameters:
+      - name: round_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Round scored
+        schema:
+          $ref: '#/definitions/Round'
+      401:
+        description: Not authenticated
+        schema:
+          $ref: '#/definitions/Error'
+      403:
+        description: Admin access required
+        schema:
+          $ref: '#/definitions/Error'
+      404:
+        description: Round not found
+        schema:
+          $ref: '#/definitions/Error'
+      409:
+        description: Round is already scored or being closed
+        schema:
+          $ref: '#/definitions/Error'
+      500:
+        description: Scoring failed (the round is marked failed and can be retried)
+        schema:
+          $ref: '#/definitions/Error'
+    """
+    auth_check = _require_admin()
+    if auth_check:
+        return auth_check
+
+    if db.session.get(TournamentRound, round_id) is None:
+        return jsonify({'error': 'Round not found'}), 404
+    try:
+        summary = tournament_service.close_round(round_id, force=True)
+    except Exception as e:
+        return jsonify({'error': f'Failed to close round: {e}'}), 500
+    if summary is None:
+        return jsonify({'error': 'Round is already scored or being closed'}), 409
+    return jsonify(summary)
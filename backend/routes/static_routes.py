@@ -4,9 +4,13 @@ Static routes for AI Agent Galaxy.
 Extracted from original app.py - handles frontend serving and static files.
 """
 import os
-from flask import Blueprint, send_from_directory, send_file, request, current_app
+from flask import Blueprint, send_from_directory, request, current_app
 from services.auth_service import get_current_user
 from database.models import PasswordResetToken
+from services.replay_store import replay_store, is_content_name
+from services.static_delivery import frontend_cache, send_cached_file
+
+REPLAY_MIMETYPES = {'.gif': 'image/gif', '.mp4': 'video/mp4'}
 
 static_bp = Blueprint('static', __name__)
 
@@ -14,7 +18,8 @@ static_bp = Blueprint('static', __name__)
 @static_bp.route('/')
 def index():
     """Serve main frontend page."""
-    return send_from_directory(current_app.config['FRONTEND_FOLDER'], 'index.html')
+    return frontend_cache.send(current_app.config['FRONTEND_FOLDER'], 'index.html',
+                               max_age=current_app.config['FRONTEND_CACHE_MAX_AGE'])
 
 
 @static_bp.route('/favicon.ico')
@@ -33,7 +38,14 @@ def admin_dashboard():
     user = get_current_user()
     if not user or not user.is_admin:
         return "Access denied. Admin privileges required.", 403
-    return send_from_directory(current_app.config['FRONTEND_FOLDER'], 'admin.html')
+    return frontend_cache.send(current_app.config['FRONTEND_FOLDER'], 'admin.html', private=True)
+
+
+@static_bp.route('/assets/<path:filename>')
+def frontend_assets(filename):
+    """Serve frontend CSS/JS assets (pre-compressed, revalidated by ETag)."""
+    return frontend_cache.send(os.path.join(current_app.config['FRONTEND_FOLDER'], 'assets'), filename,
+                               max_age=current_app.config['FRONTEND_CACHE_MAX_AGE'])
 
 
 @static_bp.route('/reset-password')
@@ -68,23 +80,30 @@ def reset_password_page():
 
 @static_bp.route('/video/<filename>')
 def serve_video(filename):
-    """Serve video/GIF files."""
-    video_path = os.path.join(current_app.config['VIDEO_FOLDER'], filename)
-    if os.path.exists(video_path):
-        if filename.endswith('.gif'):
-            return send_file(video_path, mimetype='image/gif')
-        elif filename.endswith('.mp4'):
-            return send_file(video_path, mimetype='video/mp4')
-        else:
-            return "Unsupported file format", 400
-    else:
+    """Serve video/GIF files by content name or legacy run_<uuid> name.
+
+    Replays never change once written: content names use their hash as a
+    strong ETag and are cached as immutable. Range requests are honoured.
+    """
+    mimetype = REPLAY_MIMETYPES.get(os.path.splitext(filename)[1].lower())
+    if mimetype is None:
+        return "Unsupported file format", 400
+
+    canonical_name, video_path = replay_store.resolve(filename)
+    if not os.path.isfile(video_path):
         return "File not found", 404
 
+    replay_store.touch(canonical_name)
+    etag = canonical_name.split('.', 1)[0] if is_content_name(canonical_name) else True
+    return send_cached_file(video_path, mimetype=mimetype, etag=etag,
+                            max_age=current_app.config['REPLAY_CACHE_MAX_AGE'], immutable=True)
+
 
 @static_bp.route('/static/<path:filename>')
 def serve_static(filename):
     """Serve static files."""
-    return send_from_directory(current_app.config['STATIC_FOLDER'], filename)
+    return send_from_directory(current_app.config['STATIC_FOLDER'], filename,
+                               max_age=current_app.config['STATIC_CACHE_MAX_AGE'])
 
 
 # Error handlers
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Bootstrap helpers for the AI Agent Galaxy maintenance scripts.
+Scripts are run from the backend directory, e.g. `python scripts/backfill_user_agent_stats.py`.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def make_app(config_name=None):
+    """Build a Flask app bound to the configured database, without the routes.
+
+    Skips route registration so maintenance scripts do not import torch/minigrid.
+    """
+    from flask import Flask
+    from config import get_config
+    from database import init_db
+
+    app = Flask('maintenance')
+    app.config.from_object(get_config(config_name))
+    app.logger.setLevel('INFO')
+    init_db(app)
+    return app
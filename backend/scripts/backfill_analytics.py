@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Rebuild the hourly/daily analytics rollups from game and user history.
+
+The first transaction clears both rollup tables and snapshots the highest
+game and user ids; anything written after that is already counted live by
+the game writer and the register route. History up to the snapshot is then
+streamed in id-ordered chunks and added to the rollups: hours inside the
+retention window go to analytics_hourly, older ones straight to
+analytics_daily. Resume an interrupted run with --resume-games/--resume-users
+(the ids printed in the progress log) and --no-reset.
+
+Usage (from backend/):
+    python scripts/backfill_analytics.py --chunk-size 5000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from _bootstrap import make_app
+
+
+def _flush(session, deltas, hourly_cutoff):
+    from database.models import AnalyticsHourly, AnalyticsDaily
+    from database.rollups import increment_rollup
+    from services.analytics_service import day_bucket
+
+    folded = {}
+    for (hour, agent_type), counters in deltas.items():
+        model = AnalyticsHourly if hour >= hourly_cutoff else AnalyticsDaily
+        bucket = hour if model is AnalyticsHourly else day_bucket(hour)
+        totals = folded.setdefault((model, bucket, agent_type), [0, 0, 0, 0])
+        for i, value in enumerate(counters):
+            totals[i] += value
+
+    for (model, bucket, agent_type), (games, successes, score_sum, new_users) in folded.items():
+        increment_rollup(session, model,
+                         keys={'bucket_start': bucket, 'agent_type': agent_type},
+                         increments={'games': games, 'successes': successes,
+                                     'score_sum': score_sum, 'new_users': new_users})
+    session.commit()
+
+
+def backfill(app, chunk_size=5000, reset=True, resume_games=0, resume_users=0, pause=0.0):
+    """Stream history into the rollups; returns (games_processed, users_processed)."""
+    from sqlalchemy import delete, func, select
+    from database import db
+    from database.models import User, GameResult, AnalyticsHourly, AnalyticsDaily
+    from database.models.analytics import ALL_AGENTS
+    from services.analytics_service import hour_bucket
+
+    max_steps = app.config.get('MAX_STEPS', 120)
+    retention = timedelta(hours=app.config['ANALYTICS_HOURLY_RETENTION_HOURS'])
+    hourly_cutoff = hour_bucket(datetime.utcnow() - retention)
+    games_done = users_done = 0
+
+    with app.app_context():
+        if reset:
+            db.session.execute(delete(AnalyticsHourly))
+            db.session.execute(delete(AnalyticsDaily))
+        max_game_id = db.session.execute(select(func.max(GameResult.id))).scalar() or 0
+        max_user_id = db.session.execute(select(func.max(User.id))).scalar() or 0
+        db.session.commit()
+        app.logger.info(f"Snapshot: games <= {max_game_id}, users <= {max_user_id}")
+
+        last_id = resume_games
+        while last_id < max_game_id:
+            rows = db.session.execute(
+                select(GameResult.id, GameResult.agent_type, GameResult.actual_steps,
+                       GameResult.score, GameResult.timestamp)
+                .where(GameResult.id > last_id, GameResult.id <= max_game_id)
+                .order_by(GameResult.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            deltas = {}
+            for _, agent_type, actual_steps, score, timestamp in rows:
+                counters = deltas.setdefault((hour_bucket(timestamp), agent_type), [0, 0, 0, 0])
+                counters[0] += 1
+                counters[1] += 1 if actual_steps < max_steps else 0
+                counters[2] += score
+            _flush(db.session, deltas, hourly_cutoff)
+            games_done += len(rows)
+            last_id = rows[-1][0]
+            app.logger.info(f"Games backfilled up to id {last_id} ({games_done} games)")
+            if pause:
+                time.sleep(pause)
+
+        last_id = resume_users
+        while last_id < max_user_id:
+            rows = db.session.execute(
+                select(User.id, User.created_at)
+                .where(User.id > last_id, User.id <= max_user_id)
+                .order_by(User.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            deltas = {}
+            for _, created_at in rows:
+                if created_at is not None:
+                    deltas.setdefault((hour_bucket(created_at), ALL_AGENTS), [0, 0, 0, 0])[3] += 1
+            _flush(db.session, deltas, hourly_cutoff)
+            users_done += len(rows)
+            last_id = rows[-1][0]
+            app.logger.info(f"Users backfilled up to id {last_id} ({users_done} users)")
+            if pause:
+                time.sleep(pause)
+
+    return games_done, users_done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per transaction')
+    parser.add_argument('--no-reset', action='store_true', help='keep existing rollup rows (for resuming)')
+    parser.add_argument('--resume-games', type=int, default=0, help='resume after this game id')
+    parser.add_argument('--resume-users', type=int, default=0, help='resume after this user id')
+    parser.add_argument('--pause', type=float, default=0.0, help='seconds to sleep between chunks')
+    args = parser.parse_args()
+
+    app = make_app()
+    started = time.perf_counter()
+    games, users = backfill(app, args.chunk_size, not args.no_reset,
+                            args.resume_games, args.resume_users, args.pause)
+    print(f"Backfilled {games} games and {users} users in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Backfill the user_agent_stats rollup from existing game history.
+
+Rebuilds the rollup rows for users in chunks of --chunk-size user ids. Each
+chunk runs in its own transaction: the chunk's user rows are locked (so the
+game writer waits instead of racing), their rollup rows are deleted and then
+re-inserted from a single GROUP BY over game_result. Safe to re-run and to
+resume with --start-after.
+
+Usage (from backend/):
+    python scripts/backfill_user_agent_stats.py --chunk-size 500
+"""
+import argparse
+import time
+
+from _bootstrap import make_app
+
+
+def backfill(app, chunk_size=500, start_after=0, pause=0.0):
+    """Rebuild rollups chunk by chunk; returns (users_processed, rows_written)."""
+    from sqlalchemy import case, delete, func, insert, select
+    from database import db
+    from database.models import User, GameResult, UserAgentStats
+
+    max_steps = app.config.get('MAX_STEPS', 120)
+    predicted = case((GameResult.prediction == 0, max_steps), else_=GameResult.prediction)
+    error = func.abs(predicted - GameResult.actual_steps)
+
+    users_done = rows_written = 0
+    last_id = start_after
+    with app.app_context():
+        while True:
+            user_ids = db.session.execute(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+            ).scalars().all()
+            if not user_ids:
+                break
+
+            # Lock the users first so concurrent game commits serialize behind us
+            db.session.execute(select(User.id).where(User.id.in_(user_ids)).with_for_update())
+            db.session.execute(delete(UserAgentStats).where(UserAgentStats.user_id.in_(user_ids)))
+            aggregate = (
+                select(
+                    GameResult.user_id,
+                    GameResult.agent_type,
+                    func.count(GameResult.id),
+                    func.coalesce(func.sum(GameResult.score), 0),
+                    func.coalesce(func.max(GameResult.score), 0),
+                    func.coalesce(func.sum(error), 0),
+                    func.coalesce(func.sum(case((error == 0, 1), else_=0)), 0),
+                )
+                .where(GameResult.user_id.in_(user_ids))
+                .group_by(GameResult.user_id, GameResult.agent_type)
+            )
+            result = db.session.execute(
+                insert(UserAgentStats).from_select(
+                    ['user_id', 'agent_type', 'games_played', 'total_score',
+                     'best_score', 'abs_error_sum', 'exact_hits'],
+                    aggregate,
+                )
+            )
+            db.session.commit()
+
+            users_done += len(user_ids)
+            rows_written += max(result.rowcount or 0, 0)
+            last_id = user_ids[-1]
+            app.logger.info(f"Backfilled users up to id {last_id} ({users_done} users, {rows_written} rows)")
+            if pause:
+                time.sleep(pause)
+
+    return users_done, rows_written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chunk-size', type=int, default=500, help='users per transaction')
+    parser.add_argument('--start-after', type=int, default=0, help='resume after this user id')
+    parser.add_argument('--pause', type=float, default=0.0, help='seconds to sleep between chunks')
+    args = parser.parse_args()
+
+    app = make_app()
+    started = time.perf_counter()
+    users, rows = backfill(app, args.chunk_size, args.start_after, args.pause)
+    print(f"Backfilled {rows} rollup rows for {users} users in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Pre-generate a maze bank for fast environment resets.
+
+Resets MiniGrid-MultiRoom-N6-v0 natively with seeds --base-seed ..
+--base-seed + --count - 1, stores every layout (cells, door states, agent
+pose, goal) in one flat, memory-mappable file (format in ai/maze_bank.py),
+then maps the file back and replays --verify of its layouts natively and
+from the bank with the same actions: the trajectories must be identical.
+Point MAZE_BANK_PATH at the file to have the environment pool reset from it.
+
+Usage (from backend/):
+    python scripts/build_maze_bank.py                      # models/maze_bank.safetensors
+    python scripts/build_maze_bank.py --count 50000 --verify 200
+"""
+import argparse
+import os
+import sys
+import time
+
+import _bootstrap  # noqa: F401  (puts backend/ on sys.path)
+
+
+def main():
+    import numpy as np
+    from ai.environment import setup_environment
+    from ai.maze_bank import MazeBank, verify_trajectories
+    from config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=10000, help='layouts to generate')
+    parser.add_argument('--base-seed', type=int, default=0, help='seed of the first layout')
+    parser.add_argument('--out', default=os.path.join(str(Config.MODEL_FOLDER), 'maze_bank.safetensors'))
+    parser.add_argument('--verify', type=int, default=50, help='layouts to replay against native resets (0: skip)')
+    parser.add_argument('--steps', type=int, default=120, help='steps per verified trajectory')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    bank = MazeBank.generate(setup_environment(), args.count, args.base_seed)
+    generate_s = time.perf_counter() - started
+    bank.save(args.out)
+    print(f'{len(bank)} layouts in {generate_s:.1f}s ({len(bank) / generate_s:,.0f}/s) -> {args.out} '
+          f'({os.path.getsize(args.out)} bytes)')
+
+    if args.verify:
+        mapped = MazeBank.load(args.out)
+        indices = np.random.default_rng(args.base_seed).choice(len(mapped), min(args.verify, len(mapped)),
+                                                               replace=False)
+        started = time.perf_counter()
+        mismatches = verify_trajectories(mapped, setup_environment, indices.tolist(), steps=args.steps)
+        print(f'verified {len(indices)} layouts x {args.steps} steps in {time.perf_counter() - started:.1f}s: '
+              f"{'identical to native resets' if not mismatches else f'MISMATCH at {mismatches}'}")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Calibrate the PBKDF2 work factor for password hashing on this machine.
+
+Times PBKDF2 with the configured digest, picks the iteration count for which
+one hash takes --target-ms on one core (rounded to 10000, never below
+100000), checks the result with a few real werkzeug hashes and writes it to
+PASSWORD_CALIBRATION_FILE (backend/instance/password_hash.json), where the
+password service picks it up on the next start. PASSWORD_HASH_ITERATIONS,
+if set, still takes precedence.
+
+Existing users keep their old hashes until they next log in successfully;
+they are rehashed with the new count then.
+
+Usage (from backend/):
+    python scripts/calibrate_password_hash.py --target-ms 250
+    python scripts/calibrate_password_hash.py --target-ms 250 --dry-run
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import time
+from datetime import datetime
+
+import _bootstrap  # noqa: F401  (puts backend/ on sys.path)
+
+
+def time_iterations(digest, iterations, repeat=5):
+    """Median seconds for one PBKDF2 derivation of the given cost."""
+    samples = []
+    for _ in range(repeat):
+        salt = os.urandom(16)
+        started = time.perf_counter()
+        hashlib.pbkdf2_hmac(digest, b'calibration-password', salt, iterations)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def calibrate(digest, target_seconds, probe_iterations=200000):
+    """Iteration count whose derivation takes about target_seconds."""
+    from services.password_service import MIN_ITERATIONS
+
+    per_iteration = time_iterations(digest, probe_iterations) / probe_iterations
+    iterations = int(round(target_seconds / per_iteration / 10000.0)) * 10000
+    return max(MIN_ITERATIONS, iterations)
+
+
+def main():
+    from config import Config
+    from werkzeug.security import check_password_hash, generate_password_hash
+    from services.password_service import read_calibration, write_calibration
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target-ms', type=float, default=250.0, help='time for one hash on one core')
+    parser.add_argument('--dry-run', action='store_true', help='print the result without saving it')
+    args = parser.parse_args()
+
+    method = Config.PASSWORD_HASH_METHOD
+    if not method.startswith('pbkdf2:'):
+        parser.error(f'only pbkdf2 methods can be calibrated, not {method}')
+    digest = method.split(':', 1)[1]
+    path = str(Config.PASSWORD_CALIBRATION_FILE)
+
+    iterations = calibrate(digest, args.target_ms / 1000.0)
+    samples = []
+    for _ in range(5):
+        started = time.perf_counter()
+        stored = generate_password_hash('calibration-password', f'{method}:{iterations}')
+        samples.append(time.perf_counter() - started)
+    assert check_password_hash(stored, 'calibration-password')
+    measured_ms = statistics.median(samples) * 1000
+
+    previous = read_calibration(path)
+    print(f'{method}: {iterations} iterations -> {measured_ms:.0f} ms per hash '
+          f'(target {args.target_ms:.0f} ms, previously {previous or "not calibrated"})')
+    if Config.PASSWORD_HASH_ITERATIONS:
+        print(f'Note: PASSWORD_HASH_ITERATIONS={Config.PASSWORD_HASH_ITERATIONS} is set and overrides this')
+    if args.dry_run:
+        return
+    write_calibration(path, iterations, method=method, target_ms=args.target_ms,
+                      measured_ms=round(measured_ms, 1), calibrated_at=datetime.utcnow().isoformat())
+    print(f'Saved to {path}')
+
+
+if __name__ == '__main__':
+    main()
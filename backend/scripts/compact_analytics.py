@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Compact expired hourly analytics buckets into the daily rollup.
+
+Runs compact_hourly() in small transactions until nothing past the hourly
+retention window is left.
+
+Usage (from backend/):
+    python scripts/compact_analytics.py --batch 1000
+"""
+import argparse
+
+from _bootstrap import make_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch', type=int, default=1000, help='hourly rows per transaction')
+    args = parser.parse_args()
+
+    from services.analytics_service import compact_hourly
+
+    app = make_app()
+    total = 0
+    with app.app_context():
+        while True:
+            compacted = compact_hourly(max_rows=args.batch)
+            if not compacted:
+                break
+            total += compacted
+    print(f"Compacted {total} hourly rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Convert the .pth policy checkpoints into flat, memory-mappable weight files.
+
+For each MODEL_FOLDER/<name>.pth writes MODEL_FOLDER/<name>.safetensors
+(format in ai/weights.py), then maps the new file back and checks every
+tensor is bit-identical. The model registry prefers the .safetensors file
+when it exists, so after converting, every worker maps the same read-only
+page-cache copy instead of unpickling a private one.
+
+The .pth files are read with torch.load(weights_only=True): only tensors
+and plain containers are accepted, no arbitrary pickle code runs.
+
+Usage (from backend/):
+    python scripts/convert_weights.py            # every .pth in MODEL_FOLDER
+    python scripts/convert_weights.py models/DDQN_policy_net.pth --force
+"""
+import argparse
+import glob
+import os
+import time
+
+import _bootstrap  # noqa: F401  (puts backend/ on sys.path)
+
+
+def convert(pth_path, force=False):
+    """Write the .safetensors file for one checkpoint; returns its path or None if up to date."""
+    import numpy as np
+    import torch
+    from ai.weights import load_weights, save_weights, weights_path
+
+    target = weights_path(pth_path)
+    if not force and os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(pth_path):
+        return None
+
+    state_dict = torch.load(pth_path, map_location='cpu', weights_only=True)
+    arrays = {name: tensor.detach().contiguous().numpy() for name, tensor in state_dict.items()}
+    save_weights(arrays, target, metadata={'source': os.path.basename(pth_path), 'format': 'pt'})
+
+    mapped, _ = load_weights(target)
+    if mapped.keys() != arrays.keys():
+        raise ValueError(f'{target}: tensor names differ from {pth_path}')
+    for name, array in arrays.items():
+        if mapped[name].dtype != array.dtype or not np.array_equal(mapped[name], array):
+            raise ValueError(f"{target}: tensor '{name}' differs from {pth_path}")
+    return target
+
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help='.pth files (default: every .pth in MODEL_FOLDER)')
+    parser.add_argument('--force', action='store_true', help='rewrite files that look up to date')
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(str(Config.MODEL_FOLDER), '*.pth')))
+    if not paths:
+        print(f'No .pth files found in {Config.MODEL_FOLDER}')
+        return
+    for path in paths:
+        started = time.perf_counter()
+        target = convert(path, args.force)
+        if target is None:
+            print(f'{path}: up to date')
+        else:
+            print(f'{path} -> {target} ({os.path.getsize(target)} bytes, '
+                  f'{(time.perf_counter() - started) * 1000:.0f} ms, verified)')
+
+
+if __name__ == '__main__':
+    main()
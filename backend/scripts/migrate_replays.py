@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Move legacy flat replays (VIDEO_FOLDER/run_<uuid>.gif) into content-addressed storage.
+
+Safe to run while the app is serving. For each legacy file, in batches:
+1. hash it and hard-link (or copy) it to VIDEO_FOLDER/ab/cd/<sha256>.gif
+2. in one transaction: point game_result rows at the new name, record a
+   replay_alias so old /video/run_<uuid>.gif URLs keep resolving, and fold
+   the legacy replay_file row into the content-addressed one
+3. remove the flat file
+Until step 2 commits the flat file is still served; afterwards the alias is.
+Identical episodes collapse into one file with a higher ref_count.
+
+Usage (from backend/):
+    python scripts/migrate_replays.py --batch 200 --pause 0.1
+"""
+import argparse
+import os
+import shutil
+import time
+
+from _bootstrap import make_app
+
+
+def _legacy_files(video_folder, batch_size):
+    from services.replay_store import REPLAY_EXTENSIONS, is_content_name
+
+    batch = []
+    with os.scandir(video_folder) as entries:
+        for entry in entries:
+            if (entry.name.endswith(REPLAY_EXTENSIONS) and not is_content_name(entry.name)
+                    and entry.is_file(follow_symlinks=False)):
+                batch.append(entry.path)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def _place(source, destination):
+    """Make the content-addressed copy without disturbing the flat file."""
+    if os.path.exists(destination):
+        return False
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        partial = destination + '.partial'
+        shutil.copy2(source, partial)
+        os.replace(partial, destination)
+    return True
+
+
+def migrate(app, batch_size=200, pause=0.0, dry_run=False):
+    """Migrate every legacy replay; returns counters."""
+    from sqlalchemy import update
+    from database import db
+    from database.models import GameResult, ReplayFile, ReplayAlias
+    from services.replay_store import content_hash, shard_path
+
+    video_folder = str(app.config['VIDEO_FOLDER'])
+    stats = {'files': 0, 'deduplicated': 0, 'games_rewritten': 0, 'bytes_saved': 0}
+    if not os.path.isdir(video_folder):
+        return stats
+
+    with app.app_context():
+        for batch in _legacy_files(video_folder, batch_size):
+            moves = []
+            for source in batch:
+                legacy_name = os.path.basename(source)
+                extension = os.path.splitext(legacy_name)[1].lower()
+                filename = content_hash(source) + extension
+                destination = shard_path(video_folder, filename)
+                size = os.path.getsize(source)
+                if dry_run:
+                    stats['files'] += 1
+                    continue
+                if not _place(source, destination):
+                    stats['deduplicated'] += 1
+                    stats['bytes_saved'] += size
+                moves.append((source, legacy_name, filename, size))
+
+            if dry_run or not moves:
+                continue
+
+            try:
+                for source, legacy_name, filename, size in moves:
+                    rewritten = db.session.execute(
+                        update(GameResult)
+                        .where(GameResult.gif_filename == legacy_name)
+                        .values(gif_filename=filename)
+                        .execution_options(synchronize_session=False)
+                    ).rowcount or 0
+                    stats['games_rewritten'] += rewritten
+
+                    if db.session.get(ReplayAlias, legacy_name) is None:
+                        db.session.add(ReplayAlias(legacy_name=legacy_name, filename=filename))
+
+                    legacy_row = db.session.get(ReplayFile, legacy_name)
+                    target = db.session.get(ReplayFile, filename)
+                    if target is None:
+                        target = ReplayFile(filename=filename, size_bytes=size, ref_count=max(rewritten, 1))
+                        if legacy_row is not None:
+                            target.created_at = legacy_row.created_at
+                            target.last_accessed_at = legacy_row.last_accessed_at
+                        db.session.add(target)
+                    else:
+                        target.ref_count += rewritten
+                        if legacy_row is not None and legacy_row.last_accessed_at > target.last_accessed_at:
+                            target.last_accessed_at = legacy_row.last_accessed_at
+                    if legacy_row is not None:
+                        db.session.delete(legacy_row)
+                    db.session.flush()
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            for source, _, _, _ in moves:
+                try:
+                    os.remove(source)
+                except FileNotFoundError:
+                    pass
+            stats['files'] += len(moves)
+            app.logger.info(f"Migrated {stats['files']} replays ({stats['deduplicated']} deduplicated)")
+            if pause:
+                time.sleep(pause)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch', type=int, default=200, help='files per transaction')
+    parser.add_argument('--pause', type=float, default=0.0, help='seconds to sleep between batches')
+    parser.add_argument('--dry-run', action='store_true', help='only count legacy files')
+    args = parser.parse_args()
+
+    app = make_app()
+    started = time.perf_counter()
+    stats = migrate(app, args.batch, args.pause, args.dry_run)
+    print(f"{'Would migrate' if args.dry_run else 'Migrated'} {stats['files']} replays in "
+          f"{time.perf_counter() - started:.1f}s: {stats['deduplicated']} deduplicated "
+          f"({stats['bytes_saved']} bytes saved), {stats['games_rewritten']} games rewritten")
+
+
+if __name__ == '__main__':
+    main()
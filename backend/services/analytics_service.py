@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Analytics service for AI Agent Galaxy.
+Maintains the hourly/daily activity rollups and answers dashboard queries from them.
+
+Games and registrations are added to the hourly rollup as they are written.
+Hourly rows older than ANALYTICS_HOURLY_RETENTION_HOURS are folded into the
+daily rollup and deleted, so every query reads at most one row per bucket and
+agent regardless of how much history exists.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+from database import db
+from database.models import AnalyticsHourly, AnalyticsDaily
+from database.models.analytics import ALL_AGENTS
+from database.rollups import increment_rollup
+
+GRANULARITIES = ('hour', 'day')
+COUNTERS = ('games', 'successes', 'score_sum', 'new_users')
+
+
+def hour_bucket(timestamp):
+    """Start of the hour containing timestamp."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def day_bucket(timestamp):
+    """Start of the day containing timestamp."""
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def record_games(session, games, max_steps=120):
+    """Add finished games to the hourly rollup within the caller's transaction.
+
+    `games` is an iterable of objects with agent_type, actual_steps, score and timestamp.
+    """
+    deltas = {}
+    for game in games:
+        key = (hour_bucket(game.timestamp), game.agent_type)
+        delta = deltas.setdefault(key, [0, 0, 0])
+        delta[0] += 1
+        delta[1] += 1 if game.actual_steps < max_steps else 0
+        delta[2] += game.score
+
+    for (bucket, agent_type), (games_count, successes, score_sum) in deltas.items():
+        increment_rollup(
+            session, AnalyticsHourly,
+            keys={'bucket_start': bucket, 'agent_type': agent_type},
+            increments={'games': games_count, 'successes': successes,
+                        'score_sum': score_sum, 'new_users': 0},
+        )
+
+
+def record_new_user(session, created_at=None):
+    """Count a registration in the hourly rollup within the caller's transaction."""
+    increment_rollup(
+        session, AnalyticsHourly,
+        keys={'bucket_start': hour_bucket(created_at or datetime.utcnow()), 'agent_type': ALL_AGENTS},
+        increments={'games': 0, 'successes': 0, 'score_sum': 0, 'new_users': 1},
+    )
+
+
+def compact_hourly(retention_hours=None, max_rows=1000):
+    """Fold up to max_rows expired hourly rows into the daily rollup.
+
+    Returns the number of hourly rows compacted; call repeatedly until it
+    returns 0 to fully catch up. Each call is one short transaction.
+    """
+    if retention_hours is None:
+        retention_hours = current_app.config['ANALYTICS_HOURLY_RETENTION_HOURS']
+    cutoff = hour_bucket(datetime.utcnow() - timedelta(hours=retention_hours))
+
+    try:
+        rows = db.session.execute(
+            select(AnalyticsHourly)
+            .where(AnalyticsHourly.bucket_start < cutoff)
+            .order_by(AnalyticsHourly.bucket_start)
+            .limit(max_rows)
+        ).scalars().all()
+        if not rows:
+            db.session.rollback()
+            return 0
+
+        daily = {}
+        for row in rows:
+            totals = daily.setdefault((day_bucket(row.bucket_start), row.agent_type), dict.fromkeys(COUNTERS, 0))
+            for name in COUNTERS:
+                totals[name] += getattr(row, name) or 0
+
+        for (bucket, agent_type), totals in daily.items():
+            increment_rollup(db.session, AnalyticsDaily,
+                             keys={'bucket_start': bucket, 'agent_type': agent_type},
+                             increments=totals)
+
+        for row in rows:
+            db.session.execute(
+                delete(AnalyticsHourly)
+                .where(AnalyticsHourly.bucket_start == row.bucket_start)
+                .where(AnalyticsHourly.agent_type == row.agent_type)
+            )
+        db.session.commit()
+        return len(rows)
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _buckets(start, end, granularity):
+    step = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+    bucket = hour_bucket(start) if granularity == 'hour' else day_bucket(start)
+    while bucket < end:
+        yield bucket
+        bucket += step
+
+
+def _fold(rows, granularity, agent_type, series):
+    for row in rows:
+        if agent_type and row.agent_type not in (agent_type, ALL_AGENTS):
+            continue
+        bucket = row.bucket_start if granularity == 'hour' else day_bucket(row.bucket_start)
+        totals = series.get(bucket)
+        if totals is None:
+            continue
+        for name in COUNTERS:
+            totals[name] += getattr(row, name) or 0
+
+
+def activity_series(start, end, granularity='day', agent_type=None):
+    """Return a continuous list of activity buckets in [start, end).
+
+    Hourly series are limited to the retention window (older hours only exist
+    as daily rows). Daily series combine compacted daily rows with the hourly
+    rows of days that have not been compacted yet.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+    series = {bucket: dict.fromkeys(COUNTERS, 0) for bucket in _buckets(start, end, granularity)}
+    if not series:
+        return []
+    first = min(series)
+
+    hourly = AnalyticsHourly.query.filter(
+        AnalyticsHourly.bucket_start >= first, AnalyticsHourly.bucket_start < end
+    ).all()
+    _fold(hourly, granularity, agent_type, series)
+    if granularity == 'day':
+        daily = AnalyticsDaily.query.filter(
+            AnalyticsDaily.bucket_start >= first, AnalyticsDaily.bucket_start < end
+        ).all()
+        _fold(daily, granularity, agent_type, series)
+
+    return [
+        dict(totals, bucket=bucket.isoformat(),
+             success_rate=round(totals['successes'] / totals['games'], 4) if totals['games'] else None)
+        for bucket, totals in sorted(series.items())
+    ]
+
+
+def totals_since(since, agent_type=None):
+    """Sum the activity counters from `since` to now using only the rollups.
+
+    Exact to the hour while `since` is inside the hourly retention window;
+    beyond it the first day is counted whole.
+    """
+    now = datetime.utcnow()
+    totals = dict.fromkeys(COUNTERS, 0)
+    series_start = hour_bucket(since)
+
+    retention_start = hour_bucket(now - timedelta(hours=current_app.config['ANALYTICS_HOURLY_RETENTION_HOURS']))
+    if series_start < retention_start:
+        for bucket in activity_series(series_start, retention_start, 'day', agent_type):
+            for name in COUNTERS:
+                totals[name] += bucket[name]
+        series_start = retention_start
+
+    hourly = AnalyticsHourly.query.filter(AnalyticsHourly.bucket_start >= series_start).all()
+    for row in hourly:
+        if agent_type and row.agent_type not in (agent_type, ALL_AGENTS):
+            continue
+        for name in COUNTERS:
+            totals[name] += getattr(row, name) or 0
+    return totals
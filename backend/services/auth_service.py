@@ -3,7 +3,7 @@
 Authentication service for AI Agent Galaxy.
 Extracted from original app.py - handles authentication logic.
 """
-from flask import session
+from flask import g, session
 from database import db
 from database.models import User
 
@@ -14,6 +14,8 @@ def get_current_user():
     if user_id:
         user = User.query.get(user_id)
         if user and user.is_active:
+            # Tagged onto log records for the rest of the request
+            g.user_id = user.id
             return user
     return None
 
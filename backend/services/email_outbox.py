@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Email outbox for AI Agent Galaxy.
+
+Request handlers only insert a row into email_outbox (enqueue()); a
+background sender thread delivers due messages in batches of
+MAIL_BATCH_SIZE over one SMTP connection that stays open and authenticated
+between batches (closed after MAIL_IDLE_TIMEOUT idle seconds or
+MAIL_MAX_PER_CONNECTION messages). So a slow or unreachable mail server
+never holds up a request.
+
+Delivery is at-least-once:
+- rows are claimed with an UPDATE stamping claim_token and pushing
+  next_attempt_at out by MAIL_CLAIM_LEASE, so senders in several workers
+  never pick the same row and a crashed sender's rows become due again
+- temporary failures (4xx replies, connection errors) are retried after
+  MAIL_RETRY_BASE * 2^(attempts-1) seconds (+-20% jitter, capped at
+  MAIL_RETRY_MAX) until MAIL_MAX_ATTEMPTS; permanent 5xx replies fail at once
+- results of a batch are committed in one transaction
+
+MAIL_BACKEND=console logs messages instead of sending them (the default
+when MAIL_USERNAME is unset, as in development).
+"""
+import atexit
+import os
+import random
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import func, select, update
+
+from database import db
+from database.models import OutboxEmail
+
+# Failures of the connection rather than of one message: reconnect later, stop the batch
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPHeloError,
+                     smtplib.SMTPAuthenticationError, smtplib.SMTPNotSupportedError)
+
+
+def classify_error(error):
+    """'connection', 'retry' (temporary 4xx) or 'fail' (permanent) for a send error."""
+    if isinstance(error, CONNECTION_ERRORS):
+        return 'connection'
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return 'retry' if codes and all(400 <= code < 500 for code in codes) else 'fail'
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 'retry' if 400 <= error.smtp_code < 500 else 'fail'
+    # Socket errors and timeouts (smtplib's own exceptions are OSErrors too, hence last)
+    if isinstance(error, OSError):
+        return 'connection'
+    return 'fail'
+
+
+class EmailOutbox:
+    """Queues outgoing mail in the database and delivers it from a background thread."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.backend = 'console'
+        self.batch_size = 20
+        self.poll_interval = 5.0
+        self.idle_timeout = 60.0
+        self.max_per_connection = 100
+        self.max_attempts = 6
+        self.retry_base = 30.0
+        self.retry_max = 3600.0
+        self.claim_lease = 300.0
+        self._reset_state()
+        if app is not None:
+            self.init_app(app)
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopping = False
+        self._pid = os.getpid()
+        self._smtp = None
+        self._smtp_sent = 0
+        self._smtp_used_at = 0.0
+        self.stats = {'sent': 0, 'retried': 0, 'failed': 0, 'batches': 0, 'connections': 0}
+
+    def init_app(self, app):
+        """Read MAIL_* settings from app config; the sender starts on the first request or message."""
+        self.app = app
+        self.enabled = app.config.get('MAIL_OUTBOX_ENABLED', True)
+        self.backend = app.config.get('MAIL_BACKEND', 'console')
+        if self.backend not in ('smtp', 'console'):
+            raise ValueError(f"MAIL_BACKEND must be 'smtp' or 'console', not '{self.backend}'")
+        self.batch_size = max(1, int(app.config.get('MAIL_BATCH_SIZE', 20)))
+        self.poll_interval = float(app.config.get('MAIL_POLL_INTERVAL', 5))
+        self.idle_timeout = float(app.config.get('MAIL_IDLE_TIMEOUT', 60))
+        self.max_per_connection = max(1, int(app.config.get('MAIL_MAX_PER_CONNECTION', 100)))
+        self.max_attempts = max(1, int(app.config.get('MAIL_MAX_ATTEMPTS', 6)))
+        self.retry_base = float(app.config.get('MAIL_RETRY_BASE', 30))
+        self.retry_max = float(app.config.get('MAIL_RETRY_MAX', 3600))
+        self.claim_lease = float(app.config.get('MAIL_CLAIM_LEASE', 300))
+        app.extensions['email_outbox'] = self
+        atexit.register(self.shutdown)
+
+    # -- request-thread API ------------------------------------------------------
+
+    def enqueue(self, recipient, subject, body, commit=True):
+        """Queue a message; with commit=True the caller's session is committed with it."""
+        message = OutboxEmail(recipient=recipient, subject=subject, body=body,
+                              next_attempt_at=datetime.utcnow())
+        db.session.add(message)
+        if commit:
+            db.session.commit()
+            self.wake()
+        return message
+
+    def wake(self):
+        """Ask the sender to look for due messages now."""
+        self._ensure_thread()
+        self._wake.set()
+
+    # -- sender thread -----------------------------------------------------------
+
+    def _ensure_thread(self):
+        if self.app is None or not self.enabled:
+            return
+        # Threads do not survive fork(); a pre-forked worker starts its own
+        if self._pid != os.getpid():
+            self._reset_state()
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stopping:
+                break
+            try:
+                # Keep going while full batches come back
+                while self.deliver_due() == self.batch_size and not self._stopping:
+                    pass
+            except Exception as e:
+                self.app.logger.error(f"Email outbox delivery failed: {e}")
+            if self._smtp is not None and time.monotonic() - self._smtp_used_at > self.idle_timeout:
+                self._disconnect()
+        self._disconnect()
+
+    def deliver_due(self):
+        """Claim and deliver one batch of due messages; returns how many were claimed."""
+        with self.app.app_context():
+            try:
+                batch = self._claim()
+                if not batch:
+                    return 0
+                self._deliver(batch)
+                db.session.commit()
+                self.stats['batches'] += 1
+                return len(batch)
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    def _claim(self):
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        due = (select(OutboxEmail.id)
+               .where(OutboxEmail.status == 'pending', OutboxEmail.next_attempt_at <= now)
+               .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id)
+               .limit(self.batch_size))
+        claimed = db.session.execute(
+            update(OutboxEmail)
+            .where(OutboxEmail.id.in_(due), OutboxEmail.status == 'pending', OutboxEmail.next_attempt_at <= now)
+            .values(claim_token=token, next_attempt_at=now + timedelta(seconds=self.claim_lease))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return []
+        return db.session.execute(
+            select(OutboxEmail).where(OutboxEmail.claim_token == token).order_by(OutboxEmail.id)
+        ).scalars().all()
+
+    def _deliver(self, batch):
+        for index, message in enumerate(batch):
+            message.claim_token = None
+            try:
+                self._send(message)
+            except Exception as e:
+                outcome = classify_error(e)
+                if outcome == 'connection':
+                    self._disconnect()
+                    delay = self._retry(message, e)
+                    # The server is unreachable: push the rest of the batch back without using an attempt
+                    for rest in batch[index + 1:]:
+                        rest.claim_token = None
+                        rest.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+                    return
+                if outcome == 'retry':
+                    self._retry(message, e)
+                else:
+                    self._fail(message, e)
+            else:
+                message.status = 'sent'
+                message.sent_at = datetime.utcnow()
+                message.attempts += 1
+                message.last_error = None
+                self.stats['sent'] += 1
+
+    def _retry(self, message, error):
+        """Schedule another attempt (or give up); returns the delay in seconds."""
+        message.attempts += 1
+        message.last_error = f'{type(error).__name__}: {error}'[:500]
+        if message.attempts >= self.max_attempts:
+            self._fail(message, error, counted=True)
+            return self.retry_base
+        delay = min(self.retry_max, self.retry_base * 2 ** (message.attempts - 1)) * random.uniform(0.8, 1.2)
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        self.stats['retried'] += 1
+        self.app.logger.warning(f"Email {message.id} to {message.recipient} failed "
+                                f"(attempt {message.attempts}), retrying in {delay:.0f}s: {error}")
+        return delay
+
+    def _fail(self, message, error, counted=False):
+        if not counted:
+            message.attempts += 1
+        message.status = 'failed'
+        message.last_error = f'{type(error).__name__}: {error}'[:500]
+        self.stats['failed'] += 1
+        self.app.logger.error(f"Email {message.id} to {message.recipient} failed permanently: {error}")
+
+    # -- SMTP --------------------------------------------------------------------
+
+    def _build(self, message):
+        email = EmailMessage()
+        email['From'] = self.app.config['MAIL_DEFAULT_SENDER']
+        email['To'] = message.recipient
+        email['Subject'] = message.subject
+        email.set_content(message.body)
+        return email
+
+    def _send(self, message):
+        if self.backend == 'console':
+            self.app.logger.info(f"Email to {message.recipient}: {message.subject}\n{message.body}")
+            return
+        email = self._build(message)
+        reused = self._smtp is not None
+        smtp = self._connection()
+        try:
+            smtp.send_message(email)
+        except smtplib.SMTPServerDisconnected:
+            if not reused:
+                raise
+            # The server dropped the idle connection; reconnect once
+            self._disconnect()
+            self._connection().send_message(email)
+        self._smtp_sent += 1
+        self._smtp_used_at = time.monotonic()
+
+    def _connection(self):
+        if self._smtp is not None and self._smtp_sent >= self.max_per_connection:
+            self._disconnect()
+        if self._smtp is None:
+            config = self.app.config
+            smtp = smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=config.get('MAIL_TIMEOUT', 30))
+            try:
+                smtp.ehlo()
+                if config.get('MAIL_USE_TLS', True):
+                    smtp.starttls()
+                    smtp.ehlo()
+                if config.get('MAIL_USERNAME'):
+                    smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+            except Exception:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self._smtp_sent = 0
+            self._smtp_used_at = time.monotonic()
+            self.stats['connections'] += 1
+        return self._smtp
+
+    def _disconnect(self):
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except Exception:
+                smtp.close()
+
+    def shutdown(self):
+        """Stop the sender thread; undelivered messages stay queued in the table."""
+        if self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=5)
+
+    def status(self):
+        """Queue counts by status plus this process's sender counters."""
+        counts = dict(db.session.execute(
+            select(OutboxEmail.status, func.count()).group_by(OutboxEmail.status)
+        ).all())
+        oldest = db.session.execute(
+            select(func.min(OutboxEmail.created_at)).where(OutboxEmail.status == 'pending')
+        ).scalar()
+        return {
+            'backend': self.backend,
+            'pending': counts.get('pending', 0),
+            'sent': counts.get('sent', 0),
+            'failed': counts.get('failed', 0),
+            'oldest_pending': oldest.isoformat() if oldest else None,
+            'sender': dict(self.stats),
+        }
+
+
+email_outbox = EmailOutbox()
+
+
+def init_email_outbox(app):
+    """Initialize the email outbox and its background sender with the Flask app."""
+    email_outbox.init_app(app)
+    # Not at init: with preload_app that is the gunicorn master. Each worker starts its
+    # sender on its first request and delivers anything left over from a previous run
+    app.before_request(email_outbox._ensure_thread)
+    app.logger.info(
+        f"Email outbox: backend={email_outbox.backend}, batch={email_outbox.batch_size}, "
+        f"max attempts={email_outbox.max_attempts}"
+    )
@@ -2,29 +2,19 @@
 """
 Email service for AI Agent Galaxy.
 Extracted from original app.py - handles password reset emails.
+Messages are queued in the email outbox and delivered in the background
+(see services/email_outbox.py).
 """
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from flask import current_app
+from services.email_outbox import email_outbox
 
 
-def send_password_reset_email(user, token):
-    """Send password reset email to user."""
-    try:
-        if not current_app.config['MAIL_USERNAME']:
-            print(f"Password reset token for {user.username}: {token}")
-            return True
-            
-        msg = MIMEMultipart()
-        msg['From'] = current_app.config['MAIL_USERNAME']
-        msg['To'] = user.email
-        msg['Subject'] = "Neural Navigator - Password Reset"
-
-        # Use BASE_URL from config (works in both dev and production)
-        base_url = current_app.config['BASE_URL']
-        reset_link = f"{base_url}/reset-password?token={token}"
-        body = f"""
+def password_reset_message(user, token):
+    """Subject and body of the password reset email."""
+    # Use BASE_URL from config (works in both dev and production)
+    base_url = current_app.config['BASE_URL']
+    reset_link = f"{base_url}/reset-password?token={token}"
+    body = f"""
         Hello {user.username},
 
         You requested a password reset for your Neural Navigator account.
@@ -34,16 +24,19 @@ def send_password_reset_email(user, token):
 
         This link will expire in 24 hours for security.
         """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        server = smtplib.SMTP(current_app.config['MAIL_SERVER'], current_app.config['MAIL_PORT'])
-        server.starttls()
-        server.login(current_app.config['MAIL_USERNAME'], current_app.config['MAIL_PASSWORD'])
-        server.send_message(msg)
-        server.quit()
+    return "Neural Navigator - Password Reset", body
+
+
+def send_password_reset_email(user, token):
+    """Queue the password reset email for user.
+
+    Commits the current session, so a reset token added by the caller is
+    stored in the same transaction as the message.
+    """
+    try:
+        subject, body = password_reset_message(user, token)
+        email_outbox.enqueue(user.email, subject, body)
         return True
     except Exception as e:
-        print(f"Email sending failed: {e}")
-        print(f"Password reset token for {user.username}: {token}")
-        return False
\ No newline at end of file
+        current_app.logger.error(f"Could not queue password reset email for {user.username}: {e}")
+        return False
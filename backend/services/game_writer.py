@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Write-behind buffer for finished games in AI Agent Galaxy.
+
+Finished games are queued and committed by a single background thread in
+batched transactions (group commit): one commit every GAME_WRITE_FLUSH_MS or
+GAME_WRITE_BATCH_SIZE games, whichever comes first. Player totals, the
+per-agent rollups and the hourly analytics rollup are applied as SQL-side increments in the same transaction,
+so concurrent games for the same user never race on a read-modify-write.
+A game's packed step log (ai/step_log.py) goes into game_steps in that
+transaction too, keyed by the new game_result id.
+
+Durability (GAME_WRITE_DURABILITY):
+- sync: submit() blocks until the game's batch has committed (default); a
+  game still queued after GAME_WRITE_SYNC_TIMEOUT is answered as pending,
+  as in async mode, since it will still commit and count
+- async: submit() returns once queued; queued games are flushed on shutdown
+
+write_many() writes a large set of games produced at once (a tournament
+round closing) in the caller's transaction with executemany statements.
+"""
+import atexit
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, func, insert
+
+from database import db
+from database.models import User, GameResult, GameSteps, UserAgentStats
+from database.rollups import increment_rollups
+from exceptions import GameWriteError
+from services.analytics_service import record_games
+from utils.profiler import attached, current_profile
+
+
+class GameRecord:
+    """A scored game, as written to game_result and folded into the totals."""
+
+    __slots__ = ('user_id', 'agent_type', 'prediction', 'actual_steps', 'score',
+                 'gif_filename', 'timestamp', 'round_id', 'steps')
+
+    def __init__(self, user_id, agent_type, prediction, actual_steps, score,
+                 gif_filename=None, timestamp=None, round_id=None, steps=None):
+        self.user_id = user_id
+        self.agent_type = agent_type
+        self.prediction = prediction
+        self.actual_steps = actual_steps
+        self.score = score
+        self.gif_filename = gif_filename
+        self.timestamp = timestamp or datetime.utcnow()
+        self.round_id = round_id
+        self.steps = steps  # StepLog of the episode, or None
+
+    def row(self):
+        """Column values of the game_result row."""
+        return {'user_id': self.user_id, 'agent_type': self.agent_type, 'prediction': self.prediction,
+                'actual_steps': self.actual_steps, 'score': self.score, 'gif_filename': self.gif_filename,
+                'timestamp': self.timestamp, 'round_id': self.round_id}
+
+
+class PendingGame(GameRecord):
+    """A finished game waiting to be committed."""
+
+    __slots__ = ('queued_at', 'game_id', 'error', 'profile', '_done')
+
+    def __init__(self, user_id, agent_type, prediction, actual_steps, score,
+                 gif_filename=None, timestamp=None, round_id=None, steps=None):
+        super().__init__(user_id, agent_type, prediction, actual_steps, score,
+                         gif_filename, timestamp, round_id, steps)
+        self.queued_at = time.monotonic()
+        self.game_id = None
+        self.error = None
+        # Set when the submitting request is being profiled (middleware/profiling.py)
+        self.profile = current_profile()
+        self._done = threading.Event()
+
+    @property
+    def committed(self):
+        """True once the game has been written and committed."""
+        return self._done.is_set() and self.error is None
+
+    def wait(self, timeout=None):
+        """Block until the game's batch has committed; raise GameWriteError on failure."""
+        if not self._done.wait(timeout):
+            raise GameWriteError(f'Timed out after {timeout}s waiting for game to commit')
+        if self.error is not None:
+            raise GameWriteError(f'Game could not be saved: {self.error}')
+        return self.game_id
+
+    def _resolve(self, game_id=None, error=None):
+        self.game_id = game_id
+        self.error = error
+        self._done.set()
+
+
+class GameWriteBuffer:
+    """Collects finished games and commits them in batched transactions."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.batch_size = 64
+        self.flush_interval = 0.01
+        self.durability = 'sync'
+        self.sync_timeout = 10.0
+        self._reset_state()
+        if app is not None:
+            self.init_app(app)
+
+    def _reset_state(self):
+        self._queue = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._pid = os.getpid()
+        # Updated by the writer thread, request threads (buffer disabled) and write_many()
+        self._stats_lock = threading.Lock()
+        self.stats = {'batches': 0, 'games': 0, 'failed': 0, 'largest_batch': 0, 'sync_timeouts': 0}
+
+    def init_app(self, app):
+        """Configure the buffer from app config and register the shutdown hook."""
+        self.app = app
+        self.enabled = app.config.get('GAME_WRITE_BEHIND', True)
+        self.batch_size = max(1, int(app.config.get('GAME_WRITE_BATCH_SIZE', 64)))
+        self.flush_interval = max(0.0, float(app.config.get('GAME_WRITE_FLUSH_MS', 10)) / 1000.0)
+        self.sync_timeout = float(app.config.get('GAME_WRITE_SYNC_TIMEOUT', 10))
+        self.durability = app.config.get('GAME_WRITE_DURABILITY', 'sync')
+        if self.durability not in ('sync', 'async'):
+            raise ValueError(f"GAME_WRITE_DURABILITY must be 'sync' or 'async', not '{self.durability}'")
+        app.extensions['game_writer'] = self
+        atexit.register(self.shutdown)
+
+    def submit(self, **fields):
+        """Queue a finished game for commit and return its PendingGame.
+
+        With the buffer disabled the game is committed on the calling thread.
+        In sync durability mode this blocks until the game has committed, or
+        for at most GAME_WRITE_SYNC_TIMEOUT: a game still queued then is
+        returned uncommitted (it stays queued and will count), and only a
+        failed write raises GameWriteError.
+        """
+        pending = PendingGame(**fields)
+        if not self.enabled:
+            self._commit([pending])
+            pending.wait()
+            return pending
+
+        self._ensure_thread()
+        with self._cond:
+            self._queue.append(pending)
+            if len(self._queue) == 1 or len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+        if self.durability == 'sync':
+            if pending._done.wait(self.sync_timeout):
+                pending.wait()
+            else:
+                self._count(sync_timeouts=1)
+                self.app.logger.warning(
+                    f"Game for user {pending.user_id} not committed after {self.sync_timeout}s; "
+                    f"answered as pending ({self.queue_depth()} queued)")
+        return pending
+
+    def flush(self):
+        """Commit everything currently queued on the calling thread."""
+        while True:
+            with self._cond:
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+            if not batch:
+                return
+            with attached([p.profile for p in batch]):
+                self._commit(batch)
+
+    def shutdown(self):
+        """Stop the background thread and flush anything still queued."""
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=self.sync_timeout)
+        if self.app is not None:
+            self.flush()
+
+    def queue_depth(self):
+        """Number of games waiting to be committed."""
+        return len(self._queue)
+
+    def _ensure_thread(self):
+        # Threads do not survive fork(); a pre-forked worker starts its own
+        if self._pid != os.getpid():
+            self._reset_state()
+        if self._thread is None or not self._thread.is_alive():
+            with self._cond:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._run, name='game-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = self._queue[0].queued_at + self.flush_interval
+                while len(self._queue) < self.batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+            with attached([p.profile for p in batch]):
+                self._commit(batch)
+
+    def _commit(self, batch):
+        """Write one batch in a single transaction, isolating bad records on failure."""
+        with self.app.app_context():
+            try:
+                self._write(batch)
+            except Exception as e:
+                db.session.rollback()
+                if len(batch) > 1:
+                    # Retry one by one so a single bad record cannot sink the batch
+                    for pending in batch:
+                        self._commit([pending])
+                    return
+                self._count(failed=1)
+                self.app.logger.error(f"Failed to save game for user {batch[0].user_id}: {e}")
+                batch[0]._resolve(error=e)
+                return
+            finally:
+                db.session.remove()
+
+        self._count(batches=1, games=len(batch), largest_batch=len(batch))
+
+    def _count(self, largest_batch=0, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], largest_batch)
+
+    def write_many(self, games):
+        """Write GameRecords in the caller's transaction (the caller commits).
+
+        For games produced all at once, e.g. when a tournament round closes:
+        rows and totals go out as a few executemany statements, and no game
+        ids are read back (so no step logs are stored).
+        """
+        if not games:
+            return
+        db.session.execute(insert(GameResult.__table__), [p.row() for p in games])
+        self._apply_totals(games)
+        self._count(games=len(games))
+
+    def _write(self, batch):
+        rows = [GameResult(**p.row()) for p in batch]
+        db.session.add_all(rows)
+        db.session.flush()
+        steps = [GameSteps.row(row.id, p.steps) for p, row in zip(batch, rows) if p.steps]
+        if steps:
+            db.session.execute(insert(GameSteps.__table__), steps)
+        self._apply_totals(batch)
+        db.session.commit()
+        for pending, row in zip(batch, rows):
+            pending._resolve(game_id=row.id)
+
+    def _apply_totals(self, batch):
+        """Add the batch to player totals, per-agent rollups and hourly analytics."""
+        # Fold the batch into one delta per user and per (user, agent)
+        max_steps = self.app.config.get('MAX_STEPS', 120)
+        deltas = {}
+        agent_deltas = {}
+        for p in batch:
+            delta = deltas.setdefault(p.user_id, [0, 0, 0])
+            delta[0] += p.score
+            delta[1] += 1
+            delta[2] = max(delta[2], p.score)
+
+            error = UserAgentStats.prediction_error(p.prediction, p.actual_steps, max_steps)
+            agent_delta = agent_deltas.setdefault((p.user_id, p.agent_type), [0, 0, 0, 0, 0])
+            agent_delta[0] += 1
+            agent_delta[1] += p.score
+            agent_delta[2] = max(agent_delta[2], p.score)
+            agent_delta[3] += error
+            agent_delta[4] += 1 if error == 0 else 0
+
+        # One executemany per statement, however many players the batch touches
+        users = User.__table__
+        db.session.execute(
+            users.update()
+            .where(users.c.id == bindparam('uid'))
+            .values(
+                total_score=func.coalesce(users.c.total_score, 0) + bindparam('score_sum'),
+                games_played=func.coalesce(users.c.games_played, 0) + bindparam('count'),
+                best_score=case(
+                    (func.coalesce(users.c.best_score, 0) < bindparam('best'), bindparam('best')),
+                    else_=users.c.best_score,
+                ),
+            ),
+            [{'uid': user_id, 'score_sum': score_sum, 'count': count, 'best': best}
+             for user_id, (score_sum, count, best) in deltas.items()],
+        )
+
+        increment_rollups(
+            db.session, UserAgentStats,
+            [{'user_id': user_id, 'agent_type': agent_type, 'games_played': count, 'total_score': score_sum,
+              'abs_error_sum': error_sum, 'exact_hits': hits, 'best_score': best}
+             for (user_id, agent_type), (count, score_sum, best, error_sum, hits) in agent_deltas.items()],
+            keys=('user_id', 'agent_type'),
+            increments=('games_played', 'total_score', 'abs_error_sum', 'exact_hits'),
+            maximums=('best_score',),
+        )
+
+        record_games(db.session, batch, max_steps)
+
+
+game_writer = GameWriteBuffer()
+
+
+def init_game_writer(app):
+    """Initialize the game write-behind buffer with the Flask app."""
+    game_writer.init_app(app)
+    app.logger.info(
+        f"Game write-behind {'enabled' if game_writer.enabled else 'disabled'} "
+        f"(batch={game_writer.batch_size}, flush={game_writer.flush_interval * 1000:.0f}ms, "
+        f"durability={game_writer.durability})"
+    )
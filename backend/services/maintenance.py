@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Maintenance scheduler for AI Agent Galaxy.
+
+One background thread per process runs registered housekeeping jobs, each
+with an interval (+-MAINTENANCE_JITTER so workers and jobs do not line up)
+and a time budget per turn. Jobs work in small increments (one short
+transaction of MAINTENANCE_BATCH_SIZE rows each, MAINTENANCE_PAUSE_MS apart)
+and stop when their budget is spent; a job cut short is picked up again
+after MAINTENANCE_TICK seconds instead of its full interval.
+
+Jobs are either
+- shared: one run per interval across all workers. The runner claims the
+  job's maintenance_lease row with a conditional UPDATE; the lease lasts
+  the budget plus MAINTENANCE_LEASE_GRACE, so a crashed runner's job
+  becomes due again by itself
+- local: run in every process, for per-process state (the replay sweep
+  flushes registrations recorded in memory, caches live per worker)
+
+Default jobs: expired password-reset tokens, analytics compaction, SQLite
+WAL checkpoint, SQLite ANALYZE + incremental vacuum, the replay sweep,
+cache warm-up, closing due tournament rounds and queued rescoring jobs.
+Last-run status is at GET /api/admin/maintenance.
+"""
+import atexit
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from database.models import MaintenanceLease, PasswordResetToken
+
+
+class _Job:
+    """A registered maintenance job."""
+
+    __slots__ = ('name', 'func', 'interval', 'budget', 'shared', 'description')
+
+    def __init__(self, name, func, interval, budget, shared, description):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.budget = budget
+        self.shared = shared
+        self.description = description
+
+
+class JobRun:
+    """Budget of one job turn; jobs call more() before every increment."""
+
+    def __init__(self, scheduler, budget):
+        self.scheduler = scheduler
+        self.batch_size = scheduler.batch_size
+        self.deadline = time.monotonic() + budget
+        self.increments = 0
+        self.out_of_time = False
+
+    def more(self):
+        """True while the job may do another increment (pauses between them)."""
+        if self.increments:
+            time.sleep(self.scheduler.pause)
+        if self.scheduler._stopping or time.monotonic() >= self.deadline:
+            self.out_of_time = True
+            return False
+        self.increments += 1
+        return True
+
+
+class MaintenanceScheduler:
+    """Runs housekeeping jobs from a background thread under a single-runner lease."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = True
+        self.tick = 5.0
+        self.jitter = 0.1
+        self.budget = 2.0
+        self.pause = 0.02
+        self.batch_size = 500
+        self.lease_grace = 60.0
+        self.retry_delay = 300.0
+        self._jobs = {}
+        self._reset_state()
+        if app is not None:
+            self.init_app(app)
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopping = False
+        self._pid = os.getpid()
+        self.owner = f'{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}'
+        self._next_check = dict.fromkeys(self._jobs, 0.0)
+        self._local = {}
+        self.running = None
+
+    def init_app(self, app):
+        """Read MAINTENANCE_* settings from app config; the thread starts on the first request."""
+        self.app = app
+        self.enabled = app.config.get('MAINTENANCE_ENABLED', True)
+        self.tick = max(0.1, float(app.config.get('MAINTENANCE_TICK', 5)))
+        self.jitter = min(0.5, max(0.0, float(app.config.get('MAINTENANCE_JITTER', 0.1))))
+        self.budget = float(app.config.get('MAINTENANCE_BUDGET', 2))
+        self.pause = float(app.config.get('MAINTENANCE_PAUSE_MS', 20)) / 1000.0
+        self.batch_size = max(1, int(app.config.get('MAINTENANCE_BATCH_SIZE', 500)))
+        self.lease_grace = float(app.config.get('MAINTENANCE_LEASE_GRACE', 60))
+        self.retry_delay = float(app.config.get('MAINTENANCE_RETRY_DELAY', 300))
+        app.extensions['maintenance'] = self
+        atexit.register(self.shutdown)
+        # Not started here: with preload_app this runs in the gunicorn master, which
+        # must not run jobs or fork while a scheduler thread holds DB and pool state
+
+    def register(self, name, func, interval, budget=None, shared=True, description=''):
+        """Add a job; func(run) does increments while run.more() and returns a result dict.
+
+        A truthy 'changed' entry in the result gets the run logged at INFO.
+        """
+        self._jobs[name] = _Job(name, func, float(interval), float(budget or self.budget), shared, description)
+        # First run after a random part of one tick, so workers do not start in step
+        self._next_check[name] = time.monotonic() + random.uniform(0, self.tick)
+
+    @property
+    def jobs(self):
+        return list(self._jobs.values())
+
+    # -- scheduler thread --------------------------------------------------------
+
+    def _ensure_thread(self):
+        if self.app is None or not self.enabled:
+            return
+        # Threads do not survive fork(); a pre-forked worker starts its own
+        if self._pid != os.getpid():
+            self._reset_state()
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._run, name='maintenance', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.tick)
+            self._wake.clear()
+            for job in self.jobs:
+                if self._stopping:
+                    break
+                if time.monotonic() < self._next_check.get(job.name, 0.0):
+                    continue
+                try:
+                    self.run_job(job.name)
+                except Exception as e:
+                    self.app.logger.error(f"Maintenance job {job.name} failed: {e}")
+                    self._next_check[job.name] = time.monotonic() + self.retry_delay
+
+    def _delay(self, job, run=None, failed=False):
+        """Seconds until the job's next turn."""
+        if failed:
+            return min(job.interval, self.retry_delay)
+        if run is not None and run.out_of_time:
+            # Backlog left: continue soon, in the next increment window
+            return min(job.interval, self.tick)
+        return job.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run_job(self, name, force=False):
+        """Run one turn of a job now if due (or force); returns its record, None if not run."""
+        job = self._jobs[name]
+        with self.app.app_context():
+            try:
+                if job.shared and not self._claim(job, force):
+                    return None
+                return self._execute(job)
+            finally:
+                db.session.remove()
+
+    def _execute(self, job):
+        run = JobRun(self, job.budget)
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        self.running = job.name
+        error = None
+        try:
+            result = job.func(run) or {}
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            result, error = {}, e
+        finally:
+            self.running = None
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        changed = result.pop('changed', False)
+        status = 'error' if error else ('partial' if run.out_of_time else 'ok')
+        delay = self._delay(job, run, failed=error is not None)
+        self._next_check[job.name] = time.monotonic() + delay
+
+        record = {
+            'last_started_at': started_at,
+            'last_finished_at': datetime.utcnow(),
+            'last_duration_ms': duration_ms,
+            'last_status': status,
+            'last_error': f'{type(error).__name__}: {error}'[:500] if error else None,
+            'last_result': json.dumps(dict(result, increments=run.increments), default=str),
+            'last_owner': self.owner,
+        }
+        if job.shared:
+            self._release(job, record, delay, failed=error is not None)
+        else:
+            local = self._local.setdefault(job.name, {'runs': 0, 'failures': 0})
+            local.update(record, runs=local['runs'] + 1, failures=local['failures'] + (error is not None))
+            local['next_run_at'] = datetime.utcnow() + timedelta(seconds=delay)
+
+        if error is not None:
+            self.app.logger.error(f"Maintenance job {job.name} failed after {duration_ms}ms: {error}")
+        elif changed:
+            self.app.logger.info(f"Maintenance job {job.name} ({status}, {duration_ms}ms): {result}")
+        return dict(record, name=job.name, last_result=json.loads(record['last_result']))
+
+    # -- single-runner lease -----------------------------------------------------
+
+    def _claim(self, job, force=False):
+        """Take the job's lease if it is due and free; True when this process may run it."""
+        now = datetime.utcnow()
+        lease_until = now + timedelta(seconds=job.budget + self.lease_grace)
+        conditions = [MaintenanceLease.name == job.name,
+                      or_(MaintenanceLease.lease_until.is_(None), MaintenanceLease.lease_until < now)]
+        if not force:
+            conditions.append(MaintenanceLease.next_run_at <= now)
+        claimed = db.session.execute(
+            update(MaintenanceLease).where(*conditions)
+            .values(owner=self.owner, lease_until=lease_until)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return True
+
+        row = db.session.get(MaintenanceLease, job.name)
+        if row is None:
+            # First run anywhere: create the row already leased to us
+            try:
+                db.session.add(MaintenanceLease(name=job.name, owner=self.owner, lease_until=lease_until,
+                                                next_run_at=now))
+                db.session.commit()
+                return True
+            except IntegrityError:
+                db.session.rollback()
+                row = db.session.get(MaintenanceLease, job.name)
+        # Someone else has it or it is not due: look again when it should be
+        not_before = max(row.next_run_at, row.lease_until or row.next_run_at) if row else now
+        wait = max(0.0, (not_before - datetime.utcnow()).total_seconds())
+        self._next_check[job.name] = time.monotonic() + wait + random.uniform(0, self.tick)
+        return False
+
+    def _release(self, job, record, delay, failed):
+        db.session.execute(
+            update(MaintenanceLease)
+            .where(MaintenanceLease.name == job.name, MaintenanceLease.owner == self.owner)
+            .values(owner=None, lease_until=None,
+                    next_run_at=datetime.utcnow() + timedelta(seconds=delay),
+                    runs=MaintenanceLease.runs + 1,
+                    failures=MaintenanceLease.failures + (1 if failed else 0),
+                    **record)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def shutdown(self):
+        """Stop the scheduler thread; a running job stops at its next increment."""
+        if self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=5)
+
+    # -- reporting ---------------------------------------------------------------
+
+    def status(self):
+        """Jobs with their schedule and last run (shared: from the lease table)."""
+        rows = {row.name: row for row in db.session.execute(select(MaintenanceLease)).scalars()}
+        jobs = []
+        for job in self.jobs:
+            entry = {
+                'name': job.name,
+                'description': job.description,
+                'shared': job.shared,
+                'interval_seconds': job.interval,
+                'budget_seconds': job.budget,
+            }
+            if job.shared:
+                row = rows.get(job.name)
+                entry.update(row.to_dict() if row else {'runs': 0, 'last_status': None})
+            else:
+                local = dict(self._local.get(job.name, {'runs': 0, 'last_status': None}))
+                for key, value in local.items():
+                    if isinstance(value, datetime):
+                        local[key] = value.isoformat()
+                if local.get('last_result'):
+                    local['last_result'] = json.loads(local['last_result'])
+                entry.update(local)
+            jobs.append(entry)
+        return {
+            'enabled': self.enabled,
+            'owner': self.owner,
+            'running': self.running,
+            'thread_alive': self._thread is not None and self._thread.is_alive(),
+            'jobs': jobs,
+        }
+
+
+# -- default jobs ----------------------------------------------------------------
+
+def purge_reset_tokens(run):
+    """Delete expired and used password-reset tokens, a batch per increment."""
+    deleted = 0
+    while run.more():
+        batch = (select(PasswordResetToken.id)
+                 .where(or_(PasswordResetToken.expires_at < datetime.utcnow(),
+                            PasswordResetToken.used.is_(True)))
+                 .limit(run.batch_size))
+        count = db.session.execute(
+            delete(PasswordResetToken).where(PasswordResetToken.id.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        deleted += count
+        if count < run.batch_size:
+            break
+    return {'deleted': deleted, 'changed': deleted}
+
+
+def compact_analytics(run):
+    """Fold expired hourly analytics buckets into daily ones."""
+    from services.analytics_service import compact_hourly
+
+    compacted = 0
+    while run.more():
+        count = compact_hourly(max_rows=run.batch_size)
+        compacted += count
+        if count < run.batch_size:
+            break
+    return {'compacted': compacted, 'changed': compacted}
+
+
+def _is_sqlite():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def sqlite_checkpoint(run):
+    """Copy the WAL back into the database file without waiting for readers (PASSIVE)."""
+    if not _is_sqlite() or not run.more():
+        return {'skipped': True}
+    with db.engine.connect() as connection:
+        busy, log_frames, checkpointed = connection.exec_driver_sql('PRAGMA wal_checkpoint(PASSIVE)').one()
+    return {'busy': bool(busy), 'wal_frames': log_frames, 'checkpointed': checkpointed}
+
+
+def sqlite_optimize(run):
+    """ANALYZE one table per increment (sampled), then release free pages incrementally."""
+    if not _is_sqlite():
+        return {'skipped': True}
+    limit = int(current_app.config.get('MAINTENANCE_ANALYZE_LIMIT', 1000))
+    vacuum_pages = int(current_app.config.get('MAINTENANCE_VACUUM_PAGES', 256))
+    analyzed, released = [], 0
+    with db.engine.connect() as connection:
+        # Sample at most this many rows per index instead of reading whole tables
+        connection.exec_driver_sql(f'PRAGMA analysis_limit={limit}')
+        tables = [name for (name,) in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name")]
+        for table in tables:
+            if not run.more():
+                break
+            connection.exec_driver_sql(f'ANALYZE "{table}"')
+            connection.commit()
+            analyzed.append(table)
+
+        auto_vacuum = connection.exec_driver_sql('PRAGMA auto_vacuum').scalar()
+        free_pages = connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+        # Only databases created with auto_vacuum=INCREMENTAL can give pages back piecemeal
+        while auto_vacuum == 2 and free_pages and run.more():
+            connection.exec_driver_sql(f'PRAGMA incremental_vacuum({vacuum_pages})')
+            connection.commit()
+            remaining = connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+            released += free_pages - remaining
+            free_pages = remaining
+    return {'analyzed': len(analyzed), 'tables': len(tables), 'auto_vacuum': auto_vacuum,
+            'released_pages': released, 'free_pages': free_pages}
+
+
+def sweep_replays(run):
+    """One bounded replay retention sweep (see services/replay_store.py)."""
+    from services.replay_store import replay_store
+
+    if not run.more():
+        return {}
+    summary = replay_store.sweep()
+    return {'tracked': summary['tracked'], 'adopted': summary['adopted'], 'evicted': summary['evicted'],
+            'freed_bytes': summary['freed_bytes'], 'changed': summary['adopted'] or summary['evicted']}
+
+
+def warm_caches(run):
+    """Refresh per-process caches ahead of the requests that would otherwise fill them."""
+    from services.replay_store import replay_store
+    from services.static_delivery import frontend_cache
+
+    result = {}
+    if run.more():
+        # Re-encodes only files whose mtime or size changed since the last warm-up
+        result['frontend_files'] = frontend_cache.warm(current_app.config.get('FRONTEND_FOLDER'))
+    if run.more() and replay_store.app is not None:
+        result['replay_bytes'] = replay_store.tracked_bytes(refresh=True)
+    return result
+
+
+maintenance = MaintenanceScheduler()
+
+
+def init_maintenance(app):
+    """Register the default maintenance jobs and start the scheduler with the Flask app."""
+    maintenance.init_app(app)
+    config = app.config
+    maintenance.register('purge_reset_tokens', purge_reset_tokens, config['MAINTENANCE_TOKEN_INTERVAL'],
+                         description='Delete expired and used password-reset tokens')
+    maintenance.register('compact_analytics', compact_analytics, config['MAINTENANCE_ANALYTICS_INTERVAL'],
+                         description='Fold expired hourly analytics buckets into daily rollups')
+    maintenance.register('sqlite_checkpoint', sqlite_checkpoint, config['MAINTENANCE_CHECKPOINT_INTERVAL'],
+                         description='Passive WAL checkpoint (SQLite only)')
+    maintenance.register('sqlite_optimize', sqlite_optimize, config['MAINTENANCE_OPTIMIZE_INTERVAL'],
+                         description='Sampled ANALYZE and incremental vacuum (SQLite only)')
+    if config.get('REPLAY_SWEEPER_ENABLED', True):
+        from services.replay_store import replay_store
+        maintenance.register('replay_sweep', sweep_replays, replay_store.sweep_interval, shared=False,
+                             description='Replay retention: flush recorded replays, enforce quotas')
+    maintenance.register('warm_caches', warm_caches, config['MAINTENANCE_WARM_INTERVAL'], shared=False,
+                         description='Re-encode changed frontend files, refresh the replay usage total')
+    from services.tournament_service import close_due_rounds
+    maintenance.register('close_rounds', close_due_rounds, config['TOURNAMENT_CLOSE_INTERVAL'],
+                         budget=config['TOURNAMENT_CLOSE_TIMEOUT'],
+                         description='Simulate, score and write tournament rounds whose window has ended')
+    from services.rescoring_service import run_rescore
+    maintenance.register('rescore', run_rescore, config['RESCORE_INTERVAL'], budget=config['RESCORE_BUDGET'],
+                         description='Apply the current scoring rules to stored games (queued by an admin)')
+
+    # Each process starts its scheduler thread on its first request (never the preloading master)
+    app.before_request(maintenance._ensure_thread)
+    app.logger.info(
+        f"Maintenance scheduler: {len(maintenance.jobs)} jobs, "
+        f"{'enabled' if maintenance.enabled else 'disabled'}, budget {maintenance.budget}s per turn"
+    )
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Password hashing service for AI Agent Galaxy.
+
+Hashing and verifying run PBKDF2 (werkzeug's format) on a small bounded
+pool of PASSWORD_HASH_WORKERS threads instead of the request thread.
+hashlib releases the GIL while deriving, so the pool caps how many cores
+a login storm can take from the episodes. At most PASSWORD_HASH_QUEUE
+further jobs may wait; beyond that PasswordServiceBusy is raised and the
+routes answer 503.
+
+Work factor: PASSWORD_HASH_ITERATIONS, else the value written by
+scripts/calibrate_password_hash.py to PASSWORD_CALIBRATION_FILE, else
+werkzeug 2.3's default of 600000. Stored hashes with another method or
+iteration count (older defaults, scrypt) still verify and are rehashed
+with the current parameters on the next successful login.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from exceptions import PasswordServiceBusy
+from utils.profiler import propagate
+
+DEFAULT_METHOD = 'pbkdf2:sha256'
+DEFAULT_ITERATIONS = 600000
+MIN_ITERATIONS = 100000
+
+
+def read_calibration(path):
+    """Iterations saved by the calibration script, or None."""
+    try:
+        with open(path) as f:
+            return int(json.load(f)['iterations'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_calibration(path, iterations, **details):
+    """Persist a calibrated iteration count for the password service."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.partial'
+    with open(partial, 'w') as f:
+        json.dump(dict(details, iterations=int(iterations)), f, indent=2)
+    os.replace(partial, path)
+
+
+class PasswordService:
+    """Hashes and verifies passwords on a bounded worker pool."""
+
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self.iterations = DEFAULT_ITERATIONS
+        self.workers = 2
+        self.max_queue = 32
+        self.timeout = 10.0
+        self._reset_state()
+        if app is not None:
+            self.init_app(app)
+
+    def _reset_state(self):
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.stats = {'hashed': 0, 'verified': 0, 'rehashed': 0, 'rejected_busy': 0}
+
+    def init_app(self, app):
+        """Read PASSWORD_HASH_* settings and the calibration file."""
+        self.method = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        if not self.method.startswith('pbkdf2:'):
+            raise ValueError(f"PASSWORD_HASH_METHOD must be pbkdf2:<digest>, not '{self.method}'")
+        self.iterations = (app.config.get('PASSWORD_HASH_ITERATIONS')
+                           or read_calibration(str(app.config['PASSWORD_CALIBRATION_FILE']))
+                           or DEFAULT_ITERATIONS)
+        self.workers = max(1, int(app.config.get('PASSWORD_HASH_WORKERS', 2)))
+        self.max_queue = max(0, int(app.config.get('PASSWORD_HASH_QUEUE', 32)))
+        self.timeout = float(app.config.get('PASSWORD_HASH_TIMEOUT', 10))
+        self._shutdown_executor()
+        self._reset_state()
+        app.extensions['password_service'] = self
+
+    @property
+    def method_string(self):
+        """Full werkzeug method for new hashes, e.g. pbkdf2:sha256:600000."""
+        return f'{self.method}:{self.iterations}'
+
+    def _pool(self):
+        # Worker threads do not survive fork(); a pre-forked worker starts its own
+        if self._pid != os.getpid():
+            self._reset_state()
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password')
+        return self._executor
+
+    def _shutdown_executor(self):
+        executor = getattr(self, '_executor', None)
+        if executor is not None and self._pid == os.getpid():
+            executor.shutdown(wait=False)
+
+    def _run(self, fn, *args):
+        """Run fn on the pool and wait for it; raises PasswordServiceBusy when saturated."""
+        pool = self._pool()
+        if not self._slots.acquire(blocking=False):
+            self.stats['rejected_busy'] += 1
+            raise PasswordServiceBusy('Too many password operations in progress')
+        try:
+            # A profiled request's profile follows the job onto the pool thread
+            future = pool.submit(propagate(fn), *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            raise PasswordServiceBusy('Password operation timed out') from None
+
+    def hash(self, password):
+        """Hash a password with the current method and work factor."""
+        result = self._run(generate_password_hash, password, self.method_string)
+        self.stats['hashed'] += 1
+        return result
+
+    def verify(self, password_hash, password):
+        """Check a password against any stored werkzeug hash."""
+        result = self._run(check_password_hash, password_hash, password)
+        self.stats['verified'] += 1
+        return result
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with other parameters than the current ones."""
+        return password_hash.split('$', 1)[0] != self.method_string
+
+    def verify_and_update(self, user, password):
+        """Verify user's password; on success upgrade an outdated hash in the session.
+
+        The caller commits (login_user does).
+        """
+        if not self.verify(user.password_hash, password):
+            return False
+        if self.needs_rehash(user.password_hash):
+            user.password_hash = self.hash(password)
+            self.stats['rehashed'] += 1
+        return True
+
+
+password_service = PasswordService()
+
+
+def init_password_service(app):
+    """Initialize the password hashing service with the Flask app."""
+    password_service.init_app(app)
+    app.logger.info(
+        f"Password hashing: {password_service.method_string} on {password_service.workers} threads "
+        f"(queue {password_service.max_queue})"
+    )
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+Replay storage for AI Agent Galaxy: content-addressed layout and lifecycle.
+
+Replays are named by the SHA-256 of their bytes (<hash>.gif) and fanned out
+into two levels of hashed subdirectories (VIDEO_FOLDER/ab/cd/<hash>.gif), so
+no directory grows past a few dozen entries and identical deterministic
+episodes are stored once. replay_file.ref_count counts the games sharing a
+file. Legacy flat run_<uuid>.gif names keep resolving through replay_alias
+(see scripts/migrate_replays.py).
+
+Tracks every replay file in the replay_file table (size, creation and last
+access) and enforces the REPLAY_MAX_BYTES / REPLAY_MAX_AGE_DAYS quotas from the replay_sweep job of
+the maintenance scheduler (services/maintenance.py), which runs in every
+process. Request threads only record new replays and accesses in memory;
+the sweep flushes them in one transaction per tick.
+
+Each sweep tick does a bounded amount of work (REPLAY_SWEEP_BATCH rows/files):
+- flush recorded registrations and accesses
+- reconcile a slice of VIDEO_FOLDER, adopting files the table does not know
+- evict replays not used within the age quota, then least-recently-used
+  replays while over the byte quota, nulling GameResult.gif_filename for
+  each eviction
+Both quotas go by last use (a view, or a new game sharing the file), so a
+replay referenced today is kept however long ago it was first stored.
+The directory reconcile resumes where the previous tick stopped, so even a
+million-file folder is walked a batch at a time.
+"""
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, delete, func, select, update
+
+from database import db
+from database.models import GameResult, ReplayFile, ReplayAlias
+
+REPLAY_EXTENSIONS = ('.gif', '.mp4')
+CONTENT_NAME = re.compile(r'^[0-9a-f]{64}\.(gif|mp4)$')
+INCOMING_DIR = '.incoming'
+ALIAS_CACHE_SIZE = 10000
+
+
+def content_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_content_name(filename):
+    """True for content-addressed replay names (<sha256>.<ext>)."""
+    return bool(CONTENT_NAME.match(filename))
+
+
+def shard_path(root, filename):
+    """Location of a content-addressed replay: root/ab/cd/<hash>.<ext>."""
+    return os.path.join(root, filename[:2], filename[2:4], filename)
+
+
+class ReplayStore:
+    """Retention manager for replay files in VIDEO_FOLDER."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.video_folder = None
+        self.max_bytes = 0
+        self.max_age = None
+        self.sweep_interval = 30.0
+        self.batch_size = 500
+        self.grace = 600.0
+        self._reset_state()
+        if app is not None:
+            self.init_app(app)
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._registered = {}
+        self._accessed = {}
+        self._aliases = {}
+        self._scan_iter = None
+        self._tracked_bytes = None
+        self._tracked_refreshed = 0.0
+        self.last_sweep = None
+
+    def init_app(self, app):
+        """Configure quotas from app config; sweeps are scheduled by the maintenance scheduler."""
+        self.app = app
+        self.video_folder = str(app.config['VIDEO_FOLDER'])
+        self.max_bytes = int(app.config.get('REPLAY_MAX_BYTES', 0))
+        max_age_days = float(app.config.get('REPLAY_MAX_AGE_DAYS', 0))
+        self.max_age = timedelta(days=max_age_days) if max_age_days > 0 else None
+        self.sweep_interval = float(app.config.get('REPLAY_SWEEP_INTERVAL', 30))
+        self.batch_size = max(1, int(app.config.get('REPLAY_SWEEP_BATCH', 500)))
+        self.usage_refresh = float(app.config.get('REPLAY_USAGE_REFRESH', 300))
+        # Other workers flush their registrations once per sweep: never evict anything younger
+        self.grace = max(float(app.config.get('REPLAY_EVICTION_GRACE', 600)), 2 * self.sweep_interval)
+        app.extensions['replay_store'] = self
+
+    # -- layout ------------------------------------------------------------------
+
+    def incoming_path(self, extension='.gif'):
+        """Scratch path for an episode to write its replay before store()."""
+        incoming = os.path.join(self.video_folder, INCOMING_DIR)
+        os.makedirs(incoming, exist_ok=True)
+        return os.path.join(incoming, f'{uuid.uuid4().hex}{extension}')
+
+    def path_for(self, filename):
+        """On-disk path of a tracked replay name (sharded or legacy flat)."""
+        if is_content_name(filename):
+            return shard_path(self.video_folder, filename)
+        return os.path.join(self.video_folder, filename)
+
+    def store(self, temp_path):
+        """Move a freshly written replay into content-addressed storage.
+
+        Returns the replay name (<sha256>.<ext>). When identical bytes are
+        already stored the new copy atomically replaces them: the name is the
+        same either way, and the fresh file (and mtime) survives a concurrent
+        eviction of the old one in another worker (see _evict).
+        """
+        extension = os.path.splitext(temp_path)[1].lower() or '.gif'
+        filename = content_hash(temp_path) + extension
+        destination = shard_path(self.video_folder, filename)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        os.replace(temp_path, destination)
+        self.register(filename)
+        return filename
+
+    def resolve(self, filename):
+        """Map a requested replay name to (canonical name, path), or None if unknown.
+
+        Legacy run_<uuid> names are looked up in replay_alias once migrated;
+        before migration they are still served from the flat folder.
+        """
+        if is_content_name(filename):
+            return filename, shard_path(self.video_folder, filename)
+
+        canonical = self._aliases.get(filename)
+        if canonical is None:
+            canonical = db.session.execute(
+                select(ReplayAlias.filename).where(ReplayAlias.legacy_name == filename)
+            ).scalar()
+            if canonical is not None:
+                if len(self._aliases) >= ALIAS_CACHE_SIZE:
+                    self._aliases.clear()
+                self._aliases[filename] = canonical
+        if canonical is not None:
+            return canonical, shard_path(self.video_folder, canonical)
+        return filename, os.path.join(self.video_folder, filename)
+
+    # -- request-thread API (memory only, no I/O) ------------------------------
+
+    def register(self, filename):
+        """Record a new reference to a replay; it is tracked on the next sweep."""
+        now = datetime.utcnow()
+        with self._lock:
+            first_seen, refs = self._registered.get(filename, (now, 0))
+            self._registered[filename] = (first_seen, refs + 1)
+
+    def touch(self, filename):
+        """Record an access to a replay for LRU ordering."""
+        now = datetime.utcnow()
+        with self._lock:
+            self._accessed[filename] = now
+
+    # -- sweeping ---------------------------------------------------------------
+
+    def sweep(self, max_evictions=None):
+        """Run one bounded sweep tick and return a summary of what it did."""
+        started = time.perf_counter()
+        summary = {'tracked': 0, 'adopted': 0, 'evicted': 0, 'freed_bytes': 0}
+        with self._sweep_lock, self.app.app_context():
+            try:
+                summary['tracked'] = self._flush_recorded()
+                summary['adopted'] = self._reconcile_slice()
+                self._purge_incoming()
+                evicted, freed = self._enforce_quotas(max_evictions or self.batch_size)
+                summary['evicted'], summary['freed_bytes'] = evicted, freed
+            finally:
+                db.session.remove()
+        summary['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        summary['finished_at'] = datetime.utcnow().isoformat()
+        self.last_sweep = summary
+        if summary['adopted'] or summary['evicted']:
+            self.app.logger.info(
+                f"Replay sweep: adopted {summary['adopted']}, evicted {summary['evicted']} "
+                f"({summary['freed_bytes']} bytes) in {summary['duration_ms']}ms"
+            )
+        return summary
+
+    def _stat(self, filename):
+        try:
+            return os.stat(self.path_for(filename)).st_size
+        except OSError:
+            return None
+
+    def _flush_recorded(self):
+        with self._lock:
+            registered, self._registered = self._registered, {}
+            accessed, self._accessed = self._accessed, {}
+        if not registered and not accessed:
+            return 0
+
+        try:
+            new_rows = []
+            if registered:
+                names = list(registered)
+                known = set()
+                for i in range(0, len(names), self.batch_size):
+                    known.update(db.session.execute(
+                        select(ReplayFile.filename).where(ReplayFile.filename.in_(names[i:i + self.batch_size]))
+                    ).scalars())
+                shared = []
+                for filename, (created_at, refs) in registered.items():
+                    if filename in known:
+                        shared.append({'name': filename, 'refs': refs, 'seen_at': created_at})
+                        continue
+                    size = self._stat(filename)
+                    if size is None:
+                        self.app.logger.warning(f"Replay sweep: {filename} was registered but is missing")
+                        continue
+                    new_rows.append({'filename': filename, 'size_bytes': size, 'ref_count': refs,
+                                     'created_at': created_at, 'last_accessed_at': created_at})
+                if new_rows:
+                    db.session.execute(ReplayFile.__table__.insert(), new_rows)
+                if shared:
+                    # Deduplicated episodes: count the extra references and keep them warm
+                    table = ReplayFile.__table__
+                    db.session.execute(
+                        table.update()
+                        .where(table.c.filename == bindparam('name'))
+                        .values(ref_count=table.c.ref_count + bindparam('refs'),
+                                last_accessed_at=bindparam('seen_at')),
+                        shared
+                    )
+
+            if accessed:
+                table = ReplayFile.__table__
+                db.session.execute(
+                    table.update()
+                    .where(table.c.filename == bindparam('name'))
+                    .values(last_accessed_at=bindparam('accessed_at')),
+                    [{'name': name, 'accessed_at': ts} for name, ts in accessed.items()]
+                )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.app.logger.error(f"Replay sweep: could not record {len(registered)} replays "
+                                  f"and {len(accessed)} accesses, retrying next tick: {e}")
+            # Put the records back so the next tick retries them
+            with self._lock:
+                for filename, (ts, refs) in registered.items():
+                    first_seen, pending = self._registered.get(filename, (ts, 0))
+                    self._registered[filename] = (min(first_seen, ts), pending + refs)
+                for filename, ts in accessed.items():
+                    self._accessed.setdefault(filename, ts)
+            raise
+
+        added = sum(row['size_bytes'] for row in new_rows)
+        if self._tracked_bytes is not None:
+            self._tracked_bytes += added
+        return len(new_rows)
+
+    def _iter_replay_files(self, directory=None, depth=0):
+        """Yield replay file entries: legacy flat files plus the two shard levels."""
+        with os.scandir(directory or self.video_folder) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if depth < 2 and len(entry.name) == 2:
+                        yield from self._iter_replay_files(entry.path, depth + 1)
+                elif entry.name.endswith(REPLAY_EXTENSIONS) and (depth == 0 or is_content_name(entry.name)):
+                    yield entry
+
+    def _reconcile_slice(self):
+        """Adopt up to batch_size untracked files from the next slice of VIDEO_FOLDER."""
+        if not os.path.isdir(self.video_folder):
+            return 0
+        if self._scan_iter is None:
+            self._scan_iter = self._iter_replay_files()
+
+        candidates = {}
+        try:
+            for entry in self._scan_iter:
+                candidates[entry.name] = entry
+                if len(candidates) >= self.batch_size:
+                    break
+            else:
+                self._scan_iter = None
+        except OSError:
+            self._scan_iter = None
+            return 0
+
+        if not candidates:
+            return 0
+        known = set(db.session.execute(
+            select(ReplayFile.filename).where(ReplayFile.filename.in_(list(candidates)))
+        ).scalars())
+        rows = []
+        for name, entry in candidates.items():
+            if name in known:
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            modified = datetime.utcfromtimestamp(stat.st_mtime)
+            rows.append({'filename': name, 'size_bytes': stat.st_size,
+                         'created_at': modified, 'last_accessed_at': modified})
+        if rows:
+            try:
+                db.session.execute(ReplayFile.__table__.insert(), rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            if self._tracked_bytes is not None:
+                self._tracked_bytes += sum(row['size_bytes'] for row in rows)
+        return len(rows)
+
+    def _purge_incoming(self, max_age_seconds=3600):
+        """Delete scratch files abandoned by failed episodes."""
+        incoming = os.path.join(self.video_folder, INCOMING_DIR)
+        cutoff = time.time() - max_age_seconds
+        try:
+            with os.scandir(incoming) as entries:
+                for count, entry in enumerate(entries):
+                    if count >= self.batch_size:
+                        break
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+        except OSError:
+            pass
+
+    def tracked_bytes(self, refresh=False):
+        """Total size of tracked replays, recomputed every REPLAY_USAGE_REFRESH seconds."""
+        now = time.monotonic()
+        if refresh or self._tracked_bytes is None or now - self._tracked_refreshed > self.usage_refresh:
+            self._tracked_bytes = int(db.session.execute(
+                select(func.coalesce(func.sum(ReplayFile.size_bytes), 0))
+            ).scalar())
+            self._tracked_refreshed = now
+        return self._tracked_bytes
+
+    def _enforce_quotas(self, budget):
+        evicted = freed = 0
+
+        if self.max_age is not None and budget > 0:
+            # Replays nobody has played or viewed within the age quota
+            cutoff = datetime.utcnow() - self.max_age
+            rows = db.session.execute(
+                select(ReplayFile.filename, ReplayFile.size_bytes)
+                .where(ReplayFile.last_accessed_at < cutoff)
+                .order_by(ReplayFile.last_accessed_at)
+                .limit(budget)
+            ).all()
+            count, size = self._evict(rows)
+            evicted, freed, budget = evicted + count, freed + size, budget - count
+
+        if self.max_bytes > 0 and budget > 0:
+            excess = self.tracked_bytes() - self.max_bytes
+            if excess > 0:
+                recent = datetime.utcnow() - timedelta(seconds=self.grace)
+                rows = db.session.execute(
+                    select(ReplayFile.filename, ReplayFile.size_bytes)
+                    .where(ReplayFile.last_accessed_at < recent)
+                    .order_by(ReplayFile.last_accessed_at)
+                    .limit(budget)
+                ).all()
+                victims, total = [], 0
+                for filename, size in rows:
+                    if total >= excess:
+                        break
+                    victims.append((filename, size))
+                    total += size
+                count, size = self._evict(victims)
+                evicted, freed = evicted + count, freed + size
+
+        return evicted, freed
+
+    def _in_grace(self, filename):
+        """True if a replay was registered or used recently, here or (by its mtime) in another worker."""
+        with self._lock:
+            if filename in self._registered or filename in self._accessed:
+                return True
+        try:
+            modified = os.stat(self.path_for(filename)).st_mtime
+        except OSError:
+            return False
+        return time.time() - modified < self.grace
+
+    def _evict(self, rows):
+        """Forget replays in the database first, then delete their files.
+
+        Replays within the grace window are skipped. store() replaces the
+        file of a re-produced replay, so its mtime is checked again just
+        before removal: a file re-stored by another worker after the rows
+        were deleted is kept, and its registration inserts a fresh row.
+        """
+        rows = [(filename, size) for filename, size in rows if not self._in_grace(filename)]
+        if not rows:
+            return 0, 0
+        filenames = [filename for filename, _ in rows]
+        try:
+            db.session.execute(
+                update(GameResult)
+                .where(GameResult.gif_filename.in_(filenames))
+                .values(gif_filename=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.execute(delete(ReplayAlias).where(ReplayAlias.filename.in_(filenames)))
+            db.session.execute(delete(ReplayFile).where(ReplayFile.filename.in_(filenames)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        freed = 0
+        self._aliases.clear()
+        for filename, size in rows:
+            if self._in_grace(filename):
+                continue
+            try:
+                os.remove(self.path_for(filename))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.app.logger.error(f"Could not remove replay {filename}: {e}")
+                continue
+            freed += size or 0
+        if self._tracked_bytes is not None:
+            self._tracked_bytes -= freed
+        return len(rows), freed
+
+    # -- reporting --------------------------------------------------------------
+
+    def usage(self):
+        """Disk usage report for the admin dashboard."""
+        tracked_files, references = db.session.execute(
+            select(func.count(), func.coalesce(func.sum(ReplayFile.ref_count), 0)).select_from(ReplayFile)
+        ).one()
+        oldest_access = db.session.execute(select(func.min(ReplayFile.last_accessed_at))).scalar()
+        report = {
+            'tracked_files': tracked_files,
+            'references': int(references),
+            'tracked_bytes': self.tracked_bytes(refresh=True),
+            'max_bytes': self.max_bytes or None,
+            'max_age_days': self.max_age.days if self.max_age else None,
+            'oldest_access': oldest_access.isoformat() if oldest_access else None,
+            'pending_registrations': len(self._registered),
+            'last_sweep': self.last_sweep,
+        }
+        try:
+            disk = shutil.disk_usage(self.video_folder)
+            report['disk'] = {'total_bytes': disk.total, 'used_bytes': disk.used, 'free_bytes': disk.free}
+        except OSError:
+            report['disk'] = None
+        return report
+
+
+replay_store = ReplayStore()
+
+
+def init_replay_store(app):
+    """Initialize the replay retention manager with the Flask app."""
+    replay_store.init_app(app)
+    app.logger.info(
+        f"Replay retention: max {replay_store.max_bytes or 'unlimited'} bytes, "
+        f"max age {replay_store.max_age.days if replay_store.max_age else 'unlimited'} days"
+    )
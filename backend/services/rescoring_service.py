@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Rescoring for AI Agent Galaxy.
+
+When the scoring rules change, stored games keep the scores of the old
+rules. A rescoring job applies the current rules (the vectorized
+scoring_service.calculate_scores) to every game written before it started
+and brings the aggregates built from scores back in line.
+
+An admin queues a job (POST /api/admin/rescore) and the shared rescore
+maintenance job works through it, one worker at a time, in two phases of
+keyset chunks. Every chunk commits together with the job's cursor, so a job
+cut short by its time budget, an error or a restart continues from the last
+committed chunk:
+- games: RESCORE_CHUNK_SIZE rows by id are scored in one NumPy pass; only
+  rows whose score changes are updated, and their score differences are
+  added to the hourly analytics rollup in the same transaction. Games
+  written after the job was queued already carry current scores.
+- users: User and UserAgentStats score totals and bests are recomputed from
+  game_result with one set-based UPDATE per RESCORE_USER_CHUNK_SIZE users.
+RESCORE_MAX_ROWS_PER_SECOND throttles the games phase, leaving the database
+to live traffic between chunks. A dry run only counts what would change.
+"""
+import time
+from datetime import datetime
+from itertools import chain
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import bindparam, func, or_, select, update
+
+from database import db
+from database.models import AnalyticsHourly, GameResult, RescoreJob, User, UserAgentStats
+from database.rollups import increment_rollups
+from exceptions import RescoreInProgress
+from services.analytics_service import hour_bucket
+from services.scoring_service import calculate_scores
+
+ACTIVE = ('pending', 'running')
+
+
+def active_job():
+    """The oldest pending or running job, or None."""
+    return db.session.execute(
+        select(RescoreJob).where(RescoreJob.status.in_(ACTIVE)).order_by(RescoreJob.id).limit(1)
+    ).scalar_one_or_none()
+
+
+def start_rescore(requested_by=None, dry_run=False):
+    """Queue a job over every game written so far; returns it."""
+    if active_job() is not None:
+        raise RescoreInProgress('A rescoring job is already pending or running')
+    job = RescoreJob(
+        requested_by=requested_by,
+        dry_run=bool(dry_run),
+        max_game_id=db.session.execute(select(func.max(GameResult.id))).scalar() or 0,
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def recent_jobs(limit=10):
+    """The newest jobs, newest first."""
+    return db.session.execute(
+        select(RescoreJob).order_by(RescoreJob.id.desc()).limit(limit)
+    ).scalars().all()
+
+
+def rescore_games(job, chunk_size, max_steps=120):
+    """Rescore the job's next chunk of games (caller commits); returns games scanned, 0 when done."""
+    rows = db.session.execute(
+        select(GameResult.id, GameResult.prediction, GameResult.actual_steps, GameResult.score,
+               GameResult.agent_type, GameResult.timestamp)
+        .where(GameResult.id > job.last_game_id, GameResult.id <= job.max_game_id)
+        .order_by(GameResult.id)
+        .limit(chunk_size)
+    ).all()
+    if not rows:
+        return 0
+
+    values = np.fromiter(chain.from_iterable(row[:4] for row in rows), dtype=np.int64, count=4 * len(rows))
+    ids, predicted, actual_steps, old = values.reshape(-1, 4).T
+    new = calculate_scores(predicted, actual_steps, actual_steps < max_steps)
+    changed = np.flatnonzero(new != old)
+    deltas = (new[changed] - old[changed]).tolist()
+    if changed.size and not job.dry_run:
+        games = GameResult.__table__
+        db.session.execute(
+            games.update().where(games.c.id == bindparam('gid')).values(score=bindparam('new_score')),
+            [{'gid': game_id, 'new_score': score} for game_id, score in zip(ids[changed].tolist(),
+                                                                            new[changed].tolist())],
+        )
+        _apply_analytics([rows[i] for i in changed.tolist()], deltas)
+
+    job.last_game_id = int(ids[-1])
+    job.games_scanned += len(rows)
+    job.games_changed += int(changed.size)
+    job.score_delta += sum(deltas)
+    return len(rows)
+
+
+def _apply_analytics(rows, deltas):
+    """Add changed games' score differences to their hourly analytics buckets."""
+    buckets = {}
+    for row, delta in zip(rows, deltas):
+        if row.timestamp is None:
+            continue
+        key = (hour_bucket(row.timestamp), row.agent_type)
+        buckets[key] = buckets.get(key, 0) + delta
+    # Expired hours are compacted into the daily rollup, delta rows included
+    increment_rollups(
+        db.session, AnalyticsHourly,
+        [{'bucket_start': bucket, 'agent_type': agent_type, 'games': 0, 'successes': 0,
+          'score_sum': delta, 'new_users': 0}
+         for (bucket, agent_type), delta in buckets.items() if delta],
+        keys=('bucket_start', 'agent_type'),
+        increments=('games', 'successes', 'score_sum', 'new_users'),
+    )
+
+
+def rescore_users(job, chunk_size):
+    """Recompute score totals and bests of the job's next chunk of users; returns users covered, 0 when done."""
+    ids = select(User.id).where(User.id > job.last_user_id).order_by(User.id).limit(chunk_size).subquery()
+    count, last_id = db.session.execute(select(func.count(), func.max(ids.c.id))).one()
+    if not count:
+        return 0
+
+    games = GameResult.__table__
+    users = User.__table__
+    total = select(func.coalesce(func.sum(games.c.score), 0)).where(games.c.user_id == users.c.id).scalar_subquery()
+    best = select(func.coalesce(func.max(games.c.score), 0)).where(games.c.user_id == users.c.id).scalar_subquery()
+    job.users_changed += db.session.execute(
+        users.update()
+        .where(users.c.id > job.last_user_id, users.c.id <= last_id,
+               or_(func.coalesce(users.c.total_score, 0) != total, func.coalesce(users.c.best_score, 0) != best))
+        .values(total_score=total, best_score=best)
+    ).rowcount
+
+    stats = UserAgentStats.__table__
+    of_stats_row = (games.c.user_id == stats.c.user_id, games.c.agent_type == stats.c.agent_type)
+    total = select(func.coalesce(func.sum(games.c.score), 0)).where(*of_stats_row).scalar_subquery()
+    best = select(func.coalesce(func.max(games.c.score), 0)).where(*of_stats_row).scalar_subquery()
+    job.stats_changed += db.session.execute(
+        stats.update()
+        .where(stats.c.user_id > job.last_user_id, stats.c.user_id <= last_id,
+               or_(stats.c.total_score != total, stats.c.best_score != best))
+        .values(total_score=total, best_score=best)
+    ).rowcount
+
+    job.last_user_id = last_id
+    return count
+
+
+def _finish(job):
+    job.status = 'done'
+    job.finished_at = datetime.utcnow()
+    current_app.logger.info(f"Rescore job {job.id} done: {job.to_dict()}")
+
+
+def run_rescore(run):
+    """Maintenance job: advance the active rescoring job while the turn's budget lasts."""
+    job = active_job()
+    if job is None:
+        return {'idle': True}
+    config = current_app.config
+    chunk_size = max(1, int(config.get('RESCORE_CHUNK_SIZE', 10000)))
+    user_chunk_size = max(1, int(config.get('RESCORE_USER_CHUNK_SIZE', 2000)))
+    rate = float(config.get('RESCORE_MAX_ROWS_PER_SECOND', 0))
+    max_steps = config.get('MAX_STEPS', 120)
+    if job.status == 'pending':
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+    games_changed, users_changed = job.games_changed, job.users_changed
+    try:
+        while job.status == 'running' and run.more():
+            started = time.perf_counter()
+            if job.phase == 'games':
+                count = rescore_games(job, chunk_size, max_steps)
+                if not count:
+                    if job.dry_run:
+                        _finish(job)
+                    else:
+                        job.phase = 'users'
+            else:
+                count = rescore_users(job, user_chunk_size)
+                if not count:
+                    _finish(job)
+            elapsed = time.perf_counter() - started
+            job.active_ms += elapsed * 1000
+            db.session.commit()
+            if rate and job.phase == 'games' and count:
+                # Hold the games phase to the configured rate
+                time.sleep(max(0.0, count / rate - elapsed))
+    except Exception as e:
+        # The job stays running and continues from its cursor on the next turn
+        db.session.rollback()
+        db.session.execute(
+            update(RescoreJob).where(RescoreJob.id == job.id).values(error=f'{type(e).__name__}: {e}'[:500])
+        )
+        db.session.commit()
+        raise
+
+    return {'job': job.id, 'status': job.status, 'phase': job.phase, 'last_game_id': job.last_game_id,
+            'changed': (job.games_changed - games_changed) + (job.users_changed - users_changed)}
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Response cache for read-heavy JSON endpoints in AI Agent Galaxy.
+
+@cached_response('games', 'users') keeps a view's serialized 200 response
+in a bounded in-process LRU cache (RESPONSE_CACHE_MAX_ENTRIES entries,
+RESPONSE_CACHE_MAX_BYTES of bodies). The key is the endpoint, its
+arguments and query string, the user for per-user views, and the current
+versions of the data scopes the view reads (database/versions.py). Any
+commit that writes games or users bumps their version, in every worker, so
+an entry is never served after its data changed; RESPONSE_CACHE_TTL bounds
+how long time-dependent figures ("last 7 days") may stay cached.
+
+A hit costs the guard (e.g. the admin check) and one read of the version
+counters instead of the view's queries and jsonify. Responses carry a
+strong ETag of their body and `Cache-Control: private, no-cache`, so
+browsers revalidate with If-None-Match and get a 304 without a body while
+nothing changed. Hit, miss and 304 counts per endpoint are in stats() and
+GET /api/admin/cache.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, request, session
+
+from database import db
+from database.versions import read_versions
+
+
+class CachedResponse:
+    """A serialized response body with its validator."""
+
+    __slots__ = ('body', 'mimetype', 'etag', 'stored_at')
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.stored_at = time.monotonic()
+
+
+class ResponseCache:
+    """Bounded LRU cache of serialized responses, with per-endpoint counters."""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.max_entries = 1024
+        self.max_bytes = 32 * 1024 * 1024
+        self.ttl = 30.0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {}
+        self.evictions = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure the cache from app config."""
+        self.enabled = app.config.get('RESPONSE_CACHE_ENABLED', True)
+        self.max_entries = max(1, int(app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024)))
+        self.max_bytes = max(1, int(app.config.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)))
+        self.ttl = float(app.config.get('RESPONSE_CACHE_TTL', 30))
+        app.extensions['response_cache'] = self
+
+    def get(self, key):
+        """The live entry for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.ttl and time.monotonic() - entry.stored_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, mimetype):
+        """Store a body under key; returns its entry."""
+        entry = CachedResponse(body, mimetype)
+        if len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def _remove(self, key):
+        self._bytes -= len(self._entries.pop(key).body)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def count(self, endpoint, outcome, not_modified=False):
+        """Count a 'hit' or 'miss' of an endpoint, and whether it was answered with a 304."""
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {'hit': 0, 'miss': 0, 'not_modified': 0})
+            counters[outcome] += 1
+            if not_modified:
+                counters['not_modified'] += 1
+
+    def stats(self):
+        """Entries, bytes and per-endpoint hit ratios of this process."""
+        endpoints = {}
+        for endpoint, counters in sorted(self._counters.items()):
+            lookups = counters['hit'] + counters['miss']
+            endpoints[endpoint] = dict(counters, hit_ratio=round(counters['hit'] / lookups, 4) if lookups else None)
+        hits = sum(counters['hit'] for counters in self._counters.values())
+        lookups = hits + sum(counters['miss'] for counters in self._counters.values())
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl,
+            'evictions': self.evictions,
+            'hit_ratio': round(hits / lookups, 4) if lookups else None,
+            'endpoints': endpoints,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def cached_response(*scopes, guard=None, per_user=False):
+    """Serve a GET view's JSON from the response cache while `scopes` are unchanged.
+
+    guard() runs first on every request (hit or miss); a response it returns
+    is sent instead. per_user keys entries by the session's user. Only 200
+    responses are stored.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not response_cache.enabled or request.method != 'GET':
+                return view(*args, **kwargs)
+            if guard is not None:
+                refused = guard()
+                if refused is not None:
+                    return refused
+
+            endpoint = request.endpoint
+            key = (endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))),
+                   session.get('user_id') if per_user else None, read_versions(db.session, scopes))
+            entry = response_cache.get(key)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry = response_cache.put(key, response.get_data(), response.mimetype)
+                outcome = 'miss'
+            else:
+                outcome = 'hit'
+
+            response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Cookie')
+            response = response.make_conditional(request)
+            response_cache.count(endpoint, outcome, not_modified=response.status_code == 304)
+            return response
+        return wrapper
+    return decorator
+
+
+def init_response_cache(app):
+    """Initialize the response cache with the Flask app."""
+    response_cache.init_app(app)
+    app.logger.info(
+        f"Response cache {'enabled' if response_cache.enabled else 'disabled'} "
+        f"(entries={response_cache.max_entries}, bytes={response_cache.max_bytes}, ttl={response_cache.ttl:g}s)"
+    )
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Round result streams for AI Agent Galaxy.
+
+GET /api/rounds/<id>/events is a Server-Sent Events stream: a `status`
+event whenever the round's status changes, then a `result` event with the
+scored round (outcomes and leaderboard) after which the stream ends. Comment
+lines every RESULT_STREAM_HEARTBEAT seconds keep idle connections open
+through proxies; a stream is closed after RESULT_STREAM_MAX_SECONDS and the
+browser's EventSource reconnects.
+
+Streams never query the database themselves. One poller thread per process
+reads the status of every watched round in a single query each
+RESULT_STREAM_POLL_INTERVAL seconds (rounds are closed by whichever worker
+runs the maintenance job), builds each event once and hands it to every
+subscriber. A subscriber is a queue: blocking for the threaded server's
+generator (stream()), an asyncio queue for the ASGI handler (astream()),
+where an idle stream costs a suspended task instead of a thread.
+"""
+import asyncio
+import json
+import queue
+import threading
+import time
+
+from sqlalchemy import select
+
+from database import db
+from database.models import TournamentRound
+from services import tournament_service
+
+HEARTBEAT = b': keep-alive\n\n'
+FINAL_STATUSES = frozenset(('scored',))
+
+
+def format_event(event, data):
+    """One SSE event carrying `data` as JSON."""
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'.encode()
+
+
+class Subscription:
+    """Events of one round for one stream, read with a timeout from a blocking queue."""
+
+    def __init__(self, round_id):
+        self.round_id = round_id
+        self._queue = queue.SimpleQueue()
+
+    def deliver(self, event, final):
+        self._queue.put((event, final))
+
+    def get(self, timeout):
+        """(event bytes, final), or None after `timeout` seconds without one."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription(Subscription):
+    """Subscription read by a task on the event loop that created it."""
+
+    def __init__(self, round_id):
+        self.round_id = round_id
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+
+    def deliver(self, event, final):
+        # Called from the poller thread
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (event, final))
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RoundEventHub:
+    """Watches the rounds that have open streams and fans their events out."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.poll_interval = 1.0
+        self.heartbeat = 15.0
+        self.max_seconds = 3600.0
+        self._lock = threading.Lock()
+        self._subscribers = {}  # round id -> set of subscriptions
+        self._last = {}  # round id -> (status, [(event, final), ...]) as last delivered
+        self._wake = threading.Event()
+        self._thread = None
+        self._counters = {'opened': 0, 'closed': 0, 'polls': 0, 'events': 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read RESULT_STREAM_* settings from app config."""
+        self.app = app
+        self.poll_interval = max(0.05, float(app.config.get('RESULT_STREAM_POLL_INTERVAL', 1.0)))
+        self.heartbeat = max(1.0, float(app.config.get('RESULT_STREAM_HEARTBEAT', 15)))
+        self.max_seconds = max(1.0, float(app.config.get('RESULT_STREAM_MAX_SECONDS', 3600)))
+        app.extensions['round_events'] = self
+
+    # -- subscribers ------------------------------------------------------------
+
+    def subscribe(self, round_id, subscription_class=Subscription):
+        """Start receiving a round's events; the current status arrives first."""
+        subscription = subscription_class(round_id)
+        with self._lock:
+            watchers = self._subscribers.setdefault(round_id, set())
+            watchers.add(subscription)
+            self._counters['opened'] += 1
+            last = self._last.get(round_id)
+            if last is not None:
+                for event, final in last[1]:
+                    subscription.deliver(event, final)
+            self._ensure_thread()
+        if last is None:
+            # A round nobody watched yet: fetch its status now rather than next tick
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Stop a stream's subscription (the round is forgotten with its last stream)."""
+        with self._lock:
+            watchers = self._subscribers.get(subscription.round_id)
+            if watchers is not None:
+                watchers.discard(subscription)
+                if not watchers:
+                    del self._subscribers[subscription.round_id]
+                    self._last.pop(subscription.round_id, None)
+            self._counters['closed'] += 1
+
+    def stream(self, subscription):
+        """SSE body for the threaded server (holds the request's thread while open)."""
+        deadline = time.monotonic() + self.max_seconds
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                received = subscription.get(min(self.heartbeat, remaining))
+                if received is None:
+                    yield HEARTBEAT
+                    continue
+                yield received[0]
+                if received[1]:
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    async def astream(self, subscription):
+        """SSE body for the ASGI server (an idle stream is a suspended task)."""
+        deadline = time.monotonic() + self.max_seconds
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                received = await subscription.get(min(self.heartbeat, remaining))
+                if received is None:
+                    yield HEARTBEAT
+                    continue
+                yield received[0]
+                if received[1]:
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    # -- polling ----------------------------------------------------------------
+
+    def _ensure_thread(self):
+        # Called with the lock held
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='round-events', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                round_ids = list(self._subscribers)
+            if not round_ids:
+                continue
+            try:
+                with self.app.app_context():
+                    self.poll(round_ids)
+            except Exception as e:
+                self.app.logger.error(f"Round event poll failed: {e}")
+
+    def poll(self, round_ids):
+        """Read the watched rounds once and deliver the events of those whose status changed."""
+        self._counters['polls'] += 1
+        max_steps = self.app.config.get('MAX_STEPS', 120)
+        try:
+            for tournament_round in db.session.scalars(
+                    select(TournamentRound).where(TournamentRound.id.in_(round_ids))):
+                last = self._last.get(tournament_round.id)
+                if last is not None and last[0] == tournament_round.status:
+                    continue
+                data = tournament_round.to_dict(max_steps)
+                events = [(format_event('status', {key: data[key] for key in
+                                                   ('id', 'status', 'closes_at', 'scored_at')}), False)]
+                if tournament_round.status in FINAL_STATUSES:
+                    data['leaderboard'] = tournament_service.round_leaderboard(tournament_round.id)
+                    events.append((format_event('result', data), True))
+                self._publish(tournament_round.id, tournament_round.status, events)
+        finally:
+            db.session.remove()
+
+    def _publish(self, round_id, status, events):
+        with self._lock:
+            watchers = self._subscribers.get(round_id)
+            if not watchers:
+                return
+            self._last[round_id] = (status, events)
+            for subscription in watchers:
+                for event, final in events:
+                    subscription.deliver(event, final)
+            self._counters['events'] += len(watchers) * len(events)
+
+    def stats(self):
+        """Open streams, watched rounds and counters of this process."""
+        with self._lock:
+            return dict(self._counters,
+                        open_streams=sum(len(watchers) for watchers in self._subscribers.values()),
+                        watched_rounds=len(self._subscribers))
+
+
+round_events = RoundEventHub()
+
+
+def init_round_events(app):
+    """Initialize the round event hub with the Flask app (the poller starts with the first stream)."""
+    round_events.init_app(app)
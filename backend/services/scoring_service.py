@@ -3,6 +3,7 @@
 Scoring service for AI Agent Galaxy.
 Extracted from original app.py - handles game scoring with risk-reward system.
 """
+import numpy as np
 
 
 def calculate_score(prediction, actual_steps, succeeded):
@@ -55,6 +56,38 @@ def calculate_score(prediction, actual_steps, succeeded):
         return 0
 
 
+def calculate_scores(predictions, actual_steps, succeeded):
+    """
+    Vectorized calculate_score over arrays of games.
+
+    Used when a tournament round closes (every prediction on an agent against
+    its single episode) and when stored games are rescored (one outcome per
+    row, see services/rescoring_service.py).
+
+    Args:
+        predictions: Predicted steps (array-like of ints; 0 or out of range,
+            e.g. a stored 'fail' prediction, scores 0 as in calculate_score)
+        actual_steps: Actual steps taken by AI agent (scalar or per prediction)
+        succeeded: Whether AI agent succeeded (scalar or per prediction)
+
+    Returns:
+        numpy.ndarray: int32 score per prediction, equal to calculate_score's
+    """
+    predicted = np.asarray(predictions, dtype=np.int64)
+    actual = np.asarray(actual_steps, dtype=np.int64)
+    difference = np.abs(predicted - actual)
+    scores = np.select(
+        [difference == 0, difference <= 10, difference <= 20],
+        [100, 50, 25],
+        default=0,
+    ).astype(np.int32)
+    # Agent failed at 120 steps and the player predicted 120: close, not perfect
+    failed_at_limit = ~np.asarray(succeeded, dtype=bool) & (actual == 120) & (predicted == 120)
+    scores = np.where(failed_at_limit, 50, scores)
+    scores = np.where((predicted < 1) | (predicted > 120), 0, scores)
+    return scores.astype(np.int32, copy=False)
+
+
 def get_score_explanation(prediction, actual_steps, succeeded, score):
     """Generate simple explanation for the score calculation."""
     try:
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Static delivery for AI Agent Galaxy: cache validators, compression and proxy offload.
+
+- Replays are content-addressed and never change once written, so they are
+  served with their hash as a strong ETag and `Cache-Control: immutable`.
+  Conditional GETs get a 304 and Range requests a 206 (werkzeug handles both).
+- Frontend HTML/CSS is compressed once per file version (gzip, plus brotli
+  when the optional `brotli` package is installed) and kept in memory; every
+  response carries an ETag so repeat visits revalidate with a 304.
+- STATIC_OFFLOAD = 'x-sendfile' or 'x-accel' hands file bytes to the front
+  proxy (Apache/lighttpd X-Sendfile, nginx X-Accel-Redirect) so the Python
+  worker only sends headers. For nginx, map STATIC_OFFLOAD_PREFIX to
+  STATIC_FOLDER with an `internal` location.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import abort, current_app, request
+from werkzeug.utils import safe_join, send_file as _send_file
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+OFFLOAD_MODES = ('none', 'x-sendfile', 'x-accel')
+COMPRESSIBLE_EXTENSIONS = ('.html', '.css', '.js', '.svg')
+MIN_COMPRESS_BYTES = 1024
+
+
+def _offload_mode():
+    mode = current_app.config.get('STATIC_OFFLOAD', 'none')
+    if mode not in OFFLOAD_MODES:
+        raise ValueError(f"STATIC_OFFLOAD must be one of {', '.join(OFFLOAD_MODES)}, not '{mode}'")
+    return mode
+
+
+def send_cached_file(path, mimetype=None, etag=True, max_age=None, immutable=False, private=False):
+    """Send a file from disk with validators, Range support and optional proxy offload.
+
+    `etag` may be a precomputed strong tag (e.g. a content hash) so no stat
+    based tag is computed. A max_age of 0 means "always revalidate".
+    """
+    mode = _offload_mode()
+    environ = request.environ
+    if mode != 'none' and 'HTTP_RANGE' in environ:
+        # The proxy serves the ranges itself from the full file
+        environ = {key: value for key, value in environ.items() if key != 'HTTP_RANGE'}
+    response = _send_file(
+        path,
+        environ,
+        mimetype=mimetype,
+        conditional=True,
+        etag=etag,
+        max_age=max_age,
+        use_x_sendfile=mode != 'none',
+        response_class=current_app.response_class,
+        _root_path=current_app.root_path,
+    )
+
+    if mode == 'x-accel' and 'X-Sendfile' in response.headers:
+        del response.headers['X-Sendfile']
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(current_app.config['STATIC_FOLDER']))
+        prefix = current_app.config.get('STATIC_OFFLOAD_PREFIX', '/_static').rstrip('/')
+        response.headers['X-Accel-Redirect'] = f"{prefix}/{relative.replace(os.sep, '/')}"
+
+    _apply_cache_control(response, max_age, immutable, private)
+    return response
+
+
+def _apply_cache_control(response, max_age, immutable=False, private=False):
+    if max_age:
+        response.cache_control.max_age = max_age
+        response.cache_control.public = not private
+        response.cache_control.private = private or None
+        if immutable:
+            response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+        response.cache_control.private = private or None
+
+
+class _CompressedFile:
+    """One version of a frontend file with its encoded variants."""
+
+    __slots__ = ('version', 'etag', 'variants')
+
+    def __init__(self, version, data):
+        self.version = version
+        self.etag = hashlib.sha256(data).hexdigest()[:32]
+        self.variants = {'identity': data}
+        if len(data) >= MIN_COMPRESS_BYTES:
+            self.variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(data, quality=11)
+
+
+class FrontendCache:
+    """Serves frontend files from memory, pre-encoded per file version."""
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def _load(self, path):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        entry = self._files.get(path)
+        if entry is None or entry.version != version:
+            with open(path, 'rb') as f:
+                data = f.read()
+            entry = _CompressedFile(version, data)
+            with self._lock:
+                self._files[path] = entry
+        return entry
+
+    def warm(self, directory):
+        """Encode every compressible file under directory ahead of the first request."""
+        count = 0
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                    self._load(os.path.join(root, name))
+                    count += 1
+        return count
+
+    def send(self, directory, filename, max_age=0, private=False):
+        """Send a frontend file, picking the best encoding the client accepts."""
+        path = safe_join(str(directory), filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+            return send_cached_file(path, max_age=max_age, private=private)
+
+        entry = self._load(path)
+        accepted = request.accept_encodings
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in entry.variants and accepted[candidate]:
+                encoding = candidate
+                break
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = current_app.response_class(entry.variants[encoding], mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        if len(entry.variants) > 1:
+            response.vary.add('Accept-Encoding')
+        # Each encoding is a different representation, so it gets its own strong tag
+        response.set_etag(entry.etag if encoding == 'identity' else f'{entry.etag}-{encoding}')
+        _apply_cache_control(response, max_age, private=private)
+        return response.make_conditional(request)
+
+    def stats(self):
+        """Cached files and their encoded sizes."""
+        return {
+            path: {encoding: len(data) for encoding, data in entry.variants.items()}
+            for path, entry in self._files.items()
+        }
+
+
+frontend_cache = FrontendCache()
+
+
+def init_static_delivery(app):
+    """Validate the offload mode.
+
+    Frontend files are encoded on first request; call frontend_cache.warm()
+    to do it up front (wsgi.py does, in the prefork master).
+    """
+    with app.app_context():
+        mode = _offload_mode()
+    app.logger.info(
+        f"Static delivery: offload={mode}, frontend encodings "
+        f"{'gzip+br' if brotli is not None else 'gzip'}"
+    )
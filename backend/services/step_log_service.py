@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Step log queries for AI Agent Galaxy.
+
+Games keep their episode as packed arrays in game_steps (ai/step_log.py).
+game_timeline() serves one game's steps as columns; step_analytics()
+aggregates action frequencies and reward curves over many games by joining
+their blobs into one array per column and reducing them with NumPy
+(bincount over each step's position in its episode), without building a
+Python object per step.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from ai.step_log import ACTION_DTYPE, ACTION_NAMES, REWARD_DTYPE
+from database import db
+from database.models import GameResult, GameSteps
+
+
+def game_timeline(game):
+    """One game's steps as JSON-ready columns, or None if none were stored."""
+    stored = db.session.get(GameSteps, game.id)
+    if stored is None:
+        return None
+    return dict({'game_id': game.id, 'agent_type': game.agent_type, 'actual_steps': game.actual_steps,
+                 'step_count': stored.step_count, 'action_names': list(ACTION_NAMES)},
+                **stored.to_log().timeline())
+
+
+def _aggregate(counts, actions, rewards):
+    """Action frequencies and per-step reward curves of games laid end to end."""
+    starts = np.cumsum(counts) - counts
+    position = np.arange(len(actions)) - np.repeat(starts, counts)  # step index within its game
+    totals = np.cumsum(rewards, dtype=np.float64)
+    # Running reward within each game: subtract what came before the game started
+    running = totals - np.repeat(totals[starts] - rewards[starts], counts)
+
+    games_at_step = np.bincount(position)
+    action_counts = np.bincount(actions, minlength=len(ACTION_NAMES))
+    return {
+        'games': int(len(counts)),
+        'steps': int(len(actions)),
+        'mean_steps': round(float(counts.mean()), 2),
+        'mean_episode_reward': round(float(running[starts + counts - 1].mean()), 4),
+        'action_counts': dict(zip(ACTION_NAMES, action_counts.tolist())),
+        'action_share': dict(zip(ACTION_NAMES, np.round(action_counts / len(actions), 4).tolist())),
+        'reward_curve': {
+            'games': games_at_step.tolist(),
+            'mean_reward': np.round(np.bincount(position, weights=rewards) / games_at_step, 4).tolist(),
+            'mean_cumulative_reward': np.round(np.bincount(position, weights=running) / games_at_step,
+                                               4).tolist(),
+        },
+    }
+
+
+def step_analytics(agent_type=None, days=7, limit=10000):
+    """Aggregates of the newest `limit` stored step logs from the last `days` days, per agent."""
+    query = (select(GameResult.agent_type, GameSteps.step_count, GameSteps.actions, GameSteps.rewards)
+             .join(GameResult, GameResult.id == GameSteps.game_id)
+             .where(GameResult.timestamp >= datetime.utcnow() - timedelta(days=days), GameSteps.step_count > 0)
+             .order_by(GameSteps.game_id.desc())
+             .limit(limit))
+    if agent_type:
+        query = query.where(GameResult.agent_type == agent_type)
+
+    by_agent = {}
+    for agent, count, actions, rewards in db.session.execute(query):
+        columns = by_agent.setdefault(agent, ([], [], []))
+        columns[0].append(count)
+        columns[1].append(actions)
+        columns[2].append(rewards)
+
+    agents = {}
+    for agent, (counts, actions, rewards) in sorted(by_agent.items()):
+        agents[agent] = _aggregate(np.array(counts, dtype=np.int64),
+                                   np.frombuffer(b''.join(actions), dtype=ACTION_DTYPE),
+                                   np.frombuffer(b''.join(rewards), dtype=REWARD_DTYPE).astype(np.float64))
+    return {'days': days, 'games': sum(a['games'] for a in agents.values()), 'agents': agents}
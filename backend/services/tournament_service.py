@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Tournament rounds for AI Agent Galaxy.
+
+A round replaces per-player simulation during events: an admin opens it
+for TOURNAMENT_ROUND_SECONDS (or a given window), players submit one
+prediction per agent, and when it closes one seeded episode per agent is
+simulated once for everybody. All predictions on an agent are then scored
+in one vectorized pass (scoring_service.calculate_scores) and written as
+game_result rows, with the players' totals, rollups and analytics, in a
+single transaction through game_writer.write_many(). Round games count
+towards player totals and the top-player leaderboard like solo games.
+
+Due rounds are closed by the shared close_rounds maintenance job (one
+worker at a time) or by an admin. A closer claims the round with a
+conditional UPDATE; a claim older than TOURNAMENT_CLOSE_TIMEOUT seconds
+(a crashed closer) can be taken over. The outcome is only computed at
+close, so nothing can leak while predictions are open.
+
+Every accepted prediction is scored: a prediction re-reads the round after
+its own write, in the same transaction (FOR SHARE on PostgreSQL; on SQLite
+the write already holds the database's write lock), and the closer renews
+its claim with an UPDATE of the round in the transaction that reads the
+predictions. The two conflict, so a prediction either commits before the
+predictions are read or sees the round closing and is refused.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from database.models import GameResult, RoundPrediction, TournamentRound, User
+from exceptions import RoundClosed
+from services.game_writer import GameRecord, game_writer
+from services.scoring_service import calculate_scores
+
+AGENTS = ('ddqn', 'd3qn')
+
+
+def open_round(created_by=None, duration=None, seed=None):
+    """Open a round accepting predictions for `duration` seconds; returns it."""
+    config = current_app.config
+    duration = float(duration if duration is not None else config['TOURNAMENT_ROUND_SECONDS'])
+    if not 0 < duration <= config['TOURNAMENT_MAX_ROUND_SECONDS']:
+        raise ValueError(f"duration must be between 0 and {config['TOURNAMENT_MAX_ROUND_SECONDS']} seconds")
+    now = datetime.utcnow()
+    tournament_round = TournamentRound(
+        seed=int(seed) if seed is not None else random.SystemRandom().randrange(2 ** 31),
+        created_by=created_by,
+        opens_at=now,
+        closes_at=now + timedelta(seconds=duration),
+    )
+    db.session.add(tournament_round)
+    db.session.commit()
+    return tournament_round
+
+
+def current_round():
+    """The open round closing soonest, or None."""
+    return db.session.execute(
+        select(TournamentRound)
+        .where(TournamentRound.status == 'open', TournamentRound.closes_at > datetime.utcnow())
+        .order_by(TournamentRound.closes_at)
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def _is_open(status, closes_at):
+    return status == 'open' and closes_at > datetime.utcnow()
+
+
+def submit_prediction(tournament_round, user_id, agent_type, prediction):
+    """Record (or replace) a player's prediction for one agent of an open round.
+
+    Raises RoundClosed unless the round is still open when the prediction
+    commits (checked after the write, in the same transaction).
+    """
+    if not _is_open(tournament_round.status, tournament_round.closes_at):
+        raise RoundClosed(f'Round {tournament_round.id} is closed')
+    value = 0 if prediction == 'fail' else int(prediction)
+    entry = db.session.execute(
+        select(RoundPrediction).where(RoundPrediction.round_id == tournament_round.id,
+                                      RoundPrediction.user_id == user_id,
+                                      RoundPrediction.agent_type == agent_type)
+    ).scalar_one_or_none()
+    if entry is not None:
+        entry.prediction = value
+        entry.created_at = datetime.utcnow()
+    else:
+        entry = RoundPrediction(round_id=tournament_round.id, user_id=user_id, agent_type=agent_type,
+                                prediction=value)
+        db.session.add(entry)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # A concurrent request of the same player inserted first: update that row
+        db.session.rollback()
+        return submit_prediction(tournament_round, user_id, agent_type, prediction)
+
+    # The round as of now, not as loaded: a closer's claim may have committed since
+    current = select(TournamentRound.status, TournamentRound.closes_at).where(TournamentRound.id == tournament_round.id)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        current = current.with_for_update(read=True)
+    status, closes_at = db.session.execute(current).one()
+    if not _is_open(status, closes_at):
+        db.session.rollback()
+        raise RoundClosed(f'Round {tournament_round.id} is closed')
+    db.session.commit()
+    return entry
+
+
+def _claim(round_id, force):
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=current_app.config['TOURNAMENT_CLOSE_TIMEOUT'])
+    claimable = [and_(TournamentRound.status == 'closing', TournamentRound.claimed_at < stale)]
+    if force:
+        claimable.append(TournamentRound.status.in_(('open', 'failed')))
+    else:
+        claimable.append(and_(TournamentRound.status == 'open', TournamentRound.closes_at <= now))
+    claimed = db.session.execute(
+        update(TournamentRound)
+        .where(TournamentRound.id == round_id, or_(*claimable))
+        .values(status='closing', claimed_at=now, error=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return now if claimed else None
+
+
+def _renew_claim(round_id, claimed_at):
+    """Re-stamp our claim (uncommitted); None if another closer took the round over meanwhile.
+
+    This write conflicts with every prediction still in flight for the round,
+    so predictions read after it in the same transaction are final.
+    """
+    now = datetime.utcnow()
+    renewed = db.session.execute(
+        update(TournamentRound)
+        .where(TournamentRound.id == round_id, TournamentRound.status == 'closing',
+               TournamentRound.claimed_at == claimed_at)
+        .values(claimed_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return now if renewed else None
+
+
+def simulate(agent_type, seed):
+    """Play the round's episode for agent_type; returns (steps, replay filename)."""
+    from ai import run_episode
+    from services.replay_store import replay_store
+
+    gif_path = replay_store.incoming_path('.gif')
+    result = run_episode(agent_type, gif_path, seed=seed)
+    steps = int(result[1])
+    gif_file = result[2] if len(result) == 4 else None
+    return steps, replay_store.store(gif_file) if gif_file else None
+
+
+def score_round(tournament_round, outcomes, max_steps=120):
+    """GameRecords for every prediction in the round, scored per agent in one pass."""
+    predictions = db.session.execute(
+        select(RoundPrediction.user_id, RoundPrediction.agent_type, RoundPrediction.prediction)
+        .where(RoundPrediction.round_id == tournament_round.id)
+    ).all()
+    timestamp = datetime.utcnow()
+    games = []
+    for agent_type, (steps, gif) in outcomes.items():
+        rows = [(user_id, prediction) for user_id, agent, prediction in predictions if agent == agent_type]
+        if not rows:
+            continue
+        user_ids, predicted = zip(*rows)
+        scores = calculate_scores(np.fromiter(predicted, dtype=np.int64, count=len(predicted)),
+                                  steps, steps < max_steps)
+        games.extend(
+            GameRecord(user_id=user_id, agent_type=agent_type, prediction=prediction, actual_steps=steps,
+                       score=int(score), gif_filename=gif, timestamp=timestamp,
+                       round_id=tournament_round.id)
+            for user_id, prediction, score in zip(user_ids, predicted, scores.tolist())
+        )
+    return games
+
+
+def close_round(round_id, force=False, simulate_episode=None):
+    """Simulate, score and write a round; returns a summary, None if it was not claimable.
+
+    Without force only a round past closes_at is closed. simulate_episode
+    (agent_type, seed) -> (steps, replay filename) defaults to simulate().
+    """
+    claimed_at = _claim(round_id, force)
+    if claimed_at is None:
+        return None
+    simulate_episode = simulate_episode or simulate
+    tournament_round = db.session.get(TournamentRound, round_id)
+    max_steps = current_app.config.get('MAX_STEPS', 120)
+    timings = {}
+    try:
+        started = time.perf_counter()
+        outcomes = {agent_type: simulate_episode(agent_type, tournament_round.seed) for agent_type in AGENTS}
+        timings['simulate_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        started = time.perf_counter()
+        db.session.commit()  # end the read transaction the simulation may have left open
+        if _renew_claim(round_id, claimed_at) is None:
+            db.session.rollback()
+            current_app.logger.warning(f"Tournament round {round_id} was taken over by another closer")
+            return None
+        games = score_round(tournament_round, outcomes, max_steps)
+        timings['score_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        started = time.perf_counter()
+        game_writer.write_many(games)
+        for agent_type, (steps, gif) in outcomes.items():
+            setattr(tournament_round, f'{agent_type}_steps', steps)
+            setattr(tournament_round, f'{agent_type}_gif', gif)
+        tournament_round.predictions = len(games)
+        tournament_round.status = 'scored'
+        tournament_round.scored_at = datetime.utcnow()
+        db.session.commit()
+        timings['write_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    except Exception as e:
+        db.session.rollback()
+        db.session.execute(
+            update(TournamentRound).where(TournamentRound.id == round_id)
+            .values(status='failed', error=f'{type(e).__name__}: {e}'[:500])
+        )
+        db.session.commit()
+        current_app.logger.error(f"Tournament round {round_id} failed to close: {e}")
+        raise
+
+    current_app.logger.info(f"Tournament round {round_id} scored: {len(games)} games {timings}")
+    return dict(tournament_round.to_dict(max_steps), games=len(games), **timings)
+
+
+def round_leaderboard(round_id, limit=10):
+    """Top players of a scored round by their summed score across both agents."""
+    total = func.sum(GameResult.score).label('score')
+    rows = db.session.execute(
+        select(User.id, User.username, total, func.count(GameResult.id))
+        .join(User, User.id == GameResult.user_id)
+        .where(GameResult.round_id == round_id)
+        .group_by(User.id, User.username)
+        .order_by(total.desc(), User.username)
+        .limit(limit)
+    ).all()
+    return [{'user_id': user_id, 'username': username, 'score': int(score), 'games': games}
+            for user_id, username, score, games in rows]
+
+
+def close_due_rounds(run):
+    """Maintenance job: close every round whose window has ended."""
+    closed, games = 0, 0
+    due = db.session.execute(
+        select(TournamentRound.id)
+        .where(or_(and_(TournamentRound.status == 'open', TournamentRound.closes_at <= datetime.utcnow()),
+                   TournamentRound.status == 'closing'))
+        .order_by(TournamentRound.closes_at)
+    ).scalars().all()
+    for round_id in due:
+        if not run.more():
+            break
+        summary = close_round(round_id)
+        if summary is not None:
+            closed += 1
+            games += summary['games']
+    return {'closed': closed, 'games': games, 'changed': closed}
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Shared pytest setup for AI Agent Galaxy.
+
+Run from backend/:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture
+def app(tmp_path):
+    """A fresh app on a scratch SQLite database, with no background maintenance."""
+    from config import Config
+    from app import create_app
+
+    class TestConfig(Config):
+        TESTING = True
+        DATABASE_PATH = tmp_path / 'test.db'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{DATABASE_PATH}'
+        VIDEO_FOLDER = tmp_path / 'videos'
+        PROFILE_FOLDER = tmp_path / 'profiles'
+        LOG_FILE = tmp_path / 'app.log'
+        MAINTENANCE_ENABLED = False
+
+    return create_app(TestConfig)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Local SMTP stand-in for AI Agent Galaxy tests and benchmarks.
+
+A minimal in-process server (no mail leaves the machine) that records what
+it receives and can delay connections and messages, answer 451 to the first
+few messages and 550 to chosen recipients.
+"""
+import socketserver
+import threading
+import time
+
+
+class StandInSMTP(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Tiny SMTP server: accepts AUTH PLAIN, records messages, injects delays and failures."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake=0.0, per_message=0.0):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.handshake = handshake
+        self.per_message = per_message
+        self.fail_first = 0
+        self.reject = set()
+        self.messages = []
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server._lock:
+            server.connections += 1
+        time.sleep(server.handshake)
+        self.reply('220 stand-in ESMTP')
+        recipients, mail_from = [], None
+        for raw in self.rfile:
+            command = raw.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250-stand-in\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME')
+            elif verb == 'AUTH':
+                self.reply('235 2.7.0 Authentication successful')
+            elif verb == 'MAIL':
+                mail_from, recipients = command, []
+                with server._lock:
+                    temporary = server.fail_first > 0
+                    if temporary:
+                        server.fail_first -= 1
+                self.reply('451 4.3.0 Try again later' if temporary else '250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip(' <>')
+                if address in server.reject:
+                    self.reply('550 5.1.1 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for data in self.rfile:
+                    if data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data)
+                time.sleep(server.per_message)
+                with server._lock:
+                    server.messages.append((tuple(recipients), b''.join(lines)))
+                self.reply('250 OK queued')
+            elif verb == 'RSET':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Email outbox tests for AI Agent Galaxy.
+
+Delivery runs against the local SMTP stand-in. The background sender is
+disabled and deliver_due() is called directly, so every batch is
+deterministic.
+"""
+import threading
+
+import pytest
+
+from database import db
+from database.models import OutboxEmail
+from services.email_outbox import EmailOutbox
+from tests.smtp_stand_in import StandInSMTP
+
+
+@pytest.fixture
+def smtp_server():
+    server = StandInSMTP()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _outbox(app, server, **overrides):
+    app.config.update(MAIL_BACKEND='smtp', MAIL_SERVER='127.0.0.1', MAIL_PORT=server.port, MAIL_USE_TLS=False,
+                      MAIL_USERNAME='test', MAIL_PASSWORD='test', MAIL_DEFAULT_SENDER='no-reply@localhost',
+                      MAIL_OUTBOX_ENABLED=False, MAIL_RETRY_BASE=0, MAIL_RETRY_MAX=0, **overrides)
+    return EmailOutbox(app)
+
+
+def _enqueue(app, outbox, recipients):
+    with app.app_context():
+        for recipient in recipients:
+            outbox.enqueue(recipient, 'Neural Navigator - Password Reset', f'reset link for {recipient}')
+
+
+def _drain(*outboxes):
+    """Call deliver_due() on the outboxes in turn until none of them finds a due message."""
+    while sum(outbox.deliver_due() for outbox in outboxes):
+        pass
+
+
+def _delivered(server):
+    return sorted(recipient for recipients, _ in server.messages for recipient in recipients)
+
+
+def test_senders_never_claim_the_same_message(app, smtp_server):
+    first = _outbox(app, smtp_server, MAIL_BATCH_SIZE=4)
+    second = EmailOutbox(app)
+    recipients = [f'player{i}@example.com' for i in range(10)]
+    _enqueue(app, first, recipients)
+
+    with app.app_context():
+        claims = [[message.id for message in outbox._claim()] for outbox in (first, second, first, second)]
+    assert [len(ids) for ids in claims] == [4, 4, 2, 0]
+    claimed = [message_id for ids in claims for message_id in ids]
+    assert len(claimed) == len(set(claimed)) == 10
+
+
+def test_two_senders_deliver_each_message_exactly_once(app, smtp_server):
+    first = _outbox(app, smtp_server, MAIL_BATCH_SIZE=3)
+    second = EmailOutbox(app)
+    recipients = [f'player{i}@example.com' for i in range(10)]
+    _enqueue(app, first, recipients)
+
+    _drain(first, second)
+
+    assert _delivered(smtp_server) == sorted(recipients)
+    assert first.stats['sent'] + second.stats['sent'] == 10
+
+
+def test_temporary_failures_are_retried_and_delivered_exactly_once(app, smtp_server):
+    outbox = _outbox(app, smtp_server, MAIL_BATCH_SIZE=10)
+    smtp_server.fail_first = 5
+    recipients = [f'player{i}@example.com' for i in range(8)]
+    _enqueue(app, outbox, recipients)
+
+    _drain(outbox)
+
+    assert _delivered(smtp_server) == sorted(recipients)
+    assert outbox.stats['retried'] == 5
+    with app.app_context():
+        assert outbox.status()['sent'] == 8
+        attempts = sorted(db.session.execute(db.select(OutboxEmail.attempts)).scalars())
+    assert attempts == [1] * 3 + [2] * 5
+
+
+def test_rejected_recipient_fails_permanently_without_retries(app, smtp_server):
+    outbox = _outbox(app, smtp_server)
+    smtp_server.reject = {'nobody@example.com'}
+    _enqueue(app, outbox, ['player0@example.com', 'nobody@example.com'])
+
+    _drain(outbox)
+
+    assert _delivered(smtp_server) == ['player0@example.com']
+    assert outbox.stats['retried'] == 0
+    with app.app_context():
+        bounced = db.session.execute(
+            db.select(OutboxEmail).where(OutboxEmail.recipient == 'nobody@example.com')
+        ).scalar_one()
+        assert (bounced.status, bounced.attempts) == ('failed', 1)
+        assert '550' in bounced.last_error
+
+
+def test_temporary_failures_give_up_after_max_attempts(app, smtp_server):
+    outbox = _outbox(app, smtp_server, MAIL_MAX_ATTEMPTS=3)
+    smtp_server.fail_first = 100
+    _enqueue(app, outbox, ['player0@example.com'])
+
+    _drain(outbox)
+
+    assert smtp_server.messages == []
+    with app.app_context():
+        message = db.session.execute(db.select(OutboxEmail)).scalar_one()
+        assert (message.status, message.attempts) == ('failed', 3)
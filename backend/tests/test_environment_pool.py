@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Environment pool tests for AI Agent Galaxy.
+
+Environments prefilled in a prefork master must not hand every forked
+worker the same maze sequence.
+"""
+import hashlib
+import os
+
+import pytest
+
+from ai.environment import EnvironmentPool, setup_environment
+from ai.maze_bank import MazeBank
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork()')
+
+
+def _maze_digest(env):
+    base = env.unwrapped
+    return hashlib.sha256(base.grid.encode().tobytes() + bytes(base.agent_pos) + bytes([base.agent_dir])).hexdigest()
+
+
+def _first_maze_in_child(pool):
+    """Fork, play the first (unseeded) reset of a leased environment there, return its maze digest."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_fd)
+            with pool.lease() as env:
+                env.reset()
+                os.write(write_fd, _maze_digest(env).encode())
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as reader:
+        digest = reader.read()
+    _, status = os.waitpid(pid, 0)
+    assert status == 0 and digest
+    return digest
+
+
+def _forked_first_mazes(pool, workers=3):
+    pool.prefill(1)
+    return [_first_maze_in_child(pool) for _ in range(workers)]
+
+
+def test_forked_workers_play_different_first_mazes():
+    # Without the reseed every worker replays the master's next maze
+    digests = _forked_first_mazes(EnvironmentPool())
+    assert len(set(digests)) > 1
+
+
+def test_forked_workers_draw_different_banked_layouts(tmp_path):
+    path = str(tmp_path / 'bank.safetensors')
+    MazeBank.generate(setup_environment(), 500).save(path)
+    pool = EnvironmentPool()
+    pool.use_maze_bank(path)
+    digests = _forked_first_mazes(pool)
+    assert len(set(digests)) > 1
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Logging configuration tests for AI Agent Galaxy.
+
+Only call sites that opt in with extra={'sample': True} are sampled; errors
+and everything else are always written.
+"""
+import logging
+
+from utils.logging_config import SamplingFilter
+
+
+def _record(level, lineno=10, **extra):
+    record = logging.LogRecord('services.game_writer', level, 'game_writer.py', lineno, 'message', None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_records_are_not_sampled_unless_the_call_site_opts_in():
+    sampling = SamplingFilter(burst=3, window=60)
+
+    errors = [sampling.filter(_record(logging.ERROR)) for _ in range(50)]
+    warnings = [sampling.filter(_record(logging.WARNING, lineno=20)) for _ in range(50)]
+
+    assert all(errors) and all(warnings)
+    assert sampling.suppressed == 0
+
+
+def test_opted_in_call_site_is_capped_per_window_and_reports_suppressed():
+    sampling = SamplingFilter(burst=3, window=60)
+    records = [_record(logging.WARNING, sample=True) for _ in range(10)]
+
+    passed = [sampling.filter(record) for record in records]
+
+    assert passed == [True] * 3 + [False] * 7
+    assert sampling.suppressed == 7
+    later = _record(logging.WARNING, sample=True)
+    later.created = records[0].created + 60
+    assert sampling.filter(later)
+    assert later.suppressed == 7
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tournament round tests for AI Agent Galaxy.
+
+A prediction the API accepts must be scored when the round closes; one
+arriving after the closer's claim must be refused.
+"""
+import pytest
+
+from database import db
+from database.models import GameResult, TournamentRound, User
+from exceptions import RoundClosed
+from services import tournament_service
+
+OUTCOMES = {'ddqn': (40, None), 'd3qn': (120, None)}
+
+
+def _players(count):
+    users = [User(username=f'player{i}', email=f'player{i}@example.com', password_hash='x') for i in range(count)]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+
+def test_prediction_during_close_is_refused_and_accepted_ones_are_scored(app):
+    with app.app_context():
+        early, late = _players(2)
+        tournament_round = tournament_service.open_round(duration=60, seed=7)
+        round_id = tournament_round.id
+        tournament_service.submit_prediction(tournament_round, early, 'ddqn', '40')
+        refused = []
+
+        def simulate(agent_type, seed):
+            if agent_type == 'ddqn':
+                # The round object a request loaded before the close started still says open
+                stale = TournamentRound(id=round_id, status='open', closes_at=tournament_round.closes_at)
+                with app.app_context():
+                    try:
+                        tournament_service.submit_prediction(stale, late, 'ddqn', '41')
+                    except RoundClosed:
+                        refused.append(late)
+                    finally:
+                        db.session.remove()
+            return OUTCOMES[agent_type]
+
+        summary = tournament_service.close_round(round_id, force=True, simulate_episode=simulate)
+
+        assert refused == [late]
+        assert summary['games'] == 1
+        scored = db.session.execute(db.select(GameResult.user_id).where(GameResult.round_id == round_id)).scalars()
+        assert list(scored) == [early]
+
+
+def test_closed_round_rejects_predictions(app):
+    with app.app_context():
+        (player,) = _players(1)
+        tournament_round = tournament_service.open_round(duration=60, seed=7)
+        tournament_service.close_round(tournament_round.id, force=True, simulate_episode=lambda a, s: OUTCOMES[a])
+        with pytest.raises(RoundClosed):
+            tournament_service.submit_prediction(db.session.get(TournamentRound, tournament_round.id),
+                                                 player, 'd3qn', 'fail')
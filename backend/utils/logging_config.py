@@ -2,42 +2,298 @@
 """
 Logging configuration for AI Agent Galaxy.
 Sets up application-wide logging with proper formatting.
+
+Logging never does I/O on the calling thread: handlers on the root logger
+are replaced by a QueueHandler that stamps the record with the request
+context (request id, user id, agent type), flattens it and puts it on a
+bounded queue (LOG_QUEUE_SIZE; a full queue drops and counts instead of
+blocking). One QueueListener thread per process formats the records and
+writes them to stdout and, outside debug, to LOG_FILE.
+
+- LOG_FORMAT=json writes one JSON object per line, 'text' the classic format
+- LOG_FILE rotates at LOG_FILE_MAX_BYTES keeping LOG_FILE_BACKUPS files;
+  workers sharing the file take a lock to rotate it once and follow it
+- call sites that opt in with extra={'sample': True} (per-frame render
+  errors) may log LOG_SAMPLE_BURST records per LOG_SAMPLE_WINDOW seconds;
+  the rest are dropped and the next record let through carries a
+  'suppressed' count. Everything else is always logged
 """
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+import uuid
+from datetime import datetime, timezone
 from pathlib import Path
 
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process rotation lock
+    fcntl = None
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# LogRecord attributes that are not caller-supplied extras
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, context and extras."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key != 'sample' and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copy the request id, user id and agent type onto records logged during a request."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = getattr(g, 'request_id', None)
+            record.user_id = getattr(g, 'user_id', None)
+            record.agent_type = getattr(g, 'agent_type', None)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Let at most `burst` records per opted-in call site through every `window` seconds."""
+
+    def __init__(self, burst, window):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.suppressed = 0
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0 or getattr(record, 'sample', False) is not True:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or record.created - site[0] >= self.window:
+                # [window start, records seen, records dropped]
+                if site is not None and site[2]:
+                    record.suppressed = site[2]
+                site = self._sites[key] = [record.created, 0, 0]
+            site[1] += 1
+            if site[1] > self.burst:
+                site[2] += 1
+                self.suppressed += 1
+                return False
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Non-blocking QueueHandler that follows the process across fork()."""
+
+    def __init__(self, pipeline):
+        super().__init__(None)
+        self.pipeline = pipeline
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render message and traceback here: the listener has no access to the
+        # arguments' live state, and exc_info does not need to cross threads
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = self.pipeline.text_formatter.formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record):
+        if self.pipeline.pid != os.getpid():
+            self.pipeline.after_fork()
+        try:
+            self.pipeline.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SharedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that several worker processes can share.
+
+    Rotation takes an flock on <file>.lock and re-checks the size, so only
+    one process rotates; the others notice the file was replaced and reopen.
+    """
+
+    def _replaced(self):
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except OSError:
+            return True
+
+    def shouldRollover(self, record):
+        if self.stream is not None and self._replaced():
+            self.stream.close()
+            self.stream = self._open()
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        if fcntl is None:
+            return super().doRollover()
+        with open(f'{self.baseFilename}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self._replaced() or os.path.getsize(self.baseFilename) < self.maxBytes:
+                    # Another worker rotated it while we waited
+                    if self.stream is not None:
+                        self.stream.close()
+                    self.stream = self._open()
+                    return
+                super().doRollover()
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: the queue may be full when we stop, and the listener is draining it
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """The queue, its listener thread and the output handlers of one process."""
+
+    def __init__(self, handlers, max_queue, text_formatter):
+        self.handlers = handlers
+        self.max_queue = max_queue
+        self.text_formatter = text_formatter
+        self._lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        self.pid = os.getpid()
+        self.queue = queue.Queue(self.max_queue)
+        self.listener = _QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        self.running = True
+
+    def after_fork(self):
+        """The listener thread does not survive fork(): start a fresh queue and listener."""
+        with self._lock:
+            if self.pid != os.getpid():
+                self._start()
+
+    def stop(self):
+        """Flush queued records and stop the listener (this process only)."""
+        if self.pid == os.getpid() and self.running:
+            self.running = False
+            self.listener.stop()
+
+
+_pipeline = None
+
+
+def _install(handler):
+    """Replace the root logger's handlers (and any previous pipeline) with handler."""
+    global _pipeline
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    if _pipeline is not None:
+        _pipeline.stop()
+    root.addHandler(handler)
+    _pipeline = handler.pipeline
+
+
+def log_stats():
+    """Queue depth and dropped/suppressed record counts of this process."""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, _QueueHandler):
+            sampling = next((f for f in handler.filters if isinstance(f, SamplingFilter)), None)
+            return {
+                'queued': handler.pipeline.queue.qsize(),
+                'dropped': handler.dropped,
+                'suppressed': sampling.suppressed if sampling else 0,
+            }
+    return None
+
 
 def setup_logging(app):
     """Setup logging configuration for the application."""
-    
+
     # Get log level from config
     log_level = getattr(logging, app.config.get('LOG_LEVEL', 'INFO').upper())
-    
+
     # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
+    text_formatter = logging.Formatter(TEXT_FORMAT)
+    if app.config.get('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = text_formatter
+
     # Setup console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    
+    handlers = [console_handler]
+
     # Setup file handler (optional)
     if not app.debug:
-        log_file = Path(app.config['BACKEND_DIR']) / 'app.log'
-        file_handler = logging.FileHandler(log_file)
+        log_file = Path(app.config.get('LOG_FILE') or Path(app.config['BACKEND_DIR']) / 'app.log')
+        file_handler = SharedRotatingFileHandler(
+            log_file,
+            maxBytes=app.config.get('LOG_FILE_MAX_BYTES', 10 * 1024 * 1024),
+            backupCount=app.config.get('LOG_FILE_BACKUPS', 5),
+            delay=True,
+        )
         file_handler.setLevel(logging.WARNING)
         file_handler.setFormatter(formatter)
-        app.logger.addHandler(file_handler)
-    
-    # Configure app logger
+        handlers.append(file_handler)
+
+    # Request threads only enqueue; the listener thread does the writing
+    pipeline = LogPipeline(handlers, app.config.get('LOG_QUEUE_SIZE', 10000), text_formatter)
+    queue_handler = _QueueHandler(pipeline)
+    queue_handler.addFilter(SamplingFilter(app.config.get('LOG_SAMPLE_BURST', 20),
+                                           app.config.get('LOG_SAMPLE_WINDOW', 60)))
+    queue_handler.addFilter(RequestContextFilter())
+    _install(queue_handler)
+    atexit.register(pipeline.stop)
+
+    # Configure app logger: records propagate to the root queue handler
+    # (Flask's own stderr handler would write synchronously, and twice)
+    app.logger.removeHandler(default_handler)
     app.logger.setLevel(log_level)
-    app.logger.addHandler(console_handler)
-    
+    logging.getLogger().setLevel(log_level)
+
     # Configure other loggers
     logging.getLogger('werkzeug').setLevel(logging.WARNING)
     logging.getLogger('urllib3').setLevel(logging.WARNING)
-    
-    app.logger.info("Logging configuration completed")
\ No newline at end of file
+
+    @app.before_request
+    def assign_request_id():
+        # Honour an id from the proxy so log lines can be joined across services
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16]
+
+    @app.after_request
+    def expose_request_id(response):
+        if getattr(g, 'request_id', None):
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    app.logger.info("Logging configuration completed")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Sampling profiler for AI Agent Galaxy.
+
+A Profile collects stack samples of the thread that started it plus any
+thread attached to it while that thread works on its behalf (the password
+hashing pool, the game writer's flush). One sampler thread, running only
+while at least one profile is active, reads sys._current_frames() every
+interval and counts each distinct stack, so profiled code runs unmodified
+and nothing at all happens while no profile is active.
+
+Results are collapsed stacks ("thread;outer;...;inner count" per line),
+which speedscope, flamegraph.pl and most flame graph viewers import
+directly; to_speedscope() converts them to speedscope's own JSON.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+def current_profile():
+    """The profile the calling thread is recording for, or None."""
+    return getattr(_local, 'profile', None)
+
+
+@contextmanager
+def attached(profiles):
+    """Sample the calling thread into each of `profiles` (None entries ignored) meanwhile.
+
+    The first profile also becomes the thread's current_profile(), so work
+    this thread hands on (propagate(), PendingGame) stays attributed.
+    """
+    profiles = [p for p in profiles if p is not None]
+    if not profiles:
+        yield
+        return
+    tid = threading.get_ident()
+    for profile in profiles:
+        profile._attach(tid)
+    previous = current_profile()
+    if previous is None:
+        _local.profile = profiles[0]
+    try:
+        yield
+    finally:
+        _local.profile = previous
+        for profile in profiles:
+            profile._detach(tid)
+
+
+def propagate(fn, profile=None):
+    """Wrap fn so a pool thread running it is sampled into the submitter's profile.
+
+    `profile` defaults to the calling thread's; the ASGI event loop, whose
+    thread serves many requests, passes the request's own.
+    """
+    profile = profile or current_profile()
+    if profile is None:
+        return fn
+
+    def run(*args, **kwargs):
+        with attached([profile]):
+            return fn(*args, **kwargs)
+    return run
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class Profile:
+    """Stack samples of one unit of work (a request) across the threads it uses."""
+
+    def __init__(self, sampler, label=''):
+        self.sampler = sampler
+        self.label = label
+        self.counts = Counter()
+        self.samples = 0
+        self.started = None
+        self.duration = 0.0
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def _attach(self, tid):
+        with self._lock:
+            self._threads[tid] = self._threads.get(tid, 0) + 1
+
+    def _detach(self, tid):
+        with self._lock:
+            remaining = self._threads.get(tid, 0) - 1
+            if remaining > 0:
+                self._threads[tid] = remaining
+            else:
+                self._threads.pop(tid, None)
+
+    def start(self):
+        """Start sampling the calling thread."""
+        self.started = time.perf_counter()
+        _local.profile = self
+        self._attach(threading.get_ident())
+        self.sampler.add(self)
+        return self
+
+    def stop(self):
+        """Stop sampling; must be called on the thread that started the profile."""
+        self.sampler.remove(self)
+        self._detach(threading.get_ident())
+        if getattr(_local, 'profile', None) is self:
+            _local.profile = None
+        self.duration = time.perf_counter() - self.started
+
+    def record(self, frames, names):
+        with self._lock:
+            threads = list(self._threads)
+        for tid in threads:
+            frame = frames.get(tid)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(tid, f'thread-{tid}'))
+            stack.reverse()
+            self.counts[';'.join(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        """The samples in collapsed-stack format, heaviest stacks first."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+class Sampler:
+    """Samples the threads of all active profiles from one background thread."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+        self._pid = os.getpid()
+
+    def add(self, profile):
+        with self._lock:
+            # Threads do not survive fork(); a pre-forked worker starts its own
+            if self._pid != os.getpid():
+                self._pid, self._thread = os.getpid(), None
+            self._profiles.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+                self._thread.start()
+            self._wake.notify()
+
+    def remove(self, profile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    @property
+    def active(self):
+        return len(self._profiles)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                while not self._profiles:
+                    self._wake.wait()
+                profiles = list(self._profiles)
+            frames = sys._current_frames()
+            frames.pop(own, None)
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for profile in profiles:
+                profile.record(frames, names)
+            del frames
+            time.sleep(self.interval)
+
+
+def parse_collapsed(text):
+    """(frames list, [(stack as frame indexes, count)]) from collapsed-stack text."""
+    index, frames, samples = {}, [], []
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(' ')
+        if not stack:
+            continue
+        indexes = []
+        for name in stack.split(';'):
+            if name not in index:
+                index[name] = len(frames)
+                frames.append(name)
+            indexes.append(index[name])
+        samples.append((indexes, int(count)))
+    return frames, samples
+
+
+def to_speedscope(text, name, interval):
+    """Speedscope file format (https://www.speedscope.app/file-format-schema.json) for collapsed stacks."""
+    frames, samples = parse_collapsed(text)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'ai-agent-galaxy',
+        'shared': {'frames': [{'name': frame} for frame in frames]},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(count for _, count in samples) * interval * 1000,
+            'samples': [stack for stack, _ in samples],
+            'weights': [count * interval * 1000 for _, count in samples],
+        }],
+    }
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for AI Agent Galaxy production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (see gunicorn.conf.py) this module is imported once in the
+master: both policy networks and WEB_THREADS environments are built here,
+before the workers fork, so their pages are shared copy-on-write instead of
+every worker importing torch and loading the weights again.
+"""
+import gc
+
+import ai
+from app import create_app
+from services.static_delivery import frontend_cache
+
+
+def preload(app):
+    """Load models, environment templates and encoded frontend files ahead of fork."""
+    with app.app_context():
+        loaded = ai.warm_up(environments=app.config['WEB_THREADS'])
+    encoded = frontend_cache.warm(app.config['FRONTEND_FOLDER'])
+    app.logger.info(
+        f"Preloaded models {loaded or 'none'}, {app.config['WEB_THREADS']} environments "
+        f"and {encoded} encoded frontend files for workers"
+    )
+    # Move everything allocated so far out of the collector's generations so a
+    # collection in a worker does not write to (and un-share) these pages
+    gc.collect()
+    gc.freeze()
+
+
+app = create_app()
+preload(app)